@@ -3,6 +3,11 @@ ASGI config for baneloforecasting project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The dashboard, inventory, sales and recipes views are async: served here
+(e.g. ``uvicorn baneloforecasting.asgi:application``) they wait on the
+Node.js API without holding a worker thread. DJANGO_ASGI tells the settings
+which server they run under (see SERVED_BY_ASGI).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
 application = get_asgi_application()
\ No newline at end of file
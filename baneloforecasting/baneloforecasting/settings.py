@@ -51,11 +51,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.metrics.RequestMetricsMiddleware',  # First: times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'dashboard.db_router.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,7 +66,8 @@ ROOT_URLCONF = 'baneloforecasting.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to dashboard.metrics
+        'BACKEND': 'dashboard.metrics.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'dashboard.context_processors.api_status',
             ],
         },
     },
@@ -80,18 +84,89 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'baneloforecasting.wsgi.application'
 
+# Set by asgi.py: True when served by an ASGI server (uvicorn), where the
+# async views and the live KPI stream wait without holding a thread.
+SERVED_BY_ASGI = os.getenv('DJANGO_ASGI', 'False').lower() in ('1', 'true', 'yes')
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 #
-# Django uses SQLite for its own tables (auth, sessions, etc.). All business
-# data (products, sales, recipes, inventory) is fetched via the Node.js API.
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Django uses SQLite for its own tables (auth, sessions, etc.) by default.
+# All business data (products, sales, recipes, inventory) is fetched via the
+# Node.js API. Set DB_ENGINE=postgresql to run on the shared PostgreSQL
+# database instead (same DB_* variables as nodejs-api/.env).
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite').lower()
+
+# Persistent connections: reuse a connection for up to DB_CONN_MAX_AGE seconds
+# instead of opening one per request (0 = close after every request).
+# Health checks make sure a reused connection is still alive.
+# Off by default under ASGI: each async view's ORM calls run in executor
+# threads that the request does not clean up, so persistent connections
+# pile up there. Use DB_POOL instead.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0' if SERVED_BY_ASGI else '600'))
+
+# Optional connection pool (PostgreSQL with psycopg 3 + psycopg_pool).
+# A pool replaces persistent connections, so CONN_MAX_AGE is 0 when enabled.
+DB_POOL = os.getenv('DB_POOL', 'False').lower() in ('1', 'true', 'yes')
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'banelo_db'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
     }
-}
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # SQLITE_PATH lets the benchmarks use a throwaway database
+            'NAME': os.getenv('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+# Read replica for reporting reads (exports, audit trail, forecasting).
+# Only code wrapped in dashboard.db_router.reporting_reads() / @use_replica
+# reads from it, and only while its lag is under DB_REPLICA_MAX_LAG seconds.
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST', '')
+if DB_REPLICA_HOST and 'postgresql' in DATABASES['default']['ENGINE']:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'options': '-c default_transaction_read_only=on',
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['dashboard.db_router.ReplicaRouter']
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '10'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+# After a user's own change, their reads stay on the primary this many seconds
+DB_READ_YOUR_WRITES_WINDOW = int(os.getenv('DB_READ_YOUR_WRITES_WINDOW', '5'))
 
 # ========================================
 # NODE.JS API CONFIGURATION
@@ -104,6 +179,149 @@ DATABASES = {
 # For network: http://192.168.x.x:3000 (Mobile POS laptop IP)
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://192.168.254.176:3000')
 API_TIMEOUT = int(os.getenv('API_TIMEOUT', '30'))
+# Share of Node.js API calls written to the 'dashboard.api_service.trace' log
+# (0 = off). Failed calls are always traced once this is above 0.
+API_TRACE_SAMPLE_RATE = float(os.getenv('API_TRACE_SAMPLE_RATE', '0'))
+# Seconds a products / sales / recipes list response (and its normalized
+# records) is reused across requests; writes made through the site clear it.
+API_CACHE_SECONDS = float(os.getenv('API_CACHE_SECONDS', '5'))
+# Ask the API for compressed (gzip / brotli) and column-oriented list
+# responses; an API that does not support them answers with plain JSON.
+API_COMPACT_TRANSPORT = os.getenv('API_COMPACT_TRANSPORT', 'True').lower() in ('1', 'true', 'yes')
+# Connection pool of the async client used by the async views under ASGI
+# (dashboard/async_api_service.py); one pool per event loop.
+API_ASYNC_MAX_CONNECTIONS = int(os.getenv('API_ASYNC_MAX_CONNECTIONS', '100'))
+API_ASYNC_MAX_KEEPALIVE = int(os.getenv('API_ASYNC_MAX_KEEPALIVE', '20'))
+# Circuit breaker per endpoint: opens when, over the last WINDOW seconds, at
+# least MIN_CALLS calls were made and ERROR_RATE of them failed (timeouts,
+# connection errors, 5xx); calls then fail fast for OPEN_SECONDS before a
+# single probe is let through.
+API_BREAKER_ERROR_RATE = float(os.getenv('API_BREAKER_ERROR_RATE', '0.5'))
+API_BREAKER_MIN_CALLS = int(os.getenv('API_BREAKER_MIN_CALLS', '5'))
+API_BREAKER_WINDOW_SECONDS = float(os.getenv('API_BREAKER_WINDOW_SECONDS', '30'))
+API_BREAKER_OPEN_SECONDS = float(os.getenv('API_BREAKER_OPEN_SECONDS', '15'))
+# While the API is unavailable, list pages show the last good response (up
+# to this old) with a "stale data" banner and refresh it in the background.
+API_STALE_MAX_SECONDS = float(os.getenv('API_STALE_MAX_SECONDS', '3600'))
+API_REVALIDATE_ATTEMPTS = int(os.getenv('API_REVALIDATE_ATTEMPTS', '20'))
+
+# ========================================
+# DATA SOURCES
+# ========================================
+# Where the website reads each kind of business data (dashboard/data_sources.py):
+# 'api' = through the Node.js API above, 'orm' = straight from the database
+# configured in DATABASES (only when this server can reach the POS PostgreSQL,
+# e.g. when it runs on the same machine). DATA_SOURCE sets the default, and
+# DATA_SOURCE_PRODUCTS / _SALES / _RECIPES / _WASTE override one family.
+# Writes always go through the Node.js API.
+DATA_SOURCE = os.getenv('DATA_SOURCE', 'api')
+DATA_SOURCES = {
+    family: os.getenv(f'DATA_SOURCE_{family.upper()}', DATA_SOURCE)
+    for family in ('products', 'sales', 'recipes', 'waste')
+}
+
+# ========================================
+# FIRESTORE SYNC
+# ========================================
+# Field the incremental Firestore -> local sync orders each collection by
+# (dashboard/firestore_sync.py). It must hold a Firestore timestamp; a
+# collection where some documents lack it is synced in full instead.
+# Override per collection, e.g. FIRESTORE_UPDATE_FIELD_SALES=createdAt.
+FIRESTORE_UPDATE_FIELDS = {
+    collection: os.getenv(f'FIRESTORE_UPDATE_FIELD_{collection.upper()}', 'updatedAt')
+    for collection in ('products', 'sales', 'recipes', 'recipe_ingredients')
+}
+
+# ========================================
+# LIVE DASHBOARD KPIS
+# ========================================
+# One poller per process reads new sales past a high-water mark and pushes
+# KPI deltas to every open dashboard over Server-Sent Events
+# (see dashboard/live_kpis.py).
+# Each open stream holds a worker thread under WSGI, so the stream is only
+# on by default under ASGI. Under WSGI a stream ends after
+# LIVE_KPI_MAX_STREAM_SECONDS and the browser reconnects after
+# LIVE_KPI_RETRY_SECONDS (0 = no limit).
+LIVE_KPI_ENABLED = os.getenv('LIVE_KPI_ENABLED', str(SERVED_BY_ASGI)).lower() in ('1', 'true', 'yes')
+LIVE_KPI_MAX_STREAM_SECONDS = float(os.getenv('LIVE_KPI_MAX_STREAM_SECONDS', '300'))
+LIVE_KPI_RETRY_SECONDS = float(os.getenv('LIVE_KPI_RETRY_SECONDS', '10'))
+LIVE_KPI_POLL_INTERVAL = float(os.getenv('LIVE_KPI_POLL_INTERVAL', '2.0'))
+LIVE_KPI_HEARTBEAT_SECONDS = float(os.getenv('LIVE_KPI_HEARTBEAT_SECONDS', '15'))
+LIVE_KPI_BATCH_SIZE = int(os.getenv('LIVE_KPI_BATCH_SIZE', '500'))
+
+# ========================================
+# AUDIT TRAIL WRITER
+# ========================================
+# Audit entries are queued and written in batches by a background thread
+# (see dashboard/audit.py). Set AUDIT_ASYNC=False to write synchronously.
+AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', 'True').lower() in ('1', 'true', 'yes')
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '2.0'))
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+# Entries are spilled here when the database is unavailable
+AUDIT_SPOOL_DIR = os.getenv('AUDIT_SPOOL_DIR', os.path.join(BASE_DIR, 'audit_spool'))
+# Retention: monthly partitions (or rows) older than this are archived
+# to gzip CSV files by `python manage.py archive_audit_trail`
+AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '12'))
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'audit_archive'))
+# Full-text search counts matches up to this many (shown as "1000+" beyond)
+AUDIT_SEARCH_COUNT_LIMIT = int(os.getenv('AUDIT_SEARCH_COUNT_LIMIT', '1000'))
+
+# ========================================
+# LOGGING
+# ========================================
+# Module loggers (logging.getLogger(__name__)) replace print() on the request
+# path. Per-row details are logged at DEBUG and cost nothing at the default
+# INFO level. LOG_FORMAT=json emits one JSON object per line.
+# Console output goes through a queue and is written by a background thread.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'console').lower()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'console': {
+            'format': '{asctime} {levelname:<7} {name}: {message}',
+            'style': '{',
+        },
+        'json': {
+            '()': 'dashboard.logging_utils.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'dashboard.logging_utils.QueueConsoleHandler',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'console',
+        },
+    },
+    'loggers': {
+        'dashboard': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'accounts': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+}
+
+# ========================================
+# PERFORMANCE METRICS
+# ========================================
+# Per-request timings are exported in Prometheus format at /dashboard/api/metrics/.
+# Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>"; without
+# a token the endpoint needs a logged-in user.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Window for the p50/p95/p99 quantiles
+METRICS_WINDOW_SECONDS = int(os.getenv('METRICS_WINDOW_SECONDS', '300'))
 
 
 # Password validation
@@ -0,0 +1,10 @@
+"""
+Benchmark suite for the Banelo dashboard
+
+- synthetic_data: bulk generator for a parameterized catalogue, recipes and
+  N years of seasonal sales
+- scenarios: timed runs of the heavy views, CSV exports and ML integration
+- run: command line entry point (python -m benchmarks.run --help)
+
+See benchmarks/README.md.
+"""
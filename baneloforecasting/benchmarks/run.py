@@ -0,0 +1,209 @@
+"""
+Benchmark runner
+================
+
+Generates synthetic data at one or more scales, times the scenarios and
+writes the results as JSON. With a baseline file the medians are compared
+and regressions are reported (exit code 1 with --fail-on-regression).
+
+The generator writes to the mobile tables, so by default it refuses to run
+against anything but a dedicated SQLite file (SQLITE_PATH):
+
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py migrate
+    SQLITE_PATH=/tmp/bench.sqlite3 python -m benchmarks.run --rebuild-mobile-tables
+    SQLITE_PATH=/tmp/bench.sqlite3 python -m benchmarks.run --scales small medium \\
+        --baseline benchmarks/baseline.json --fail-on-regression
+
+Usage:
+    python -m benchmarks.run --help
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Setup Django environment
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
+# Per-request INFO logs would drown the report (and add console I/O to the timings)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+
+from benchmarks import scenarios, synthetic_data
+
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / 'baseline.json'
+RESULTS_DIR = BENCHMARK_DIR / 'results'
+
+# Differences below this are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+
+# ========================================
+# SAFETY
+# ========================================
+
+def is_benchmark_database():
+    """True for a SQLite file other than the development db.sqlite3"""
+    if connection.vendor != 'sqlite':
+        return False
+    name = Path(str(settings.DATABASES['default']['NAME'])).resolve()
+    return name != (Path(settings.BASE_DIR) / 'db.sqlite3').resolve()
+
+
+# ========================================
+# COMPARISON
+# ========================================
+
+def compare(results, baseline, threshold):
+    """
+    Compare medians with a baseline run
+
+    Returns:
+        list: One dict per scale / scenario present in both runs, with the
+              ratio and whether it counts as a regression
+    """
+    rows = []
+    for scale, scale_results in results['scales'].items():
+        baseline_scale = baseline.get('scales', {}).get(scale, {}).get('scenarios', {})
+        for name, current in scale_results['scenarios'].items():
+            previous = baseline_scale.get(name)
+            if not previous or 'median' not in previous or 'median' not in current:
+                continue
+            ratio = current['median'] / previous['median'] if previous['median'] else float('inf')
+            slower = current['median'] - previous['median']
+            rows.append({
+                'scale': scale,
+                'scenario': name,
+                'baseline': previous['median'],
+                'current': current['median'],
+                'ratio': ratio,
+                'queries': (previous.get('queries'), current.get('queries')),
+                'regression': ratio > 1 + threshold and slower > MIN_REGRESSION_SECONDS,
+            })
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n📊 Comparison with baseline (regression: > {threshold:.0%} slower)")
+    print(f"{'Scale':<8} {'Scenario':<28} {'Baseline':>10} {'Current':>10} {'Ratio':>7} {'Queries':>12}")
+    for row in rows:
+        queries = '{} -> {}'.format(*row['queries'])
+        marker = '  ❌ REGRESSION' if row['regression'] else ''
+        print(
+            f"{row['scale']:<8} {row['scenario']:<28} {row['baseline'] * 1000:>8.1f}ms "
+            f"{row['current'] * 1000:>8.1f}ms {row['ratio']:>6.2f}x {queries:>12}{marker}"
+        )
+
+
+# ========================================
+# MAIN
+# ========================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run the dashboard benchmarks')
+    parser.add_argument('--scales', nargs='+', default=['small'], choices=list(synthetic_data.SCALES))
+    parser.add_argument('--scenarios', nargs='+', choices=list(scenarios.SCENARIOS),
+                        help='Scenarios to run (default: all)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline results to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Also write the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before a regression (0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--keep-data', action='store_true', help='Leave the synthetic data in the database')
+    parser.add_argument('--rebuild-mobile-tables', action='store_true',
+                        help='Recreate products / sales / recipes / recipe_ingredients from the models (SQLite only)')
+    parser.add_argument('--allow-any-database', action='store_true',
+                        help='Run even if the database is not a dedicated SQLite benchmark file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not is_benchmark_database() and not args.allow_any_database:
+        print("❌ Refusing to write synthetic data to this database.")
+        print("   Set SQLITE_PATH to a throwaway file (and run migrate), or pass --allow-any-database.")
+        return 2
+
+    created = synthetic_data.ensure_mobile_tables(rebuild=args.rebuild_mobile_tables)
+    if created:
+        print(f"🔧 Created tables: {', '.join(created)}")
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'api_base_url': getattr(settings, 'API_BASE_URL', None),
+            'repeats': args.repeats,
+            'seed': args.seed,
+        },
+        'scales': {},
+    }
+
+    try:
+        for scale in args.scales:
+            print(f"\n🧪 Scale: {scale}")
+            rows = synthetic_data.generate_scale(scale, seed=args.seed)
+            print(f"   Generated: {rows}")
+
+            scale_results = scenarios.run_scenarios(args.scenarios, args.repeats, args.warmup)
+            for name, result in scale_results.items():
+                if 'skipped' in result:
+                    print(f"   ⏭  {name:<28} skipped ({result['skipped']})")
+                else:
+                    decode = (
+                        f"  decode {result['decode_median'] * 1000:6.1f}ms  {result['bytes']:>9,} bytes"
+                        if 'decode_median' in result else ''
+                    )
+                    print(
+                        f"   ⏱  {name:<28} median {result['median'] * 1000:8.1f}ms  "
+                        f"p95 {result['p95'] * 1000:8.1f}ms  {result['queries']:>5} queries  "
+                        f"HTTP {result['status']}{decode}"
+                    )
+            results['scales'][scale] = {'data': rows, 'scenarios': scale_results}
+    finally:
+        if not args.keep_data:
+            synthetic_data.clear_synthetic_data()
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results written to {output}")
+
+    exit_code = 0
+    if args.baseline.exists() and not args.save_baseline:
+        threshold = args.threshold
+        rows = compare(results, json.loads(args.baseline.read_text()), threshold)
+        print_comparison(rows, threshold)
+        if any(row['regression'] for row in rows):
+            print("\n❌ Performance regressions found")
+            if args.fail_on_regression:
+                exit_code = 1
+        else:
+            print("\n✅ No regressions")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"📌 Baseline saved to {args.baseline}")
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Benchmark scenarios
+
+Each scenario requests one page / endpoint through the Django test client
+(the full middleware, template and ORM stack, without a network server) as a
+logged-in benchmark user, and reports wall time percentiles, ORM query count
+and response size over a number of repeats.
+
+dashboard_view and inventory_view read through the Node.js API
+(API_BASE_URL); their numbers include the upstream calls, so point
+API_BASE_URL at a local API (or `manage.py run_api_standin`) when comparing
+runs.
+
+The api_<endpoint>_<format> scenarios fetch the dashboard's list responses
+from an in-process API stand-in in each transport format (plain / column-
+oriented JSON, uncompressed / gzip / brotli) and decode them into records
+like APIService does. They report the bytes on the wire and the decode time
+(decompression, JSON parsing, row expansion and records) separately.
+
+integrate_ml_model runs as a subprocess (it is a standalone script) and is
+skipped when pandas / joblib or ml_models/forecasting_model.pkl are missing.
+"""
+
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.api_service import (
+    CachedResponse, ProductRecord, SaleRecord, decode_payload, transport_headers,
+)
+from dashboard.api_standin import brotli, make_standin_server
+
+
+BENCHMARK_USERNAME = 'bench-admin'
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+class Skip(Exception):
+    """Raised by a scenario that cannot run in this environment"""
+
+
+# ========================================
+# SCENARIOS
+# ========================================
+
+def http_scenario(url_name, method='get', data=None):
+    def run(client):
+        return getattr(client, method)(reverse(url_name), data or {})
+    return run
+
+
+def integrate_ml_model(client):
+    missing = [name for name in ('pandas', 'numpy', 'joblib') if importlib.util.find_spec(name) is None]
+    if missing:
+        raise Skip(f'missing packages: {", ".join(missing)}')
+    if not (PROJECT_DIR / 'ml_models' / 'forecasting_model.pkl').exists():
+        raise Skip('ml_models/forecasting_model.pkl not found')
+
+    result = subprocess.run(
+        [sys.executable, 'integrate_ml_model.py'],
+        cwd=PROJECT_DIR, env=os.environ.copy(), capture_output=True, text=True,
+    )
+    return result
+
+
+class TransportResult:
+    """What an API transport scenario returns instead of a response"""
+
+    def __init__(self, status_code, wire_bytes, decode_seconds):
+        self.status_code = status_code
+        self.wire_bytes = wire_bytes
+        self.decode_seconds = decode_seconds
+
+
+_standin = None
+_standin_lock = threading.Lock()
+
+
+def standin_url():
+    """Base URL of a stand-in API served from a background thread (started once)"""
+    global _standin
+    with _standin_lock:
+        if _standin is None:
+            _standin = make_standin_server('127.0.0.1', 0)
+            threading.Thread(target=_standin.serve_forever, name='bench-standin', daemon=True).start()
+    return f'http://127.0.0.1:{_standin.server_port}'
+
+
+# format -> (compact, Accept-Encoding)
+TRANSPORT_FORMATS = {
+    'json': (False, 'identity'),
+    'json_gzip': (False, 'gzip'),
+    'columns': (True, 'identity'),
+    'columns_gzip': (True, 'gzip'),
+    'columns_br': (True, 'br'),
+}
+
+# endpoint name -> (path, params, record class); what dashboard_view fetches
+TRANSPORT_ENDPOINTS = {
+    'sales': ('/api/sales', {'limit': 5000}, SaleRecord),
+    'products': ('/api/products', None, ProductRecord),
+}
+
+
+def transport_scenario(endpoint, transport_format):
+    path, params, record_class = TRANSPORT_ENDPOINTS[endpoint]
+    compact, encoding = TRANSPORT_FORMATS[transport_format]
+
+    def run(client):
+        if encoding == 'br' and brotli is None:
+            raise Skip('brotli is not installed')
+        headers = {**transport_headers(compact), 'Accept-Encoding': encoding}
+        response = requests.get(standin_url() + path, params=params, headers=headers, stream=True, timeout=60)
+
+        started = time.perf_counter()
+        payload = decode_payload(response.headers.get('Content-Type'), json.loads(response.content))
+        records = CachedResponse(payload['data']).records(record_class)
+        decode_seconds = time.perf_counter() - started
+
+        if response.headers.get('Content-Encoding', 'identity') != encoding or not records:
+            raise Skip(f'the stand-in did not answer with {encoding} / any rows')
+        return TransportResult(response.status_code, response.raw.tell(), decode_seconds)
+    return run
+
+
+SCENARIOS = {
+    'dashboard_view': http_scenario('dashboard'),
+    'inventory_view': http_scenario('inventory'),
+    'inventory_forecasting_view': http_scenario('inventory_forecasting'),
+    'train_forecasting_model': http_scenario('train_forecasting_model', method='post'),
+    'export_sales_csv': http_scenario('export_sales_csv'),
+    'export_audit_trail_csv': http_scenario('export_audit_trail_csv'),
+    'integrate_ml_model': integrate_ml_model,
+    **{
+        f'api_{endpoint}_{transport_format}': transport_scenario(endpoint, transport_format)
+        for endpoint in TRANSPORT_ENDPOINTS
+        for transport_format in TRANSPORT_FORMATS
+    },
+}
+
+
+# ========================================
+# RUNNER
+# ========================================
+
+def get_client():
+    user, created = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME, defaults={'is_staff': True, 'is_superuser': True}
+    )
+    if created:
+        user.set_unusable_password()
+        user.save()
+    # ALLOWED_HOSTS may be empty in development
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(user)
+    return client
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def response_info(response):
+    """(status, size in bytes) of a test client response, CompletedProcess or TransportResult"""
+    if isinstance(response, TransportResult):
+        return response.status_code, response.wire_bytes
+    if isinstance(response, subprocess.CompletedProcess):
+        return (200 if response.returncode == 0 else 500), len(response.stdout or '')
+    if getattr(response, 'streaming', False):
+        return response.status_code, sum(len(chunk) for chunk in response.streaming_content)
+    return response.status_code, len(response.content)
+
+
+def run_scenario(name, client, repeats=5, warmup=1):
+    """
+    Time one scenario
+
+    Returns:
+        dict: status, repeats, median / p95 / min / mean seconds, queries
+              and response bytes (of the last run), plus decode_median for
+              the API transport scenarios; or a 'skipped' reason
+    """
+    scenario = SCENARIOS[name]
+
+    timings = []
+    decode_timings = []
+    # A scenario raises Skip on its first run, which is a timed one with --warmup 0
+    try:
+        for _ in range(warmup):
+            scenario(client)
+
+        for _ in range(repeats):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = scenario(client)
+                status, size = response_info(response)
+                timings.append(time.perf_counter() - started)
+            if isinstance(response, TransportResult):
+                decode_timings.append(response.decode_seconds)
+    except Skip as e:
+        return {'skipped': str(e)}
+
+    timings.sort()
+    result = {
+        'status': status,
+        'repeats': repeats,
+        'median': statistics.median(timings),
+        'p95': percentile(timings, 0.95),
+        'min': timings[0],
+        'mean': statistics.fmean(timings),
+        'queries': len(queries.captured_queries),
+        'bytes': size,
+    }
+    if decode_timings:
+        result['decode_median'] = statistics.median(decode_timings)
+    return result
+
+
+def run_scenarios(names=None, repeats=5, warmup=1):
+    client = get_client()
+    return {name: run_scenario(name, client, repeats, warmup) for name in (names or SCENARIOS)}
@@ -0,0 +1,300 @@
+"""
+Synthetic data generator
+
+Creates a reproducible (seeded) catalogue of ingredients, beverages and
+pastries, a recipe for every beverage, and N years of sales with weekly and
+yearly seasonality plus a slow trend. All rows are written with bulk_create
+in large batches; a year of sales for 50 products takes seconds instead of
+the minutes the add_*_sales.py scripts need for a few hundred rows.
+
+Every generated row is tagged with SYNTHETIC_PREFIX (in its firebase id, or
+user name for audit entries), so clear_synthetic_data() only removes
+generated rows.
+"""
+
+import math
+import random
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from dashboard.audit import record_audit_users
+from dashboard.models import AuditTrail, AuditUser, Product, Recipe, RecipeIngredient, Sale
+from dashboard.table_versions import install_table_versions
+
+
+SYNTHETIC_PREFIX = 'bench-'
+DEFAULT_BATCH_SIZE = 5000
+
+INGREDIENT_NAMES = [
+    'Espresso Beans', 'Whole Milk', 'Oat Milk', 'Chocolate Syrup', 'Caramel Syrup',
+    'Vanilla Syrup', 'Matcha Powder', 'Sugar', 'Whipped Cream', 'Ice', 'Tea Leaves',
+    'Lemon', 'Cocoa Powder', 'Hazelnut Syrup', 'Cinnamon',
+]
+BEVERAGE_NAMES = [
+    'Cappuccino', 'Latte', 'Espresso', 'Mocha', 'Caramel Macchiato', 'Hot Chocolate',
+    'Cold Coffee', 'Cold Mocha', 'Iced Tea', 'Lemonade', 'Flat White', 'White Mocha',
+    'Matcha Latte', 'Americano', 'Hazelnut Latte',
+]
+PASTRY_NAMES = [
+    'Croissant', 'Blueberry Muffin', 'Cinnamon Roll', 'Chocolate Chip Cookie',
+    'Banana Bread', 'Cheesecake Slice', 'Ensaymada', 'Pandesal',
+]
+
+
+# ========================================
+# SCALES
+# ========================================
+
+SCALES = {
+    'small': {'ingredients': 15, 'beverages': 15, 'pastries': 8, 'years': 1,
+              'orders_per_day': 4, 'audit_entries': 2000},
+    'medium': {'ingredients': 40, 'beverages': 40, 'pastries': 20, 'years': 2,
+               'orders_per_day': 6, 'audit_entries': 20000},
+    'large': {'ingredients': 80, 'beverages': 100, 'pastries': 50, 'years': 3,
+              'orders_per_day': 8, 'audit_entries': 100000},
+}
+
+
+def numbered_names(base_names, count):
+    """base names first, then 'Name 2', 'Name 3', ... until `count` names exist"""
+    names = []
+    round_number = 1
+    while len(names) < count:
+        for name in base_names:
+            names.append(name if round_number == 1 else f'{name} {round_number}')
+            if len(names) == count:
+                break
+        round_number += 1
+    return names
+
+
+# ========================================
+# CATALOGUE AND RECIPES
+# ========================================
+
+def build_products(rng, ingredients, beverages, pastries):
+    products = []
+    for i, name in enumerate(numbered_names(INGREDIENT_NAMES, ingredients)):
+        stock = rng.uniform(2000, 20000)
+        products.append(Product(
+            firebase_id=f'{SYNTHETIC_PREFIX}ing-{i:05d}', name=name, category='Ingredients',
+            price=0, unit='g', quantity=stock, inventory_a=stock * 0.7, inventory_b=stock * 0.3,
+            cost_per_unit=round(rng.uniform(0.05, 2.0), 2),
+        ))
+    for i, name in enumerate(numbered_names(BEVERAGE_NAMES, beverages)):
+        products.append(Product(
+            firebase_id=f'{SYNTHETIC_PREFIX}bev-{i:05d}', name=name, category='Beverages',
+            price=round(rng.uniform(90, 220), 2), unit='cup',
+        ))
+    for i, name in enumerate(numbered_names(PASTRY_NAMES, pastries)):
+        stock = rng.randint(10, 80)
+        products.append(Product(
+            firebase_id=f'{SYNTHETIC_PREFIX}pas-{i:05d}', name=name, category='Pastries',
+            price=round(rng.uniform(45, 160), 2), unit='pcs',
+            quantity=stock, inventory_a=stock, inventory_b=0,
+        ))
+    return products
+
+
+def build_recipes(rng, beverages, ingredients):
+    """One recipe per beverage with 2-5 ingredients; returns (recipes, ingredient rows)"""
+    recipes, rows = [], []
+    for number, beverage in enumerate(beverages, start=1):
+        recipe_fid = f'{SYNTHETIC_PREFIX}rec-{number:05d}'
+        recipes.append(Recipe(
+            firebase_id=recipe_fid, product_firebase_id=beverage.firebase_id,
+            product_name=beverage.name, product_number=number,
+        ))
+        for j, ingredient in enumerate(rng.sample(ingredients, k=min(len(ingredients), rng.randint(2, 5)))):
+            rows.append(RecipeIngredient(
+                firebase_id=f'{recipe_fid}-{j}', recipe_firebase_id=recipe_fid,
+                ingredient_firebase_id=ingredient.firebase_id, ingredient_name=ingredient.name,
+                quantity_needed=round(rng.uniform(5, 60), 1), unit='g',
+            ))
+    return recipes, rows
+
+
+# ========================================
+# SALES
+# ========================================
+
+# Monday .. Sunday
+WEEKDAY_FACTORS = (0.8, 0.85, 0.9, 0.95, 1.15, 1.35, 1.25)
+
+
+def demand_factor(day, start_day, total_days):
+    """Weekly pattern x yearly seasonality (peak in December) x slow growth"""
+    weekday = WEEKDAY_FACTORS[day.weekday()]
+    yearly = 1 + 0.25 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 350) / 365.25)
+    trend = 1 + 0.3 * ((day - start_day).days / max(total_days, 1))
+    return weekday * yearly * trend
+
+
+def iter_sales(rng, products, start_day, days, orders_per_day):
+    """Yield unsaved Sale rows, one per order line, day by day"""
+    tz = timezone.get_current_timezone()
+    popularity = {product.firebase_id: rng.uniform(0.3, 1.7) for product in products}
+
+    for offset in range(days):
+        day = start_day + timedelta(days=offset)
+        factor = demand_factor(day, start_day, days)
+        for product in products:
+            orders = max(0, int(rng.gauss(orders_per_day * popularity[product.firebase_id] * factor, 1.5)))
+            for _ in range(orders):
+                quantity = rng.choice((1, 1, 1, 2, 2, 3))
+                order_time = time(rng.randint(7, 21), rng.randint(0, 59), rng.randint(0, 59))
+                yield Sale(
+                    product_firebase_id=product.firebase_id, product_name=product.name,
+                    category=product.category, quantity=quantity, price=product.price,
+                    total=round(quantity * product.price, 2),
+                    order_date=timezone.make_aware(datetime.combine(day, order_time), tz),
+                )
+
+
+AUDIT_ACTIONS = ('Product Updated', 'Sale Created', 'Inventory Transfer', 'Recipe Updated', 'Waste Logged', 'Login')
+
+
+def iter_audit_entries(rng, count, start_day, days, users=8):
+    tz = timezone.get_current_timezone()
+    for _ in range(count):
+        day = start_day + timedelta(days=rng.randrange(days))
+        user_name = f'{SYNTHETIC_PREFIX}user-{rng.randrange(users)}'
+        action = rng.choice(AUDIT_ACTIONS)
+        yield AuditTrail(
+            action=action, user_id=user_name, user_name=user_name,
+            details=f'{action} #{rng.randrange(100000)}',
+            timestamp=timezone.make_aware(
+                datetime.combine(day, time(rng.randint(7, 21), rng.randint(0, 59))), tz
+            ),
+        )
+
+
+def bulk_insert(model, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """bulk_create an iterable in batches without materializing it; returns the row count"""
+    total, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+    return total
+
+
+# ========================================
+# SCHEMA
+# ========================================
+
+MOBILE_MODELS = (Product, Sale, Recipe, RecipeIngredient)
+
+
+def ensure_mobile_tables(rebuild=False):
+    """
+    Create the mobile app tables (managed = False) that do not exist yet
+
+    With rebuild=True they are dropped and recreated from the current models
+    first - only for a throwaway SQLite benchmark database (SQLITE_PATH),
+    never for a database the mobile app syncs with.
+
+    Returns:
+        list: Tables that were created
+    """
+    if rebuild and connection.vendor != 'sqlite':
+        raise ValueError('Rebuilding the mobile tables is only allowed on a SQLite benchmark database')
+
+    with connection.cursor() as cursor:
+        existing = set(connection.introspection.table_names(cursor))
+
+    created = []
+    with connection.schema_editor() as schema_editor:
+        if rebuild:
+            for model in reversed(MOBILE_MODELS):
+                if model._meta.db_table in existing:
+                    schema_editor.delete_model(model)
+                    existing.discard(model._meta.db_table)
+        for model in MOBILE_MODELS:
+            table = model._meta.db_table
+            if table not in existing:
+                schema_editor.create_model(model)
+                created.append(table)
+    if created:
+        # The catalogue endpoints' ETags need the change counters on new tables
+        install_table_versions()
+    return created
+
+
+# ========================================
+# PUBLIC API
+# ========================================
+
+def clear_synthetic_data():
+    """Delete every generated row (and nothing else)"""
+    with transaction.atomic():
+        Sale.objects.filter(product_firebase_id__startswith=SYNTHETIC_PREFIX).delete()
+        RecipeIngredient.objects.filter(recipe_firebase_id__startswith=SYNTHETIC_PREFIX).delete()
+        Recipe.objects.filter(firebase_id__startswith=SYNTHETIC_PREFIX).delete()
+        Product.objects.filter(firebase_id__startswith=SYNTHETIC_PREFIX).delete()
+        AuditTrail.objects.filter(user_name__startswith=SYNTHETIC_PREFIX).delete()
+        AuditUser.objects.filter(user_name__startswith=SYNTHETIC_PREFIX).delete()
+
+
+def generate(ingredients=15, beverages=15, pastries=8, years=1, orders_per_day=4,
+             audit_entries=2000, seed=42, end_date=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Replace the synthetic data set with a freshly generated one
+
+    Returns:
+        dict: Row counts per table
+    """
+    rng = random.Random(seed)
+    end_day = end_date or timezone.localdate()
+    days = int(365 * years)
+    start_day = end_day - timedelta(days=days - 1)
+
+    clear_synthetic_data()
+
+    with transaction.atomic():
+        Product.objects.bulk_create(build_products(rng, ingredients, beverages, pastries), batch_size=batch_size)
+        products = list(Product.objects.filter(firebase_id__startswith=SYNTHETIC_PREFIX).order_by('firebase_id'))
+
+        ingredient_products = [p for p in products if p.category == 'Ingredients']
+        beverage_products = [p for p in products if p.category == 'Beverages']
+        sellable = [p for p in products if p.category != 'Ingredients']
+
+        recipes, recipe_rows = build_recipes(rng, beverage_products, ingredient_products)
+        Recipe.objects.bulk_create(recipes, batch_size=batch_size)
+        recipe_ids = dict(Recipe.objects.filter(firebase_id__startswith=SYNTHETIC_PREFIX).values_list('firebase_id', 'id'))
+        for row in recipe_rows:
+            row.recipe_id = recipe_ids.get(row.recipe_firebase_id)
+        RecipeIngredient.objects.bulk_create(recipe_rows, batch_size=batch_size)
+
+        sales = bulk_insert(Sale, iter_sales(rng, sellable, start_day, days, orders_per_day), batch_size)
+
+        audit = bulk_insert(AuditTrail, iter_audit_entries(rng, audit_entries, start_day, days), batch_size)
+        record_audit_users(AuditTrail.objects.filter(
+            user_name__startswith=SYNTHETIC_PREFIX
+        ).values('user_name').distinct())
+
+    if connection.vendor in ('postgresql', 'sqlite'):
+        # Fresh statistics so the planner sees the new row counts
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    return {
+        'products': len(products),
+        'recipes': len(recipes),
+        'recipe_ingredients': len(recipe_rows),
+        'sales': sales,
+        'audit_entries': audit,
+        'days': days,
+    }
+
+
+def generate_scale(scale, seed=42, **overrides):
+    """generate() with one of the SCALES presets"""
+    return generate(seed=seed, **{**SCALES[scale], **overrides})
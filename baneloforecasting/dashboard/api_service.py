@@ -1,14 +1,633 @@
 """
 API Service Layer - Connects to Node.js API instead of direct PostgreSQL
 This allows the website to work on a different machine than the database.
+
+List responses (products, sales, recipes) are also available as normalized
+records (ProductRecord, SaleRecord, RecipeRecord, IngredientRecord): the
+snake_case / camelCase fallbacks, float coercion, category grouping and
+date parsing are done once per response instead of in every view. The raw
+response and its records are cached together for API_CACHE_SECONDS, and
+any write through this service clears the cache.
+
+Each endpoint has a circuit breaker: once too many calls fail it opens and
+calls fail immediately instead of waiting API_TIMEOUT. While the upstream
+is down, list methods serve the last good response flagged as stale
+(CachedResponse.stale, a banner on the page) and a background thread
+revalidates it once the breaker lets a probe through.
+
+GET requests negotiate a compact transport: compressed bodies (gzip, or
+brotli when the brotli package is installed) and column-oriented list
+bodies (COLUMNS_MEDIA_TYPE) that send each key name once instead of once
+per row. Upstreams that support neither answer with plain JSON.
 """
 
+import logging
+import random
+import re
 import requests
 import os
-from datetime import datetime
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from functools import lru_cache
+from urllib.parse import quote
 import json
 
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized timestamp decoding
+    np = None
+
+from .metrics import (
+    REQUEST_ID_HEADER, get_request_id, record_stale_response, record_upstream_call, registry,
+)
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger('dashboard.api_service.trace')
+
+# Share of upstream calls written to the trace log (0 = off, 1 = every call)
+API_TRACE_SAMPLE_RATE = getattr(settings, 'API_TRACE_SAMPLE_RATE', 0.0)
+
+# Path segments that are ids (numbers, Firebase ids, UUIDs) become ":id"
+ID_SEGMENT_RE = re.compile(r'^(?=.*\d)[\w-]{6,}$|^\d+$')
+
+# Seconds; upstream calls are slower than local work
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# How long list responses (and their normalized records) are reused (0 = off)
+API_CACHE_SECONDS = getattr(settings, 'API_CACHE_SECONDS', 5)
+
+# Circuit breaker (per endpoint) and stale fallback
+API_BREAKER_ERROR_RATE = getattr(settings, 'API_BREAKER_ERROR_RATE', 0.5)
+API_BREAKER_MIN_CALLS = getattr(settings, 'API_BREAKER_MIN_CALLS', 5)
+API_BREAKER_WINDOW_SECONDS = getattr(settings, 'API_BREAKER_WINDOW_SECONDS', 30)
+API_BREAKER_OPEN_SECONDS = getattr(settings, 'API_BREAKER_OPEN_SECONDS', 15)
+API_STALE_MAX_SECONDS = getattr(settings, 'API_STALE_MAX_SECONDS', 3600)
+API_REVALIDATE_ATTEMPTS = getattr(settings, 'API_REVALIDATE_ATTEMPTS', 20)
+
+# Ask for compressed, column-oriented list responses (False = plain JSON)
+API_COMPACT_TRANSPORT = getattr(settings, 'API_COMPACT_TRANSPORT', True)
+
+
+# ========================================
+# UPSTREAM INSTRUMENTATION
+# ========================================
+
+def normalize_endpoint(endpoint):
+    """'/api/products/abc123XYZ' -> '/api/products/:id' (bounded label values)"""
+    path = endpoint.split('?', 1)[0]
+    return '/'.join(':id' if ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/'))
+
+
+def error_class(error, status):
+    """Short label for what went wrong with an upstream call"""
+    if status is not None and status >= 400:
+        # Only raise_for_status() fails after a status was received
+        return f'http_{status // 100}xx'
+    if isinstance(error, json.JSONDecodeError):
+        return 'invalid_json'
+    return type(error).__name__
+
+
+def record_api_call(method, endpoint, status, size, elapsed, error, request_id):
+    """Latency histogram, byte / status / error counters and the sampled trace log"""
+    labels = {'method': method, 'endpoint': endpoint}
+    registry.histogram(
+        'banelo_upstream_duration_seconds', labels, 'Node.js API call latency', UPSTREAM_BUCKETS
+    ).observe(elapsed)
+    registry.inc('banelo_upstream_bytes_total', labels, size, 'Bytes received from the Node.js API (as sent, i.e. compressed)')
+    registry.inc(
+        'banelo_upstream_responses_total', {**labels, 'status': status or 'none'},
+        help_text='Node.js API responses by status'
+    )
+    if error is not None:
+        registry.inc(
+            'banelo_upstream_errors_total', {**labels, 'error': error_class(error, status)},
+            help_text='Failed Node.js API calls by error class'
+        )
+
+    if API_TRACE_SAMPLE_RATE > 0 and (error is not None or random.random() < API_TRACE_SAMPLE_RATE):
+        # Failures are always traced once tracing is on
+        trace_logger.info(
+            "%s %s status=%s bytes=%s ms=%.1f request_id=%s%s",
+            method, endpoint, status, size, elapsed * 1000, request_id,
+            f" error={error_class(error, status)}" if error is not None else '',
+            extra={
+                'request_id': request_id, 'method': method, 'endpoint': endpoint,
+                'status': status, 'bytes': size, 'duration_ms': round(elapsed * 1000, 1),
+            },
+        )
+
+
+def upstream_ok(error, status):
+    """
+    False if a call failed because of the upstream (no response, 5xx,
+    invalid JSON); 4xx answers are the caller's problem and count as healthy
+    """
+    if error is None:
+        return True
+    return status is not None and status < 500 and not isinstance(error, json.JSONDecodeError)
+
+
+def short_circuit_response(endpoint):
+    """What _make_request returns while the endpoint's breaker is open"""
+    registry.inc(
+        'banelo_upstream_short_circuits_total', {'endpoint': endpoint},
+        help_text='Node.js API calls refused by an open circuit breaker'
+    )
+    return {'success': False, 'error': 'API temporarily unavailable (circuit open)', 'data': [],
+            'circuit_open': True}
+
+
+def error_result(message, response=None):
+    """
+    What _make_request returns for a failed call; the Node.js API's JSON
+    error body (its message, per-line results, ...) is kept when there is one
+    """
+    result = {'success': False, 'error': message, 'data': []}
+    if response is not None:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            result.update(body)
+            result['success'] = False
+    return result
+
+
+# ========================================
+# TRANSPORT
+# ========================================
+
+# {"success": true, "data": {"columns": [...], "rows": [[...], ...]}, "count": N}
+COLUMNS_MEDIA_TYPE = 'application/vnd.banelo.columns+json'
+
+
+def transport_headers(compact=API_COMPACT_TRANSPORT):
+    """
+    Accept headers for GET requests. Accept-Encoding is left to the HTTP
+    client when compact, which advertises exactly the codings it can decode.
+    """
+    if compact:
+        return {'Accept': f'{COLUMNS_MEDIA_TYPE}, application/json;q=0.9'}
+    return {'Accept': 'application/json', 'Accept-Encoding': 'identity'}
+
+
+def decode_payload(content_type, payload):
+    """A parsed response body in the plain JSON shape (column-oriented `data` -> row objects)"""
+    if COLUMNS_MEDIA_TYPE in (content_type or '') and isinstance(payload, dict):
+        data = payload.get('data')
+        if isinstance(data, dict) and 'columns' in data:
+            columns = data['columns']
+            payload['data'] = [dict(zip(columns, row)) for row in data.get('rows') or ()]
+    return payload
+
+
+# What _make_request returns for a 304: the cached copy is still current
+NOT_MODIFIED = {'success': True, 'not_modified': True, 'data': []}
+
+
+def conditional_headers(validators):
+    """If-None-Match / If-Modified-Since from a cached response's (ETag, Last-Modified)"""
+    etag, last_modified = validators
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def decode_response(status, headers, body, validators=None):
+    """
+    The result dict of a GET (see _make_request): NOT_MODIFIED for a 304,
+    else the decoded body with the response's (ETag, Last-Modified) attached
+    as 'validators' when the request was a conditional one
+    """
+    if status == 304:
+        return dict(NOT_MODIFIED)
+    result = decode_payload(headers.get('Content-Type'), body())
+    if validators is not None and isinstance(result, dict):
+        result['validators'] = (headers.get('ETag'), headers.get('Last-Modified'))
+    return result
+
+
+# ========================================
+# CIRCUIT BREAKER
+# ========================================
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker: closed -> open -> half-open -> closed
+
+    closed: calls go through; outcomes of the last window_seconds are kept
+    and the breaker opens once at least min_calls were made and the share
+    of failures reaches error_rate.
+    open: calls are refused without touching the network for open_seconds.
+    half_open: a single probe call is let through; success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, error_rate=API_BREAKER_ERROR_RATE, min_calls=API_BREAKER_MIN_CALLS,
+                 window_seconds=API_BREAKER_WINDOW_SECONDS, open_seconds=API_BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'short_circuited': 0}
+
+    def allow(self):
+        """True if a call may go to the upstream now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.stats['short_circuited'] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                self.stats['short_circuited'] += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record(self, ok):
+        """Outcome of a call that allow() let through"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._close()
+                else:
+                    self._open(now)
+                return
+            if self.state == self.OPEN:
+                # Started before the breaker opened
+                return
+
+            self._outcomes.append((now, ok))
+            cutoff = now - self.window_seconds
+            while self._outcomes and self._outcomes[0][0] < cutoff:
+                self._outcomes.popleft()
+            calls = len(self._outcomes)
+            failures = sum(1 for _, call_ok in self._outcomes if not call_ok)
+            if calls >= self.min_calls and failures / calls >= self.error_rate:
+                self._open(now)
+
+    def finish(self, status, error):
+        """Record a call that got a response or a handled error; release the probe otherwise"""
+        if status is None and error is None:
+            # Cancelled or raised before reaching the upstream: no verdict
+            with self._lock:
+                self._probe_in_flight = False
+            return
+        self.record(upstream_ok(error, status))
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self._outcomes.clear()
+        self.stats['opened'] += 1
+        logger.warning("🔌 Circuit for %s opened, failing fast for %ss", self.name, self.open_seconds)
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.opened_at = None
+        logger.info("✅ Circuit for %s closed, upstream recovered", self.name)
+
+    def retry_in(self):
+        """Seconds until an open breaker lets a probe through (0 if it would now)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def snapshot(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            state = self.state
+        return {
+            'state': state,
+            'calls_in_window': calls,
+            'error_rate': round(failures / calls, 3) if calls else 0.0,
+            'retry_in_seconds': round(self.retry_in(), 1),
+            **self.stats,
+        }
+
+
+# ========================================
+# NORMALIZED RECORDS
+# ========================================
+
+BEVERAGE_CATEGORIES = frozenset(['beverage', 'beverages', 'drink', 'drinks', 'hot drinks', 'cold drinks'])
+PASTRY_CATEGORIES = frozenset(['pastries', 'pastry', 'snacks', 'snack'])
+INGREDIENT_CATEGORIES = frozenset(['ingredients', 'ingredient'])
+
+
+def normalize_category(raw_category):
+    """'Hot Drinks ' -> 'beverage', 'Snack' -> 'pastries', 'Ingredient' -> 'ingredients', else lowercased"""
+    category = str(raw_category or '').lower().strip()
+    if category in BEVERAGE_CATEGORIES:
+        return 'beverage'
+    if category in PASTRY_CATEGORIES:
+        return 'pastries'
+    if category in INGREDIENT_CATEGORIES:
+        return 'ingredients'
+    return category
+
+
+def first(data, *keys):
+    """First truthy value among the snake_case / camelCase spellings of a field"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return None
+
+
+def to_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@lru_cache(maxsize=16384)
+def _parse_iso_timestamp(value, tz):
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=tz)
+    return parsed.astimezone(tz)
+
+
+def parse_api_datetime(value):
+    """
+    API timestamp (ISO string or datetime) -> aware datetime in the current
+    time zone, or None. Values without an offset are taken as local time.
+
+    Strings are memoized: a refetched list repeats every timestamp it had.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return timezone.make_aware(value) if timezone.is_naive(value) else timezone.localtime(value)
+    return _parse_iso_timestamp(str(value), timezone.get_current_timezone())
+
+
+def local_day_hour(moment):
+    """(day number, hour) of an aware datetime; day numbers are date.toordinal() values"""
+    return moment.toordinal(), moment.hour
+
+
+@lru_cache(maxsize=4096)
+def day_label(day, fmt='%Y-%m-%d'):
+    return date.fromordinal(day).strftime(fmt)
+
+
+def _utc_offsets(tz, moments):
+    """
+    UTC offset of `tz` at each of the datetime64 UTC `moments`, as timedelta64.
+
+    Offsets are looked up once per distinct UTC hour that holds data, so
+    daylight-saving changes anywhere in the column are handled. Returns
+    None if an offset changes inside one of those hours.
+    """
+    hours, inverse = np.unique(moments.astype('datetime64[h]'), return_inverse=True)
+    offsets = []
+    for hour in hours.tolist():
+        start = hour.replace(tzinfo=dt_timezone.utc)
+        offset = start.astimezone(tz).utcoffset()
+        if (start + timedelta(hours=1, microseconds=-1)).astimezone(tz).utcoffset() != offset:
+            return None
+        offsets.append(int(offset.total_seconds()))
+    return np.array(offsets, dtype='timedelta64[s]')[inverse.reshape(-1)]
+
+
+def decode_timestamp_column(values):
+    """
+    Local (day number, hour) for a whole column of API timestamps
+
+    With numpy installed, a column of UTC ISO strings ('...Z', what the
+    Node.js API sends) is converted in one vectorized pass; anything else
+    falls back to the memoized per-value parser. Unparseable values give
+    (None, None).
+
+    Returns:
+        tuple: (list of day numbers, list of hours)
+    """
+    if np is not None and values and all(isinstance(v, str) and v.endswith('Z') for v in values):
+        try:
+            moments = np.array([v[:-1] for v in values], dtype='datetime64[ms]')
+            offsets = _utc_offsets(timezone.get_current_timezone(), moments)
+            if offsets is not None:
+                local = moments + offsets
+                days = local.astype('datetime64[D]')
+                hours = (local - days).astype('timedelta64[h]').astype(np.int64)
+                day_numbers = days.astype(np.int64) + UNIX_EPOCH_ORDINAL
+                return day_numbers.tolist(), hours.tolist()
+        except (ValueError, OverflowError):
+            pass
+
+    tz = timezone.get_current_timezone()
+    days, hours = [], []
+    for value in values:
+        day, hour = _day_hour(value, tz) if isinstance(value, str) else _day_hour_of(value)
+        days.append(day)
+        hours.append(hour)
+    return days, hours
+
+
+@lru_cache(maxsize=16384)
+def _day_hour(value, tz):
+    moment = _parse_iso_timestamp(value, tz)
+    return local_day_hour(moment) if moment else (None, None)
+
+
+def _day_hour_of(value):
+    moment = parse_api_datetime(value)
+    return local_day_hour(moment) if moment else (None, None)
+
+
+class ProductRecord:
+    """A product from the API with canonical, pre-coerced fields"""
+
+    __slots__ = ('id', 'firebase_id', 'name', 'category', 'raw_category', 'price', 'quantity',
+                 'inventory_a', 'inventory_b', 'cost_per_unit', 'unit', 'image_uri', 'raw')
+
+    def __init__(self, data):
+        self.raw = data
+        self.id = data.get('id')
+        self.firebase_id = first(data, 'firebase_id', 'firebaseId') or ''
+        self.name = data.get('name') or 'Unknown'
+        self.raw_category = data.get('category') or ''
+        self.category = normalize_category(self.raw_category)
+        self.price = to_float(data.get('price'))
+        self.quantity = to_float(data.get('quantity'))
+        self.inventory_a = to_float(first(data, 'inventory_a', 'inventoryA'))
+        self.inventory_b = to_float(first(data, 'inventory_b', 'inventoryB'))
+        self.cost_per_unit = to_float(first(data, 'cost_per_unit', 'costPerUnit'))
+        self.unit = data.get('unit') or 'pcs'
+        image = first(data, 'image_uri', 'imageUri')
+        self.image_uri = str(image) if image and str(image) not in ('nan', 'None') else None
+
+    @property
+    def key(self):
+        """firebase_id, or the local id for products that were never synced"""
+        return self.firebase_id or str(self.id or '')
+
+
+class SaleRecord:
+    """
+    A sale from the API
+
+    `day` (date.toordinal() of the local order date) and `hour` are ints for
+    cheap bucketing; `order_date` (aware, local) is only parsed when read.
+    """
+
+    __slots__ = ('id', 'product_firebase_id', 'product_name', 'category', 'quantity', 'price',
+                 'total', 'day', 'hour', '_order_date_raw', '_order_date', 'raw')
+
+    def __init__(self, data, decode_date=True):
+        self.raw = data
+        self.id = data.get('id')
+        self.product_firebase_id = first(data, 'product_firebase_id', 'productFirebaseId') or ''
+        self.product_name = first(data, 'product_name', 'productName') or 'Unknown'
+        self.category = data.get('category') or 'Uncategorized'
+        self.price = to_float(data.get('price'))
+        self.quantity = int(to_float(data.get('quantity')))
+        self.total = to_float(first(data, 'total_amount', 'total')) or self.price * self.quantity
+        self._order_date_raw = first(data, 'order_date', 'orderDate')
+        self._order_date = None
+        self.day = self.hour = None
+        if decode_date:
+            moment = self.order_date
+            if moment:
+                self.day, self.hour = local_day_hour(moment)
+
+    @property
+    def order_date(self):
+        if self._order_date is None and self._order_date_raw:
+            self._order_date = parse_api_datetime(self._order_date_raw)
+        return self._order_date
+
+    @classmethod
+    def build_all(cls, items):
+        """Records for a whole response, decoding the order_date column in one pass"""
+        records = [cls(item, decode_date=False) for item in items]
+        days, hours = decode_timestamp_column([record._order_date_raw for record in records])
+        for record, day, hour in zip(records, days, hours):
+            record.day = day
+            record.hour = hour
+        return tuple(records)
+
+
+class IngredientRecord:
+    """One ingredient line of a recipe"""
+
+    __slots__ = ('id', 'ingredient_firebase_id', 'ingredient_name', 'quantity_needed', 'unit',
+                 'cost_per_unit', 'stock', 'raw')
+
+    def __init__(self, data):
+        self.raw = data
+        self.id = data.get('id') or ''
+        self.ingredient_firebase_id = first(data, 'ingredient_firebase_id', 'ingredientFirebaseId') or ''
+        self.ingredient_name = first(data, 'ingredient_name', 'ingredientName') or 'Unknown'
+        self.quantity_needed = to_float(first(data, 'quantity_needed', 'quantityNeeded'))
+        self.unit = data.get('unit') or 'g'
+        self.cost_per_unit = to_float(first(data, 'cost_per_unit', 'costPerUnit'))
+        self.stock = to_float(data.get('stock'))
+
+
+class RecipeRecord:
+    """A recipe with its ingredients; name_key is the lowercased product name for matching"""
+
+    __slots__ = ('id', 'product_firebase_id', 'product_name', 'name_key', 'product_number',
+                 'ingredients', 'raw')
+
+    def __init__(self, data):
+        self.raw = data
+        self.id = first(data, 'firebase_id', 'firebaseId', 'id')
+        self.product_firebase_id = first(data, 'product_firebase_id', 'productFirebaseId') or ''
+        self.product_name = first(data, 'product_name', 'productName') or 'Unknown'
+        self.name_key = (first(data, 'product_name', 'productName') or '').lower().strip()
+        self.product_number = data.get('product_number', data.get('productNumber'))
+        self.ingredients = tuple(IngredientRecord(ing) for ing in data.get('ingredients') or ())
+
+
+# ========================================
+# RESPONSE CACHE
+# ========================================
+
+class CachedResponse:
+    """
+    A list response and, built on first use, its normalized records
+
+    `stale` is set once it is served after a failed refresh (see
+    APIService._serve_stale); `age` is seconds since it was fetched or last
+    confirmed unchanged by a 304. `validators` is the response's (ETag,
+    Last-Modified), sent back to revalidate it once it expires.
+    """
+
+    __slots__ = ('data', 'fetched_at', 'stale', 'validators', '_records', '_index', '_lock')
+
+    def __init__(self, data, validators=(None, None)):
+        self.data = data
+        self.fetched_at = time.monotonic()
+        self.stale = False
+        self.validators = validators
+        self._records = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+    def records(self, record_class):
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    build_all = getattr(record_class, 'build_all', None)
+                    self._records = build_all(self.data) if build_all else tuple(map(record_class, self.data))
+        return self._records
+
+    def index(self, record_class):
+        """{key: record} over the records, keyed on both firebase_id and the local id"""
+        if self._index is None:
+            records = self.records(record_class)
+            with self._lock:
+                if self._index is None:
+                    index = {str(record.id): record for record in records if record.id is not None}
+                    index.update((record.firebase_id, record) for record in records if record.firebase_id)
+                    self._index = index
+        return self._index
+
 
 class APIService:
     """Service class for making API calls to the Node.js backend"""
@@ -17,38 +636,235 @@ class APIService:
         # API Configuration - can be overridden via environment variables
         self.base_url = os.getenv('API_BASE_URL', 'http://localhost:3000')
         self.timeout = int(os.getenv('API_TIMEOUT', '30'))
+        self.cache_seconds = API_CACHE_SECONDS
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        # Last successful response per cache key, kept past cache_seconds for outages
+        self._last_good = {}
+        self._revalidating = set()
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    # ========================================
+    # CACHED LIST RESPONSES
+    # ========================================
+
+    def _get_list(self, endpoint, params=None, keys=()):
+        """
+        GET a list endpoint through the cache
+
+        Returns:
+            CachedResponse: Only successful responses are cached; on failure
+            an uncached, empty one is returned (like the list methods did)
+        """
+        cache_key = self._cache_key(endpoint, params)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self._make_request('GET', endpoint, params=params, validators=self._validators(cache_key))
+        return self._store(cache_key, result, keys)
+
+    def get_list_validators(self, endpoint, params=None, keys=()):
+        """
+        (ETag, Last-Modified) of a list endpoint's current response, from the
+        cache or a conditional GET; (None, None) if the API sent neither
+        """
+        return self._get_list(endpoint, params, keys=keys).validators
+
+    @staticmethod
+    def _cache_key(endpoint, params):
+        return endpoint, tuple(sorted((params or {}).items()))
+
+    def _cached(self, cache_key):
+        """The cached response for this key, if it is still fresh"""
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached.fetched_at < self.cache_seconds:
+            return cached
+        return None
+
+    def _validators(self, cache_key):
+        """(ETag, Last-Modified) of the last good response, to make the refresh conditional"""
+        with self._cache_lock:
+            last_good = self._last_good.get(cache_key)
+        return last_good.validators if last_good is not None else (None, None)
+
+    def _store(self, cache_key, result, keys=()):
+        """
+        Wrap a list result in a CachedResponse, caching it if the call succeeded
+
+        A failed call returns the last good response for this key (flagged
+        stale) if there is one, else an uncached empty response. A 304 puts
+        the last good response (same object, records already built) back in
+        the cache.
+        """
+        if not result.get('success', True):
+            return self._serve_stale(cache_key, keys)
+
+        if result.get('not_modified'):
+            with self._cache_lock:
+                entry = self._last_good.get(cache_key)
+            if entry is None:
+                return CachedResponse([])
+            entry.fetched_at = time.monotonic()
+            entry.stale = False
+            registry.inc(
+                'banelo_upstream_not_modified_total', {'endpoint': normalize_endpoint(cache_key[0])},
+                help_text='List responses revalidated with a 304 instead of a new body'
+            )
+        else:
+            data = result.get('data')
+            for key in keys:
+                if data is not None:
+                    break
+                data = result.get(key)
+            entry = CachedResponse(data or [], result.get('validators') or (None, None))
 
-    def _make_request(self, method, endpoint, data=None, params=None):
-        """Make HTTP request to the API"""
+        with self._cache_lock:
+            if self.cache_seconds > 0:
+                self._cache[cache_key] = entry
+            self._last_good[cache_key] = entry
+        return entry
+
+    def _serve_stale(self, cache_key, keys):
+        with self._cache_lock:
+            last_good = self._last_good.get(cache_key)
+        if last_good is None or last_good.age > API_STALE_MAX_SECONDS:
+            return CachedResponse([])
+
+        last_good.stale = True
+        record_stale_response()
+        logger.info("🕰️ Serving %s from %.0fs ago while the API is unavailable", cache_key[0], last_good.age)
+        self._schedule_revalidation(cache_key, keys)
+        return last_good
+
+    # ========================================
+    # BACKGROUND REVALIDATION
+    # ========================================
+
+    def _schedule_revalidation(self, cache_key, keys):
+        """Refresh a stale response in the background (one thread per cache key)"""
+        with self._cache_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+        threading.Thread(
+            target=self._revalidate, args=(cache_key, keys), name='api-revalidate', daemon=True
+        ).start()
+
+    def _revalidate(self, cache_key, keys):
+        endpoint, params = cache_key[0], dict(cache_key[1]) or None
+        breaker = self.breaker(normalize_endpoint(endpoint))
+        try:
+            for _ in range(API_REVALIDATE_ATTEMPTS):
+                # Wake up when the breaker lets its half-open probe through
+                time.sleep(max(breaker.retry_in(), 1.0))
+                result = self._make_request(
+                    'GET', endpoint, params=params, validators=self._validators(cache_key)
+                )
+                if result.get('success', True):
+                    self._store(cache_key, result, keys)
+                    logger.info("✅ Revalidated %s, the API is back", endpoint)
+                    return
+        finally:
+            with self._cache_lock:
+                self._revalidating.discard(cache_key)
+
+    # ========================================
+    # CIRCUIT BREAKERS
+    # ========================================
+
+    def breaker(self, endpoint_label):
+        """The circuit breaker of a normalized endpoint ('/api/products/:id')"""
+        breaker = self._breakers.get(endpoint_label)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self._breakers.setdefault(endpoint_label, CircuitBreaker(endpoint_label))
+        return breaker
+
+    def breaker_states(self):
+        """{endpoint: breaker snapshot} for the health endpoint"""
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
+
+    def invalidate_cache(self):
+        """Forget cached responses (called after every write)"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _write(self, method, endpoint, data=None):
+        result = self._make_request(method, endpoint, data=data)
+        self.invalidate_cache()
+        return result
+
+    def _make_request(self, method, endpoint, data=None, params=None, validators=None):
+        """
+        Make HTTP request to the API (timed, counted and optionally traced)
+
+        validators: (ETag, Last-Modified) of a cached copy for a conditional
+        GET; the result is then NOT_MODIFIED on a 304 and carries the new
+        response's validators otherwise.
+        """
         url = f"{self.base_url}{endpoint}"
+        endpoint_label = normalize_endpoint(endpoint)
+        request_id = get_request_id() or uuid.uuid4().hex
+        headers = {REQUEST_ID_HEADER: request_id}
+        if method == 'GET':
+            headers.update(transport_headers())
+            if validators:
+                headers.update(conditional_headers(validators))
+
+        breaker = self.breaker(endpoint_label)
+        if not breaker.allow():
+            # Fail fast instead of waiting for the timeout again
+            return short_circuit_response(endpoint_label)
+
+        started = time.perf_counter()
+        status = None
+        size = 0
+        error = None
 
         try:
             if method == 'GET':
-                response = requests.get(url, params=params, timeout=self.timeout)
+                response = requests.get(url, params=params, headers=headers, timeout=self.timeout)
             elif method == 'POST':
-                response = requests.post(url, json=data, timeout=self.timeout)
+                response = requests.post(url, json=data, headers=headers, timeout=self.timeout)
             elif method == 'PUT':
-                response = requests.put(url, json=data, timeout=self.timeout)
+                response = requests.put(url, json=data, headers=headers, timeout=self.timeout)
             elif method == 'DELETE':
-                response = requests.delete(url, json=data, timeout=self.timeout)
+                response = requests.delete(url, json=data, headers=headers, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
 
+            status = response.status_code
+            # Bytes read off the socket (before decompression)
+            size = response.raw.tell() if response.raw is not None else len(response.content)
             response.raise_for_status()
-            return response.json()
+            return decode_response(status, response.headers, response.json, validators)
 
-        except requests.exceptions.ConnectionError:
-            print(f"[API] Connection error: Cannot reach {url}")
+        except requests.exceptions.ConnectionError as e:
+            error = e
+            logger.warning("[API] Connection error: Cannot reach %s [%s]", url, request_id)
             return {'success': False, 'error': 'Cannot connect to API server', 'data': []}
-        except requests.exceptions.Timeout:
-            print(f"[API] Timeout: Request to {url} timed out")
+        except requests.exceptions.Timeout as e:
+            error = e
+            logger.warning("[API] Timeout: Request to %s timed out [%s]", url, request_id)
             return {'success': False, 'error': 'API request timed out', 'data': []}
         except requests.exceptions.RequestException as e:
-            print(f"[API] Request error: {e}")
-            return {'success': False, 'error': str(e), 'data': []}
-        except json.JSONDecodeError:
-            print(f"[API] Invalid JSON response from {url}")
+            error = e
+            logger.warning("[API] Request error: %s [%s]", e, request_id)
+            return error_result(str(e), e.response)
+        except json.JSONDecodeError as e:
+            error = e
+            logger.warning("[API] Invalid JSON response from %s [%s]", url, request_id)
             return {'success': False, 'error': 'Invalid API response', 'data': []}
+        finally:
+            elapsed = time.perf_counter() - started
+            breaker.finish(status, error)
+            record_upstream_call(elapsed)
+            record_api_call(method, endpoint_label, status, size, elapsed, error, request_id)
 
     # ========================================
     # PRODUCTS ENDPOINTS
@@ -56,10 +872,11 @@ class APIService:
 
     def get_products(self):
         """Get all products from the API"""
-        result = self._make_request('GET', '/api/products')
-        if result.get('success', True):
-            return result.get('data', result.get('products', []))
-        return []
+        return self._get_list('/api/products', keys=('products',)).data
+
+    def get_product_records(self):
+        """All products as ProductRecords"""
+        return self._get_list('/api/products', keys=('products',)).records(ProductRecord)
 
     def get_product(self, product_id):
         """Get a single product by ID"""
@@ -68,34 +885,77 @@ class APIService:
             return result.get('data', result.get('product', None))
         return None
 
+    def get_product_record(self, product_id):
+        """
+        One product as a ProductRecord (None if not found), by firebase_id
+        or, for products that were never synced, local id
+
+        A point lookup: GET /api/products/:id. Node only looks up
+        firebase_id, so numeric (local) ids are first looked up in the id
+        index of the cached catalogue instead of a GET that would 404.
+        """
+        product_id = str(product_id)
+        if product_id.isdigit():
+            record = self._get_list('/api/products', keys=('products',)).index(ProductRecord).get(product_id)
+            if record is not None:
+                return record
+        product = self.get_product(quote(product_id, safe=''))
+        return ProductRecord(product) if product else None
+
+    def get_product_records_by_key(self, product_ids):
+        """
+        {product_id: ProductRecord or None} for several firebase_ids / local
+        ids, from the id index of the cached catalogue (one GET at most)
+        """
+        index = self._get_list('/api/products', keys=('products',)).index(ProductRecord)
+        return {str(product_id): index.get(str(product_id)) for product_id in product_ids}
+
     def add_product(self, product_data):
         """Add a new product"""
-        return self._make_request('POST', '/api/products', data=product_data)
+        return self._write('POST', '/api/products', data=product_data)
 
     def update_product(self, product_id, product_data):
         """Update an existing product"""
-        return self._make_request('PUT', f'/api/products/{product_id}', data=product_data)
+        return self._write('PUT', f'/api/products/{product_id}', data=product_data)
 
     def delete_product(self, product_id):
         """Delete a product"""
-        return self._make_request('DELETE', f'/api/products/{product_id}')
+        return self._write('DELETE', f'/api/products/{product_id}')
 
     # ========================================
     # SALES ENDPOINTS
     # ========================================
 
-    def get_sales(self, limit=1000, date_from=None, date_to=None):
-        """Get sales data with optional filters"""
+    def _sales_list(self, limit, date_from, date_to):
         params = {'limit': limit}
         if date_from:
             params['date_from'] = date_from
         if date_to:
             params['date_to'] = date_to
+        return self._get_list('/api/sales', params, keys=('sales',))
+
+    def get_sales(self, limit=1000, date_from=None, date_to=None):
+        """Get sales data with optional filters"""
+        return self._sales_list(limit, date_from, date_to).data
+
+    def get_sale_records(self, limit=1000, date_from=None, date_to=None):
+        """Sales as SaleRecords (same filters as get_sales)"""
+        return self._sales_list(limit, date_from, date_to).records(SaleRecord)
+
+    def get_sales_after(self, after_id, limit=500, date_from=None):
+        """
+        Sales with id > after_id, oldest first (uncached; for high-water mark polling)
 
+        Returns:
+            list or None: None if the call failed, so the caller keeps its mark
+        """
+        params = {'after_id': after_id, 'limit': limit}
+        if date_from:
+            params['date_from'] = date_from
         result = self._make_request('GET', '/api/sales', params=params)
-        if result.get('success', True):
-            return result.get('data', result.get('sales', []))
-        return []
+        if not result.get('success', True):
+            return None
+        return result.get('data', result.get('sales', []))
 
     def get_sales_summary(self, period='today'):
         """Get sales summary (today, week, month)"""
@@ -108,10 +968,11 @@ class APIService:
 
     def get_recipes(self):
         """Get all recipes with ingredients"""
-        result = self._make_request('GET', '/api/recipes')
-        if result.get('success', True):
-            return result.get('data', result.get('recipes', []))
-        return []
+        return self._get_list('/api/recipes', keys=('recipes',)).data
+
+    def get_recipe_records(self):
+        """All recipes (with ingredients) as RecipeRecords"""
+        return self._get_list('/api/recipes', keys=('recipes',)).records(RecipeRecord)
 
     def get_recipe(self, recipe_id):
         """Get a single recipe by ID"""
@@ -122,15 +983,15 @@ class APIService:
 
     def add_recipe(self, recipe_data):
         """Add a new recipe"""
-        return self._make_request('POST', '/api/recipes', data=recipe_data)
+        return self._write('POST', '/api/recipes', data=recipe_data)
 
     def update_recipe(self, recipe_id, recipe_data):
         """Update an existing recipe"""
-        return self._make_request('PUT', f'/api/recipes/{recipe_id}', data=recipe_data)
+        return self._write('PUT', f'/api/recipes/{recipe_id}', data=recipe_data)
 
     def delete_recipe(self, recipe_id):
         """Delete a recipe"""
-        return self._make_request('DELETE', f'/api/recipes/{recipe_id}')
+        return self._write('DELETE', f'/api/recipes/{recipe_id}')
 
     # ========================================
     # RECIPE INGREDIENTS ENDPOINTS
@@ -205,7 +1066,7 @@ class APIService:
 
     def add_waste_log(self, waste_data):
         """Add a new waste log entry"""
-        return self._make_request('POST', '/api/waste', data=waste_data)
+        return self._write('POST', '/api/waste', data=waste_data)
 
     # ========================================
     # INVENTORY ENDPOINTS
@@ -213,11 +1074,26 @@ class APIService:
 
     def transfer_inventory(self, product_id, quantity):
         """Transfer stock from Inventory A to B"""
-        return self._make_request('POST', '/api/products/transfer', data={
+        return self._write('POST', '/api/products/transfer', data={
             'firebaseId': product_id,
             'quantity': quantity
         })
 
+    def transfer_inventory_bulk(self, items):
+        """
+        Transfer several products from Inventory A to B in one transaction
+
+        Args:
+            items: [(product_id, quantity), ...]
+
+        Returns:
+            dict: Node's response; 'results' holds one entry per line, and
+            nothing is transferred unless every line succeeds
+        """
+        return self._write('POST', '/api/products/transfer/bulk', data={
+            'items': [{'firebaseId': product_id, 'quantity': quantity} for product_id, quantity in items]
+        })
+
     def update_inventory(self, product_id, inventory_a=None, inventory_b=None):
         """Update product inventory"""
         data = {'product_id': product_id}
@@ -225,7 +1101,7 @@ class APIService:
             data['inventory_a'] = inventory_a
         if inventory_b is not None:
             data['inventory_b'] = inventory_b
-        return self._make_request('PUT', f'/api/products/{product_id}/inventory', data=data)
+        return self._write('PUT', f'/api/products/{product_id}/inventory', data=data)
 
     # ========================================
     # HEALTH CHECK
@@ -235,11 +1111,19 @@ class APIService:
         """Check if the API is reachable"""
         try:
             result = self._make_request('GET', '/api/health')
+            if not result.get('success', True):
+                return {
+                    'status': 'unhealthy',
+                    'api_url': self.base_url,
+                    'message': result.get('error', 'API health check failed'),
+                    'circuit_breakers': self.breaker_states(),
+                }
             return {
                 'status': 'healthy',
                 'api_url': self.base_url,
                 'message': 'API connection successful',
-                'data': result
+                'data': result,
+                'circuit_breakers': self.breaker_states(),
             }
         except Exception as e:
             return {
@@ -0,0 +1,31 @@
+"""
+Node.js API response shapes
+
+Rows of the mobile tables formatted the way nodejs-api/routes returns them.
+Shared by the API stand-in (dashboard/api_standin.py) and the orm data
+source (dashboard/data_sources.py), so both hand the views the same dicts
+as the real API.
+"""
+
+
+def format_ingredient(row):
+    return {
+        'id': row['firebase_id'],
+        'ingredientFirebaseId': row['ingredient_firebase_id'],
+        'ingredientName': row['ingredient_name'],
+        'quantity': row['quantity_needed'],
+        'quantityNeeded': row['quantity_needed'],
+        'unit': row['unit'],
+    }
+
+
+def format_recipe(recipe, ingredients):
+    return {
+        'id': recipe['firebase_id'],
+        'productFirebaseId': recipe['product_firebase_id'],
+        'productName': recipe['product_name'],
+        'productNumber': recipe['product_number'],
+        'createdAt': recipe.get('created_at'),
+        'updatedAt': recipe.get('updated_at'),
+        'ingredients': [format_ingredient(row) for row in ingredients],
+    }
@@ -0,0 +1,819 @@
+"""
+Local stand-in for the Node.js API
+
+A small WSGI application that serves the endpoints APIService calls
+(/api/products, /api/sales, /api/recipes, /api/products/transfer[/bulk],
+/api/waste, /api/waste-logs, /api/audit-logs, /api/health) straight from the
+Django database, with the same JSON shapes as nodejs-api/routes. It lets the
+web tier be load-tested and benchmarked without Node.js or PostgreSQL:
+
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py run_api_standin --latency-ms 40 --failure-rate 0.02
+    API_BASE_URL=http://127.0.0.1:3000 python manage.py runserver
+
+Faults are injected before a request is handled:
+- latency: latency_ms plus uniform jitter of +/- jitter_ms
+- failure_rate: share of requests answered with failure_status (Node's 500 body)
+- hang_rate: share of requests that sleep hang_seconds first (longer than
+  API_TIMEOUT, so the client sees a timeout)
+
+Queries mirror the SQL in nodejs-api/routes; writes run in a transaction.
+Responses are negotiated like nodejs-api/middleware/transport.js does
+(column-oriented list bodies, gzip / brotli); negotiate=False serves plain
+JSON only, like an older Node.js API. Successful GETs carry Express's weak
+ETag and are answered with an empty 304 when If-None-Match matches it.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .api_service import COLUMNS_MEDIA_TYPE
+from .api_shapes import format_ingredient, format_recipe
+from .metrics import REQUEST_ID_HEADER
+
+try:
+    import brotli
+except ImportError:  # optional: br responses
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+STANDIN_VERSION = '1.0.0-standin'
+
+
+class APIError(Exception):
+    """Ends a handler with a Node-style {'success': False, 'message': ...} response"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ========================================
+# SQL HELPERS
+# ========================================
+
+def fetch_rows(sql, params=()):
+    """Rows of a query as dicts keyed by column name (like node-postgres rows)"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, map(aware, row))) for row in cursor.fetchall()]
+
+
+def aware(value):
+    """Raw SQLite cursors return naive UTC datetimes; serialize them with a zone like Node does"""
+    if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def fetch_one(sql, params=()):
+    rows = fetch_rows(sql, params)
+    return rows[0] if rows else None
+
+
+def execute(sql, params=()):
+    """Run a write statement; returns the affected row count"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def db_datetime(value=None):
+    """A datetime as a raw query parameter, stored the way the ORM stores it"""
+    return connection.ops.adapt_datetimefield_value(value or timezone.now())
+
+
+def date_param(value):
+    """A date_from / date_to query value; full timestamps are compared like PostgreSQL would"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        return value
+    return db_datetime(parsed)
+
+
+def to_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        raise APIError(400, f'Invalid number: {value}')
+
+
+def filtered_query(table, date_column, params, filters=(), after_id=False):
+    """
+    SELECT * with the optional equality filters, date range and limit the
+    Node routes accept; with after_id=True also `?after_id=N` (rows with
+    id > N, oldest first)
+    """
+    sql = f'SELECT * FROM {table} WHERE 1=1'
+    values = []
+    for param, column in filters:
+        if params.get(param):
+            sql += f' AND {column} = %s'
+            values.append(params[param])
+    if params.get('date_from'):
+        sql += f' AND {date_column} >= %s'
+        values.append(date_param(params['date_from']))
+    if params.get('date_to'):
+        sql += f' AND {date_column} <= %s'
+        values.append(date_param(params['date_to']))
+    paged_by_id = after_id and params.get('after_id')
+    if paged_by_id:
+        sql += ' AND id > %s'
+        values.append(int(params['after_id']))
+    sql += ' ORDER BY id ASC' if paged_by_id else f' ORDER BY {date_column} DESC'
+    if params.get('limit'):
+        sql += ' LIMIT %s'
+        values.append(int(params['limit']))
+    return fetch_rows(sql, values)
+
+
+# ========================================
+# PRODUCTS
+# ========================================
+
+PRODUCT_COLUMNS = ('name', 'category', 'price', 'quantity', 'inventory_a', 'inventory_b',
+                   'cost_per_unit', 'unit', 'image_uri')
+
+
+def list_products(params, body):
+    rows = fetch_rows('SELECT * FROM products ORDER BY name ASC')
+    return 200, {'success': True, 'data': rows, 'count': len(rows)}
+
+
+def get_product(params, body, product_id):
+    product = fetch_one('SELECT * FROM products WHERE firebase_id = %s', [product_id])
+    if product is None:
+        raise APIError(404, 'Product not found')
+    return 200, {'success': True, 'data': product}
+
+
+def create_product(params, body):
+    now = db_datetime()
+    with transaction.atomic():
+        execute(
+            """INSERT INTO products
+               (firebase_id, name, category, price, quantity, inventory_a, inventory_b, cost_per_unit,
+                unit, image_uri, stock, created_at, updated_at)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 0, %s, %s)""",
+            [body.get('firebase_id'), body.get('name'), body.get('category'), body.get('price') or 0,
+             body.get('quantity') or 0, body.get('inventory_a') or 0, body.get('inventory_b') or 0,
+             body.get('cost_per_unit') or 0, body.get('unit') or 'pcs', body.get('image_uri') or '',
+             now, now]
+        )
+        product = fetch_one('SELECT * FROM products WHERE firebase_id = %s', [body.get('firebase_id')])
+    return 201, {'success': True, 'message': 'Product created successfully', 'data': product}
+
+
+def save_product_fields(product_id, updates):
+    """UPDATE the given (column, value) pairs of a product and return the updated row"""
+    assignments = ''.join(f'{column} = %s, ' for column, _ in updates)
+    with transaction.atomic():
+        updated = execute(
+            f'UPDATE products SET {assignments}updated_at = %s WHERE firebase_id = %s',
+            [value for _, value in updates] + [db_datetime(), product_id]
+        )
+        if not updated:
+            raise APIError(404, 'Product not found')
+        return fetch_one('SELECT * FROM products WHERE firebase_id = %s', [product_id])
+
+
+def update_product(params, body, product_id):
+    product = save_product_fields(product_id, [(column, body[column]) for column in PRODUCT_COLUMNS if column in body])
+    return 200, {'success': True, 'message': 'Product updated successfully', 'data': product}
+
+
+def update_inventory(params, body, product_id):
+    updates = [(column, body[column]) for column in ('inventory_a', 'inventory_b') if column in body]
+    if 'inventory_b' in body:
+        # Keep quantity in sync with inventory_b
+        updates.append(('quantity', body['inventory_b']))
+    product = save_product_fields(product_id, updates)
+    return 200, {'success': True, 'message': 'Inventory updated successfully', 'data': product}
+
+
+def delete_product(params, body, product_id):
+    with transaction.atomic():
+        product = fetch_one('SELECT * FROM products WHERE firebase_id = %s', [product_id])
+        if product is None:
+            raise APIError(404, 'Product not found')
+        execute('DELETE FROM products WHERE firebase_id = %s', [product_id])
+    return 200, {'success': True, 'message': f'Product "{product["name"]}" deleted successfully'}
+
+
+def transfer_inventory(params, body):
+    firebase_id = body.get('firebaseId')
+    quantity = to_float(body.get('quantity'))
+
+    if not firebase_id or not quantity:
+        raise APIError(400, 'Missing required fields: firebaseId and quantity')
+    if quantity <= 0:
+        raise APIError(400, 'Quantity must be greater than 0')
+
+    with transaction.atomic():
+        product = fetch_one('SELECT * FROM products WHERE firebase_id = %s', [firebase_id])
+        if product is None:
+            raise APIError(404, 'Product not found')
+
+        inventory_a = float(product['inventory_a'] or 0)
+        inventory_b = float(product['inventory_b'] or 0)
+        if inventory_a < quantity:
+            raise APIError(
+                400, f'Insufficient stock in Inventory A. Available: {inventory_a}, Requested: {quantity}'
+            )
+
+        new_a, new_b = inventory_a - quantity, inventory_b + quantity
+        execute(
+            'UPDATE products SET inventory_a = %s, inventory_b = %s, quantity = %s, updated_at = %s '
+            'WHERE firebase_id = %s',
+            [new_a, new_b, new_b, db_datetime(), firebase_id]
+        )
+
+    return 200, {
+        'success': True,
+        'message': f'Successfully transferred {body.get("quantity")} units to Inventory B',
+        'newInventoryA': new_a,
+        'newInventoryB': new_b,
+    }
+
+
+MAX_BULK_TRANSFER_ITEMS = 500
+
+
+def check_transfer_lines(items, products):
+    """
+    Per-line results of a bulk transfer against one stock snapshot, and the
+    total quantity per product; lines for the same product draw on the same stock
+    """
+    available = {}
+    totals = {}
+    results = []
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        firebase_id = str(item.get('firebaseId') or '')
+        quantity = to_float(item.get('quantity'))
+        line = {'index': index, 'firebaseId': firebase_id, 'quantity': quantity}
+
+        product = products.get(firebase_id)
+        if not firebase_id or quantity <= 0:
+            results.append({**line, 'success': False, 'message': 'Missing firebaseId or quantity not greater than 0'})
+            continue
+        if product is None:
+            results.append({**line, 'success': False, 'message': 'Product not found'})
+            continue
+
+        stock = available.get(firebase_id, float(product['inventory_a'] or 0))
+        if stock < quantity:
+            results.append({
+                **line, 'productName': product['name'], 'success': False,
+                'message': f'Insufficient stock in Inventory A. Available: {stock}, Requested: {quantity}',
+            })
+            continue
+
+        available[firebase_id] = stock - quantity
+        totals[firebase_id] = totals.get(firebase_id, 0) + quantity
+        results.append({**line, 'productName': product['name'], 'success': True})
+    return results, totals
+
+
+def transfer_inventory_bulk(params, body):
+    items = body.get('items')
+    if not isinstance(items, list) or not items:
+        raise APIError(400, 'Missing required field: items (list of { firebaseId, quantity })')
+    if len(items) > MAX_BULK_TRANSFER_ITEMS:
+        raise APIError(400, f'Too many items: {len(items)} (maximum {MAX_BULK_TRANSFER_ITEMS})')
+
+    with transaction.atomic():
+        firebase_ids = list({str(item.get('firebaseId') or '') for item in items if isinstance(item, dict)})
+        lock = ' FOR UPDATE' if connection.features.has_select_for_update else ''
+        snapshot = fetch_rows(
+            f'SELECT firebase_id, name, inventory_a, inventory_b FROM products '
+            f'WHERE firebase_id IN ({", ".join(["%s"] * len(firebase_ids))}){lock}',
+            firebase_ids,
+        ) if firebase_ids else []
+        results, totals = check_transfer_lines(items, {row['firebase_id']: row for row in snapshot})
+
+        failed = sum(1 for result in results if not result['success'])
+        if failed:
+            return 400, {
+                'success': False,
+                'message': f'No stock was transferred: {failed} of {len(items)} lines failed',
+                'results': results,
+            }
+
+        # One set-based UPDATE for the whole batch
+        lines = ' UNION ALL '.join(['SELECT %s AS firebase_id, %s AS quantity'] * len(totals))
+        updated = execute(
+            f"""UPDATE products
+                SET inventory_a = COALESCE(inventory_a, 0) - t.quantity,
+                    inventory_b = COALESCE(inventory_b, 0) + t.quantity,
+                    quantity = COALESCE(inventory_b, 0) + t.quantity,
+                    updated_at = %s
+                FROM ({lines}) AS t
+                WHERE products.firebase_id = t.firebase_id AND COALESCE(products.inventory_a, 0) >= t.quantity""",
+            [db_datetime()] + [value for pair in totals.items() for value in pair],
+        )
+        if updated != len(totals):
+            transaction.set_rollback(True)
+            return 409, {
+                'success': False,
+                'message': 'Stock changed during the transfer, nothing was transferred',
+                'results': results,
+            }
+
+        new_inventory = {
+            row['firebase_id']: row for row in fetch_rows(
+                f'SELECT firebase_id, inventory_a, inventory_b FROM products '
+                f'WHERE firebase_id IN ({", ".join(["%s"] * len(totals))})',
+                list(totals),
+            )
+        }
+
+    return 200, {
+        'success': True,
+        'message': f'Successfully transferred {sum(totals.values())} units of {len(totals)} products to Inventory B',
+        'count': len(items),
+        'results': [
+            {
+                **result,
+                'newInventoryA': float(new_inventory[result['firebaseId']]['inventory_a']),
+                'newInventoryB': float(new_inventory[result['firebaseId']]['inventory_b']),
+            }
+            for result in results
+        ],
+    }
+
+
+# ========================================
+# SALES
+# ========================================
+
+SUMMARY_PERIOD_DAYS = {'today': 0, 'week': 7, 'month': 30}
+
+
+def list_sales(params, body):
+    rows = filtered_query('sales', 'order_date', params, after_id=True)
+    return 200, {'success': True, 'data': rows, 'count': len(rows)}
+
+
+def sales_summary(params, body):
+    sql = """SELECT COUNT(*) AS total_orders, SUM(total) AS total_revenue,
+                    SUM(quantity) AS total_items_sold, AVG(total) AS average_order_value
+             FROM sales WHERE 1=1"""
+    values = []
+    days = SUMMARY_PERIOD_DAYS.get(params.get('period'))
+    if days is not None:
+        sql += ' AND order_date >= %s'
+        start_of_today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        values.append(db_datetime(start_of_today - timedelta(days=days)))
+    return 200, {'success': True, 'data': fetch_one(sql, values)}
+
+
+# ========================================
+# RECIPES
+# ========================================
+
+def ingredients_by_recipe(recipe_ids):
+    grouped = {recipe_id: [] for recipe_id in recipe_ids}
+    if recipe_ids:
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        for row in fetch_rows(
+            f'SELECT * FROM recipe_ingredients WHERE recipe_firebase_id IN ({placeholders})', list(recipe_ids)
+        ):
+            grouped[row['recipe_firebase_id']].append(row)
+    return grouped
+
+
+def list_recipes(params, body):
+    recipes = fetch_rows('SELECT * FROM recipes ORDER BY product_name ASC')
+    ingredients = ingredients_by_recipe([recipe['firebase_id'] for recipe in recipes])
+    data = [format_recipe(recipe, ingredients[recipe['firebase_id']]) for recipe in recipes]
+    return 200, {'success': True, 'data': data, 'count': len(data)}
+
+
+def get_recipe(params, body, recipe_id):
+    recipe = fetch_one('SELECT * FROM recipes WHERE firebase_id = %s', [recipe_id])
+    if recipe is None:
+        raise APIError(404, 'Recipe not found')
+    return 200, {'success': True, 'data': format_recipe(recipe, ingredients_by_recipe([recipe_id])[recipe_id])}
+
+
+def get_recipe_ingredients(params, body, recipe_id):
+    rows = fetch_rows('SELECT * FROM recipe_ingredients WHERE recipe_firebase_id = %s', [recipe_id])
+    return 200, {'success': True, 'data': [format_ingredient(row) for row in rows], 'count': len(rows)}
+
+
+def insert_ingredients(recipe_id, ingredients, now):
+    for ingredient in ingredients:
+        execute(
+            """INSERT INTO recipe_ingredients
+               (firebase_id, recipe_firebase_id, ingredient_firebase_id, ingredient_name, quantity_needed,
+                unit, created_at)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            [f'ingredient_{recipe_id}_{ingredient.get("ingredientFirebaseId")}_{int(time.time() * 1000)}',
+             recipe_id, ingredient.get('ingredientFirebaseId'), ingredient.get('ingredientName'),
+             ingredient.get('quantityNeeded'), ingredient.get('unit') or 'g', now]
+        )
+
+
+def create_recipe(params, body):
+    product_id = body.get('productFirebaseId')
+    product_name = body.get('productName')
+    ingredients = body.get('ingredients') or []
+
+    if not product_id or not product_name:
+        raise APIError(400, 'Missing required fields: productFirebaseId and productName')
+    if not ingredients:
+        raise APIError(400, 'At least one ingredient is required')
+
+    recipe_id = f'recipe_{product_id}_{int(time.time() * 1000)}'
+    now = db_datetime()
+    with transaction.atomic():
+        execute(
+            """INSERT INTO recipes (firebase_id, product_firebase_id, product_name, product_number,
+                                    created_at, updated_at)
+               VALUES (%s, %s, %s, %s, %s, %s)""",
+            [recipe_id, product_id, product_name, body.get('productNumber') or 0, now, now]
+        )
+        insert_ingredients(recipe_id, ingredients, now)
+        recipe = fetch_one('SELECT * FROM recipes WHERE firebase_id = %s', [recipe_id])
+
+    return 201, {
+        'success': True,
+        'message': f'Recipe for {product_name} created successfully',
+        'data': {'id': recipe_id, **recipe},
+    }
+
+
+def update_recipe(params, body, recipe_id):
+    now = db_datetime()
+    with transaction.atomic():
+        if fetch_one('SELECT id FROM recipes WHERE firebase_id = %s', [recipe_id]) is None:
+            raise APIError(404, 'Recipe not found')
+        execute(
+            'UPDATE recipes SET product_firebase_id = %s, product_name = %s, product_number = %s, '
+            'updated_at = %s WHERE firebase_id = %s',
+            [body.get('productFirebaseId'), body.get('productName'), body.get('productNumber') or 0, now, recipe_id]
+        )
+        execute('DELETE FROM recipe_ingredients WHERE recipe_firebase_id = %s', [recipe_id])
+        insert_ingredients(recipe_id, body.get('ingredients') or [], now)
+    return 200, {'success': True, 'message': f'Recipe for {body.get("productName")} updated successfully'}
+
+
+def delete_recipe(params, body, recipe_id):
+    with transaction.atomic():
+        recipe = fetch_one('SELECT * FROM recipes WHERE firebase_id = %s', [recipe_id])
+        if recipe is None:
+            raise APIError(404, 'Recipe not found')
+        execute('DELETE FROM recipe_ingredients WHERE recipe_firebase_id = %s', [recipe_id])
+        execute('DELETE FROM recipes WHERE firebase_id = %s', [recipe_id])
+    return 200, {'success': True, 'message': f'Recipe for {recipe["product_name"]} deleted successfully'}
+
+
+# ========================================
+# WASTE AND AUDIT LOGS
+# ========================================
+
+def list_waste_logs(params, body):
+    rows = filtered_query('waste_logs', 'waste_date', params)
+    return 200, {'success': True, 'data': rows, 'count': len(rows)}
+
+
+def add_waste_log(params, body):
+    firebase_id = body.get('productFirebaseId')
+    quantity = to_float(body.get('quantity'))
+
+    if not firebase_id or not quantity:
+        raise APIError(400, 'Missing required fields: productFirebaseId and quantity')
+    if quantity <= 0:
+        raise APIError(400, 'Quantity must be greater than 0')
+
+    now = db_datetime()
+    with transaction.atomic():
+        product = fetch_one('SELECT * FROM products WHERE firebase_id = %s', [firebase_id])
+        if product is None:
+            raise APIError(404, 'Product not found')
+
+        inventory_b = float(product['inventory_b'] or 0)
+        if inventory_b < quantity:
+            raise APIError(
+                400, f'Insufficient stock in Inventory B. Available: {inventory_b}, Requested: {quantity}'
+            )
+
+        execute(
+            """INSERT INTO waste_logs
+               (product_firebase_id, product_name, category, quantity, reason, recorded_by, waste_date, created_at)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+            [firebase_id, body.get('productName'), body.get('category'), quantity, body.get('reason'),
+             body.get('recordedBy') or 'system', now, now]
+        )
+        new_b = inventory_b - quantity
+        execute(
+            'UPDATE products SET inventory_b = %s, quantity = %s, updated_at = %s WHERE firebase_id = %s',
+            [new_b, new_b, now, firebase_id]
+        )
+
+    return 201, {
+        'success': True,
+        'message': f'Successfully recorded {body.get("quantity")} units of {body.get("productName")} as waste',
+        'newInventoryB': new_b,
+    }
+
+
+def list_audit_logs(params, body):
+    rows = filtered_query('audit_trail', 'timestamp', params, filters=(('user', 'user_name'), ('action', 'action')))
+    return 200, {'success': True, 'data': rows, 'count': len(rows)}
+
+
+def add_audit_log(params, body):
+    if not body.get('action') or not body.get('user_id') or not body.get('user_name'):
+        raise APIError(400, 'Missing required fields: action, user_id, and user_name')
+    with transaction.atomic():
+        execute(
+            'INSERT INTO audit_trail (action, user_id, user_name, details, timestamp) VALUES (%s, %s, %s, %s, %s)',
+            [body['action'], body['user_id'], body['user_name'], body.get('details') or '', db_datetime()]
+        )
+        row = fetch_one('SELECT * FROM audit_trail ORDER BY id DESC LIMIT 1')
+    return 201, {'success': True, 'message': 'Audit log created successfully', 'data': row}
+
+
+def health(params, body):
+    return 200, {
+        'status': 'healthy',
+        'message': 'Banelo API stand-in is running',
+        'timestamp': timezone.now(),
+        'version': STANDIN_VERSION,
+    }
+
+
+# ========================================
+# ROUTING
+# ========================================
+
+ID = r'([^/]+)'
+
+ROUTES = [
+    ('GET', r'/api/health', health),
+    ('GET', r'/api/products', list_products),
+    ('POST', r'/api/products', create_product),
+    ('POST', r'/api/products/transfer', transfer_inventory),
+    ('POST', r'/api/products/transfer/bulk', transfer_inventory_bulk),
+    ('GET', rf'/api/products/{ID}', get_product),
+    ('PUT', rf'/api/products/{ID}', update_product),
+    ('DELETE', rf'/api/products/{ID}', delete_product),
+    ('PUT', rf'/api/products/{ID}/inventory', update_inventory),
+    ('GET', r'/api/sales', list_sales),
+    ('GET', r'/api/sales/summary', sales_summary),
+    ('GET', r'/api/recipes', list_recipes),
+    ('POST', r'/api/recipes', create_recipe),
+    ('GET', rf'/api/recipes/{ID}', get_recipe),
+    ('PUT', rf'/api/recipes/{ID}', update_recipe),
+    ('DELETE', rf'/api/recipes/{ID}', delete_recipe),
+    ('GET', rf'/api/recipes/{ID}/ingredients', get_recipe_ingredients),
+    ('GET', r'/api/waste', list_waste_logs),
+    ('POST', r'/api/waste', add_waste_log),
+    ('GET', r'/api/waste-logs', list_waste_logs),
+    ('POST', r'/api/waste-logs', add_waste_log),
+    ('GET', r'/api/audit-logs', list_audit_logs),
+    ('POST', r'/api/audit-logs', add_audit_log),
+]
+
+COMPILED_ROUTES = [(method, re.compile(f'^{pattern}/?$'), handler) for method, pattern, handler in ROUTES]
+
+
+def resolve(method, path):
+    """(handler, url args) or (None, None)"""
+    for route_method, pattern, handler in COMPILED_ROUTES:
+        if route_method == method:
+            match = pattern.match(path)
+            if match:
+                return handler, match.groups()
+    return None, None
+
+
+# ========================================
+# TRANSPORT NEGOTIATION
+# ========================================
+
+# Smaller bodies are not worth compressing (the Node compression default)
+COMPRESSION_THRESHOLD = 1024
+
+
+def header_qualities(header):
+    """{token: q} of an Accept / Accept-Encoding header"""
+    qualities = {}
+    for item in (header or '').split(','):
+        token, _, parameters = item.partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(';'):
+            name, _, value = parameter.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token] = quality
+    return qualities
+
+
+def wants_columns(accept):
+    """True if the client prefers column-oriented bodies to plain JSON"""
+    qualities = header_qualities(accept)
+    json_quality = max(qualities.get(token, 0) for token in ('application/json', 'application/*', '*/*'))
+    return qualities.get(COLUMNS_MEDIA_TYPE, 0) > json_quality
+
+
+def to_columns(rows):
+    """Row objects -> {'columns': [...], 'rows': [[...], ...]} (missing keys become null)"""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    return {'columns': columns, 'rows': [[row.get(column) for column in columns] for row in rows]}
+
+
+def compress(body, accept_encoding):
+    """(body, Content-Encoding or None) for the best coding the client accepts"""
+    if len(body) < COMPRESSION_THRESHOLD:
+        return body, None
+    qualities = header_qualities(accept_encoding)
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        if qualities.get(coding, qualities.get('*', 0)) > 0:
+            if coding == 'br':
+                return brotli.compress(body, quality=4), coding
+            return gzip.compress(body, compresslevel=6), coding
+    return body, None
+
+
+def etag(body):
+    """Express's default weak ETag of a response body (before compression)"""
+    digest = base64.b64encode(hashlib.sha1(body).digest()).decode()[:27]
+    return f'W/"{len(body):x}-{digest}"'
+
+
+def etag_matches(if_none_match, tag):
+    """Weak comparison against an If-None-Match list, like Express's `fresh`"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = tag[2:] if tag.startswith('W/') else tag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+# ========================================
+# WSGI APPLICATION
+# ========================================
+
+class StandInAPI:
+    """WSGI app serving the routes above, with injected latency and failures"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, failure_status=500,
+                 hang_rate=0.0, hang_seconds=35.0, seed=None, negotiate=True):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.negotiate = negotiate
+        self.random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def roll(self):
+        """(delay seconds, fail?, hang?) for one request"""
+        with self._random_lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            fail = self.random.random() < self.failure_rate
+            hang = self.random.random() < self.hang_rate
+        return max(0.0, (self.latency_ms + jitter) / 1000), fail, hang
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO') or '/'
+        request_id = environ.get('HTTP_' + REQUEST_ID_HEADER.upper().replace('-', '_'))
+
+        delay, fail, hang = self.roll()
+        if hang:
+            delay += self.hang_seconds
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            status, payload = self.failure_status, {
+                'success': False, 'message': 'Internal server error', 'error': 'Injected failure'
+            }
+        else:
+            status, payload = self.dispatch(method, path, environ)
+
+        logger.debug("%s %s -> %s (%.0fms injected) [%s]", method, path, status, delay * 1000, request_id)
+
+        status, body, headers = self.encode(method, environ, status, payload)
+        if request_id:
+            headers.append((REQUEST_ID_HEADER, request_id))
+        start_response(f'{status} {"OK" if status < 400 else "Error"}', headers)
+        return [body]
+
+    def encode(self, method, environ, status, payload):
+        """
+        (status, body, headers) of a response, in the format and coding the
+        client asked for. Successful GETs get Express's weak ETag and an empty
+        304 when If-None-Match matches it.
+        """
+        content_type = 'application/json; charset=utf-8'
+        if (self.negotiate and method == 'GET' and wants_columns(environ.get('HTTP_ACCEPT'))
+                and isinstance(payload.get('data'), list) and payload['data']
+                and isinstance(payload['data'][0], dict)):
+            payload = {**payload, 'data': to_columns(payload['data'])}
+            content_type = f'{COLUMNS_MEDIA_TYPE}; charset=utf-8'
+
+        body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+        headers = [('Content-Type', content_type)]
+        if method == 'GET' and 200 <= status < 300:
+            tag = etag(body)
+            if etag_matches(environ.get('HTTP_IF_NONE_MATCH'), tag):
+                return 304, b'', [('ETag', tag)]
+            headers.append(('ETag', tag))
+        if self.negotiate:
+            body, coding = compress(body, environ.get('HTTP_ACCEPT_ENCODING'))
+            if coding:
+                headers.append(('Content-Encoding', coding))
+            headers.append(('Vary', 'Accept, Accept-Encoding'))
+        headers.append(('Content-Length', str(len(body))))
+        return status, body, headers
+
+    def dispatch(self, method, path, environ):
+        handler, args = resolve(method, path)
+        if handler is None:
+            return 404, {'success': False, 'message': 'Endpoint not found', 'path': path}
+
+        params = {key: values[-1] for key, values in parse_qs(environ.get('QUERY_STRING', '')).items()}
+
+        close_old_connections()
+        try:
+            body = read_json_body(environ)
+            return handler(params, body, *args)
+        except APIError as e:
+            return e.status, {'success': False, 'message': e.message}
+        except Exception as e:
+            logger.exception("❌ Stand-in error on %s %s: %s", method, path, e)
+            return 500, {'success': False, 'message': 'Internal server error', 'error': str(e)}
+        finally:
+            close_old_connections()
+
+
+def read_json_body(environ):
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if not length:
+        return {}
+    try:
+        return json.loads(environ['wsgi.input'].read(length) or b'{}')
+    except json.JSONDecodeError:
+        raise APIError(400, 'Invalid JSON body')
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """One thread per connection, so concurrent upstream calls overlap like on Node"""
+    daemon_threads = True
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def make_standin_server(host='127.0.0.1', port=3000, **options):
+    return make_server(
+        host, port, StandInAPI(**options),
+        server_class=ThreadingWSGIServer, handler_class=QuietRequestHandler,
+    )
@@ -0,0 +1,220 @@
+"""
+Async API Service - non-blocking Node.js API calls for the async views
+
+Under ASGI the dashboard / inventory / sales / recipes views await the
+Node.js API instead of holding a worker thread for up to API_TIMEOUT, so one
+worker can serve many requests that are all waiting on a slow upstream.
+
+AsyncAPIService mirrors the read side of APIService and shares its base URL,
+timeout, circuit breakers and response cache (writes made through APIService
+still clear it). Calls go through one httpx.AsyncClient per event loop, i.e.
+one shared connection pool per ASGI worker (API_ASYNC_MAX_CONNECTIONS).
+Under WSGI, Django runs each async view on its own short-lived loop, so the
+async views are wrapped in @closes_api_client, which closes that loop's pool
+when the view returns instead of leaking one client per request.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import time
+import uuid
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+
+try:
+    import httpx
+except ImportError:  # only needed by the async views
+    httpx = None
+
+from .api_service import (
+    ProductRecord, RecipeRecord, SaleRecord, conditional_headers, decode_response, error_result,
+    get_api_service, normalize_endpoint, record_api_call, short_circuit_response, transport_headers,
+)
+from .metrics import REQUEST_ID_HEADER, get_request_id, record_upstream_call
+
+logger = logging.getLogger(__name__)
+
+
+API_ASYNC_MAX_CONNECTIONS = getattr(settings, 'API_ASYNC_MAX_CONNECTIONS', 100)
+API_ASYNC_MAX_KEEPALIVE = getattr(settings, 'API_ASYNC_MAX_KEEPALIVE', 20)
+
+
+class AsyncAPIService:
+    """Async read-only client for the Node.js API (see APIService)"""
+
+    def __init__(self, service=None):
+        if httpx is None:
+            raise ImproperlyConfigured('The async views need httpx (pip install httpx)')
+        # Same configuration and response cache as the sync service
+        self.service = service or get_api_service()
+        self.base_url = self.service.base_url
+        self.timeout = self.service.timeout
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        """The pooled client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=API_ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=API_ASYNC_MAX_KEEPALIVE,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the pool of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def _make_request(self, method, endpoint, data=None, params=None, validators=None):
+        """Async counterpart of APIService._make_request (same result dicts and metrics)"""
+        url = f"{self.base_url}{endpoint}"
+        endpoint_label = normalize_endpoint(endpoint)
+        request_id = get_request_id() or uuid.uuid4().hex
+        headers = {REQUEST_ID_HEADER: request_id}
+        if method == 'GET':
+            headers.update(transport_headers())
+            if validators:
+                headers.update(conditional_headers(validators))
+
+        breaker = self.service.breaker(endpoint_label)
+        if not breaker.allow():
+            return short_circuit_response(endpoint_label)
+
+        started = time.perf_counter()
+        status = None
+        size = 0
+        error = None
+
+        try:
+            if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+                raise ValueError(f"Unsupported HTTP method: {method}")
+
+            response = await self._client().request(
+                method, endpoint, params=params, json=data, headers=headers
+            )
+            status = response.status_code
+            size = response.num_bytes_downloaded
+            if status != 304:  # httpx treats every non-2xx as an error
+                response.raise_for_status()
+            return decode_response(status, response.headers, response.json, validators)
+
+        except httpx.ConnectError as e:
+            error = e
+            logger.warning("[API] Connection error: Cannot reach %s [%s]", url, request_id)
+            return {'success': False, 'error': 'Cannot connect to API server', 'data': []}
+        except httpx.TimeoutException as e:
+            error = e
+            logger.warning("[API] Timeout: Request to %s timed out [%s]", url, request_id)
+            return {'success': False, 'error': 'API request timed out', 'data': []}
+        except httpx.HTTPError as e:
+            error = e
+            logger.warning("[API] Request error: %s [%s]", e, request_id)
+            return error_result(str(e), getattr(e, 'response', None))
+        except json.JSONDecodeError as e:
+            error = e
+            logger.warning("[API] Invalid JSON response from %s [%s]", url, request_id)
+            return {'success': False, 'error': 'Invalid API response', 'data': []}
+        finally:
+            elapsed = time.perf_counter() - started
+            breaker.finish(status, error)
+            record_upstream_call(elapsed)
+            record_api_call(method, endpoint_label, status, size, elapsed, error, request_id)
+
+    async def _get_list(self, endpoint, params=None, keys=()):
+        """GET a list endpoint through the shared cache (see APIService._get_list)"""
+        cache_key = self.service._cache_key(endpoint, params)
+        cached = self.service._cached(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await self._make_request(
+            'GET', endpoint, params=params, validators=self.service._validators(cache_key)
+        )
+        return self.service._store(cache_key, result, keys)
+
+    # ========================================
+    # PRODUCTS
+    # ========================================
+
+    async def get_products(self):
+        return (await self._get_list('/api/products', keys=('products',))).data
+
+    async def get_product_records(self):
+        return (await self._get_list('/api/products', keys=('products',))).records(ProductRecord)
+
+    # ========================================
+    # SALES
+    # ========================================
+
+    async def _sales_list(self, limit, date_from, date_to):
+        params = {'limit': limit}
+        if date_from:
+            params['date_from'] = date_from
+        if date_to:
+            params['date_to'] = date_to
+        return await self._get_list('/api/sales', params, keys=('sales',))
+
+    async def get_sales(self, limit=1000, date_from=None, date_to=None):
+        return (await self._sales_list(limit, date_from, date_to)).data
+
+    async def get_sale_records(self, limit=1000, date_from=None, date_to=None):
+        return (await self._sales_list(limit, date_from, date_to)).records(SaleRecord)
+
+    async def get_sales_summary(self, period='today'):
+        return await self._make_request('GET', '/api/sales/summary', params={'period': period})
+
+    # ========================================
+    # RECIPES
+    # ========================================
+
+    async def get_recipes(self):
+        return (await self._get_list('/api/recipes', keys=('recipes',))).data
+
+    async def get_recipe_records(self):
+        return (await self._get_list('/api/recipes', keys=('recipes',))).records(RecipeRecord)
+
+    async def get_recipe_ingredients(self, recipe_id):
+        result = await self._make_request('GET', f'/api/recipes/{recipe_id}/ingredients')
+        if result.get('success', True):
+            return result.get('data', result.get('ingredients', []))
+        return []
+
+
+# Singleton instance
+_async_api_service = None
+
+def get_async_api_service():
+    """Get the singleton async API service instance"""
+    global _async_api_service
+    if _async_api_service is None:
+        _async_api_service = AsyncAPIService()
+    return _async_api_service
+
+
+def closes_api_client(view):
+    """Close the async client after an async view that runs on a per-request loop
+
+    Under ASGI the worker's loop, and with it the pool, outlives the request.
+    Under WSGI the loop is thrown away afterwards, so its client is closed here.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest) and _async_api_service is not None:
+                await _async_api_service.aclose()
+    return wrapper
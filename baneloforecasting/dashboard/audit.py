@@ -0,0 +1,388 @@
+"""
+Buffered audit trail writer
+
+Audit entries are appended to an in-process bounded queue and written by a
+background thread with bulk_create, in batches of AUDIT_BATCH_SIZE or every
+AUDIT_FLUSH_INTERVAL seconds, whichever comes first. Logging an action on the
+request path therefore costs a queue append instead of a database round trip.
+
+If the database is unavailable (or the queue is full) entries are spilled to a
+JSON-lines file in AUDIT_SPOOL_DIR and replayed on the next successful flush.
+Pending entries are flushed when the process exits.
+
+Every worker process shares the spool file, so appends and the replay's
+rename hold an exclusive file lock on it, and each replay moves the file to
+its own per-process name before reading it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the spool is then only locked per process
+    fcntl = None
+
+from .models import AuditTrail, AuditUser
+
+logger = logging.getLogger(__name__)
+
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+AUDIT_ASYNC = getattr(settings, 'AUDIT_ASYNC', True)
+AUDIT_BATCH_SIZE = getattr(settings, 'AUDIT_BATCH_SIZE', 100)
+AUDIT_FLUSH_INTERVAL = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)
+AUDIT_QUEUE_SIZE = getattr(settings, 'AUDIT_QUEUE_SIZE', 10000)
+AUDIT_SPOOL_DIR = getattr(settings, 'AUDIT_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'audit_spool'))
+
+SPOOL_FILENAME = 'audit_spool.jsonl'
+
+
+# ========================================
+# AUDIT WRITER
+# ========================================
+
+class AuditWriter:
+    """Bounded queue + background flusher for AuditTrail rows"""
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                 queue_size=AUDIT_QUEUE_SIZE, spool_dir=AUDIT_SPOOL_DIR):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = os.path.join(spool_dir, SPOOL_FILENAME)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._spool_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._known_users = set()
+
+        self.stats = {'enqueued': 0, 'written': 0, 'spilled': 0, 'replayed': 0, 'flushes': 0}
+
+    # ----------------------------------------
+    # Producer side (request path)
+    # ----------------------------------------
+
+    def submit(self, entry):
+        """Queue one audit entry dict; never blocks and never raises"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+            self.stats['enqueued'] += 1
+        except queue.Full:
+            # Keep the entry durable rather than blocking the request
+            self._spill([entry])
+
+    # ----------------------------------------
+    # Background flusher
+    # ----------------------------------------
+
+    def _ensure_started(self):
+        """Start the flusher lazily (and again in forked worker processes)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+
+    def _collect_batch(self):
+        """Block until batch_size entries arrive or flush_interval elapses"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        """Take everything currently queued"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, batch):
+        """bulk_create one batch; spill it to disk if the database fails"""
+        close_old_connections()
+        try:
+            self._replay_spool()
+            AuditTrail.objects.bulk_create(
+                [AuditTrail(**entry) for entry in batch], batch_size=self.batch_size
+            )
+            self._known_users = record_audit_users(batch, self._known_users)
+            self.stats['written'] += len(batch)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            logger.warning("Could not write audit trail, spilling %s entries to disk: %s", len(batch), e)
+            self._spill(batch)
+
+    def flush(self):
+        """Write everything queued right now (used at shutdown)"""
+        batch = self._drain()
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+
+    def shutdown(self):
+        """Stop the flusher thread and flush what is left"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    # ----------------------------------------
+    # Disk spool
+    # ----------------------------------------
+
+    def _spill(self, entries):
+        """Save entries to the spool file until the database is back"""
+        try:
+            self._append_spool(entries)
+            self.stats['spilled'] += len(entries)
+        except Exception as e:
+            logger.warning("Could not spill audit trail to disk, %s entries lost: %s", len(entries), e)
+
+    @contextmanager
+    def _locked_spool(self):
+        """
+        Open the spool file for appending, holding an exclusive lock on it
+
+        A replay in another process may rename the file while we wait for the
+        lock; reopen until the locked file is the one at spool_path.
+        """
+        with self._spool_lock:
+            os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+            while True:
+                f = open(self.spool_path, 'a', encoding='utf-8')
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    if os.path.exists(self.spool_path) and os.path.samestat(
+                            os.fstat(f.fileno()), os.stat(self.spool_path)):
+                        yield f
+                        return
+                finally:
+                    f.close()
+
+    def _append_spool(self, entries):
+        """Append entries to the JSON-lines spool file (fsynced)"""
+        with self._locked_spool() as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=_encode_datetime) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spool(self):
+        """Load spilled entries back into the database, if any"""
+        if not os.path.exists(self.spool_path):
+            return
+
+        with self._locked_spool():
+            # Private name: another process replaying at the same time takes a later file
+            replay_path = f'{self.spool_path}.{os.getpid()}.{uuid.uuid4().hex}.replay'
+            os.replace(self.spool_path, replay_path)
+
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            entries = [_decode_entry(json.loads(line)) for line in f if line.strip()]
+        if not entries:
+            os.remove(replay_path)
+            return
+
+        try:
+            AuditTrail.objects.bulk_create(
+                [AuditTrail(**entry) for entry in entries], batch_size=self.batch_size
+            )
+        except Exception:
+            # Still down: put the entries back for the next attempt
+            self._append_spool(entries)
+            os.remove(replay_path)
+            raise
+
+        os.remove(replay_path)
+        self._known_users = record_audit_users(entries, self._known_users)
+        self.stats['replayed'] += len(entries)
+        logger.info("✅ Replayed %s spilled audit entries", len(entries))
+
+
+def _encode_datetime(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_entry(entry):
+    if entry.get('timestamp'):
+        entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+    return entry
+
+
+# ========================================
+# DISTINCT USERS LOOKUP
+# ========================================
+# On PostgreSQL and SQLite a trigger on audit_trail adds new user names to
+# audit_users, so rows inserted by the Node.js API (or anything else) are
+# covered too. Other backends rely on record_audit_users().
+
+AUDIT_TABLE = AuditTrail._meta.db_table
+AUDIT_USERS_TABLE = AuditUser._meta.db_table
+AUDIT_USERS_TRIGGER = f'{AUDIT_TABLE}_record_user'
+
+# Adds the name of NEW unless it is empty or already known
+RECORD_USER_SQL = (
+    f'INSERT INTO "{AUDIT_USERS_TABLE}" (user_name, first_seen) '
+    f'SELECT NEW.user_name, COALESCE(NEW."timestamp", CURRENT_TIMESTAMP) '
+    f"WHERE NEW.user_name IS NOT NULL AND NEW.user_name <> '' "
+    f'ON CONFLICT (user_name) DO NOTHING'
+)
+
+
+def create_postgres_audit_users_trigger(cursor):
+    """Row trigger on audit_trail (on a partitioned table it applies to every partition)"""
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION record_audit_user() RETURNS trigger AS $$
+        BEGIN
+            {RECORD_USER_SQL};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{AUDIT_USERS_TRIGGER}" ON "{AUDIT_TABLE}"')
+    cursor.execute(
+        f'CREATE TRIGGER "{AUDIT_USERS_TRIGGER}" AFTER INSERT ON "{AUDIT_TABLE}" '
+        f'FOR EACH ROW EXECUTE FUNCTION record_audit_user()'
+    )
+
+
+def create_sqlite_audit_users_trigger(cursor):
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{AUDIT_USERS_TRIGGER}"')
+    cursor.execute(
+        f'CREATE TRIGGER "{AUDIT_USERS_TRIGGER}" AFTER INSERT ON "{AUDIT_TABLE}" BEGIN '
+        f'{RECORD_USER_SQL}; END'
+    )
+
+
+def create_audit_users_trigger(schema_editor):
+    """Install the trigger and pick up the names written without it (idempotent)"""
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            create_postgres_audit_users_trigger(cursor)
+        elif vendor == 'sqlite':
+            create_sqlite_audit_users_trigger(cursor)
+        else:
+            return
+        cursor.execute(
+            f'INSERT INTO "{AUDIT_USERS_TABLE}" (user_name, first_seen) '
+            f'SELECT user_name, MIN("timestamp") FROM "{AUDIT_TABLE}" '
+            f"WHERE user_name IS NOT NULL AND user_name <> '' GROUP BY user_name "
+            f'ON CONFLICT (user_name) DO NOTHING'
+        )
+
+
+def drop_audit_users_trigger(schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{AUDIT_USERS_TRIGGER}" ON "{AUDIT_TABLE}"')
+            cursor.execute('DROP FUNCTION IF EXISTS record_audit_user()')
+        elif vendor == 'sqlite':
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{AUDIT_USERS_TRIGGER}"')
+
+
+def record_audit_users(entries, known_users=frozenset()):
+    """
+    Add any new user names from written entries to the AuditUser lookup table
+
+    `known_users` is an in-process set of names already stored, so a steady
+    stream of entries from the same users costs no extra queries.
+    Returns the updated set. A no-op where the trigger maintains the table.
+    """
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return known_users
+    new_users = {entry['user_name'] for entry in entries if entry.get('user_name')} - set(known_users)
+    if new_users:
+        AuditUser.objects.bulk_create(
+            [AuditUser(user_name=user_name) for user_name in new_users],
+            ignore_conflicts=True,
+        )
+    return set(known_users) | new_users
+
+
+def get_audit_user_names():
+    """Distinct audit trail user names, from the lookup table"""
+    return list(AuditUser.objects.values_list('user_name', flat=True))
+
+
+# ========================================
+# PUBLIC HELPERS
+# ========================================
+
+_audit_writer = None
+_audit_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Get the process-wide audit writer"""
+    global _audit_writer
+    if _audit_writer is None:
+        with _audit_writer_lock:
+            if _audit_writer is None:
+                _audit_writer = AuditWriter()
+                atexit.register(_audit_writer.shutdown)
+    return _audit_writer
+
+
+def build_audit_entry(action, user, details=''):
+    """Field values for one AuditTrail row"""
+    return {
+        'action': action,
+        'user_id': str(user.id) if hasattr(user, 'id') else '',
+        'user_name': user.username if hasattr(user, 'username') else str(user),
+        'details': details,
+        'timestamp': timezone.now(),
+    }
+
+
+def log_audit(action, user, details=''):
+    """Record an audit trail entry (queued unless AUDIT_ASYNC is off)"""
+    try:
+        entry = build_audit_entry(action, user, details)
+        if AUDIT_ASYNC:
+            get_audit_writer().submit(entry)
+        else:
+            AuditTrail.objects.create(**entry)
+            record_audit_users([entry])
+    except Exception as e:
+        logger.warning("Could not log audit trail: %s", e)
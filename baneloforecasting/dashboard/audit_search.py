@@ -0,0 +1,248 @@
+"""
+Audit trail full-text search
+
+Searches AuditTrail.action and AuditTrail.details through a full-text index
+instead of LIKE scans:
+
+- PostgreSQL: a stored generated tsvector column (search_vector) on
+  audit_trail with a GIN index, ranked with ts_rank_cd.
+- SQLite: an FTS5 shadow table (audit_trail_fts) kept in sync by triggers,
+  ranked with bm25.
+
+The index is maintained by the database itself, so rows written by the
+buffered audit writer (bulk_create) and rows removed by archiving are picked
+up without any application code.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection, connections, router
+
+from .models import AuditTrail
+
+
+AUDIT_TABLE = AuditTrail._meta.db_table
+SEARCH_COLUMN = 'search_vector'
+SEARCH_INDEX = f'{AUDIT_TABLE}_search_idx'
+FTS_TABLE = f'{AUDIT_TABLE}_fts'
+
+# 'simple' keeps product names and user names as-is (no English stemming)
+TEXT_SEARCH_CONFIG = 'simple'
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Matches are counted up to here, so a broad query does not count the
+# whole table; beyond it the total is a lower bound
+SEARCH_COUNT_LIMIT = getattr(settings, 'AUDIT_SEARCH_COUNT_LIMIT', 1000)
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# ========================================
+# INDEX SETUP
+# ========================================
+
+def create_postgres_search_index(cursor):
+    """Add the generated tsvector column and its GIN index (idempotent)"""
+    cursor.execute(
+        f'ALTER TABLE "{AUDIT_TABLE}" ADD COLUMN IF NOT EXISTS "{SEARCH_COLUMN}" tsvector '
+        f"GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', "
+        f"coalesce(\"action\", '') || ' ' || coalesce(\"details\", ''))) STORED"
+    )
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{SEARCH_INDEX}" ON "{AUDIT_TABLE}" USING GIN ("{SEARCH_COLUMN}")'
+    )
+
+
+def drop_postgres_search_index(cursor):
+    cursor.execute(f'DROP INDEX IF EXISTS "{SEARCH_INDEX}"')
+    cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" DROP COLUMN IF EXISTS "{SEARCH_COLUMN}"')
+
+
+def create_sqlite_search_index(cursor):
+    """Create the FTS5 shadow table, its sync triggers, and index existing rows"""
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5('
+        f'action, details, content="{AUDIT_TABLE}", content_rowid="id")'
+    )
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "{AUDIT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"(rowid, action, details) VALUES (new.id, new.action, new.details);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "{AUDIT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, action, details)
+            VALUES ('delete', old.id, old.action, old.details);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE ON "{AUDIT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, action, details)
+            VALUES ('delete', old.id, old.action, old.details);
+            INSERT INTO "{FTS_TABLE}"(rowid, action, details) VALUES (new.id, new.action, new.details);
+        END
+    """)
+    cursor.execute(f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'rebuild\')')
+
+
+def drop_sqlite_search_index(cursor):
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_{suffix}"')
+    cursor.execute(f'DROP TABLE IF EXISTS "{FTS_TABLE}"')
+
+
+def create_search_index(schema_editor):
+    """Create the full-text index for the current database backend"""
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            create_postgres_search_index(cursor)
+        elif vendor == 'sqlite':
+            create_sqlite_search_index(cursor)
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            drop_postgres_search_index(cursor)
+        elif vendor == 'sqlite':
+            drop_sqlite_search_index(cursor)
+
+
+def is_search_supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+# ========================================
+# QUERY PARSING
+# ========================================
+
+def search_terms(query):
+    """Split free text into plain word terms (drops operators and punctuation)"""
+    return TERM_RE.findall(query or '')
+
+
+def to_fts5_query(terms):
+    """Every term must match, the last one as a prefix (search-as-you-type)"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' AND '.join(quoted)
+
+
+def to_tsquery(terms):
+    """Same semantics as to_fts5_query() for PostgreSQL's to_tsquery()"""
+    quoted = [f"'{term}'" for term in terms]
+    quoted[-1] += ':*'
+    return ' & '.join(quoted)
+
+
+# ========================================
+# SEARCH
+# ========================================
+
+def build_filters(alias, db_connection, user_name=None, action=None, date_from=None, date_to=None):
+    """
+    Extra WHERE clauses for the exact-match filters the audit page already has
+
+    Date bounds are adapted the way the ORM stores them on db_connection
+    (SQLite keeps naive UTC text), so they compare correctly in raw SQL.
+    """
+    clauses, params = [], []
+    if user_name:
+        clauses.append(f'{alias}."user_name" = %s')
+        params.append(user_name)
+    if action:
+        clauses.append(f'{alias}."action" = %s')
+        params.append(action)
+    if date_from:
+        clauses.append(f'{alias}."timestamp" >= %s')
+        params.append(db_connection.ops.adapt_datetimefield_value(date_from))
+    if date_to:
+        clauses.append(f'{alias}."timestamp" < %s')
+        params.append(db_connection.ops.adapt_datetimefield_value(date_to))
+    return clauses, params
+
+
+def search_audit_trail(query, page=1, page_size=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Ranked full-text search over audit trail action and details
+
+    Args:
+        query: Free text; all words must match, the last one as a prefix
+        page: 1-based page number
+        page_size: Results per page (capped at MAX_PAGE_SIZE)
+        **filters: Optional user_name, action, date_from, date_to
+
+    Returns:
+        dict: {'total', 'total_exact', 'page', 'page_size', 'results'} where
+              results is a list of (AuditTrail, rank) ordered by relevance,
+              then newest first. Matches are counted up to SEARCH_COUNT_LIMIT
+              (or the end of the page, if further): past that, total is that
+              cap and total_exact is False.
+    """
+    page = max(1, int(page))
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    offset = (page - 1) * page_size
+
+    empty = {'total': 0, 'total_exact': True, 'page': page, 'page_size': page_size, 'results': []}
+
+    terms = search_terms(query)
+    if not terms:
+        return empty
+
+    # Same database the ORM would read from (the replica for reporting reads)
+    db_alias = router.db_for_read(AuditTrail)
+    db_connection = connections[db_alias]
+
+    filter_clauses, filter_params = build_filters('a', db_connection, **filters)
+
+    if db_connection.vendor == 'postgresql':
+        where = [f'a."{SEARCH_COLUMN}" @@ to_tsquery(\'{TEXT_SEARCH_CONFIG}\', %s)'] + filter_clauses
+        match_params = [to_tsquery(terms)] + filter_params
+        from_sql = f'FROM "{AUDIT_TABLE}" a WHERE {" AND ".join(where)}'
+        rank_sql = f'ts_rank_cd(a."{SEARCH_COLUMN}", to_tsquery(\'{TEXT_SEARCH_CONFIG}\', %s))'
+        select_sql = (
+            f'SELECT a."id", {rank_sql} AS rank {from_sql} '
+            f'ORDER BY rank DESC, a."timestamp" DESC LIMIT %s OFFSET %s'
+        )
+        select_params = [to_tsquery(terms)] + match_params + [page_size, offset]
+    elif db_connection.vendor == 'sqlite':
+        where = [f'"{FTS_TABLE}" MATCH %s'] + filter_clauses
+        match_params = [to_fts5_query(terms)] + filter_params
+        from_sql = (
+            f'FROM "{FTS_TABLE}" JOIN "{AUDIT_TABLE}" a ON a."id" = "{FTS_TABLE}".rowid '
+            f'WHERE {" AND ".join(where)}'
+        )
+        # bm25() is lower-is-better; negate it so rank sorts like PostgreSQL
+        select_sql = (
+            f'SELECT a."id", -bm25("{FTS_TABLE}") AS rank {from_sql} '
+            f'ORDER BY rank DESC, a."timestamp" DESC LIMIT %s OFFSET %s'
+        )
+        select_params = match_params + [page_size, offset]
+    else:
+        raise NotImplementedError(f'Full-text search is not available on {db_connection.vendor}')
+
+    # LIMIT cap + 1 tells "exactly cap" from "more than cap"
+    count_cap = max(SEARCH_COUNT_LIMIT, offset + page_size)
+
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM (SELECT 1 {from_sql} LIMIT %s) matches', match_params + [count_cap + 1]
+        )
+        counted = cursor.fetchone()[0]
+        total, total_exact = min(counted, count_cap), counted <= count_cap
+        if total == 0 or offset >= total:
+            return {**empty, 'total': total, 'total_exact': total_exact}
+
+        cursor.execute(select_sql, select_params)
+        ranked = cursor.fetchall()
+
+    # Load the page through the ORM so field values get the usual conversions
+    logs = AuditTrail.objects.using(db_alias).in_bulk([log_id for log_id, _ in ranked])
+    results = [(logs[log_id], rank) for log_id, rank in ranked if log_id in logs]
+
+    return {'total': total, 'total_exact': total_exact, 'page': page, 'page_size': page_size, 'results': results}
@@ -0,0 +1,286 @@
+"""
+Audit trail storage - monthly partitions and retention
+
+On PostgreSQL, audit_trail can be converted into a table declaratively
+partitioned by RANGE(timestamp), one partition per month. Filtered queries
+on a date range then only touch the matching months, and old months can be
+detached and archived as a whole instead of DELETEd row by row.
+
+On other databases (SQLite in development) retention falls back to
+archiving and deleting old rows month by month.
+"""
+
+import csv
+import gzip
+import os
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .audit import create_postgres_audit_users_trigger
+from .audit_search import SEARCH_COLUMN, create_postgres_search_index
+from .models import AuditTrail
+
+
+AUDIT_TABLE = AuditTrail._meta.db_table
+PARTITION_PREFIX = f'{AUDIT_TABLE}_p'
+DEFAULT_PARTITION = f'{AUDIT_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{PARTITION_PREFIX}(\d{{4}})_(\d{{2}})$')
+
+ARCHIVE_COLUMNS = ['id', 'action', 'details', 'user_id', 'user_name', 'timestamp']
+
+
+# ========================================
+# MONTH HELPERS
+# ========================================
+
+def month_start(value):
+    """First instant of the month containing `value` (timezone-aware)"""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    value = timezone.localtime(value)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    """Shift a month start by a number of months"""
+    month_index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def iter_months(first, last):
+    """Month starts from `first` up to and including `last`"""
+    current = month_start(first)
+    last = month_start(last)
+    while current <= last:
+        yield current
+        current = add_months(current, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}'
+
+
+def retention_cutoff(keep_months=None):
+    """Start of the oldest month that is kept"""
+    if keep_months is None:
+        keep_months = settings.AUDIT_RETENTION_MONTHS
+    return add_months(month_start(timezone.now()), -keep_months)
+
+
+# ========================================
+# POSTGRESQL PARTITIONS
+# ========================================
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned():
+    """True if audit_trail is already a partitioned table"""
+    if not is_postgresql():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [AUDIT_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions():
+    """[(partition name, month start)] of attached monthly partitions, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+        """, [AUDIT_TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            month = timezone.make_aware(datetime(int(match.group(1)), int(match.group(2)), 1))
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [f'"{name}"'])
+    return cursor.fetchone()[0]
+
+
+def stored_columns(cursor, table):
+    """Column list of a table without generated columns (search_vector is recomputed)"""
+    cursor.execute(
+        f"SELECT column_name FROM information_schema.columns "
+        f"WHERE table_name = %s AND column_name <> %s ORDER BY ordinal_position",
+        [table, SEARCH_COLUMN]
+    )
+    return ', '.join(f'"{row[0]}"' for row in cursor.fetchall())
+
+
+def create_month_partition(cursor, month):
+    """
+    Create the partition for one month if it does not exist yet
+
+    PostgreSQL refuses a new partition while the DEFAULT partition holds rows
+    for its range, so DEFAULT is detached, those rows are moved into the new
+    partition and DEFAULT is attached again (call this inside a transaction).
+    """
+    name = partition_name(month)
+    if table_exists(cursor, name):
+        return name
+
+    has_default = table_exists(cursor, DEFAULT_PARTITION)
+    if has_default:
+        cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" DETACH PARTITION "{DEFAULT_PARTITION}"')
+
+    cursor.execute(
+        f'CREATE TABLE "{name}" PARTITION OF "{AUDIT_TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+    if has_default:
+        columns = stored_columns(cursor, DEFAULT_PARTITION)
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s '
+            f'RETURNING {columns}) INSERT INTO "{AUDIT_TABLE}" ({columns}) SELECT {columns} FROM moved',
+            [month, add_months(month, 1)]
+        )
+        cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+    return name
+
+
+def convert_to_partitioned(first_month, last_month):
+    """
+    Rebuild audit_trail as a partitioned table (one transaction)
+
+    The existing table is renamed, a partitioned copy is created with the
+    same columns, monthly partitions plus a DEFAULT partition are attached
+    (rows outside the months land in DEFAULT until their month's partition
+    is created, see create_month_partition), the rows are copied across and the old table is dropped. Indexes from
+    AuditTrail.Meta.indexes (and the full-text search index) are recreated
+    on the partitioned parent and cascade to every partition, as does the
+    audit_users trigger.
+    """
+    legacy = f'{AUDIT_TABLE}_legacy'
+    sequence = f'{AUDIT_TABLE}_partitioned_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{AUDIT_TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING GENERATED) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+
+        # The partition key must be part of the primary key
+        cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" ADD PRIMARY KEY ("id", "timestamp")')
+
+        # Own sequence for ids (identity columns are not inherited by LIKE)
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{sequence}"')
+        cursor.execute(
+            f'ALTER TABLE "{AUDIT_TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{sequence}"\')'
+        )
+        cursor.execute(f'ALTER SEQUENCE "{sequence}" OWNED BY "{AUDIT_TABLE}"."id"')
+        cursor.execute(
+            f'SELECT setval(\'"{sequence}"\', COALESCE((SELECT MAX("id") FROM "{legacy}"), 0) + 1, false)'
+        )
+
+        created = [create_month_partition(cursor, month) for month in iter_months(first_month, last_month)]
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{AUDIT_TABLE}" DEFAULT')
+
+        columns = stored_columns(cursor, legacy)
+        cursor.execute(f'INSERT INTO "{AUDIT_TABLE}" ({columns}) SELECT {columns} FROM "{legacy}"')
+        cursor.execute(f'DROP TABLE "{legacy}"')
+
+    # Index names are free again now that the legacy table is gone
+    with transaction.atomic(), connection.schema_editor() as schema_editor:
+        for index in AuditTrail._meta.indexes:
+            schema_editor.add_index(AuditTrail, index)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_postgres_search_index(cursor)
+        create_postgres_audit_users_trigger(cursor)
+
+    return created
+
+
+def ensure_partitions(first_month, last_month):
+    """Create any missing monthly partitions in the given range"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        return [create_month_partition(cursor, month) for month in iter_months(first_month, last_month)]
+
+
+# ========================================
+# ARCHIVING
+# ========================================
+
+def archive_path(archive_dir, label):
+    os.makedirs(archive_dir, exist_ok=True)
+    return os.path.join(archive_dir, f'{label}.csv.gz')
+
+
+def archive_partition(name, archive_dir, drop=True):
+    """Detach one monthly partition, dump it to <name>.csv.gz and drop it"""
+    path = archive_path(archive_dir, name)
+
+    # Detach, dump and drop together: a failed dump leaves the partition attached
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{AUDIT_TABLE}" DETACH PARTITION "{name}"')
+
+        columns = ', '.join(f'"{column}"' for column in ARCHIVE_COLUMNS)
+        copy_sql = f'COPY "{name}" ({columns}) TO STDOUT WITH CSV HEADER'
+        raw_cursor = cursor.cursor
+        with gzip.open(path, 'wb') as archive:
+            if hasattr(raw_cursor, 'copy_expert'):
+                # psycopg2
+                raw_cursor.copy_expert(copy_sql, archive)
+            else:
+                # psycopg 3
+                with raw_cursor.copy(copy_sql) as copy:
+                    for data in copy:
+                        archive.write(data)
+
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+
+    return path
+
+
+def archive_rows_before(cutoff, archive_dir, dry_run=False):
+    """
+    Fallback for non-partitioned tables: archive and delete old rows,
+    one gzip CSV per month. Returns [(label, row count, path)].
+    """
+    oldest = AuditTrail.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+    if oldest is None:
+        return []
+
+    results = []
+    for month in iter_months(oldest, add_months(cutoff, -1)):
+        month_rows = AuditTrail.objects.filter(timestamp__gte=month, timestamp__lt=add_months(month, 1))
+        count = month_rows.count()
+        if count == 0:
+            continue
+
+        label = partition_name(month)
+        path = archive_path(archive_dir, label) if not dry_run else None
+
+        if not dry_run:
+            with transaction.atomic():
+                with gzip.open(path, 'wt', newline='', encoding='utf-8') as archive:
+                    writer = csv.writer(archive)
+                    writer.writerow(ARCHIVE_COLUMNS)
+                    for row in month_rows.order_by('timestamp').values_list(*ARCHIVE_COLUMNS).iterator(chunk_size=2000):
+                        writer.writerow(row)
+                month_rows.delete()
+
+        results.append((label, count, path))
+
+    return results
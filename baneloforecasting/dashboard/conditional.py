@@ -0,0 +1,63 @@
+"""
+Conditional GETs for the catalogue JSON endpoints
+
+The product and recipe lists change rarely but are polled often. Their
+views are wrapped in Django's condition() with an ETag / Last-Modified taken
+from the data source (DataSource.validators): a table_versions lookup for the
+orm backend, the Node.js API's ETag for the api backend. A client sending
+If-None-Match / If-Modified-Since for unchanged data gets an empty 304 before
+the list is read and serialized.
+
+Responses are marked private / no-cache (the browser keeps its copy but
+asks every time) and vary on Accept (the DRF endpoints also render HTML).
+Validators are looked up once per request and only kept on 200 responses,
+so an error body is never revalidated.
+"""
+
+import logging
+from functools import wraps
+
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from .data_sources import get_data_source
+
+logger = logging.getLogger(__name__)
+
+
+def catalogue_validators(request, family):
+    """(ETag, Last-Modified) of `family` for this request, computed once"""
+    memo = request.__dict__.setdefault('_catalogue_validators', {})
+    if family not in memo:
+        try:
+            memo[family] = get_data_source(family).validators(family)
+        except Exception as e:
+            logger.warning("⚠️ No validators for %s: %s", family, e)
+            memo[family] = (None, None)
+    return memo[family]
+
+
+def conditional_catalogue(family):
+    """Decorator: answer conditional GETs of a view listing `family`"""
+
+    def etag_func(request, *args, **kwargs):
+        return catalogue_validators(request, family)[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        return catalogue_validators(request, family)[1]
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                response.headers.pop('ETag', None)
+                response.headers.pop('Last-Modified', None)
+            return response
+
+        return vary_on_headers('Accept')(cache_control(private=True, no_cache=True)(wrapper))
+
+    return decorator
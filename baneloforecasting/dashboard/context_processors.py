@@ -0,0 +1,11 @@
+"""
+Template context processors
+"""
+
+from .metrics import get_request_metrics
+
+
+def api_status(request):
+    """`api_data_stale`: the page shows last-good Node.js API data because the API is unavailable"""
+    metrics = get_request_metrics()
+    return {'api_data_stale': bool(metrics and metrics['stale_responses'])}
@@ -0,0 +1,313 @@
+"""
+Data sources - where the views read products, sales, recipes and waste logs
+
+The same PostgreSQL tables can be read two ways:
+- APIDataSource: through the Node.js API (APIService, with its cache,
+  circuit breakers and stale fallback), for a website on another machine,
+- ORMDataSource: straight from the database through the Django models,
+  which skips the HTTP hop when the website runs next to PostgreSQL.
+
+settings.DATA_SOURCES routes each family ('products', 'sales', 'recipes',
+'waste') to one of them. Both return rows in the Node.js API's JSON shape
+(table columns, recipes with camelCase keys and embedded ingredients), so the
+normalized records and the views built on them do not depend on the choice.
+Every method has an async counterpart (aget_*) for the async views. Writes
+are not routed: they always go through APIService.
+
+validators(family) gives the ETag / Last-Modified of a family's current data
+for the conditional catalogue endpoints (dashboard/conditional.py): from the
+table_versions counters (orm) or the Node.js API's own ETag (api).
+"""
+
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+
+from .api_service import ProductRecord, RecipeRecord, SaleRecord, get_api_service
+from .api_shapes import format_ingredient, format_recipe
+from .async_api_service import get_async_api_service
+from .models import Product, Recipe, RecipeIngredient, Sale, WasteLog
+from .table_versions import family_version
+
+
+FAMILIES = ('products', 'sales', 'recipes', 'waste')
+DATA_SOURCES = getattr(settings, 'DATA_SOURCES', {})
+
+
+class DataSource:
+    """Read interface shared by the backends"""
+
+    name = None
+
+    # ========================================
+    # PRODUCTS
+    # ========================================
+
+    def get_products(self):
+        raise NotImplementedError
+
+    def get_product_records(self):
+        return tuple(ProductRecord(product) for product in self.get_products())
+
+    def get_product_record(self, product_id):
+        """One product by firebase_id or local id (ProductRecord.key); None if not found"""
+        raise NotImplementedError
+
+    def get_product_records_by_key(self, product_ids):
+        """{product_id: ProductRecord or None} for several ids, in one read"""
+        records = self.get_product_records()
+        index = {str(record.id): record for record in records if record.id is not None}
+        index.update((record.firebase_id, record) for record in records if record.firebase_id)
+        return {str(product_id): index.get(str(product_id)) for product_id in product_ids}
+
+    # ========================================
+    # SALES
+    # ========================================
+
+    def get_sales(self, limit=1000, date_from=None, date_to=None):
+        """Newest first; date_from / date_to are inclusive dates or ISO timestamps"""
+        raise NotImplementedError
+
+    def get_sale_records(self, limit=1000, date_from=None, date_to=None):
+        return SaleRecord.build_all(self.get_sales(limit, date_from, date_to))
+
+    def get_sales_after(self, after_id, limit=500, date_from=None):
+        """Sales with id > after_id, oldest first; None if the read failed"""
+        raise NotImplementedError
+
+    # ========================================
+    # RECIPES
+    # ========================================
+
+    def get_recipes(self):
+        raise NotImplementedError
+
+    def get_recipe_records(self):
+        return tuple(RecipeRecord(recipe) for recipe in self.get_recipes())
+
+    def get_recipe_ingredients(self, recipe_id):
+        raise NotImplementedError
+
+    # ========================================
+    # WASTE
+    # ========================================
+
+    def get_waste_logs(self, date_from=None, date_to=None):
+        """Newest first; same date filters as get_sales"""
+        raise NotImplementedError
+
+    # ========================================
+    # VALIDATORS
+    # ========================================
+
+    def validators(self, family):
+        """(ETag, Last-Modified datetime) of a family's current data; (None, None) if unknown"""
+        return None, None
+
+    # ========================================
+    # ASYNC COUNTERPARTS
+    # ========================================
+
+    async def aget_product_records(self):
+        return await sync_to_async(self.get_product_records)()
+
+    async def aget_sale_records(self, limit=1000, date_from=None, date_to=None):
+        return await sync_to_async(self.get_sale_records)(limit, date_from, date_to)
+
+    async def aget_recipe_records(self):
+        return await sync_to_async(self.get_recipe_records)()
+
+    async def aget_recipe_ingredients(self, recipe_id):
+        return await sync_to_async(self.get_recipe_ingredients)(recipe_id)
+
+
+def _entity_tag(source, family, *parts):
+    """A short, opaque ETag for a family's data as read by one backend"""
+    digest = hashlib.sha1(':'.join([family, *map(str, parts)]).encode()).hexdigest()[:20]
+    return f'"{source}-{digest}"'
+
+
+class APIDataSource(DataSource):
+    """Reads through the Node.js API"""
+
+    name = 'api'
+
+    # Families whose list response carries the upstream validators
+    LIST_ENDPOINTS = {
+        'products': ('/api/products', ('products',)),
+        'recipes': ('/api/recipes', ('recipes',)),
+    }
+
+    @property
+    def api(self):
+        return get_api_service()
+
+    def get_products(self):
+        return self.api.get_products()
+
+    def get_product_records(self):
+        return self.api.get_product_records()
+
+    def get_product_record(self, product_id):
+        return self.api.get_product_record(product_id)
+
+    def get_product_records_by_key(self, product_ids):
+        return self.api.get_product_records_by_key(product_ids)
+
+    def get_sales(self, limit=1000, date_from=None, date_to=None):
+        return self.api.get_sales(limit, date_from, date_to)
+
+    def get_sale_records(self, limit=1000, date_from=None, date_to=None):
+        return self.api.get_sale_records(limit, date_from, date_to)
+
+    def get_sales_after(self, after_id, limit=500, date_from=None):
+        return self.api.get_sales_after(after_id, limit, date_from)
+
+    def get_recipes(self):
+        return self.api.get_recipes()
+
+    def get_recipe_records(self):
+        return self.api.get_recipe_records()
+
+    def get_recipe_ingredients(self, recipe_id):
+        return self.api.get_recipe_ingredients(recipe_id)
+
+    def get_waste_logs(self, date_from=None, date_to=None):
+        return self.api.get_waste_logs(date_from, date_to)
+
+    def validators(self, family):
+        """From the cached list response, revalidated upstream with a conditional GET"""
+        if family not in self.LIST_ENDPOINTS:
+            return None, None
+        endpoint, keys = self.LIST_ENDPOINTS[family]
+        etag, last_modified = self.api.get_list_validators(endpoint, keys=keys)
+        if not etag and not last_modified:
+            return None, None
+        timestamp = parse_http_date_safe(last_modified) if last_modified else None
+        changed_at = datetime.fromtimestamp(timestamp, dt_timezone.utc) if timestamp is not None else None
+        return _entity_tag(self.name, family, etag, last_modified), changed_at
+
+    # Non-blocking HTTP instead of a thread per call
+    async def aget_product_records(self):
+        return await get_async_api_service().get_product_records()
+
+    async def aget_sale_records(self, limit=1000, date_from=None, date_to=None):
+        return await get_async_api_service().get_sale_records(limit, date_from, date_to)
+
+    async def aget_recipe_records(self):
+        return await get_async_api_service().get_recipe_records()
+
+    async def aget_recipe_ingredients(self, recipe_id):
+        return await get_async_api_service().get_recipe_ingredients(recipe_id)
+
+
+def _moment(value):
+    """A date_from / date_to value ('YYYY-MM-DD', ISO timestamp or datetime) as an aware datetime"""
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _in_range(queryset, column, date_from, date_to):
+    """The Node routes' date filters: column >= date_from and column <= date_to"""
+    if date_from:
+        queryset = queryset.filter(**{f'{column}__gte': _moment(date_from)})
+    if date_to:
+        queryset = queryset.filter(**{f'{column}__lte': _moment(date_to)})
+    return queryset
+
+
+class ORMDataSource(DataSource):
+    """Reads the tables directly (same rows and order as the Node.js routes)"""
+
+    name = 'orm'
+
+    def get_products(self):
+        return list(Product.objects.order_by('name').values())
+
+    def get_product_record(self, product_id):
+        product_id = str(product_id)
+        lookup = Q(firebase_id=product_id)
+        if product_id.isdigit():
+            lookup |= Q(id=int(product_id))
+        product = Product.objects.filter(lookup).values().first()
+        return ProductRecord(product) if product else None
+
+    def get_product_records_by_key(self, product_ids):
+        product_ids = {str(product_id) for product_id in product_ids}
+        lookup = Q(firebase_id__in=product_ids)
+        local_ids = [int(product_id) for product_id in product_ids if product_id.isdigit()]
+        if local_ids:
+            lookup |= Q(id__in=local_ids)
+        records = [ProductRecord(product) for product in Product.objects.filter(lookup).values()]
+        # A firebase_id match wins over a local id match, as in get_product_record
+        index = {str(record.id): record for record in records}
+        index.update((record.firebase_id, record) for record in records if record.firebase_id)
+        return {product_id: index.get(product_id) for product_id in product_ids}
+
+    def get_sales(self, limit=1000, date_from=None, date_to=None):
+        sales = _in_range(Sale.objects.order_by('-order_date'), 'order_date', date_from, date_to).values()
+        return list(sales[:limit] if limit else sales)
+
+    def get_sales_after(self, after_id, limit=500, date_from=None):
+        sales = _in_range(Sale.objects.filter(id__gt=after_id).order_by('id'), 'order_date', date_from, None).values()
+        return list(sales[:limit] if limit else sales)
+
+    def get_recipes(self):
+        recipes = list(Recipe.objects.order_by('product_name').values())
+        ingredients = {recipe['firebase_id']: [] for recipe in recipes}
+        for row in RecipeIngredient.objects.filter(recipe_firebase_id__in=list(ingredients)).values():
+            ingredients[row['recipe_firebase_id']].append(row)
+        return [format_recipe(recipe, ingredients[recipe['firebase_id']]) for recipe in recipes]
+
+    def get_recipe_ingredients(self, recipe_id):
+        rows = RecipeIngredient.objects.filter(recipe_firebase_id=recipe_id).values()
+        return [format_ingredient(row) for row in rows]
+
+    def get_waste_logs(self, date_from=None, date_to=None):
+        waste_logs = _in_range(WasteLog.objects.order_by('-waste_date'), 'waste_date', date_from, date_to)
+        return list(waste_logs.values())
+
+    def validators(self, family):
+        """From the table_versions counters the triggers keep"""
+        version, changed_at = family_version(family)
+        if version is None:
+            return None, None
+        return _entity_tag(self.name, family, version, changed_at.isoformat()), changed_at
+
+
+# ========================================
+# ROUTING
+# ========================================
+
+BACKENDS = {
+    'api': APIDataSource,
+    'orm': ORMDataSource,
+}
+
+_data_sources = {}
+
+
+def get_data_source(family):
+    """The data source settings.DATA_SOURCES routes `family` to (default: the Node.js API)"""
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown data family: {family}")
+    name = DATA_SOURCES.get(family, 'api')
+    source = _data_sources.get(name)
+    if source is None:
+        if name not in BACKENDS:
+            raise ImproperlyConfigured(
+                f"DATA_SOURCES['{family}'] is '{name}', expected one of: {', '.join(BACKENDS)}"
+            )
+        source = _data_sources.setdefault(name, BACKENDS[name]())
+    return source
+
+
+def data_source_names():
+    """{family: backend name}, for the health check"""
+    return {family: DATA_SOURCES.get(family, 'api') for family in FAMILIES}
@@ -0,0 +1,91 @@
+"""
+Database connection reuse statistics
+
+Counts how many database connections this process opened versus how many
+requests it served. With persistent connections (CONN_MAX_AGE > 0) the
+number of connections stays flat while requests keep growing; with
+CONN_MAX_AGE = 0 every request that touches the database opens a new one.
+
+When the PostgreSQL connection pool is enabled (DB_POOL), Django hands out
+pooled connections and the pool's own counters are included as well.
+"""
+
+import threading
+import time
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    'started_at': time.time(),
+    'requests': 0,
+    'connections_opened': {},
+}
+
+
+# ========================================
+# SIGNAL HANDLERS
+# ========================================
+
+def on_connection_created(sender, connection, **kwargs):
+    """A new connection was opened (or checked out of the pool)"""
+    with _stats_lock:
+        opened = _stats['connections_opened']
+        opened[connection.alias] = opened.get(connection.alias, 0) + 1
+
+
+def on_request_finished(sender, **kwargs):
+    with _stats_lock:
+        _stats['requests'] += 1
+
+
+def connect_signals():
+    """Called from DashboardConfig.ready()"""
+    connection_created.connect(on_connection_created, dispatch_uid='db_connections_created')
+    request_finished.connect(on_request_finished, dispatch_uid='db_connections_request_finished')
+
+
+# ========================================
+# STATS
+# ========================================
+
+def get_pool_stats(alias):
+    """psycopg_pool counters for an alias, or None if it is not pooled"""
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None or not hasattr(pool, 'get_stats'):
+        return None
+    return pool.get_stats()
+
+
+def get_connection_stats():
+    """Connection reuse statistics for this process"""
+    with _stats_lock:
+        requests = _stats['requests']
+        opened = dict(_stats['connections_opened'])
+        started_at = _stats['started_at']
+
+    total_opened = sum(opened.values())
+
+    databases = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        databases[alias] = {
+            'vendor': connections[alias].vendor,
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+            'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            'pooled': 'pool' in settings_dict.get('OPTIONS', {}),
+            'connections_opened': opened.get(alias, 0),
+            'pool': get_pool_stats(alias),
+        }
+
+    return {
+        'uptime_seconds': round(time.time() - started_at, 1),
+        'requests': requests,
+        'connections_opened': total_opened,
+        # Share of requests that did not need a fresh connection
+        'reuse_ratio': round(max(0.0, 1 - total_opened / requests), 4) if requests else None,
+        'databases': databases,
+    }
@@ -0,0 +1,223 @@
+"""
+Read-replica database router
+
+Reporting reads (the audit trail pages and search, forecasting, the export /
+integration scripts) can be served by a read replica so they do not compete
+with transactional writes on the primary. Only code that explicitly opts in
+with `reporting_reads()` / `@use_replica` is routed; everything else, and
+every write, stays on the primary. Views that read through a data source
+(dashboard/data_sources.py) do not opt in: by default they go to the Node.js
+API, not the ORM.
+
+The replica is skipped (reads fall back to the primary) when:
+- no replica is configured (DB_REPLICA_HOST unset),
+- its replication lag exceeds DB_REPLICA_MAX_LAG seconds (checked at most
+  every DB_REPLICA_LAG_CHECK_INTERVAL seconds) or the lag check fails,
+- the user made a change within the last DB_READ_YOUR_WRITES_WINDOW seconds
+  (read-your-writes pinning, see ReplicaPinningMiddleware).
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+DB_REPLICA_MAX_LAG = getattr(settings, 'DB_REPLICA_MAX_LAG', 10.0)
+DB_REPLICA_LAG_CHECK_INTERVAL = getattr(settings, 'DB_REPLICA_LAG_CHECK_INTERVAL', 5.0)
+DB_READ_YOUR_WRITES_WINDOW = getattr(settings, 'DB_READ_YOUR_WRITES_WINDOW', 5)
+
+PIN_COOKIE_NAME = 'db_pinned_until'
+
+# Writes to these apps (e.g. saving the session) are not user mutations
+UNPINNED_APP_LABELS = ('sessions',)
+
+_reporting = contextvars.ContextVar('db_reporting_reads', default=False)
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+
+
+# ========================================
+# OPT-IN FOR REPORTING READS
+# ========================================
+
+@contextmanager
+def reporting_reads():
+    """Route reads inside this block to the replica (when it is usable)"""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def use_replica(func):
+    """Decorator form of reporting_reads() for views and script functions"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with reporting_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# ========================================
+# REPLICA LAG
+# ========================================
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_lag_lock = threading.Lock()
+_lag_cache = {'checked_at': 0.0, 'lag': None}
+
+
+def measure_replica_lag():
+    """Replication lag of the replica in seconds, or None if it is unreachable"""
+    try:
+        replica = connections[REPLICA_DB_ALIAS]
+        with replica.cursor() as cursor:
+            if replica.vendor != 'postgresql':
+                # Not a streaming replica (e.g. a test alias): no lag to report
+                return 0.0
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning("⚠️ Replica lag check failed, reading from primary: %s", e)
+        return None
+
+
+def get_replica_lag():
+    """Cached replica lag (re-measured every DB_REPLICA_LAG_CHECK_INTERVAL seconds)"""
+    now = time.monotonic()
+    with _lag_lock:
+        if now - _lag_cache['checked_at'] < DB_REPLICA_LAG_CHECK_INTERVAL:
+            return _lag_cache['lag']
+        # Claim this check so concurrent requests keep using the cached value
+        _lag_cache['checked_at'] = now
+
+    lag = measure_replica_lag()
+    with _lag_lock:
+        _lag_cache['lag'] = lag
+    return lag
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def replica_usable():
+    """True if reporting reads may go to the replica right now"""
+    if not replica_configured():
+        return False
+
+    state = _request_state.get()
+    if state is not None and state['pinned']:
+        return False
+
+    lag = get_replica_lag()
+    return lag is not None and lag <= DB_REPLICA_MAX_LAG
+
+
+# ========================================
+# ROUTER
+# ========================================
+
+class ReplicaRouter:
+    """Send opted-in reporting reads to the replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _reporting.get() and replica_usable():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.app_label not in UNPINNED_APP_LABELS:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replica hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS
+
+
+# ========================================
+# READ-YOUR-WRITES MIDDLEWARE
+# ========================================
+
+class ReplicaPinningMiddleware:
+    """
+    Pin a client to the primary for a short window after it changes data
+
+    A mutation is any unsafe HTTP method (the Node.js API writes to the same
+    primary) or any ORM write during the request. The pin is a short-lived
+    cookie; a forged one can only force reads onto the primary.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _request_state.set(self._initial_state(request))
+        try:
+            response = self.get_response(request)
+            state = _request_state.get()
+        finally:
+            _request_state.reset(token)
+        return self._pin(request, response, state)
+
+    async def __acall__(self, request):
+        # The state dict is shared with the ORM calls (sync_to_async copies the context)
+        token = _request_state.set(self._initial_state(request))
+        try:
+            response = await self.get_response(request)
+            state = _request_state.get()
+        finally:
+            _request_state.reset(token)
+        return self._pin(request, response, state)
+
+    def _initial_state(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+        return {'pinned': pinned_until > time.time(), 'wrote': False}
+
+    def _pin(self, request, response, state):
+        if state['wrote'] or request.method not in self.SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                str(time.time() + DB_READ_YOUR_WRITES_WINDOW),
+                max_age=DB_READ_YOUR_WRITES_WINDOW,
+                httponly=True,
+                samesite='Lax',
+            )
+
+        return response
@@ -1,8 +1,11 @@
 ﻿import firebase_admin
 from firebase_admin import credentials, firestore
+import logging
 import os
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 class FirebaseService:
     _instance = None
     _db = None
@@ -24,9 +27,9 @@ class FirebaseService:
                 cred_path = os.getenv('FIREBASE_CREDENTIALS', 'firebase-credentials.json')
                 
                 # Debug: Print the path being used
-                print(f"🔍 Looking for Firebase credentials at: {cred_path}")
-                print(f"🔍 File exists: {os.path.exists(cred_path)}")
-                print(f"🔍 Current working directory: {os.getcwd()}")
+                logger.debug("🔍 Looking for Firebase credentials at: %s", cred_path)
+                logger.debug("🔍 File exists: %s", os.path.exists(cred_path))
+                logger.debug("🔍 Current working directory: %s", os.getcwd())
                 
                 # Check if file exists
                 if not os.path.exists(cred_path):
@@ -34,15 +37,13 @@ class FirebaseService:
                 
                 cred = credentials.Certificate(cred_path)
                 firebase_admin.initialize_app(cred)
-                print("✅ Firebase initialized successfully!")
+                logger.info("✅ Firebase initialized successfully!")
             
             self._db = firestore.client()
-            print(f"✅ Firestore client created: {self._db}")
+            logger.info("✅ Firestore client created: %s", self._db)
             
         except Exception as e:
-            print(f"❌ Error initializing Firebase: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error initializing Firebase: %s", e)
             self._db = None
     
     @property
@@ -65,12 +66,10 @@ class FirebaseService:
                 product_data['id'] = doc.id
                 products.append(product_data)
             
-            print(f"🔍 Found {len(products)} products in Firebase")
+            logger.debug("🔍 Found %s products in Firebase", len(products))
             return products
         except Exception as e:
-            print(f"❌ Error getting products: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error getting products: %s", e)
             return []
     
     def get_all_sales(self):
@@ -90,9 +89,7 @@ class FirebaseService:
             
             return sales
         except Exception as e:
-            print(f"❌ Error getting sales: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error getting sales: %s", e)
             return []
     
     # ✅ NEW CRUD METHODS BELOW
@@ -105,20 +102,17 @@ class FirebaseService:
             
             products_ref = self._db.collection('products')
             
-            # Add timestamp
-            from datetime import datetime
-            product_data['createdAt'] = datetime.now()
-            product_data['updatedAt'] = datetime.now()
+            # Add timestamps (server time: the incremental sync orders by updatedAt)
+            product_data['createdAt'] = firestore.SERVER_TIMESTAMP
+            product_data['updatedAt'] = firestore.SERVER_TIMESTAMP
             
             # Add document and get reference
             doc_ref = products_ref.add(product_data)
             
-            print(f"✅ Product added with ID: {doc_ref[1].id}")
+            logger.info("✅ Product added with ID: %s", doc_ref[1].id)
             return {'success': True, 'id': doc_ref[1].id}
         except Exception as e:
-            print(f"❌ Error adding product: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error adding product: %s", e)
             return {'success': False, 'error': str(e)}
     
     def update_product(self, product_id, product_data):
@@ -127,20 +121,17 @@ class FirebaseService:
             if self._db is None:
                 raise Exception("Firebase is not initialized.")
             
-            # Add timestamp
-            from datetime import datetime
-            product_data['updatedAt'] = datetime.now()
+            # Add timestamp (server time: the incremental sync orders by updatedAt)
+            product_data['updatedAt'] = firestore.SERVER_TIMESTAMP
             
             # Update document
             product_ref = self._db.collection('products').document(product_id)
             product_ref.update(product_data)
             
-            print(f"✅ Product updated: {product_id}")
+            logger.info("✅ Product updated: %s", product_id)
             return {'success': True, 'id': product_id}
         except Exception as e:
-            print(f"❌ Error updating product: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error updating product: %s", e)
             return {'success': False, 'error': str(e)}
     
     def delete_product(self, product_id):
@@ -152,12 +143,10 @@ class FirebaseService:
             # Delete document
             self._db.collection('products').document(product_id).delete()
             
-            print(f"✅ Product deleted: {product_id}")
+            logger.info("✅ Product deleted: %s", product_id)
             return {'success': True}
         except Exception as e:
-            print(f"❌ Error deleting product: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error deleting product: %s", e)
             return {'success': False, 'error': str(e)}
     
     def get_product_by_id(self, product_id):
@@ -175,5 +164,5 @@ class FirebaseService:
             else:
                 return None
         except Exception as e:
-            print(f"❌ Error getting product: {e}")
+            logger.error("❌ Error getting product: %s", e)
             return None
\ No newline at end of file
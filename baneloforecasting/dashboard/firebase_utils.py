@@ -2,12 +2,15 @@
 Firebase utilities - timeout handling, health checks, and error recovery
 """
 import functools
+import logging
 import signal
 import os
 from datetime import datetime, timedelta
 from django.http import JsonResponse
 from django.core.cache import cache
 
+logger = logging.getLogger(__name__)
+
 # ========================================
 # TIMEOUT DECORATOR
 # ========================================
@@ -47,7 +50,7 @@ def firebase_timeout(seconds=30):
                 return result
             except TimeoutException:
                 signal.alarm(0)  # Cancel the alarm
-                print(f"⚠️ Firebase operation timed out after {seconds}s")
+                logger.warning("⚠️ Firebase operation timed out after %ss", seconds)
                 return None
             except Exception as e:
                 signal.alarm(0)  # Cancel the alarm
@@ -89,7 +92,7 @@ def check_firebase_connectivity():
 
         # Check if Firebase is initialized
         if not firebase_admin._apps:
-            print("❌ Firebase not initialized")
+            logger.error("❌ Firebase not initialized")
             status = {
                 'is_healthy': False,
                 'last_checked': datetime.now().isoformat(),
@@ -118,9 +121,9 @@ def check_firebase_connectivity():
                 'message': 'Firebase is accessible',
                 'cached': False
             }
-            print("✅ Firebase health check passed")
+            logger.info("✅ Firebase health check passed")
         except Exception as auth_error:
-            print(f"❌ Firebase auth error: {auth_error}")
+            logger.error("❌ Firebase auth error: %s", auth_error)
             status = {
                 'is_healthy': False,
                 'last_checked': datetime.now().isoformat(),
@@ -132,7 +135,7 @@ def check_firebase_connectivity():
         return status
 
     except Exception as e:
-        print(f"❌ Error checking Firebase health: {e}")
+        logger.error("❌ Error checking Firebase health: %s", e)
         status = {
             'is_healthy': False,
             'last_checked': datetime.now().isoformat(),
@@ -168,7 +171,7 @@ def get_firestore_client_with_timeout():
 
         return db
     except Exception as e:
-        print(f"❌ Error getting Firestore client: {e}")
+        logger.error("❌ Error getting Firestore client: %s", e)
         raise
 
 
@@ -200,7 +203,7 @@ def safe_firestore_query(collection_name, operation=None, timeout=10, default_va
         return result
 
     except Exception as e:
-        print(f"❌ Error querying {collection_name}: {e}")
+        logger.error("❌ Error querying %s: %s", collection_name, e)
         return default_value if default_value is not None else []
 
 
@@ -0,0 +1,490 @@
+"""
+Firestore sync helpers
+
+Download: incremental Firestore -> local database sync. Instead of streaming
+whole collections, each run reads only the documents updated after the stored
+checkpoint, in ordered pages. The checkpoint is saved in the same transaction
+as the page it covers, so a crash resumes exactly where the last committed
+page stopped.
+
+Firestore leaves documents without the order_by field out of the query, so a
+collection is only synced incrementally when every document has its update
+field (settings.FIRESTORE_UPDATE_FIELDS); otherwise the run reads the whole
+collection, paged by document id. Documents whose update field is not a
+timestamp are skipped, and the cursor only ever moves to a timestamp.
+
+A document that fails to apply stops the run: the cursor is saved just
+before it, so the next run reads it (and what follows) again instead of
+skipping it for good.
+
+Upload: batched local -> Firestore writes. Documents are grouped into write
+batches (one RPC per batch), several batches are committed concurrently, and
+documents whose content hash has not changed since the last upload are skipped.
+A full reconcile also deletes the documents that no longer have a local
+source (delete_orphaned_documents).
+
+The Firestore client is passed in, so any object that implements the small
+surface used here (collection / document / order_by / start_after / limit /
+select / stream / batch / count) can stand in for it - e.g. an in-memory fake.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SyncCheckpoint, SyncedDocumentHash
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# CONFIGURATION
+# ========================================
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_UPDATE_FIELD = 'updatedAt'
+UPDATE_FIELDS = getattr(settings, 'FIRESTORE_UPDATE_FIELDS', {})
+
+# Firestore allows at most 500 writes per batch commit
+FIRESTORE_BATCH_LIMIT = 500
+DEFAULT_UPLOAD_WORKERS = 4
+
+# Fields that change on every run and must not affect the content hash
+VOLATILE_FIELDS = ('synced_at',)
+
+# Firestore's special field path for ordering by document id
+DOCUMENT_ID_FIELD = '__name__'
+
+
+# ========================================
+# CHECKPOINTS
+# ========================================
+
+def get_checkpoint(collection_name):
+    """Get (or create) the checkpoint row for a collection"""
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(collection=collection_name)
+    return checkpoint
+
+
+def reset_checkpoint(collection_name):
+    """Forget the checkpoint so the next run re-reads the whole collection"""
+    SyncCheckpoint.objects.filter(collection=collection_name).delete()
+
+
+def get_publish_watermark(collection_name):
+    """Time of the last successful publish to a Firestore collection (or None)"""
+    checkpoint = SyncCheckpoint.objects.filter(collection=f'publish:{collection_name}').first()
+    return checkpoint.last_update_time if checkpoint else None
+
+
+def set_publish_watermark(collection_name, watermark, docs_published=0):
+    """Record a successful publish; later runs only publish what changed after it"""
+    checkpoint = get_checkpoint(f'publish:{collection_name}')
+    checkpoint.last_update_time = watermark
+    checkpoint.docs_synced += docs_published
+    checkpoint.last_synced_at = timezone.now()
+    checkpoint.save()
+
+
+def update_field_for(collection_name):
+    """Timestamp field the incremental sync orders a collection by"""
+    return UPDATE_FIELDS.get(collection_name, DEFAULT_UPDATE_FIELD)
+
+
+def usable_timestamp(value):
+    """An update field value as an aware datetime, or None if it is not a timestamp"""
+    if not isinstance(value, datetime):
+        return None
+    # Firestore treats naive datetimes as UTC
+    return value if timezone.is_aware(value) else value.replace(tzinfo=dt_timezone.utc)
+
+
+# ========================================
+# PAGED QUERY
+# ========================================
+
+def fetch_page(db, collection_name, update_field, last_update_time, last_doc_id, page_size):
+    """
+    Fetch one ordered page of documents past the (update time, doc id) cursor
+
+    Ordering by document id as a second key makes the cursor unique even
+    when several documents share the same update time. With update_field
+    None the page is ordered by document id alone (full sync).
+    """
+    query = db.collection(collection_name)
+    if update_field:
+        query = query.order_by(update_field)
+    query = query.order_by(DOCUMENT_ID_FIELD)
+
+    if update_field and last_update_time is not None:
+        query = query.start_after({
+            update_field: last_update_time,
+            DOCUMENT_ID_FIELD: last_doc_id,
+        })
+    elif not update_field and last_doc_id:
+        query = query.start_after({DOCUMENT_ID_FIELD: last_doc_id})
+
+    return list(query.limit(page_size).stream())
+
+
+def documents_missing_field(db, collection_name, field):
+    """Documents an order_by(field) query would leave out (two count aggregations)"""
+    total = count_documents(db, collection_name)
+    ordered = count_documents(db, collection_name, order_by=field)
+    return total - ordered
+
+
+# ========================================
+# INCREMENTAL SYNC
+# ========================================
+
+def new_sync_stats(collection_name, mode):
+    return {
+        'collection': collection_name,
+        'mode': mode,
+        'pages': 0,
+        'docs': 0,
+        'created': 0,
+        'updated': 0,
+        'skipped': 0,
+        'no_timestamp': 0,
+        'errors': 0,
+        'fetch_seconds': 0.0,
+        'apply_seconds': 0.0,
+    }
+
+
+def apply_page(collection_name, docs, apply_doc, stats, stop_on_error=False):
+    """
+    Apply a page of documents (call inside the page's transaction)
+
+    Returns the number of documents handled: with stop_on_error, the index
+    of the first one that failed (its changes are rolled back).
+    """
+    for index, doc in enumerate(docs):
+        try:
+            # Savepoint per document: a bad row must not poison the page
+            with transaction.atomic():
+                result = apply_doc(doc) or 'skipped'
+            stats[result] = stats.get(result, 0) + 1
+        except Exception as e:
+            logger.error("❌ Error applying %s/%s: %s", collection_name, doc.id, e)
+            stats['errors'] += 1
+            if stop_on_error:
+                return index
+    return len(docs)
+
+
+def finish_stats(stats, started):
+    stats['elapsed_seconds'] = time.perf_counter() - started
+    stats['docs_per_second'] = (
+        stats['docs'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] > 0 else 0.0
+    )
+    return stats
+
+
+def incremental_sync(db, collection_name, apply_doc, page_size=DEFAULT_PAGE_SIZE,
+                     update_field=None, max_pages=None):
+    """
+    Sync a Firestore collection into the local database, page by page
+
+    Args:
+        db: Firestore client (or a compatible fake)
+        collection_name: Name of the Firestore collection
+        apply_doc: Callable(doc) that writes one document locally and returns
+                   'created', 'updated' or 'skipped'
+        page_size: Documents per page (one transaction per page)
+        update_field: Document field holding the last update time
+                      (default: update_field_for(collection_name))
+        max_pages: Optional cap on pages per run
+
+    Returns:
+        dict: Throughput metrics for this run ('mode' is 'full' if the
+        collection had to be read in full)
+    """
+    update_field = update_field or update_field_for(collection_name)
+
+    missing = documents_missing_field(db, collection_name, update_field)
+    if missing:
+        logger.warning("⚠️ %s %s documents have no '%s' field, reading the whole collection",
+                       missing, collection_name, update_field)
+        return full_sync(db, collection_name, apply_doc, page_size=page_size, max_pages=max_pages)
+
+    checkpoint = get_checkpoint(collection_name)
+    stats = new_sync_stats(collection_name, 'incremental')
+    started = time.perf_counter()
+
+    while max_pages is None or stats['pages'] < max_pages:
+        fetch_started = time.perf_counter()
+        docs = fetch_page(
+            db, collection_name, update_field,
+            checkpoint.last_update_time, checkpoint.last_doc_id, page_size
+        )
+        stats['fetch_seconds'] += time.perf_counter() - fetch_started
+
+        if not docs:
+            break
+
+        # Only documents with a real timestamp are applied and can be a cursor
+        timed = []
+        for doc in docs:
+            update_time = usable_timestamp((doc.to_dict() or {}).get(update_field))
+            if update_time is None:
+                stats['no_timestamp'] += 1
+            else:
+                timed.append((doc, update_time))
+
+        if not timed:
+            # The cursor cannot move past this page
+            logger.warning("⚠️ A whole page of %s has no usable '%s' timestamp, reading the whole collection",
+                           collection_name, update_field)
+            return full_sync(db, collection_name, apply_doc, page_size=page_size, max_pages=max_pages)
+
+        apply_started = time.perf_counter()
+
+        with transaction.atomic():
+            applied = apply_page(
+                collection_name, [doc for doc, _ in timed], apply_doc, stats, stop_on_error=True
+            )
+
+            # Advance the cursor to the last document applied (the whole page,
+            # or up to the one that failed)
+            if applied:
+                last_doc, last_update_time = timed[applied - 1]
+                checkpoint.last_update_time = last_update_time
+                checkpoint.last_doc_id = last_doc.id
+                checkpoint.docs_synced += applied
+                checkpoint.last_synced_at = timezone.now()
+                checkpoint.save()
+
+        stats['apply_seconds'] += time.perf_counter() - apply_started
+        stats['pages'] += 1
+        stats['docs'] += applied
+
+        logger.info("📄 Page %s: %s docs (checkpoint → %s / %s)", stats['pages'], applied,
+                    checkpoint.last_update_time, checkpoint.last_doc_id)
+
+        if applied < len(timed):
+            logger.warning("⚠️ Stopped %s at %s; the next run retries from there",
+                           collection_name, timed[applied][0].id)
+            break
+
+        if len(docs) < page_size:
+            break
+
+    return finish_stats(stats, started)
+
+
+def full_sync(db, collection_name, apply_doc, page_size=DEFAULT_PAGE_SIZE, max_pages=None):
+    """
+    Read a whole collection, paged by document id (no checkpoint is kept)
+
+    For collections whose documents do not all carry the update field;
+    apply_doc must be idempotent, as every run re-applies every document.
+    """
+    stats = new_sync_stats(collection_name, 'full')
+    started = time.perf_counter()
+    last_doc_id = ''
+
+    while max_pages is None or stats['pages'] < max_pages:
+        fetch_started = time.perf_counter()
+        docs = fetch_page(db, collection_name, None, None, last_doc_id, page_size)
+        stats['fetch_seconds'] += time.perf_counter() - fetch_started
+
+        if not docs:
+            break
+
+        apply_started = time.perf_counter()
+        with transaction.atomic():
+            apply_page(collection_name, docs, apply_doc, stats)
+        stats['apply_seconds'] += time.perf_counter() - apply_started
+
+        last_doc_id = docs[-1].id
+        stats['pages'] += 1
+        stats['docs'] += len(docs)
+
+        if len(docs) < page_size:
+            break
+
+    return finish_stats(stats, started)
+
+
+def print_sync_metrics(stats):
+    """Log the throughput metrics returned by incremental_sync()"""
+    logger.info("📈 %s (%s): %s docs in %s pages (%.1f docs/s)", stats['collection'], stats['mode'],
+                stats['docs'], stats['pages'], stats['docs_per_second'])
+    logger.info("✅ Created: %s  🔄 Updated: %s  ⏭️ Skipped: %s  🕳️ No timestamp: %s  ❌ Errors: %s",
+                stats['created'], stats['updated'], stats['skipped'], stats['no_timestamp'], stats['errors'])
+    logger.info("⏱️ Fetch: %.2fs  Apply: %.2fs  Total: %.2fs",
+                stats['fetch_seconds'], stats['apply_seconds'], stats['elapsed_seconds'])
+
+
+# ========================================
+# BATCHED UPLOADS
+# ========================================
+
+def content_hash(data, exclude=VOLATILE_FIELDS):
+    """Stable hash of a document's content, ignoring volatile fields"""
+    payload = {key: value for key, value in data.items() if key not in exclude}
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def commit_batch(db, collection_name, chunk):
+    """Write one chunk of (doc_id, data) pairs as a single batch commit"""
+    collection_ref = db.collection(collection_name)
+    batch = db.batch()
+    for doc_id, data in chunk:
+        batch.set(collection_ref.document(doc_id), data)
+    batch.commit()
+    return len(chunk)
+
+
+def batched_upload(db, collection_name, docs, batch_size=FIRESTORE_BATCH_LIMIT,
+                   max_workers=DEFAULT_UPLOAD_WORKERS, skip_unchanged=True):
+    """
+    Upload documents to Firestore in concurrent write batches
+
+    Args:
+        db: Firestore client (or a compatible fake)
+        collection_name: Target Firestore collection
+        docs: Iterable of (doc_id, data) pairs
+        batch_size: Writes per batch commit (capped at the Firestore limit)
+        max_workers: Number of batches committed concurrently
+        skip_unchanged: Skip documents whose content hash matches the last upload
+
+    Returns:
+        dict: {'uploaded', 'unchanged', 'errors', 'batches', 'elapsed_seconds'}
+    """
+    batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+    started = time.perf_counter()
+
+    known_hashes = {}
+    if skip_unchanged:
+        known_hashes = dict(
+            SyncedDocumentHash.objects.filter(collection=collection_name)
+            .values_list('doc_id', 'content_hash')
+        )
+
+    stats = {'uploaded': 0, 'unchanged': 0, 'errors': 0, 'batches': 0}
+
+    # Only changed documents are sent
+    pending = []
+    new_hashes = {}
+    for doc_id, data in docs:
+        doc_hash = content_hash(data)
+        if skip_unchanged and known_hashes.get(doc_id) == doc_hash:
+            stats['unchanged'] += 1
+            continue
+        pending.append((doc_id, data))
+        new_hashes[doc_id] = doc_hash
+
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    committed = []
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(commit_batch, db, collection_name, chunk): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    stats['uploaded'] += future.result()
+                    stats['batches'] += 1
+                    committed.extend(doc_id for doc_id, _ in chunk)
+                except Exception as e:
+                    logger.warning("⚠️ Batch of %s documents failed: %s", len(chunk), e)
+                    stats['errors'] += len(chunk)
+
+    # Remember what was uploaded (DB writes stay on the calling thread)
+    if committed:
+        SyncedDocumentHash.objects.bulk_create(
+            [
+                SyncedDocumentHash(collection=collection_name, doc_id=doc_id,
+                                   content_hash=new_hashes[doc_id])
+                for doc_id in committed
+            ],
+            update_conflicts=True,
+            unique_fields=['collection', 'doc_id'],
+            update_fields=['content_hash', 'synced_at'],
+        )
+
+    stats['elapsed_seconds'] = time.perf_counter() - started
+    return stats
+
+
+def list_document_ids(db, collection_name):
+    """Ids of every document in a collection (no fields are read)"""
+    return {doc.id for doc in db.collection(collection_name).select([]).stream()}
+
+
+def batched_delete(db, collection_name, doc_ids, batch_size=FIRESTORE_BATCH_LIMIT):
+    """
+    Delete documents in write batches and forget their upload hashes
+
+    Returns:
+        dict: {'deleted', 'errors', 'batches'}
+    """
+    batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+    doc_ids = sorted(doc_ids)
+    collection_ref = db.collection(collection_name)
+    stats = {'deleted': 0, 'errors': 0, 'batches': 0}
+
+    deleted = []
+    for start in range(0, len(doc_ids), batch_size):
+        chunk = doc_ids[start:start + batch_size]
+        batch = db.batch()
+        for doc_id in chunk:
+            batch.delete(collection_ref.document(doc_id))
+        try:
+            batch.commit()
+        except Exception as e:
+            logger.warning("⚠️ Delete batch of %s documents failed: %s", len(chunk), e)
+            stats['errors'] += len(chunk)
+            continue
+        stats['deleted'] += len(chunk)
+        stats['batches'] += 1
+        deleted.extend(chunk)
+
+    # A document uploaded again later must not be skipped as unchanged
+    SyncedDocumentHash.objects.filter(collection=collection_name, doc_id__in=deleted).delete()
+    return stats
+
+
+def delete_orphaned_documents(db, collection_name, keep_ids, batch_size=FIRESTORE_BATCH_LIMIT):
+    """
+    Delete the documents of a collection whose id is not in keep_ids
+
+    For full reconciles: keep_ids is every document the local data still
+    produces, so whatever else is in Firestore has lost its source.
+    """
+    orphaned = list_document_ids(db, collection_name) - {str(doc_id) for doc_id in keep_ids}
+    if not orphaned:
+        return {'deleted': 0, 'errors': 0, 'batches': 0}
+    return batched_delete(db, collection_name, orphaned, batch_size)
+
+
+def count_documents(db, collection_name, order_by=None):
+    """
+    Count documents with a server-side count aggregation (no document reads)
+
+    With order_by, only documents that have that field are counted (like
+    Firestore's ordered queries).
+    """
+    query = db.collection(collection_name)
+    if order_by:
+        query = query.order_by(order_by)
+    try:
+        results = query.count().get()
+    except AttributeError:
+        # Older google-cloud-firestore without aggregation queries
+        return sum(1 for _ in query.select([]).stream())
+    return int(results[0][0].value)
@@ -0,0 +1,260 @@
+"""
+Index advisor for the unmanaged mobile tables
+
+products, sales, recipes and recipe_ingredients are created by the mobile
+app (managed = False), so Django never adds indexes for the filters the
+website uses on them. RECOMMENDED_INDEXES lists those filters together with
+a representative ORM query taken from the views / scripts; the advisor
+inspects the live schema, reports which indexes are missing, and builds the
+CREATE INDEX statements (CONCURRENTLY on PostgreSQL, so the mobile app is
+never blocked while an index is built).
+
+Query plans before / after are compared with EXPLAIN:
+- PostgreSQL: the "after" plan uses a hypothetical index (hypopg extension)
+  when it is installed, otherwise only the current plan is shown.
+- SQLite: the index is built inside a transaction that is rolled back.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Product, Recipe, RecipeIngredient, Sale
+
+
+# ========================================
+# RECOMMENDATIONS
+# ========================================
+
+RECOMMENDED_INDEXES = [
+    {
+        'name': 'sales_order_date_idx',
+        'model': Sale,
+        'columns': ['order_date'],
+        'reason': 'Date-range filters and ORDER BY order_date (sales export, forecasting, Colab export)',
+        'query': lambda: Sale.objects.filter(
+            order_date__gte=timezone.now() - timedelta(days=90)
+        ).order_by('-order_date')[:100],
+    },
+    {
+        'name': 'sales_product_fid_date_idx',
+        'model': Sale,
+        'columns': ['product_firebase_id', 'order_date'],
+        'reason': 'Per-product sales history (forecast training, sync duplicate check)',
+        'query': lambda: Sale.objects.filter(
+            product_firebase_id='sample-product', order_date__gte=timezone.now() - timedelta(days=90)
+        ),
+    },
+    {
+        'name': 'sales_product_name_idx',
+        'model': Sale,
+        'columns': ['product_name'],
+        'reason': 'Sales matched by product name (forecast training fallback, sample data scripts)',
+        'query': lambda: Sale.objects.filter(product_name='Sample Product'),
+    },
+    {
+        'name': 'recipe_ingr_recipe_fid_idx',
+        'model': RecipeIngredient,
+        'columns': ['recipe_firebase_id'],
+        'reason': 'Ingredients of a recipe (max servings calculation, recipe sync)',
+        'query': lambda: RecipeIngredient.objects.filter(
+            Q(recipe_id=1) | Q(recipe_firebase_id='sample-recipe')
+        ),
+    },
+    {
+        'name': 'recipe_ingr_recipe_id_idx',
+        'model': RecipeIngredient,
+        'columns': ['recipe_id'],
+        'reason': 'Ingredients of a recipe by local id (OR branch of the same lookup)',
+        'query': lambda: RecipeIngredient.objects.filter(recipe_id=1),
+    },
+    {
+        'name': 'recipes_product_fid_idx',
+        'model': Recipe,
+        'columns': ['product_firebase_id'],
+        'reason': 'Recipe of a product (inventory and recipe views)',
+        'query': lambda: Recipe.objects.filter(product_firebase_id='sample-product'),
+    },
+    {
+        'name': 'products_firebase_id_idx',
+        'model': Product,
+        'columns': ['firebase_id'],
+        'reason': 'Product lookups by firebase_id (views, viewsets, sync scripts)',
+        'query': lambda: Product.objects.filter(firebase_id='sample-product'),
+    },
+]
+
+
+# ========================================
+# SCHEMA INSPECTION
+# ========================================
+
+def db_columns(model, fields):
+    return [model._meta.get_field(field).column for field in fields]
+
+
+def existing_indexes(table):
+    """{index name: [columns]} for every index / unique constraint on a table"""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        name: info['columns']
+        for name, info in constraints.items()
+        if (info['index'] or info['unique'] or info['primary_key']) and info['columns']
+    }
+
+
+def table_exists(table):
+    with connection.cursor() as cursor:
+        return table in connection.introspection.table_names(cursor)
+
+
+def invalid_indexes():
+    """Names of PostgreSQL indexes left INVALID by a failed CREATE INDEX CONCURRENTLY"""
+    if connection.vendor != 'postgresql':
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT index_class.relname
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE NOT pg_index.indisvalid
+        """)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def covering_index(indexes, columns):
+    """Name of an existing index whose leading columns are `columns`, if any"""
+    for name, index_columns in indexes.items():
+        if index_columns[:len(columns)] == columns:
+            return name
+    return None
+
+
+def create_index_sql(recommendation):
+    model = recommendation['model']
+    table = model._meta.db_table
+    columns = ', '.join(f'"{column}"' for column in db_columns(model, recommendation['columns']))
+    concurrently = 'CONCURRENTLY ' if connection.vendor == 'postgresql' else ''
+    return f'CREATE INDEX {concurrently}IF NOT EXISTS "{recommendation["name"]}" ON "{table}" ({columns})'
+
+
+def analyze():
+    """
+    Compare the recommendations with the live schema
+
+    Returns:
+        list: One dict per recommendation with 'table', 'columns', 'status'
+              ('missing', 'present', 'invalid' or 'no_table'), 'existing' and 'sql'
+    """
+    report = []
+    indexes_by_table = {}
+    invalid = invalid_indexes()
+
+    for recommendation in RECOMMENDED_INDEXES:
+        model = recommendation['model']
+        table = model._meta.db_table
+        columns = db_columns(model, recommendation['columns'])
+
+        item = {
+            **recommendation,
+            'table': table,
+            'db_columns': columns,
+            'existing': None,
+            'sql': create_index_sql(recommendation),
+        }
+
+        if table not in indexes_by_table:
+            indexes_by_table[table] = existing_indexes(table) if table_exists(table) else None
+
+        if indexes_by_table[table] is None:
+            item['status'] = 'no_table'
+        elif recommendation['name'] in invalid:
+            item['status'] = 'invalid'
+        else:
+            item['existing'] = covering_index(indexes_by_table[table], columns)
+            item['status'] = 'present' if item['existing'] else 'missing'
+
+        report.append(item)
+
+    return report
+
+
+# ========================================
+# EXPLAIN
+# ========================================
+
+def explain(queryset):
+    """Query plan of a queryset as a list of text lines"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    return [f'EXPLAIN not supported on {connection.vendor}']
+
+
+def hypopg_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+        return cursor.fetchone() is not None
+
+
+class _Rollback(Exception):
+    pass
+
+
+def explain_with_index(item):
+    """
+    (before plan, after plan) for a recommendation; after is None when it
+    cannot be estimated without actually building the index
+    """
+    queryset = item['query']()
+    before = explain(queryset)
+
+    if connection.vendor == 'postgresql':
+        if not hypopg_available():
+            return before, None
+        columns = ', '.join(f'"{column}"' for column in item['db_columns'])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT * FROM hypopg_create_index(%s)',
+                [f'CREATE INDEX ON "{item["table"]}" ({columns})']
+            )
+            try:
+                after = explain(queryset)
+            finally:
+                cursor.execute('SELECT hypopg_reset()')
+        return before, after
+
+    if connection.vendor == 'sqlite':
+        after = None
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(item['sql'])
+                after = explain(queryset)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return before, after
+
+    return before, None
+
+
+# ========================================
+# APPLY
+# ========================================
+
+def apply_index(item):
+    """Build one index (CONCURRENTLY on PostgreSQL, which must run outside a transaction)"""
+    with connection.cursor() as cursor:
+        if item['status'] == 'invalid':
+            # Leftover of an interrupted build: IF NOT EXISTS would keep it
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{item["name"]}"')
+        cursor.execute(item['sql'])
@@ -0,0 +1,408 @@
+"""
+Live dashboard KPIs over Server-Sent Events
+
+The dashboard subscribes to /dashboard/api/kpi-stream/ and updates its
+summary cards and recent sales in place instead of being refreshed (which
+re-aggregates up to 5000 sales per viewer). One KPIHub per process owns
+the numbers:
+
+- the first viewer starts a background poller, which seeds today's and
+  yesterday's totals once from the sales data source (settings.DATA_SOURCES),
+- it then reads the sales past a high-water mark (/api/sales?after_id=N, or
+  id > N in the database) every LIVE_KPI_POLL_INTERVAL seconds and folds
+  only the new rows into the totals, so a poll costs O(new sales), not
+  O(history),
+- every change is encoded once and fanned out to all connected streams
+  (generators under WSGI, async generators under ASGI); the poller stops
+  when the last viewer leaves and resumes from its mark.
+
+Events are `snapshot` (sent on connect) and `kpi` (deltas plus the new
+totals). A comment line every LIVE_KPI_HEARTBEAT_SECONDS keeps proxies from
+closing idle connections.
+
+A WSGI stream holds a worker thread for as long as the tab is open, so the
+stream is off unless LIVE_KPI_ENABLED (the default under ASGI), and a WSGI
+stream ends after LIVE_KPI_MAX_STREAM_SECONDS; the `retry` field tells the
+browser to reconnect LIVE_KPI_RETRY_SECONDS later.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .api_service import SaleRecord
+from .data_sources import get_data_source
+
+logger = logging.getLogger(__name__)
+
+
+LIVE_KPI_POLL_INTERVAL = getattr(settings, 'LIVE_KPI_POLL_INTERVAL', 2.0)
+LIVE_KPI_HEARTBEAT_SECONDS = getattr(settings, 'LIVE_KPI_HEARTBEAT_SECONDS', 15.0)
+LIVE_KPI_BATCH_SIZE = getattr(settings, 'LIVE_KPI_BATCH_SIZE', 500)
+LIVE_KPI_ENABLED = getattr(settings, 'LIVE_KPI_ENABLED', False)
+LIVE_KPI_MAX_STREAM_SECONDS = getattr(settings, 'LIVE_KPI_MAX_STREAM_SECONDS', 300.0)
+LIVE_KPI_RETRY_SECONDS = getattr(settings, 'LIVE_KPI_RETRY_SECONDS', 10.0)
+
+# Non-beverage products below this quantity count as low stock
+REORDER_LEVEL = 20
+RECENT_SALES_SHOWN = 5
+
+# Events kept for streams that fall behind between two wake-ups
+EVENT_BUFFER_SIZE = 256
+
+
+# ========================================
+# KPI HELPERS (shared with dashboard_view)
+# ========================================
+
+def percent_change(current, previous):
+    """Change vs. yesterday in percent, as the dashboard cards show it (0 without a baseline)"""
+    if previous > 0:
+        return round(((current - previous) / previous) * 100, 1)
+    return 0
+
+
+def count_low_stock(products):
+    """Low stock items among ProductRecords (beverages have no physical stock)"""
+    return sum(
+        1 for product in products
+        if product.category != 'beverage' and product.quantity < REORDER_LEVEL
+    )
+
+
+def format_recent_sale(sale):
+    """A SaleRecord as a row of the dashboard's recent sales table"""
+    return {
+        'product': sale.product_name,
+        'quantity': sale.quantity,
+        'price': sale.price,
+        'total': sale.total,
+        'datetime': sale.order_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'display_date': sale.order_date.strftime('%b %d, %Y - %I:%M %p'),
+    }
+
+
+def format_sse(event, data, event_id=None):
+    """One Server-Sent Events message (data is already JSON)"""
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}event: {event}\ndata: {data}\n\n'
+
+
+HEARTBEAT = ': keepalive\n\n'
+
+
+def format_retry(seconds):
+    """SSE message setting the browser's reconnection delay"""
+    return f'retry: {int(seconds * 1000)}\n\n'
+
+
+# ========================================
+# KPI HUB
+# ========================================
+
+class KPIHub:
+    """Process-wide KPI totals, the poller thread and fan-out to the streams"""
+
+    def __init__(self, poll_interval=LIVE_KPI_POLL_INTERVAL, batch_size=LIVE_KPI_BATCH_SIZE,
+                 heartbeat_seconds=LIVE_KPI_HEARTBEAT_SECONDS, source=None,
+                 max_stream_seconds=LIVE_KPI_MAX_STREAM_SECONDS, retry_seconds=LIVE_KPI_RETRY_SECONDS):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_stream_seconds = max_stream_seconds
+        self.retry_seconds = retry_seconds
+        self._source = source
+
+        # Guards the totals, the event buffer, the subscribers and the thread
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=EVENT_BUFFER_SIZE)
+        self._async_waiters = set()
+        self._subscribers = 0
+        self._thread = None
+        self._pid = None
+        self.version = 0
+
+        self.seeded = False
+        self.last_id = 0
+        self.today_day = None
+        self.today_sales = 0.0
+        self.today_orders = 0
+        self.yesterday_sales = 0.0
+        self.yesterday_orders = 0
+        self.low_stock_items = 0
+        self.recent = []
+
+        self.stats = {'polls': 0, 'rows': 0, 'events': 0, 'errors': 0}
+
+    @property
+    def sales_source(self):
+        return self._source or get_data_source('sales')
+
+    @property
+    def products_source(self):
+        return self._source or get_data_source('products')
+
+    # ----------------------------------------
+    # Totals
+    # ----------------------------------------
+
+    def totals(self):
+        return {
+            'today_sales': round(self.today_sales, 2),
+            'today_orders': self.today_orders,
+            'sales_change': percent_change(self.today_sales, self.yesterday_sales),
+            'orders_change': percent_change(self.today_orders, self.yesterday_orders),
+            'low_stock_items': self.low_stock_items,
+            'recent_sales': [format_recent_sale(sale) for sale in self.recent],
+        }
+
+    def _roll_day(self):
+        """Start a new day at local midnight: today's totals become yesterday's"""
+        today_day = timezone.localtime().toordinal()
+        if today_day == self.today_day:
+            return False
+        if self.today_day is not None and today_day == self.today_day + 1:
+            self.yesterday_sales, self.yesterday_orders = self.today_sales, self.today_orders
+        else:
+            self.yesterday_sales, self.yesterday_orders = 0.0, 0
+        self.today_day = today_day
+        self.today_sales, self.today_orders = 0.0, 0
+        self.recent = []
+        return True
+
+    def _fold(self, records):
+        """Add sales to the totals; returns today's new sales"""
+        new_today = []
+        for sale in records:
+            if sale.id is not None:
+                self.last_id = max(self.last_id, int(sale.id))
+            if sale.day == self.today_day:
+                self.today_sales += sale.total
+                self.today_orders += 1
+                new_today.append(sale)
+            elif sale.day == self.today_day - 1:
+                # Synced late from a POS that was offline
+                self.yesterday_sales += sale.total
+                self.yesterday_orders += 1
+
+        if new_today:
+            self.recent = sorted(
+                self.recent + new_today, key=lambda sale: sale.order_date, reverse=True
+            )[:RECENT_SALES_SHOWN]
+        return new_today
+
+    def _update_low_stock(self, products):
+        if not products:
+            # Failed call (or no products): keep the last known count
+            return False
+        low_stock_items = count_low_stock(products)
+        changed = low_stock_items != self.low_stock_items
+        self.low_stock_items = low_stock_items
+        return changed
+
+    # ----------------------------------------
+    # Poller
+    # ----------------------------------------
+
+    def _seed(self):
+        """Today's and yesterday's totals and the high-water mark (once per process)"""
+        sales_source = self.sales_source
+        latest = sales_source.get_sales(limit=1)
+        start_of_yesterday = (timezone.localtime() - timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        rows = sales_source.get_sales_after(0, limit=None, date_from=start_of_yesterday.isoformat())
+        if rows is None:
+            self.stats['errors'] += 1
+            return
+        products = self.products_source.get_product_records()
+
+        with self._cond:
+            self._roll_day()
+            self.today_sales = self.yesterday_sales = 0.0
+            self.today_orders = self.yesterday_orders = 0
+            self.last_id = max((int(sale['id']) for sale in latest if sale.get('id') is not None), default=0)
+            self._fold(SaleRecord.build_all(rows))
+            self._update_low_stock(products)
+            self.seeded = True
+
+        logger.info("📡 Live KPIs seeded: %s sales today, high-water mark %s", self.today_orders, self.last_id)
+        self._publish('snapshot', self.totals())
+
+    def _poll(self):
+        """Fold in the sales past the high-water mark and publish what changed"""
+        self.stats['polls'] += 1
+        with self._cond:
+            rolled = self._roll_day()
+
+        new_today = []
+        while True:
+            rows = self.sales_source.get_sales_after(self.last_id, limit=self.batch_size)
+            if rows is None:
+                # Keep the mark and try again on the next poll
+                self.stats['errors'] += 1
+                break
+            self.stats['rows'] += len(rows)
+            with self._cond:
+                new_today += self._fold(SaleRecord.build_all(rows))
+            if len(rows) < self.batch_size:
+                break
+
+        products = self.products_source.get_product_records()
+        with self._cond:
+            stock_changed = self._update_low_stock(products)
+
+        if rolled or new_today or stock_changed:
+            new_today.sort(key=lambda sale: sale.order_date, reverse=True)
+            self._publish('kpi', {
+                **self.totals(),
+                'today_sales_delta': round(sum(sale.total for sale in new_today), 2),
+                'today_orders_delta': len(new_today),
+                'new_sales': [format_recent_sale(sale) for sale in new_today[:RECENT_SALES_SHOWN]],
+            })
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._subscribers == 0:
+                    self._thread = None
+                    return
+            try:
+                if self.seeded:
+                    self._poll()
+                else:
+                    self._seed()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning("⚠️ Live KPI poll failed: %s", e)
+            time.sleep(self.poll_interval)
+
+    # ----------------------------------------
+    # Fan-out
+    # ----------------------------------------
+
+    def _publish(self, event, payload):
+        """Encode an event once and wake every stream"""
+        data = json.dumps(payload)
+        with self._cond:
+            self.version += 1
+            self._events.append((self.version, event, data))
+            self.stats['events'] += 1
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, wake in waiters:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                # The stream's event loop is already closed
+                pass
+
+    def _subscribe(self, waiter=None):
+        """Register a stream (starting the poller if needed); returns the current version"""
+        with self._cond:
+            self._subscribers += 1
+            if waiter is not None:
+                self._async_waiters.add(waiter)
+            if self._thread is None or self._pid != os.getpid():
+                # Not running yet, or inherited from the parent of a forked worker
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='live-kpi-poller', daemon=True)
+                self._thread.start()
+            return self.version
+
+    def _unsubscribe(self, waiter=None):
+        with self._cond:
+            self._subscribers -= 1
+            self._async_waiters.discard(waiter)
+
+    def _messages_after(self, version):
+        """(new version, SSE messages) for the events published after `version`"""
+        events = [event for event in self._events if event[0] > version]
+        if not events:
+            return version, []
+        if events[0][0] > version + 1:
+            # This stream fell behind the buffer: every event carries the totals,
+            # so the newest one is enough
+            events = events[-1:]
+        return events[-1][0], [format_sse(event, data, event_id) for event_id, event, data in events]
+
+    def _initial_messages(self, version):
+        messages = [format_retry(self.retry_seconds)]
+        if self.seeded:
+            # Otherwise the seed publishes its own snapshot event
+            messages.append(format_sse('snapshot', json.dumps(self.totals()), version))
+        return messages
+
+    def stream(self):
+        """SSE messages for one viewer (WSGI); ends after max_stream_seconds"""
+        deadline = time.monotonic() + self.max_stream_seconds if self.max_stream_seconds else None
+        version = self._subscribe()
+        try:
+            with self._cond:
+                messages = self._initial_messages(version)
+            yield from messages
+            while True:
+                timeout = self.heartbeat_seconds
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # Free the worker thread; the browser reconnects after `retry`
+                        return
+                    timeout = min(timeout, remaining)
+                with self._cond:
+                    if self.version == version:
+                        self._cond.wait(timeout)
+                    version, messages = self._messages_after(version)
+                yield from messages or [HEARTBEAT]
+        finally:
+            self._unsubscribe()
+
+    async def astream(self):
+        """SSE messages for one viewer (ASGI); waiting costs no thread"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        wake = waiter[1]
+        version = self._subscribe(waiter)
+        try:
+            with self._cond:
+                messages = self._initial_messages(version)
+            for message in messages:
+                yield message
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                wake.clear()
+                with self._cond:
+                    version, messages = self._messages_after(version)
+                for message in messages:
+                    yield message
+        finally:
+            self._unsubscribe(waiter)
+
+
+# ========================================
+# PUBLIC HELPERS
+# ========================================
+
+_kpi_hub = None
+_kpi_hub_lock = threading.Lock()
+
+
+def get_kpi_hub():
+    """Get the process-wide KPI hub"""
+    global _kpi_hub
+    if _kpi_hub is None:
+        with _kpi_hub_lock:
+            if _kpi_hub is None:
+                _kpi_hub = KPIHub()
+    return _kpi_hub
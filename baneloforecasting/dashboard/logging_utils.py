@@ -0,0 +1,94 @@
+"""
+Logging helpers - JSON formatter and non-blocking console handler
+
+Views and helpers log through module loggers (logging.getLogger(__name__))
+with %-style arguments, so a message below the configured level is never
+formatted. Records that do pass are handed to a queue and written to the
+console by a background thread, keeping stdout I/O off the request path.
+
+Configured in settings.LOGGING (LOG_LEVEL / LOG_FORMAT environment variables).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line (for log shippers)"""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class QueueConsoleHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking console handler
+
+    emit() only puts the record on an in-memory queue; a QueueListener thread
+    formats it and writes it to stdout. Like the stock QueueHandler, msg and
+    args are merged on the calling thread, so arguments changed after the
+    call are logged as they were; unlike it, the rest of the formatting
+    (and the traceback) is left to the listener, since the queue never
+    leaves the process. When the queue is full the record is dropped rather
+    than blocking the request.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.console = logging.StreamHandler(stream or sys.stdout)
+        self.listener = logging.handlers.QueueListener(
+            self.queue, self.console, respect_handler_level=False
+        )
+        self.listener.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread
+        super().setFormatter(fmt)
+        self.console.setFormatter(fmt)
+
+    def prepare(self, record):
+        message = record.getMessage()
+        # A copy, so other handlers still see the original record
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def close(self):
+        if self.listener is not None:
+            # Flush what is queued before the process exits
+            self.listener.stop()
+            self.listener = None
+        super().close()
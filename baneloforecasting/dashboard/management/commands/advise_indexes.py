@@ -0,0 +1,80 @@
+# dashboard/management/commands/advise_indexes.py
+# Run with: python manage.py advise_indexes [--explain] [--apply]
+# Reports missing indexes on the mobile app tables (products, sales, recipes,
+# recipe_ingredients) and optionally builds them.
+
+from django.core.management.base import BaseCommand
+
+from dashboard.index_advisor import analyze, apply_index, explain_with_index
+
+
+class Command(BaseCommand):
+    help = 'Inspect indexes on the unmanaged mobile tables and create the ones the website queries need'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Show the query plan of each affected query before / after the index'
+        )
+        parser.add_argument(
+            '--apply', action='store_true',
+            help='Create the missing indexes (CREATE INDEX CONCURRENTLY on PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        report = analyze()
+        todo = [item for item in report if item['status'] in ('missing', 'invalid')]
+
+        self.stdout.write('\n📋 Index report\n')
+        for item in report:
+            columns = ', '.join(item['db_columns'])
+            if item['status'] == 'present':
+                self.stdout.write(f"  ✓ {item['table']}({columns}) - covered by {item['existing']}")
+            elif item['status'] == 'no_table':
+                self.stdout.write(f"  - {item['table']}({columns}) - table not found, skipped")
+            else:
+                label = 'INVALID (interrupted build)' if item['status'] == 'invalid' else 'MISSING'
+                self.stdout.write(self.style.WARNING(f"  ✗ {item['table']}({columns}) - {label}"))
+                self.stdout.write(f"      Why: {item['reason']}")
+
+            if options['explain'] and item['status'] != 'no_table':
+                try:
+                    before, after = explain_with_index(item)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'      Could not EXPLAIN: {e}'))
+                    continue
+                self.stdout.write('      Plan now:')
+                for line in before:
+                    self.stdout.write(f'        {line}')
+                if item['status'] != 'present':
+                    self.stdout.write('      Plan with index:')
+                    if after is None:
+                        self.stdout.write('        (install the hypopg extension to estimate it)')
+                    for line in after or []:
+                        self.stdout.write(f'        {line}')
+
+        if all(item['status'] == 'no_table' for item in report):
+            self.stdout.write(self.style.WARNING('\n⚠️ No mobile tables found - no indexes were checked'))
+            return
+
+        if not todo:
+            skipped = sum(item['status'] == 'no_table' for item in report)
+            suffix = f' ({skipped} skipped: table not found)' if skipped else ''
+            self.stdout.write(self.style.SUCCESS(f'\n✅ All recommended indexes exist{suffix}'))
+            return
+
+        self.stdout.write('\n📝 Statements:\n')
+        for item in todo:
+            self.stdout.write(f"  {item['sql']};")
+
+        if not options['apply']:
+            self.stdout.write('\nDry run - use --apply to create them.')
+            return
+
+        self.stdout.write('')
+        for item in todo:
+            try:
+                apply_index(item)
+                self.stdout.write(self.style.SUCCESS(f"  ✓ Created {item['name']}"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"  ❌ {item['name']}: {e}"))
@@ -0,0 +1,67 @@
+# dashboard/management/commands/archive_audit_trail.py
+# Run with: python manage.py archive_audit_trail [--keep-months 12] [--dry-run]
+# Archives audit history older than the retention window to gzip CSV files.
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.audit_storage import (
+    archive_partition, archive_rows_before, is_partitioned, list_partitions, retention_cutoff,
+)
+
+
+class Command(BaseCommand):
+    help = 'Detach/archive audit_trail months older than the retention window to compressed files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=settings.AUDIT_RETENTION_MONTHS,
+            help=f'Months of audit history to keep online (default: {settings.AUDIT_RETENTION_MONTHS})'
+        )
+        parser.add_argument(
+            '--archive-dir', default=settings.AUDIT_ARCHIVE_DIR,
+            help='Directory for the .csv.gz archives'
+        )
+        parser.add_argument(
+            '--keep-detached', action='store_true',
+            help='Detach and archive partitions but keep them as standalone tables'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be archived'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['keep_months'])
+        archive_dir = options['archive_dir']
+        dry_run = options['dry_run']
+
+        self.stdout.write(f'Archiving audit trail older than {cutoff:%Y-%m-%d}...')
+
+        if is_partitioned():
+            old_partitions = [name for name, month in list_partitions() if month < cutoff]
+
+            if not old_partitions:
+                self.stdout.write('  Nothing to archive')
+                return
+
+            for name in old_partitions:
+                if dry_run:
+                    self.stdout.write(f'  Would archive partition {name}')
+                    continue
+                path = archive_partition(name, archive_dir, drop=not options['keep_detached'])
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {name} → {path}'))
+            return
+
+        # Not partitioned (e.g. SQLite): archive and delete rows month by month
+        results = archive_rows_before(cutoff, archive_dir, dry_run=dry_run)
+
+        if not results:
+            self.stdout.write('  Nothing to archive')
+            return
+
+        for label, count, path in results:
+            if dry_run:
+                self.stdout.write(f'  Would archive {count} rows ({label})')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {label}: {count} rows → {path}'))
@@ -0,0 +1,30 @@
+# dashboard/management/commands/install_table_versions.py
+# Run with: python manage.py install_table_versions [--uninstall]
+# Installs the change-counter triggers behind the catalogue endpoints' ETags.
+
+from django.core.management.base import BaseCommand
+
+from dashboard.table_versions import VERSIONED_TABLES, install_table_versions, uninstall_table_versions
+
+
+class Command(BaseCommand):
+    help = 'Install the table_versions triggers on the mobile tables (after creating them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uninstall', action='store_true',
+            help='Drop the triggers and counters instead'
+        )
+
+    def handle(self, *args, **options):
+        if options['uninstall']:
+            uninstall_table_versions()
+            self.stdout.write(self.style.SUCCESS('✓ Table version triggers removed'))
+            return
+
+        installed = install_table_versions()
+        for table in VERSIONED_TABLES:
+            if table in installed:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {table}'))
+            else:
+                self.stdout.write(f'  - {table} (table does not exist)')
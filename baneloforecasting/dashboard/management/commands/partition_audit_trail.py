@@ -0,0 +1,54 @@
+# dashboard/management/commands/partition_audit_trail.py
+# Run with: python manage.py partition_audit_trail [--months-ahead 3]
+# Schedule monthly (cron) so next months' partitions always exist.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from dashboard.audit_storage import (
+    AUDIT_TABLE, add_months, convert_to_partitioned, ensure_partitions,
+    is_partitioned, is_postgresql, month_start,
+)
+
+
+class Command(BaseCommand):
+    help = 'Partition audit_trail by month on PostgreSQL and create upcoming monthly partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Number of future months to pre-create partitions for (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        if not is_postgresql():
+            raise CommandError(
+                f'Declarative partitioning needs PostgreSQL (current backend: {connection.vendor}). '
+                'The audit_trail indexes still apply; use archive_audit_trail for retention.'
+            )
+
+        this_month = month_start(timezone.now())
+        last_month = add_months(this_month, options['months_ahead'])
+
+        if not is_partitioned():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT MIN("timestamp") FROM "{AUDIT_TABLE}"')
+                oldest = cursor.fetchone()[0]
+
+            first_month = month_start(oldest) if oldest else this_month
+
+            self.stdout.write(
+                f'Converting {AUDIT_TABLE} to a partitioned table '
+                f'({first_month:%Y-%m} to {last_month:%Y-%m})...'
+            )
+            created = convert_to_partitioned(first_month, last_month)
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ {AUDIT_TABLE} is now partitioned by month ({len(created)} partitions + default)'
+            ))
+            return
+
+        created = ensure_partitions(this_month, last_month)
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ Partitions ensured through {last_month:%Y-%m} ({len(created)} checked)'
+        ))
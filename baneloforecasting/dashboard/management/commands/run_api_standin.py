@@ -0,0 +1,76 @@
+# dashboard/management/commands/run_api_standin.py
+# Run with: python manage.py run_api_standin [--port 3000] [--latency-ms 40 --jitter-ms 20] [--failure-rate 0.05] [--plain-json]
+# Serves the Node.js API endpoints from the Django database, for offline load
+# tests and benchmarks (point API_BASE_URL at it).
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.api_standin import ID, ROUTES, make_standin_server
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the Node.js API with injectable latency and failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3000)
+        parser.add_argument(
+            '--latency-ms', type=float, default=0,
+            help='Delay added to every request (milliseconds)'
+        )
+        parser.add_argument(
+            '--jitter-ms', type=float, default=0,
+            help='Uniform +/- variation of the delay (milliseconds)'
+        )
+        parser.add_argument(
+            '--failure-rate', type=float, default=0.0,
+            help='Share of requests answered with --failure-status (0-1)'
+        )
+        parser.add_argument('--failure-status', type=int, default=500)
+        parser.add_argument(
+            '--hang-rate', type=float, default=0.0,
+            help='Share of requests delayed by --hang-seconds, to trigger client timeouts (0-1)'
+        )
+        parser.add_argument('--hang-seconds', type=float, default=35.0)
+        parser.add_argument('--seed', type=int, help='Seed for reproducible fault injection')
+        parser.add_argument(
+            '--plain-json', action='store_true',
+            help='Ignore Accept / Accept-Encoding (uncompressed JSON only, like an older Node.js API)'
+        )
+
+    def handle(self, *args, **options):
+        for rate in ('failure_rate', 'hang_rate'):
+            if not 0 <= options[rate] <= 1:
+                raise CommandError(f"--{rate.replace('_', '-')} must be between 0 and 1")
+
+        server = make_standin_server(
+            options['host'], options['port'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            failure_rate=options['failure_rate'],
+            failure_status=options['failure_status'],
+            hang_rate=options['hang_rate'],
+            hang_seconds=options['hang_seconds'],
+            seed=options['seed'],
+            negotiate=not options['plain_json'],
+        )
+
+        self.stdout.write('\n🚀 Banelo API stand-in')
+        self.stdout.write(f"📡 http://{options['host']}:{options['port']}  (set API_BASE_URL to this)")
+        self.stdout.write(
+            f"⏱  latency {options['latency_ms']:.0f}±{options['jitter_ms']:.0f}ms, "
+            f"failures {options['failure_rate']:.0%} (HTTP {options['failure_status']}), "
+            f"hangs {options['hang_rate']:.0%} ({options['hang_seconds']:.0f}s), "
+            f"{'plain JSON' if options['plain_json'] else 'compact transport'}"
+        )
+        self.stdout.write('\n📋 Endpoints:')
+        for method, pattern, _ in ROUTES:
+            self.stdout.write(f"   {method:<6} {pattern.replace(ID, ':id')}")
+        self.stdout.write('\n⏳ Waiting for requests (Ctrl+C to stop)...\n')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('\n✅ Stand-in stopped')
+        finally:
+            server.server_close()
@@ -0,0 +1,365 @@
+"""
+Per-request performance metrics
+
+RequestMetricsMiddleware measures, for every request:
+- wall time
+- Django ORM query count and SQL time (connection.execute_wrapper)
+- upstream Node.js API call count and latency (reported by APIService)
+- template render time (TimedDjangoTemplates backend)
+
+Values are added to in-memory histograms keyed by URL name, exported in the
+Prometheus text format at /dashboard/api/metrics/, and returned to the
+browser in a Server-Timing header (visible in the devtools Network tab).
+Each request also gets an id (X-Request-ID) that APIService forwards to the
+Node.js API.
+
+Histograms keep cumulative buckets (Prometheus-style, use rate() for
+windows) plus the samples of the last METRICS_WINDOW_SECONDS for p50 / p95 /
+p99 quantiles. Metrics are per worker process.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+
+METRICS_WINDOW_SECONDS = getattr(settings, 'METRICS_WINDOW_SECONDS', 300)
+METRICS_MAX_SAMPLES = getattr(settings, 'METRICS_MAX_SAMPLES', 2048)
+
+# Seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+# ========================================
+# HISTOGRAMS
+# ========================================
+
+class RollingHistogram:
+    """Cumulative bucket counts plus a rolling window of samples for quantiles"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window_seconds=METRICS_WINDOW_SECONDS,
+                 max_samples=METRICS_MAX_SAMPLES):
+        self.buckets = tuple(buckets)
+        self.window_seconds = window_seconds
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        now = time.monotonic()
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self._samples.append((now, value))
+
+    def quantiles(self, quantiles=QUANTILES):
+        """{q: value} over the samples of the last window_seconds (None if empty)"""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            values = sorted(value for _, value in self._samples)
+        if not values:
+            return {q: None for q in quantiles}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in quantiles}
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.bucket_counts), self.count, self.sum
+
+
+class MetricsRegistry:
+    """Named histograms and counters, each split by a tuple of labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+
+    def histogram(self, name, labels, help_text='', buckets=DEFAULT_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, RollingHistogram(buckets))
+                self.help.setdefault(name, help_text)
+        return histogram
+
+    def inc(self, name, labels, amount=1, help_text=''):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+            self.help.setdefault(name, help_text)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+registry = MetricsRegistry()
+
+
+# ========================================
+# PROMETHEUS EXPORT
+# ========================================
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_float(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+def render_prometheus(metrics_registry=None):
+    """All metrics in the Prometheus text exposition format"""
+    metrics_registry = metrics_registry or registry
+    lines = []
+
+    by_name = {}
+    for (name, labels), histogram in sorted(metrics_registry.histograms.items()):
+        by_name.setdefault(name, []).append((labels, histogram))
+
+    for name, series in by_name.items():
+        lines.append(f'# HELP {name} {metrics_registry.help.get(name, "")}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in series:
+            bucket_counts, count, total = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = _format_float(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_float(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        # Rolling-window quantiles as a companion summary
+        lines.append(f'# HELP {name}_window Quantiles over the last {METRICS_WINDOW_SECONDS}s')
+        lines.append(f'# TYPE {name}_window summary')
+        for labels, histogram in series:
+            for q, value in histogram.quantiles().items():
+                if value is not None:
+                    lines.append(f'{name}_window{_format_labels(labels, [("quantile", q)])} {_format_float(value)}')
+
+    counter_names = {}
+    for (name, labels), value in sorted(metrics_registry.counters.items()):
+        counter_names.setdefault(name, []).append((labels, value))
+
+    for name, series in counter_names.items():
+        lines.append(f'# HELP {name} {metrics_registry.help.get(name, "")}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in series:
+            lines.append(f'{name}{_format_labels(labels)} {_format_float(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# ========================================
+# PER-REQUEST RECORDING
+# ========================================
+
+def new_request_metrics():
+    return {
+        'db_queries': 0,
+        'db_seconds': 0.0,
+        'api_calls': 0,
+        'api_seconds': 0.0,
+        'template_seconds': 0.0,
+        'stale_responses': 0,
+    }
+
+
+def get_request_metrics():
+    """Metrics dict of the request being handled (None outside a request)"""
+    return _current.get()
+
+
+def get_request_id():
+    """Id of the request being handled (None outside a request)"""
+    return _request_id.get()
+
+
+def record_upstream_call(seconds):
+    """Called by APIService after each upstream HTTP call"""
+    current = _current.get()
+    if current is not None:
+        current['api_calls'] += 1
+        current['api_seconds'] += seconds
+
+
+def record_stale_response():
+    """Called by APIService when it serves a last-good response during an outage"""
+    current = _current.get()
+    if current is not None:
+        current['stale_responses'] += 1
+
+
+def record_template_render(seconds):
+    current = _current.get()
+    if current is not None:
+        current['template_seconds'] += seconds
+
+
+def _sql_timer(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current = _current.get()
+        if current is not None:
+            current['db_queries'] += 1
+            current['db_seconds'] += time.perf_counter() - started
+
+
+def server_timing_header(metrics, total_seconds):
+    """Server-Timing value (durations in milliseconds)"""
+    return ', '.join([
+        f'db;dur={metrics["db_seconds"] * 1000:.1f};desc="{metrics["db_queries"]} queries"',
+        f'api;dur={metrics["api_seconds"] * 1000:.1f};desc="{metrics["api_calls"]} upstream calls"',
+        f'tpl;dur={metrics["template_seconds"] * 1000:.1f};desc="templates"',
+        f'total;dur={total_seconds * 1000:.1f}',
+    ])
+
+
+def record_request(view, method, status, metrics, total_seconds):
+    labels = {'view': view, 'method': method}
+    registry.histogram('banelo_request_duration_seconds', labels, 'Request wall time').observe(total_seconds)
+    registry.histogram('banelo_request_db_seconds', labels, 'SQL time per request').observe(metrics['db_seconds'])
+    registry.histogram('banelo_request_api_seconds', labels, 'Upstream API time per request').observe(metrics['api_seconds'])
+    registry.histogram('banelo_request_template_seconds', labels, 'Template render time per request').observe(metrics['template_seconds'])
+    registry.inc('banelo_requests_total', {**labels, 'status': status}, help_text='Requests handled')
+    registry.inc('banelo_db_queries_total', labels, metrics['db_queries'], 'ORM queries executed')
+    registry.inc('banelo_api_calls_total', labels, metrics['api_calls'], 'Upstream API calls made')
+
+
+def _install_sql_timers():
+    """Time SQL on every connection of the calling thread; close() the stack to remove"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(_sql_timer))
+    return stack
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request and attach a Server-Timing header
+
+    Works in both sync and async stacks. For async views the SQL timers are
+    installed from the request's thread-sensitive executor, the thread its
+    sync_to_async ORM calls run on.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, tokens, request_id, started = self._start(request)
+        try:
+            with _install_sql_timers():
+                response = self.get_response(request)
+        finally:
+            self._reset(tokens)
+        return self._finish(request, response, metrics, request_id, started)
+
+    async def __acall__(self, request):
+        metrics, tokens, request_id, started = self._start(request)
+        try:
+            stack = await sync_to_async(_install_sql_timers)()
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            self._reset(tokens)
+        return self._finish(request, response, metrics, request_id, started)
+
+    def _start(self, request):
+        metrics = new_request_metrics()
+        # Reuse the caller's id (e.g. from a proxy) so logs can be correlated
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        tokens = (_current.set(metrics), _request_id.set(request_id))
+        return metrics, tokens, request_id, time.perf_counter()
+
+    def _reset(self, tokens):
+        _current.reset(tokens[0])
+        _request_id.reset(tokens[1])
+
+    def _finish(self, request, response, metrics, request_id, started):
+        total_seconds = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        record_request(view or 'unnamed', request.method, response.status_code, metrics, total_seconds)
+
+        response['Server-Timing'] = server_timing_header(metrics, total_seconds)
+        response[REQUEST_ID_HEADER] = request_id
+        if metrics['stale_responses']:
+            # Some upstream data on this page is from before an API outage
+            response['Warning'] = '110 - "Response is Stale"'
+        return response
+
+
+# ========================================
+# TEMPLATE TIMING
+# ========================================
+
+class TimedTemplate:
+    """Wraps a backend template and reports its render time"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            record_template_render(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report render time to the metrics"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_alter_audittrail_user_id_alter_audittrail_user_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('collection', models.CharField(max_length=100, unique=True)),
+                ('last_update_time', models.DateTimeField(blank=True, db_column='last_update_time', null=True)),
+                ('last_doc_id', models.CharField(blank=True, db_column='last_doc_id', default='', max_length=255)),
+                ('docs_synced', models.IntegerField(db_column='docs_synced', default=0)),
+                ('last_synced_at', models.DateTimeField(blank=True, db_column='last_synced_at', null=True)),
+            ],
+            options={
+                'db_table': 'sync_checkpoints',
+                'managed': True,
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_sync_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedDocumentHash',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('collection', models.CharField(max_length=100)),
+                ('doc_id', models.CharField(db_column='doc_id', max_length=255)),
+                ('content_hash', models.CharField(db_column='content_hash', max_length=64)),
+                ('synced_at', models.DateTimeField(auto_now=True, db_column='synced_at')),
+            ],
+            options={
+                'db_table': 'synced_document_hashes',
+                'managed': True,
+                'unique_together': {('collection', 'doc_id')},
+            },
+        ),
+    ]
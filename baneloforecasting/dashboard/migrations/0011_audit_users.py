@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:03
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def backfill_audit_users(apps, schema_editor):
+    """Seed the lookup table from the existing audit history (one-off DISTINCT)"""
+    AuditTrail = apps.get_model('dashboard', 'AuditTrail')
+    AuditUser = apps.get_model('dashboard', 'AuditUser')
+
+    rows = (
+        AuditTrail.objects.exclude(user_name__isnull=True).exclude(user_name='')
+        .values('user_name').annotate(first_seen=Min('timestamp'))
+    )
+    AuditUser.objects.bulk_create(
+        [AuditUser(user_name=row['user_name'], first_seen=row['first_seen']) for row in rows],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_audittrail_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditUser',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user_name', models.CharField(db_column='user_name', max_length=255, unique=True)),
+                ('first_seen', models.DateTimeField(db_column='first_seen', default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'audit_users',
+                'ordering': ['user_name'],
+                'managed': True,
+            },
+        ),
+        migrations.RunPython(backfill_audit_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:40
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from dashboard.audit_search import create_search_index
+    create_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from dashboard.audit_search import drop_search_index
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_audit_users'),
+    ]
+
+    operations = [
+        # PostgreSQL: generated tsvector column + GIN index
+        # SQLite: FTS5 shadow table + sync triggers
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def install_table_versions(apps, schema_editor):
+    from dashboard.table_versions import install_table_versions
+    install_table_versions(schema_editor.connection)
+
+
+def uninstall_table_versions(apps, schema_editor):
+    from dashboard.table_versions import uninstall_table_versions
+    uninstall_table_versions(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_audittrail_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('table_name', models.CharField(db_column='table_name', max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(db_column='updated_at', default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'table_versions',
+                'managed': True,
+            },
+        ),
+        # Change counters for the tables that exist now; tables created
+        # later get theirs from `manage.py install_table_versions`
+        migrations.RunPython(install_table_versions, uninstall_table_versions),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+from django.db import migrations
+
+# Versioned by 0013, but no endpoint reads their versions and the counter
+# row serializes every sale / waste entry on PostgreSQL
+UNVERSIONED_TABLES = ('sales', 'waste_logs')
+
+
+def drop_table_versions(apps, schema_editor):
+    from dashboard.table_versions import uninstall_table_versions
+    uninstall_table_versions(schema_editor.connection, tables=UNVERSIONED_TABLES)
+
+
+def restore_table_versions(apps, schema_editor):
+    from dashboard.table_versions import install_table_versions
+    install_table_versions(schema_editor.connection, tables=UNVERSIONED_TABLES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_table_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_table_versions, restore_table_versions),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:20
+
+from django.db import migrations
+
+
+def create_audit_users_trigger(apps, schema_editor):
+    from dashboard.audit import create_audit_users_trigger
+    create_audit_users_trigger(schema_editor)
+
+
+def drop_audit_users_trigger(apps, schema_editor):
+    from dashboard.audit import drop_audit_users_trigger
+    drop_audit_users_trigger(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_unversion_write_heavy_tables'),
+    ]
+
+    operations = [
+        # Rows inserted outside Django (nodejs-api/routes/audit.js) reach
+        # audit_users too; also picks up the names they added since 0011
+        migrations.RunPython(create_audit_users_trigger, drop_audit_users_trigger),
+    ]
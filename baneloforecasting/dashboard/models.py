@@ -312,8 +312,8 @@ class AuditTrail(models.Model):
         db_column='user_name'
     )
 
-    # Timestamp
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Timestamp (set when the action happens, not when the buffered row is written)
+    timestamp = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.action} by {self.user_name} at {self.timestamp}"
@@ -322,6 +322,33 @@ class AuditTrail(models.Model):
         db_table = 'audit_trail'
         managed = True  # Django will create this table
         ordering = ['-timestamp']
+        # On PostgreSQL the table can be partitioned by month
+        # (python manage.py partition_audit_trail)
+        indexes = [
+            models.Index(fields=['timestamp'], name='audit_trail_ts_idx'),
+            models.Index(fields=['user_name', 'timestamp'], name='audit_trail_user_ts_idx'),
+            models.Index(fields=['action', 'timestamp'], name='audit_trail_action_ts_idx'),
+        ]
+
+
+class AuditUser(models.Model):
+    """
+    Distinct user names seen in the audit trail (filter dropdown source).
+    Kept up to date by a trigger on audit_trail (dashboard/audit.py), so pages
+    never run DISTINCT over audit_trail.
+    """
+    id = models.AutoField(primary_key=True)
+
+    user_name = models.CharField(max_length=255, unique=True, db_column='user_name')
+    first_seen = models.DateTimeField(default=timezone.now, db_column='first_seen')
+
+    def __str__(self):
+        return self.user_name
+
+    class Meta:
+        db_table = 'audit_users'
+        managed = True  # Django will create this table
+        ordering = ['user_name']
 
 
 # =====================================================
@@ -396,3 +423,74 @@ class MLModel(models.Model):
     class Meta:
         db_table = 'ml_models'
         managed = True  # Django manages this table
+
+
+# =====================================================
+# SYNC STATE (Firestore -> local database)
+# =====================================================
+
+class SyncCheckpoint(models.Model):
+    """
+    Per-collection resume point for the incremental Firestore sync.
+    Saved in the same transaction as each applied batch, so a crashed
+    sync picks up right after the last committed document.
+    Rows named 'publish:<collection>' hold the watermark of the last
+    upload in the other direction.
+    """
+    id = models.AutoField(primary_key=True)
+
+    collection = models.CharField(max_length=100, unique=True)
+
+    # Cursor: last seen update time + document id (tie-breaker)
+    last_update_time = models.DateTimeField(null=True, blank=True, db_column='last_update_time')
+    last_doc_id = models.CharField(max_length=255, blank=True, default='', db_column='last_doc_id')
+
+    # Running totals
+    docs_synced = models.IntegerField(default=0, db_column='docs_synced')
+    last_synced_at = models.DateTimeField(null=True, blank=True, db_column='last_synced_at')
+
+    def __str__(self):
+        return f"{self.collection} @ {self.last_update_time} ({self.last_doc_id})"
+
+    class Meta:
+        db_table = 'sync_checkpoints'
+        managed = True  # Django manages this table
+
+
+class SyncedDocumentHash(models.Model):
+    """
+    Content hash of each document last uploaded to Firestore.
+    Lets the uploader skip documents that have not changed since the last sync.
+    """
+    id = models.AutoField(primary_key=True)
+
+    collection = models.CharField(max_length=100)
+    doc_id = models.CharField(max_length=255, db_column='doc_id')
+    content_hash = models.CharField(max_length=64, db_column='content_hash')
+    synced_at = models.DateTimeField(auto_now=True, db_column='synced_at')
+
+    def __str__(self):
+        return f"{self.collection}/{self.doc_id}"
+
+    class Meta:
+        db_table = 'synced_document_hashes'
+        managed = True  # Django manages this table
+        unique_together = [('collection', 'doc_id')]
+
+
+class TableVersion(models.Model):
+    """
+    Change counter of a table, bumped by database triggers on every write
+    (whoever makes it: Django, the Node.js API or the mobile app). The JSON
+    endpoints derive their ETag / Last-Modified from it (dashboard/table_versions.py).
+    """
+    table_name = models.CharField(max_length=100, primary_key=True, db_column='table_name')
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now, db_column='updated_at')
+
+    def __str__(self):
+        return f"{self.table_name} v{self.version}"
+
+    class Meta:
+        db_table = 'table_versions'
+        managed = True  # Django manages this table
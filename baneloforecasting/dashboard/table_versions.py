@@ -0,0 +1,167 @@
+"""
+Table versions - cheap validators for the catalogue JSON endpoints
+
+The table_versions table holds one change counter per table. Triggers bump
+it on every INSERT / UPDATE / DELETE, so writes made outside Django (the
+Node.js API, the mobile app) count too. Every bump updates one shared row,
+which serializes the writers of that table on PostgreSQL, so only the
+tables behind a conditional endpoint (products, recipes) get triggers;
+sales and waste logs, written on every order, do not:
+
+- PostgreSQL: one statement-level trigger per table (a bulk update is one
+  bump) calling bump_table_version().
+- SQLite: row-level INSERT / UPDATE / DELETE triggers.
+
+An endpoint can then answer If-None-Match / If-Modified-Since with a
+single-row lookup instead of reading and serializing the whole table.
+
+The mobile tables are not created by Django migrations, so triggers are
+only installed on tables that exist. Run `python manage.py
+install_table_versions` after creating them later. Installing (again) also
+bumps the counters, so validators issued before can never match stale data.
+A table without a row has no version, and its endpoints skip conditional
+handling.
+"""
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import TableVersion
+
+
+VERSION_TABLE = TableVersion._meta.db_table
+
+# Tables behind the data families served with conditional GETs
+# (dashboard/conditional.py); the other families have no version
+FAMILY_TABLES = {
+    'products': ('products',),
+    'recipes': ('recipes', 'recipe_ingredients'),
+}
+VERSIONED_TABLES = tuple(table for tables in FAMILY_TABLES.values() for table in tables)
+
+POSTGRES_BUMP_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "{VERSION_TABLE}" (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, now())
+    ON CONFLICT (table_name) DO UPDATE
+        SET version = "{VERSION_TABLE}".version + 1, updated_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+# ========================================
+# TRIGGER SETUP
+# ========================================
+
+def create_postgres_triggers(cursor, table):
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{table}_version" ON "{table}"')
+    cursor.execute(
+        f'CREATE TRIGGER "{table}_version" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+        f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()'
+    )
+
+
+def drop_postgres_triggers(cursor, table):
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{table}_version" ON "{table}"')
+
+
+def create_sqlite_triggers(cursor, table):
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        name = f'{table}_version_{operation.lower()}'
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+        cursor.execute(
+            f'CREATE TRIGGER "{name}" AFTER {operation} ON "{table}" BEGIN '
+            f'INSERT OR IGNORE INTO "{VERSION_TABLE}" (table_name, version, updated_at) '
+            f"VALUES ('{table}', 0, CURRENT_TIMESTAMP); "
+            f'UPDATE "{VERSION_TABLE}" SET version = version + 1, updated_at = CURRENT_TIMESTAMP '
+            f"WHERE table_name = '{table}'; "
+            f'END'
+        )
+
+
+def drop_sqlite_triggers(cursor, table):
+    for operation in ('insert', 'update', 'delete'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{table}_version_{operation}"')
+
+
+def bump_versions(cursor, tables):
+    """Start (or advance) the counters of freshly triggered tables"""
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    for table in tables:
+        cursor.execute(
+            f'INSERT INTO "{VERSION_TABLE}" (table_name, version, updated_at) VALUES (%s, 1, %s) '
+            f'ON CONFLICT (table_name) DO UPDATE SET version = "{VERSION_TABLE}".version + 1, '
+            f'updated_at = excluded.updated_at',
+            [table, now],
+        )
+
+
+def install_table_versions(db_connection=None, tables=VERSIONED_TABLES):
+    """
+    Install the version triggers on the tables that exist (idempotent)
+
+    Returns:
+        list: Tables that are now versioned
+    """
+    db_connection = db_connection or connection
+    vendor = db_connection.vendor
+    if vendor not in ('postgresql', 'sqlite'):
+        return []
+
+    with db_connection.cursor() as cursor:
+        existing = set(db_connection.introspection.table_names(cursor))
+        installed = [table for table in tables if table in existing]
+        if vendor == 'postgresql' and installed:
+            cursor.execute(POSTGRES_BUMP_FUNCTION)
+        for table in installed:
+            if vendor == 'postgresql':
+                create_postgres_triggers(cursor, table)
+            else:
+                create_sqlite_triggers(cursor, table)
+        bump_versions(cursor, installed)
+    return installed
+
+
+def uninstall_table_versions(db_connection=None, tables=VERSIONED_TABLES):
+    """Drop the triggers and counters of `tables` (and the bump function with the last of them)"""
+    db_connection = db_connection or connection
+    vendor = db_connection.vendor
+    with db_connection.cursor() as cursor:
+        existing = set(db_connection.introspection.table_names(cursor))
+        for table in tables:
+            if table not in existing:
+                continue
+            if vendor == 'postgresql':
+                drop_postgres_triggers(cursor, table)
+            elif vendor == 'sqlite':
+                drop_sqlite_triggers(cursor, table)
+        if vendor == 'postgresql' and set(VERSIONED_TABLES) <= set(tables):
+            cursor.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+        TableVersion.objects.using(db_connection.alias).filter(table_name__in=tables).delete()
+
+
+# ========================================
+# VALIDATORS
+# ========================================
+
+def family_version(family):
+    """
+    (version token, last change) of a data family from its tables' counters,
+    or (None, None) if any of them is not versioned
+    """
+    tables = FAMILY_TABLES.get(family)
+    if tables is None:
+        return None, None
+    rows = {
+        table_name: (version, updated_at)
+        for table_name, version, updated_at in TableVersion.objects.filter(
+            table_name__in=tables
+        ).values_list('table_name', 'version', 'updated_at')
+    }
+    if len(rows) < len(tables):
+        return None, None
+    token = '.'.join(str(rows[table][0]) for table in tables)
+    return token, max(updated_at for _, updated_at in rows.values())
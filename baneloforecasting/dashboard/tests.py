@@ -1,3 +1,1868 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from benchmarks.synthetic_data import ensure_mobile_tables
+from dashboard import (
+    api_service, audit, audit_search, audit_storage, conditional, data_sources, db_connections, db_router,
+    firestore_sync,
+)
+from dashboard.api_service import (
+    COLUMNS_MEDIA_TYPE, APIService, CircuitBreaker, ProductRecord, decode_timestamp_column, parse_api_datetime,
+)
+from dashboard.api_standin import make_standin_server
+from dashboard.async_api_service import closes_api_client, get_async_api_service
+from dashboard.data_sources import APIDataSource, ORMDataSource, data_source_names, get_data_source
+from dashboard.firestore_sync import (
+    DOCUMENT_ID_FIELD, FIRESTORE_BATCH_LIMIT, batched_upload, count_documents, delete_orphaned_documents,
+    get_checkpoint, incremental_sync, update_field_for,
+)
+from dashboard.live_kpis import KPIHub
+from dashboard.logging_utils import QueueConsoleHandler
+from dashboard.metrics import REQUEST_ID_HEADER, MetricsRegistry
+from dashboard.models import (
+    AuditTrail, AuditUser, Product, Recipe, RecipeIngredient, Sale, SyncCheckpoint, SyncedDocumentHash, WasteLog,
+)
+
+
+# ========================================
+# IN-MEMORY FIRESTORE
+# ========================================
+
+T0 = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def type_order(value):
+    """Firestore's cross-type ordering: null < bool < number < timestamp < string"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value)
+    return (4, str(value))
+
+
+class FakeDocument:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeAggregate:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self.query = query
+
+    def get(self):
+        return [[FakeAggregate(len(self.query._matching()))]]
+
+
+class FakeQuery:
+    """collection / order_by / start_after / limit / stream / count / select / document"""
+
+    def __init__(self, db, name, orders=(), cursor=None, max_docs=None):
+        self.db = db
+        self.name = name
+        self.orders = tuple(orders)
+        self.cursor = cursor
+        self.max_docs = max_docs
+
+    def _copy(self, **changes):
+        state = {'orders': self.orders, 'cursor': self.cursor, 'max_docs': self.max_docs, **changes}
+        return FakeQuery(self.db, self.name, **state)
+
+    def order_by(self, field):
+        return self._copy(orders=self.orders + (field,))
+
+    def start_after(self, values):
+        return self._copy(cursor=values)
+
+    def limit(self, count):
+        return self._copy(max_docs=count)
+
+    def select(self, fields):
+        return self
+
+    def document(self, doc_id):
+        return (self.name, doc_id)
+
+    def _key(self, doc_id, data):
+        return tuple(
+            (5, doc_id) if field == DOCUMENT_ID_FIELD else type_order(data[field])
+            for field in self.orders
+        )
+
+    def _matching(self):
+        # Ordering by a field leaves out documents that do not have it
+        fields = [field for field in self.orders if field != DOCUMENT_ID_FIELD]
+        docs = [
+            (doc_id, data) for doc_id, data in self.db.collections.get(self.name, {}).items()
+            if all(field in data for field in fields)
+        ]
+        docs.sort(key=lambda item: self._key(*item))
+        if self.cursor is not None:
+            after = tuple(
+                (5, self.cursor[field]) if field == DOCUMENT_ID_FIELD else type_order(self.cursor[field])
+                for field in self.orders
+            )
+            docs = [item for item in docs if self._key(*item) > after]
+        return docs
+
+    def stream(self):
+        self.db.stream_calls += 1
+        if self.db.fail_on_stream == self.db.stream_calls:
+            raise ConnectionError('Injected fetch failure')
+        docs = self._matching()
+        if self.max_docs is not None:
+            docs = docs[:self.max_docs]
+        self.db.reads += len(docs)
+        return [FakeDocument(doc_id, data) for doc_id, data in docs]
+
+    def count(self):
+        if not self.db.aggregation:
+            raise AttributeError("'Query' object has no attribute 'count'")
+        return FakeCountQuery(self)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref, data))
+
+    def delete(self, ref):
+        self.writes.append((ref, None))
+
+    def commit(self):
+        with self.db.lock:
+            self.db.commits.append(len(self.writes))
+            if any(self.db.fail_commit(ref[1]) for ref, _ in self.writes):
+                raise ConnectionError('Injected commit failure')
+            for (name, doc_id), data in self.writes:
+                if data is None:
+                    self.db.collections.get(name, {}).pop(doc_id, None)
+                else:
+                    self.db.collections.setdefault(name, {})[doc_id] = dict(data)
+
+
+class FakeFirestore:
+    def __init__(self, collections=None, aggregation=True):
+        self.collections = collections or {}
+        self.aggregation = aggregation
+        self.stream_calls = 0
+        self.fail_on_stream = None
+        self.reads = 0
+        self.commits = []
+        self.fail_commit = lambda doc_id: False
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeQuery(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+class Crash(BaseException):
+    """Not an Exception: escapes the per-document error handling like a killed process"""
+
+
+def sink_apply(doc):
+    """apply_doc that records each document once (a second apply would violate the unique key)"""
+    SyncedDocumentHash.objects.create(collection='sink', doc_id=doc.id, content_hash='')
+    return 'created'
+
+
+def applied_ids():
+    return set(SyncedDocumentHash.objects.filter(collection='sink').values_list('doc_id', flat=True))
+
+
+# ========================================
+# INCREMENTAL SYNC
+# ========================================
+
+class IncrementalSyncTests(TestCase):
+
+    def make_db(self, count, same_time=False):
+        return FakeFirestore({'sales': {
+            f'doc{i:02d}': {'updatedAt': T0 if same_time else T0 + timedelta(minutes=i)}
+            for i in range(count)
+        }})
+
+    def test_pages_through_collection_and_saves_cursor(self):
+        db = self.make_db(7)
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=3)
+
+        self.assertEqual((stats['mode'], stats['pages'], stats['docs'], stats['errors']), ('incremental', 3, 7, 0))
+        self.assertEqual(applied_ids(), {f'doc{i:02d}' for i in range(7)})
+        checkpoint = get_checkpoint('sales')
+        self.assertEqual((checkpoint.last_update_time, checkpoint.last_doc_id), (T0 + timedelta(minutes=6), 'doc06'))
+
+        # Nothing new: nothing read past the cursor
+        self.assertEqual(incremental_sync(db, 'sales', sink_apply, page_size=3)['docs'], 0)
+
+    def test_only_documents_updated_after_the_cursor_are_read(self):
+        db = self.make_db(5)
+        incremental_sync(db, 'sales', sink_apply, page_size=10)
+        db.collections['sales']['doc99'] = {'updatedAt': T0 + timedelta(days=1)}
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=10)
+        self.assertEqual(stats['docs'], 1)
+        self.assertIn('doc99', applied_ids())
+
+    def test_duplicate_timestamps_are_tie_broken_by_document_id(self):
+        db = self.make_db(5, same_time=True)
+        seen = []
+
+        def apply_doc(doc):
+            seen.append(doc.id)
+            return sink_apply(doc)
+
+        # Page boundaries fall between documents with the same update time
+        stats = incremental_sync(db, 'sales', apply_doc, page_size=2)
+
+        self.assertEqual(seen, [f'doc{i:02d}' for i in range(5)])
+        self.assertEqual((stats['pages'], stats['errors']), (3, 0))
+        self.assertEqual(get_checkpoint('sales').last_doc_id, 'doc04')
+
+    def test_resumes_after_a_failed_page_fetch(self):
+        db = self.make_db(7)
+        db.fail_on_stream = 2  # first page after the coverage check succeeds, second fails
+
+        with self.assertRaises(ConnectionError):
+            incremental_sync(db, 'sales', sink_apply, page_size=3)
+        self.assertEqual(applied_ids(), {'doc00', 'doc01', 'doc02'})
+        self.assertEqual(get_checkpoint('sales').last_doc_id, 'doc02')
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=3)
+        self.assertEqual((stats['docs'], stats['errors']), (4, 0))
+        self.assertEqual(applied_ids(), {f'doc{i:02d}' for i in range(7)})
+
+    def test_resumes_after_a_crash_inside_a_page(self):
+        db = self.make_db(7)
+
+        def crash_on_doc04(doc):
+            if doc.id == 'doc04':
+                raise Crash()
+            return sink_apply(doc)
+
+        with self.assertRaises(Crash):
+            incremental_sync(db, 'sales', crash_on_doc04, page_size=3)
+        # The crashed page (doc03..doc05) was rolled back with its checkpoint
+        self.assertEqual(applied_ids(), {'doc00', 'doc01', 'doc02'})
+        self.assertEqual(get_checkpoint('sales').last_doc_id, 'doc02')
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=3)
+        self.assertEqual((stats['docs'], stats['errors']), (4, 0))
+        self.assertEqual(applied_ids(), {f'doc{i:02d}' for i in range(7)})
+
+    def test_failed_document_is_read_again_on_the_next_run(self):
+        db = self.make_db(7)
+        broken = {'doc04'}
+
+        def apply_doc(doc):
+            if doc.id in broken:
+                raise ValueError('bad document')
+            return sink_apply(doc)
+
+        stats = incremental_sync(db, 'sales', apply_doc, page_size=3)
+
+        # The run stops at the failed document, with the cursor just before it
+        self.assertEqual((stats['docs'], stats['errors']), (4, 1))
+        self.assertEqual(applied_ids(), {'doc00', 'doc01', 'doc02', 'doc03'})
+        self.assertEqual(get_checkpoint('sales').last_doc_id, 'doc03')
+
+        broken.clear()
+        stats = incremental_sync(db, 'sales', apply_doc, page_size=3)
+        self.assertEqual((stats['docs'], stats['errors']), (3, 0))
+        self.assertEqual(applied_ids(), {f'doc{i:02d}' for i in range(7)})
+
+    def test_documents_without_a_timestamp_are_skipped(self):
+        db = self.make_db(3)
+        db.collections['sales']['null'] = {'updatedAt': None}
+        db.collections['sales']['millis'] = {'updatedAt': 1767225600000}
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=10)
+
+        self.assertEqual((stats['docs'], stats['no_timestamp']), (3, 2))
+        self.assertEqual(applied_ids(), {'doc00', 'doc01', 'doc02'})
+        self.assertIsInstance(get_checkpoint('sales').last_update_time, datetime)
+
+    def test_page_without_any_timestamp_falls_back_to_full_sync(self):
+        db = FakeFirestore({'sales': {f'doc{i}': {'updatedAt': None} for i in range(4)}})
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=2)
+
+        self.assertEqual((stats['mode'], stats['docs']), ('full', 4))
+        self.assertIsNone(get_checkpoint('sales').last_update_time)
+
+    def test_missing_update_field_falls_back_to_full_sync(self):
+        db = self.make_db(3)
+        db.collections['sales']['mobile1'] = {'orderDate': '2026-01-01 10:00:00'}
+        db.collections['sales']['mobile2'] = {'orderDate': '2026-01-01 11:00:00'}
+
+        stats = incremental_sync(db, 'sales', sink_apply, page_size=2)
+
+        self.assertEqual((stats['mode'], stats['docs'], stats['pages']), ('full', 5, 3))
+        self.assertEqual(applied_ids(), {'doc00', 'doc01', 'doc02', 'mobile1', 'mobile2'})
+        self.assertFalse(SyncCheckpoint.objects.filter(collection='sales', last_update_time__isnull=False).exists())
+
+    def test_update_field_is_per_collection(self):
+        db = FakeFirestore({'sales': {
+            'a': {'createdAt': T0},
+            'b': {'createdAt': T0 + timedelta(minutes=1)},
+        }})
+        with mock.patch.dict(firestore_sync.UPDATE_FIELDS, {'sales': 'createdAt'}):
+            self.assertEqual(update_field_for('sales'), 'createdAt')
+            stats = incremental_sync(db, 'sales', sink_apply)
+
+        self.assertEqual((stats['mode'], stats['docs']), ('incremental', 2))
+        self.assertEqual(update_field_for('unknown_collection'), firestore_sync.DEFAULT_UPDATE_FIELD)
+
+
+# ========================================
+# BATCHED UPLOADS
+# ========================================
+
+class BatchedUploadTests(TestCase):
+
+    def docs(self, count, version=1):
+        return [(f'p{i:04d}', {'value': i, 'version': version, 'synced_at': datetime.now()}) for i in range(count)]
+
+    def hashes(self):
+        return SyncedDocumentHash.objects.filter(collection='predictions').count()
+
+    def test_commits_at_most_500_writes_per_batch(self):
+        db = FakeFirestore()
+
+        stats = batched_upload(db, 'predictions', self.docs(1201), batch_size=1000)
+
+        self.assertEqual(sorted(db.commits), [201, 500, 500])
+        self.assertTrue(all(size <= FIRESTORE_BATCH_LIMIT for size in db.commits))
+        self.assertEqual((stats['uploaded'], stats['batches'], stats['errors']), (1201, 3, 0))
+        self.assertEqual(len(db.collections['predictions']), 1201)
+        self.assertEqual(self.hashes(), 1201)
+
+    def test_unchanged_documents_are_skipped(self):
+        db = FakeFirestore()
+        batched_upload(db, 'predictions', self.docs(10))
+        db.commits.clear()
+
+        # synced_at differs on every run but does not count as a change
+        stats = batched_upload(db, 'predictions', self.docs(10))
+        self.assertEqual((stats['uploaded'], stats['unchanged']), (0, 10))
+        self.assertEqual(db.commits, [])
+
+        changed = self.docs(10)
+        changed[3][1]['value'] = -1
+        stats = batched_upload(db, 'predictions', changed)
+        self.assertEqual((stats['uploaded'], stats['unchanged']), (1, 9))
+
+    def test_failed_batch_counts_errors_and_keeps_no_hashes(self):
+        db = FakeFirestore()
+        db.fail_commit = lambda doc_id: doc_id == 'p0000'
+
+        stats = batched_upload(db, 'predictions', self.docs(700))
+
+        self.assertEqual((stats['uploaded'], stats['errors'], stats['batches']), (200, 500, 1))
+        recorded = set(SyncedDocumentHash.objects.filter(collection='predictions').values_list('doc_id', flat=True))
+        self.assertEqual(len(recorded), 200)
+        self.assertNotIn('p0000', recorded)
+
+        # The failed documents are retried on the next run, the others skipped
+        db.fail_commit = lambda doc_id: False
+        stats = batched_upload(db, 'predictions', self.docs(700))
+        self.assertEqual((stats['uploaded'], stats['unchanged'], stats['errors']), (500, 200, 0))
+
+    def test_force_reuploads_unchanged_documents(self):
+        db = FakeFirestore()
+        batched_upload(db, 'predictions', self.docs(10))
+
+        # What sync_predictions_to_firebase.py --force passes
+        stats = batched_upload(db, 'predictions', self.docs(10), skip_unchanged=False)
+
+        self.assertEqual((stats['uploaded'], stats['unchanged']), (10, 0))
+        self.assertEqual(self.hashes(), 10)
+
+    def test_full_reconcile_deletes_orphaned_documents(self):
+        db = FakeFirestore()
+        batched_upload(db, 'predictions', self.docs(10))
+        kept = [doc_id for doc_id, _ in self.docs(10)[:7]]
+
+        stats = delete_orphaned_documents(db, 'predictions', kept)
+
+        self.assertEqual((stats['deleted'], stats['errors']), (3, 0))
+        self.assertEqual(sorted(db.collections['predictions']), kept)
+        self.assertEqual(self.hashes(), 7)
+        # A prediction that comes back is uploaded again, not skipped as unchanged
+        stats = batched_upload(db, 'predictions', self.docs(10))
+        self.assertEqual((stats['uploaded'], stats['unchanged']), (3, 7))
+
+    def test_orphaned_documents_are_deleted_in_batches(self):
+        db = FakeFirestore()
+        batched_upload(db, 'predictions', self.docs(1201))
+        db.commits.clear()
+        db.fail_commit = lambda doc_id: doc_id == 'p0000'
+
+        with self.assertLogs('dashboard.firestore_sync', 'WARNING'):
+            stats = delete_orphaned_documents(db, 'predictions', [])
+
+        self.assertEqual(db.commits, [500, 500, 201])
+        self.assertEqual((stats['deleted'], stats['errors'], stats['batches']), (701, 500, 2))
+        # The batch that failed is still in Firestore and keeps its hashes
+        self.assertEqual(len(db.collections['predictions']), 500)
+        self.assertEqual(self.hashes(), 500)
+
+    def test_count_documents_uses_the_aggregation(self):
+        db = FakeFirestore({'predictions': {f'p{i}': {} for i in range(42)}})
+
+        self.assertEqual(count_documents(db, 'predictions'), 42)
+        self.assertEqual(db.reads, 0)
+
+    def test_count_documents_without_aggregation_support(self):
+        db = FakeFirestore({'predictions': {f'p{i}': {} for i in range(42)}}, aggregation=False)
+
+        self.assertEqual(count_documents(db, 'predictions'), 42)
+        self.assertEqual(db.reads, 42)
+
+    def test_count_documents_ordered_by_a_field(self):
+        db = FakeFirestore({'sales': {'a': {'updatedAt': T0}, 'b': {}}})
+
+        self.assertEqual(count_documents(db, 'sales', order_by='updatedAt'), 1)
+        db.aggregation = False
+        self.assertEqual(count_documents(db, 'sales', order_by='updatedAt'), 1)
+
+
+# ========================================
+# ASYNC API CLIENT
+# ========================================
+
+class AsyncClientLifecycleTests(SimpleTestCase):
+
+    def test_client_of_a_per_request_loop_is_closed(self):
+        service = get_async_api_service()
+        opened = []
+
+        @closes_api_client
+        async def view(request):
+            opened.append(service._client())
+            return 'ok'
+
+        # Under WSGI every call runs on a new event loop
+        for _ in range(3):
+            self.assertEqual(async_to_sync(view)(RequestFactory().get('/')), 'ok')
+
+        self.assertEqual(len(opened), 3)
+        self.assertTrue(all(client.is_closed for client in opened))
+        self.assertEqual(len(service._clients), 0)
+
+
+# ========================================
+# LIVE KPI STREAM
+# ========================================
+
+class LiveKpiStreamTests(TestCase):
+
+    def test_stream_is_off_unless_enabled(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+
+        with mock.patch('dashboard.views.LIVE_KPI_ENABLED', False):
+            response = self.client.get('/dashboard/api/kpi-stream/')
+
+        # 204 stops EventSource from reconnecting
+        self.assertEqual(response.status_code, 204)
+
+    def test_wsgi_stream_ends_after_its_max_lifetime(self):
+        hub = KPIHub(heartbeat_seconds=0.01, max_stream_seconds=0.05, retry_seconds=10)
+
+        with mock.patch.object(KPIHub, '_run', lambda self: None):
+            messages = list(hub.stream())
+
+        self.assertEqual(messages[0], 'retry: 10000\n\n')
+        self.assertTrue(messages[1:])
+        self.assertEqual(hub._subscribers, 0)
+
+
+# ========================================
+# CONNECTION REUSE STATS
+# ========================================
+
+class ConnectionStatsTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(db_connections._stats, {'requests': 0, 'connections_opened': {}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(User.objects.create_user('manager'))
+
+    def open_connection(self, alias='default'):
+        connection_created.send(sender=type(connections[alias]), connection=mock.Mock(alias=alias))
+
+    def test_requests_and_new_connections_are_counted(self):
+        self.open_connection()
+        for _ in range(4):
+            self.client.get('/dashboard/api/health/db/')
+
+        stats = self.client.get('/dashboard/api/health/db/').json()['stats']
+
+        # The fifth request is still being handled
+        self.assertEqual((stats['requests'], stats['connections_opened'], stats['reuse_ratio']), (4, 1, 0.75))
+        default = stats['databases']['default']
+        self.assertEqual((default['vendor'], default['connections_opened']), ('sqlite', 1))
+        self.assertEqual(default['conn_max_age'], connections.settings['default']['CONN_MAX_AGE'])
+        self.assertEqual((default['pooled'], default['pool']), (False, None))
+
+    def test_no_ratio_before_the_first_request(self):
+        self.open_connection()
+
+        stats = db_connections.get_connection_stats()
+
+        self.assertEqual((stats['requests'], stats['connections_opened'], stats['reuse_ratio']), (0, 1, None))
+
+    def test_more_connections_than_requests_is_no_reuse(self):
+        for _ in range(3):
+            self.open_connection()
+        db_connections.on_request_finished(sender=None)
+
+        self.assertEqual(db_connections.get_connection_stats()['reuse_ratio'], 0.0)
+
+    def test_pool_counters_are_included(self):
+        pool = mock.Mock(get_stats=mock.Mock(return_value={'pool_size': 4, 'requests_num': 120}))
+        with mock.patch.object(connections['default'], 'pool', pool, create=True):
+            stats = db_connections.get_connection_stats()
+
+        self.assertEqual(stats['databases']['default']['pool'], {'pool_size': 4, 'requests_num': 120})
+
+
+# ========================================
+# READ REPLICA ROUTING
+# ========================================
+
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+        self.lag = 1.0
+        for name, value in (('replica_configured', lambda: True), ('get_replica_lag', lambda: self.lag)):
+            patcher = mock.patch.object(db_router, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def read_alias(self):
+        return self.router.db_for_read(AuditTrail)
+
+    def test_only_reporting_reads_go_to_the_replica(self):
+        self.assertEqual(self.read_alias(), 'default')
+        with db_router.reporting_reads():
+            self.assertEqual(self.read_alias(), 'replica')
+        self.assertEqual(db_router.use_replica(self.read_alias)(), 'replica')
+        self.assertEqual(self.router.db_for_write(AuditTrail), 'default')
+
+    def test_lagging_or_unreachable_replica_is_skipped(self):
+        with db_router.reporting_reads():
+            self.lag = db_router.DB_REPLICA_MAX_LAG + 1
+            self.assertEqual(self.read_alias(), 'default')
+            self.lag = None
+            self.assertEqual(self.read_alias(), 'default')
+
+    def test_without_a_replica_reads_stay_on_the_primary(self):
+        with mock.patch.object(db_router, 'replica_configured', return_value=False), db_router.reporting_reads():
+            self.assertEqual(self.read_alias(), 'default')
+
+    def test_nothing_is_migrated_on_the_replica(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'dashboard'))
+        self.assertTrue(self.router.allow_migrate('default', 'dashboard'))
+
+
+class ReplicaLagTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(db_router._lag_cache, {'checked_at': 0.0, 'lag': None})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lag_is_measured_once_per_interval(self):
+        clock = mock.Mock(monotonic=mock.Mock(return_value=1000.0))
+        with mock.patch.object(db_router, 'time', clock), \
+                mock.patch.object(db_router, 'measure_replica_lag', side_effect=[2.0, 30.0]) as measure:
+            self.assertEqual(db_router.get_replica_lag(), 2.0)
+            clock.monotonic.return_value += db_router.DB_REPLICA_LAG_CHECK_INTERVAL - 0.1
+            self.assertEqual(db_router.get_replica_lag(), 2.0)
+            clock.monotonic.return_value += 0.2
+            self.assertEqual(db_router.get_replica_lag(), 30.0)
+
+        self.assertEqual(measure.call_count, 2)
+
+    def test_failed_lag_check_reports_no_lag(self):
+        # No 'replica' alias is configured in the tests
+        with self.assertLogs('dashboard.db_router', 'WARNING'):
+            self.assertIsNone(db_router.measure_replica_lag())
+
+
+class ReplicaPinningTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(db_router, 'get_replica_lag', return_value=0.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(db_router, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def run_request(self, request, write=None):
+        """Run a request through the middleware; returns (response, replica usable in the view)"""
+        seen = {}
+
+        def view(request):
+            if write is not None:
+                db_router.ReplicaRouter().db_for_write(write)
+            seen['usable'] = db_router.replica_usable()
+            return HttpResponse()
+
+        response = db_router.ReplicaPinningMiddleware(view)(request)
+        return response, seen['usable']
+
+    def test_reads_do_not_pin(self):
+        response, usable = self.run_request(self.factory.get('/'))
+
+        self.assertTrue(usable)
+        self.assertNotIn(db_router.PIN_COOKIE_NAME, response.cookies)
+
+    def test_unsafe_methods_and_orm_writes_pin_the_client(self):
+        for request, write in ((self.factory.post('/'), None), (self.factory.get('/'), AuditTrail)):
+            response, _ = self.run_request(request, write)
+            self.assertIn(db_router.PIN_COOKIE_NAME, response.cookies)
+
+    def test_session_writes_do_not_pin(self):
+        response, _ = self.run_request(self.factory.get('/'), Session)
+
+        self.assertNotIn(db_router.PIN_COOKIE_NAME, response.cookies)
+
+    def test_pinned_client_reads_from_the_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE_NAME] = str(time.time() + 5)
+        _, usable = self.run_request(request)
+        self.assertFalse(usable)
+
+        request = self.factory.get('/')
+        request.COOKIES[db_router.PIN_COOKIE_NAME] = str(time.time() - 1)
+        _, usable = self.run_request(request)
+        self.assertTrue(usable)
+
+    def test_async_views_share_the_request_state(self):
+        async def view(request):
+            db_router.ReplicaRouter().db_for_write(AuditTrail)
+            return HttpResponse()
+
+        response = async_to_sync(db_router.ReplicaPinningMiddleware(view))(self.factory.get('/'))
+
+        self.assertIn(db_router.PIN_COOKIE_NAME, response.cookies)
+
+
+# ========================================
+# AUDIT WRITER
+# ========================================
+
+class AuditWriterTests(TestCase):
+
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = spool_dir.name
+        # Flush on demand instead of from the background thread
+        for target, name in ((audit.AuditWriter, '_ensure_started'), (audit, 'close_old_connections')):
+            patcher = mock.patch.object(target, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def writer(self, **kwargs):
+        return audit.AuditWriter(batch_size=2, spool_dir=self.spool_dir, **kwargs)
+
+    def submit(self, writer, *details):
+        for detail in details:
+            writer.submit(audit.build_audit_entry('Sale', 'cashier', detail))
+
+    def details(self):
+        return sorted(AuditTrail.objects.values_list('details', flat=True))
+
+    def spooled(self, writer):
+        if not os.path.exists(writer.spool_path):
+            return []
+        with open(writer.spool_path, encoding='utf-8') as f:
+            return [json.loads(line)['details'] for line in f]
+
+    def test_flush_writes_queued_entries_in_batches(self):
+        writer = self.writer()
+        self.submit(writer, 'a', 'b', 'c', 'd', 'e')
+
+        writer.flush()
+
+        self.assertEqual(self.details(), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual((writer.stats['written'], writer.stats['flushes']), (5, 3))
+
+    def test_full_queue_spills_to_disk(self):
+        writer = self.writer(queue_size=1)
+        self.submit(writer, 'queued', 'overflow')
+
+        self.assertEqual(self.spooled(writer), ['overflow'])
+        self.assertEqual((writer.stats['enqueued'], writer.stats['spilled']), (1, 1))
+
+    def test_spilled_entries_are_replayed_when_the_database_is_back(self):
+        writer = self.writer()
+        self.submit(writer, 'a', 'b')
+        with mock.patch.object(AuditTrail.objects, 'bulk_create', side_effect=Exception('db down')), \
+                self.assertLogs('dashboard.audit', 'WARNING'):
+            writer.flush()
+        self.assertEqual((self.details(), self.spooled(writer)), ([], ['a', 'b']))
+
+        self.submit(writer, 'c')
+        writer.flush()
+
+        self.assertEqual(self.details(), ['a', 'b', 'c'])
+        self.assertEqual((writer.stats['replayed'], writer.stats['written']), (2, 1))
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_replay_keeps_entries_while_the_database_is_down(self):
+        writer = self.writer()
+        writer._spill([audit.build_audit_entry('Sale', 'cashier', 'spilled')])
+        self.submit(writer, 'new')
+
+        with mock.patch.object(AuditTrail.objects, 'bulk_create', side_effect=Exception('db down')), \
+                self.assertLogs('dashboard.audit', 'WARNING'):
+            writer.flush()
+
+        self.assertEqual(sorted(self.spooled(writer)), ['new', 'spilled'])
+        self.assertEqual(os.listdir(self.spool_dir), [audit.SPOOL_FILENAME])
+
+    def test_append_reopens_a_spool_renamed_by_another_process(self):
+        writer = self.writer()
+        writer._spill([audit.build_audit_entry('Sale', 'cashier', 'old')])
+        taken = writer.spool_path + '.other.replay'
+        real_flock = audit.fcntl.flock if audit.fcntl else None
+
+        def replay_elsewhere(fd, operation):
+            # Another worker replays the spool while we wait for the lock
+            if not os.path.exists(taken):
+                os.replace(writer.spool_path, taken)
+            if real_flock:
+                real_flock(fd, operation)
+
+        with mock.patch.object(audit, 'fcntl', mock.Mock(flock=replay_elsewhere, LOCK_EX=2)):
+            writer._spill([audit.build_audit_entry('Sale', 'cashier', 'new')])
+
+        self.assertEqual(self.spooled(writer), ['new'])
+        with open(taken, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['details'] for line in f], ['old'])
+
+
+# ========================================
+# AUDIT USERS
+# ========================================
+
+class AuditUsersTriggerTests(TestCase):
+
+    def test_rows_inserted_outside_django_add_their_user(self):
+        # What nodejs-api/routes/audit.js runs
+        with connection.cursor() as cursor:
+            for user_name in ('cashier', 'cashier', ''):
+                cursor.execute(
+                    "INSERT INTO audit_trail (action, user_id, user_name, details, timestamp) "
+                    "VALUES ('Sale', '7', %s, '', CURRENT_TIMESTAMP)",
+                    [user_name],
+                )
+
+        self.assertEqual(list(AuditUser.objects.values_list('user_name', flat=True)), ['cashier'])
+
+
+# ========================================
+# METRICS ENDPOINT
+# ========================================
+
+class MetricsTokenTests(TestCase):
+
+    def test_bearer_token_is_required(self):
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/dashboard/api/metrics/').status_code, 401)
+            self.assertEqual(
+                self.client.get('/dashboard/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401
+            )
+            self.assertEqual(
+                self.client.get('/dashboard/api/metrics/', HTTP_AUTHORIZATION='Bearer s3crét').status_code, 401
+            )
+            self.assertEqual(
+                self.client.get('/dashboard/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200
+            )
+
+
+# ========================================
+# CONDITIONAL REQUESTS
+# ========================================
+
+def api_response(status, payload=None, **headers):
+    """A requests.Response as the Node.js API would send it"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode() if payload is not None else b''
+    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    response.headers.update(headers)
+    return response
+
+
+PRODUCTS_BODY = {'success': True, 'data': [{'id': 7, 'firebase_id': 'fb-latte', 'name': 'Latte'}]}
+
+
+class ConditionalUpstreamTests(SimpleTestCase):
+
+    def setUp(self):
+        self.api = APIService()
+        # Every read goes upstream, conditionally once there is a copy
+        self.api.cache_seconds = 0
+
+    def get(self, *responses):
+        with mock.patch('dashboard.api_service.requests.get', side_effect=responses) as get:
+            results = [self.api.get_product_records() for _ in responses]
+        return results, [call.kwargs['headers'] for call in get.call_args_list]
+
+    def test_not_modified_reuses_the_cached_records(self):
+        (first, second), (plain, conditional_get) = self.get(
+            api_response(200, PRODUCTS_BODY, ETag='W/"1"', **{'Last-Modified': 'Mon, 19 Oct 2026 08:00:00 GMT'}),
+            api_response(304, ETag='W/"1"'),
+        )
+
+        self.assertNotIn('If-None-Match', plain)
+        self.assertEqual(conditional_get['If-None-Match'], 'W/"1"')
+        self.assertEqual(conditional_get['If-Modified-Since'], 'Mon, 19 Oct 2026 08:00:00 GMT')
+        self.assertIs(second, first)
+        self.assertEqual([record.firebase_id for record in second], ['fb-latte'])
+
+    def test_changed_list_replaces_the_copy_and_its_validators(self):
+        changed = {'success': True, 'data': PRODUCTS_BODY['data'] + [{'id': 8, 'firebase_id': 'fb-mocha', 'name': 'Mocha'}]}
+        (first, second), _ = self.get(api_response(200, PRODUCTS_BODY, ETag='W/"1"'), api_response(200, changed, ETag='W/"2"'))
+
+        self.assertEqual((len(first), len(second)), (1, 2))
+        with mock.patch('dashboard.api_service.requests.get', return_value=api_response(304)):
+            self.assertEqual(self.api.get_list_validators('/api/products', keys=('products',)), ('W/"2"', None))
+
+    def test_api_data_source_tag_follows_the_upstream_etag(self):
+        source = APIDataSource()
+        with mock.patch.object(APIDataSource, 'api', self.api), \
+                mock.patch('dashboard.api_service.requests.get', side_effect=[
+                    api_response(200, PRODUCTS_BODY, ETag='W/"1"'), api_response(304),
+                    api_response(200, PRODUCTS_BODY, ETag='W/"2"')]):
+            first, same, changed = (source.validators('products')[0] for _ in range(3))
+
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, changed)
+        self.assertTrue(first.startswith('"api-'))
+        self.assertEqual(source.validators('sales'), (None, None))
+
+
+class ConditionalCatalogueTests(TestCase):
+
+    URL = '/dashboard/api/products/'
+    ETAG = '"orm-0123456789abcdef0123"'
+    CHANGED_AT = datetime(2026, 10, 19, 8, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('manager'))
+        self.source = mock.Mock()
+        self.source.validators.return_value = (self.ETAG, self.CHANGED_AT)
+        self.source.get_product_records.return_value = (ProductRecord(PRODUCTS_BODY['data'][0]),)
+        for target in ('dashboard.conditional.get_data_source', 'dashboard.views.get_data_source'):
+            patcher = mock.patch(target, lambda family: self.source)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_full_response_carries_the_validators(self):
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.ETAG)
+        self.assertEqual(response['Last-Modified'], 'Mon, 19 Oct 2026 08:00:00 GMT')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+        self.source.validators.assert_called_once_with('products')
+
+    def test_unchanged_list_is_not_read(self):
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=self.ETAG)
+
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        self.source.get_product_records.assert_not_called()
+
+    def test_stale_etag_gets_the_list(self):
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH='"orm-older"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['id'] for product in response.json()['products']], ['fb-latte'])
+
+    def test_failed_validators_lookup_serves_the_list_without_them(self):
+        self.source.validators.side_effect = RuntimeError('API down')
+
+        with self.assertLogs('dashboard.conditional', 'WARNING'):
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=self.ETAG)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_error_responses_drop_the_validators(self):
+        view = conditional.conditional_catalogue('products')(lambda request: JsonResponse({}, status=503))
+        request = RequestFactory().get(self.URL)
+
+        response = view(request)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+
+# ========================================
+# CIRCUIT BREAKER AND STALE FALLBACK
+# ========================================
+
+class FakeClock:
+    """Stands in for the time module: sleeping only moves the clock"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeClockMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(api_service, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class CircuitBreakerTests(FakeClockMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.breaker = CircuitBreaker('/api/test', error_rate=0.5, min_calls=4, window_seconds=30, open_seconds=15)
+
+    def open_breaker(self):
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            for ok in (True, False, True, False):
+                self.assertTrue(self.breaker.allow())
+                self.breaker.record(ok)
+
+    def test_opens_once_the_error_rate_is_reached(self):
+        for ok in (True, False, False):
+            self.breaker.record(ok)
+        # 2 of 3 failed, but fewer than min_calls were made
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            self.breaker.record(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual((self.breaker.retry_in(), self.breaker.stats['short_circuited']), (15, 1))
+
+    def test_old_failures_leave_the_window(self):
+        for _ in range(3):
+            self.breaker.record(False)
+        self.clock.sleep(31)
+        self.breaker.record(True)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.snapshot()['calls_in_window'], 1)
+
+    def test_single_half_open_probe_closes_the_breaker(self):
+        self.open_breaker()
+        self.clock.sleep(15)
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_opens_the_breaker_again(self):
+        self.open_breaker()
+        self.clock.sleep(15)
+        self.assertTrue(self.breaker.allow())
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            self.breaker.record(False)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.retry_in(), 15)
+        self.assertEqual(self.breaker.stats['opened'], 2)
+
+    def test_probe_without_a_verdict_lets_the_next_one_through(self):
+        self.open_breaker()
+        self.clock.sleep(15)
+        self.assertTrue(self.breaker.allow())
+
+        # e.g. the request was cancelled before it reached the API
+        self.breaker.finish(None, None)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+    def test_open_breaker_fails_fast_without_calling_the_api(self):
+        api = APIService()
+        down = requests.exceptions.ConnectionError('refused')
+
+        with mock.patch('dashboard.api_service.requests.get', side_effect=down) as get, \
+                self.assertLogs('dashboard.api_service', 'WARNING'):
+            for _ in range(api_service.API_BREAKER_MIN_CALLS):
+                api.get_product('fb-latte')
+            result = api._make_request('GET', '/api/products/fb-latte')
+
+        self.assertEqual(get.call_count, api_service.API_BREAKER_MIN_CALLS)
+        self.assertTrue(result['circuit_open'])
+        self.assertEqual(api.breaker(api_service.normalize_endpoint('/api/products/fb-latte')).state,
+                         CircuitBreaker.OPEN)
+
+
+class FakeThread:
+    """Records background revalidations instead of starting them"""
+
+    started = []
+
+    def __init__(self, target, args, **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        FakeThread.started.append(self)
+
+    def run(self):
+        self.target(*self.args)
+
+
+class StaleWhileRevalidateTests(FakeClockMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIService()
+        FakeThread.started = []
+        patcher = mock.patch.object(api_service, 'threading', mock.Mock(Thread=FakeThread, Lock=threading.Lock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def products(self, *responses):
+        with mock.patch('dashboard.api_service.requests.get', side_effect=responses):
+            return self.api.get_product_records()
+
+    def last_good(self):
+        return self.api._last_good[self.api._cache_key('/api/products', None)]
+
+    def revalidate(self, *responses):
+        with mock.patch('dashboard.api_service.requests.get', side_effect=responses) as get:
+            for thread in FakeThread.started:
+                thread.run()
+        return get.call_count
+
+    def test_outage_serves_the_last_good_copy_and_refreshes_it_in_the_background(self):
+        down = requests.exceptions.ConnectionError('refused')
+        fresh = self.products(api_response(200, PRODUCTS_BODY))
+        self.clock.sleep(self.api.cache_seconds + 1)
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            stale = self.products(down)
+            self.products(down)
+
+        self.assertIs(stale, fresh)
+        self.assertTrue(self.last_good().stale)
+        # One background refresh per list, however many readers saw it stale
+        self.assertEqual(len(FakeThread.started), 1)
+
+        changed = {'success': True, 'data': PRODUCTS_BODY['data'] + [{'id': 8, 'firebase_id': 'fb-mocha'}]}
+        with self.assertLogs('dashboard.api_service', 'INFO'):
+            calls = self.revalidate(down, api_response(200, changed))
+
+        self.assertEqual(calls, 2)
+        refreshed = self.products()
+        self.assertEqual([record.firebase_id for record in refreshed], ['fb-latte', 'fb-mocha'])
+        self.assertFalse(self.last_good().stale)
+        self.assertEqual(self.api._revalidating, set())
+
+    def test_copy_older_than_the_stale_limit_is_not_served(self):
+        self.products(api_response(200, PRODUCTS_BODY))
+        self.clock.sleep(api_service.API_STALE_MAX_SECONDS + 1)
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            records = self.products(requests.exceptions.ConnectionError('refused'))
+
+        self.assertEqual(records, ())
+        self.assertEqual(FakeThread.started, [])
+
+    def test_revalidation_gives_up_after_its_attempts(self):
+        down = requests.exceptions.ConnectionError('refused')
+        self.products(api_response(200, PRODUCTS_BODY))
+        self.clock.sleep(self.api.cache_seconds + 1)
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            self.products(down)
+            started = self.clock.now
+            calls = self.revalidate(*[down] * api_service.API_REVALIDATE_ATTEMPTS)
+
+        # Attempts wait for the breaker's half-open probe instead of hammering the API
+        self.assertLessEqual(calls, api_service.API_REVALIDATE_ATTEMPTS)
+        self.assertGreaterEqual(self.clock.now - started, api_service.API_REVALIDATE_ATTEMPTS)
+        self.assertEqual(self.api._revalidating, set())
+
+
+# ========================================
+# UPSTREAM INSTRUMENTATION
+# ========================================
+
+class UpstreamMetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        patcher = mock.patch.object(api_service, 'registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = APIService()
+
+    def counter(self, name, **labels):
+        return self.registry.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def call(self, response, endpoint='/api/products/Xb4k9LmQ2pA'):
+        with mock.patch('dashboard.api_service.requests.get', side_effect=[response]):
+            return self.api._make_request('GET', endpoint)
+
+    def test_calls_are_counted_by_normalized_endpoint_and_status(self):
+        ok = api_response(200, {'success': True, 'data': {'id': 7}})
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            self.call(ok)
+            self.call(api_response(503, {'success': False}), '/api/products/Qz81nYt0wE')
+            self.call(requests.exceptions.ConnectionError('refused'))
+
+        labels = {'method': 'GET', 'endpoint': '/api/products/:id'}
+        self.assertEqual(self.counter('banelo_upstream_responses_total', status=200, **labels), 1)
+        self.assertEqual(self.counter('banelo_upstream_responses_total', status=503, **labels), 1)
+        self.assertEqual(self.counter('banelo_upstream_responses_total', status='none', **labels), 1)
+        self.assertEqual(self.counter('banelo_upstream_errors_total', error='http_5xx', **labels), 1)
+        self.assertEqual(self.counter('banelo_upstream_errors_total', error='ConnectionError', **labels), 1)
+        self.assertEqual(self.counter('banelo_upstream_bytes_total', **labels), len(ok.content) + len(b'{"success": false}'))
+        self.assertEqual(self.registry.histogram('banelo_upstream_duration_seconds', labels).snapshot()[1], 3)
+
+    def test_failures_are_always_traced_with_the_request_id(self):
+        with mock.patch.object(api_service, 'API_TRACE_SAMPLE_RATE', 1e-9), \
+                self.assertLogs('dashboard.api_service.trace', 'INFO') as trace, \
+                self.assertLogs('dashboard.api_service', 'WARNING'):
+            with mock.patch('dashboard.api_service.random.random', return_value=0.5):
+                self.call(api_response(200, {'success': True, 'data': {}}))
+            self.call(requests.exceptions.Timeout('slow'))
+
+        record, = trace.records
+        self.assertEqual((record.status, record.endpoint), (None, '/api/products/:id'))
+        self.assertIn('error=Timeout', record.getMessage())
+        self.assertEqual(len(record.request_id), 32)
+
+
+class RequestIdPropagationTests(TestCase):
+
+    URL = '/dashboard/api/products/'
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('manager'))
+        source = APIDataSource()
+        for target, value in (('dashboard.conditional.get_data_source', lambda family: source),
+                              ('dashboard.views.get_data_source', lambda family: source)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(APIDataSource, 'api', APIService())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **headers):
+        with mock.patch('dashboard.api_service.requests.get', return_value=api_response(200, PRODUCTS_BODY)) as get:
+            response = self.client.get(self.URL, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, {call.kwargs['headers'][REQUEST_ID_HEADER] for call in get.call_args_list}
+
+    def test_caller_request_id_reaches_the_api(self):
+        response, upstream_ids = self.get(HTTP_X_REQUEST_ID='lb-trace-42')
+
+        self.assertEqual(upstream_ids, {'lb-trace-42'})
+        self.assertEqual(response[REQUEST_ID_HEADER], 'lb-trace-42')
+
+    def test_request_without_an_id_gets_one(self):
+        response, upstream_ids = self.get()
+
+        self.assertEqual(upstream_ids, {response[REQUEST_ID_HEADER]})
+        self.assertEqual(len(response[REQUEST_ID_HEADER]), 32)
+
+
+# ========================================
+# PRODUCT LOOKUPS
+# ========================================
+
+class ProductLookupTests(SimpleTestCase):
+
+    CATALOGUE = {'success': True, 'data': [
+        {'id': 7, 'firebase_id': 'fb-latte', 'name': 'Latte'},
+        {'id': 9, 'firebase_id': '', 'name': 'Cookie'},
+    ]}
+
+    def lookup(self, product_id, *responses):
+        api = APIService()
+        with mock.patch('dashboard.api_service.requests.get', side_effect=responses) as get:
+            record = api.get_product_record(product_id)
+        return record, [call.args[0].removeprefix(api.base_url) for call in get.call_args_list]
+
+    def test_firebase_id_is_a_point_lookup(self):
+        record, urls = self.lookup('fb/latte', api_response(200, {'success': True, 'data': {'id': 7, 'firebase_id': 'fb/latte'}}))
+
+        self.assertEqual((record.id, record.firebase_id), (7, 'fb/latte'))
+        self.assertEqual(urls, ['/api/products/fb%2Flatte'])
+
+    def test_local_id_comes_from_the_catalogue_index(self):
+        with self.assertNoLogs('dashboard.api_service', 'WARNING'):
+            synced, urls = self.lookup(7, api_response(200, self.CATALOGUE))
+            unsynced, _ = self.lookup('9', api_response(200, self.CATALOGUE))
+
+        self.assertEqual(urls, ['/api/products'])
+        self.assertEqual(synced.firebase_id, 'fb-latte')
+        self.assertEqual((unsynced.name, unsynced.firebase_id, unsynced.key), ('Cookie', '', '9'))
+
+    def test_unknown_ids_are_not_found(self):
+        not_found = api_response(404, {'success': False, 'message': 'Product not found'})
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            numeric, numeric_urls = self.lookup('42', api_response(200, self.CATALOGUE), not_found)
+            missing, missing_urls = self.lookup('fb-missing', not_found)
+
+        self.assertEqual((numeric, missing), (None, None))
+        # A numeric id may still be a firebase_id
+        self.assertEqual(numeric_urls, ['/api/products', '/api/products/42'])
+        self.assertEqual(missing_urls, ['/api/products/fb-missing'])
+
+    def test_several_ids_are_resolved_from_one_catalogue_read(self):
+        api = APIService()
+        with mock.patch('dashboard.api_service.requests.get', return_value=api_response(200, self.CATALOGUE)) as get:
+            records = api.get_product_records_by_key(['7', 'fb-latte', '9', 'fb-missing'])
+
+        self.assertEqual(get.call_count, 1)
+        self.assertIs(records['7'], records['fb-latte'])
+        self.assertEqual(records['9'].name, 'Cookie')
+        self.assertIsNone(records['fb-missing'])
+
+
+# ========================================
+# DATA SOURCES
+# ========================================
+
+class MobileTablesMixin:
+    """Recreates the mobile tables from the current models (the test database has the 0001 ones)"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Schema changes on SQLite must run outside the class-wide transaction
+        ensure_mobile_tables(rebuild=True)
+        super().setUpClass()
+
+
+def manila(*args):
+    return datetime(*args, tzinfo=ZoneInfo('Asia/Manila'))
+
+
+class ORMDataSourceTests(MobileTablesMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(firebase_id='fb-mocha', name='Mocha', category='Coffee', quantity=4)
+        cls.latte = Product.objects.create(firebase_id='fb-latte', name='Latte', category='Coffee', quantity=10)
+        cls.cookie = Product.objects.create(firebase_id='', name='Cookie', category='Pastry')
+        for day, hour in ((16, 9), (17, 14), (18, 0), (18, 8)):
+            Sale.objects.create(product_firebase_id='fb-latte', product_name='Latte', category='Coffee',
+                                quantity=1, price=120, total=120, order_date=manila(2026, 10, day, hour))
+        Recipe.objects.create(firebase_id='rc-mocha', product_firebase_id='fb-mocha', product_name='Mocha')
+        Recipe.objects.create(firebase_id='rc-latte', product_firebase_id='fb-latte', product_name='Latte')
+        RecipeIngredient.objects.create(firebase_id='ri-milk', recipe_firebase_id='rc-latte',
+                                        ingredient_firebase_id='fb-milk', ingredient_name='Milk', quantity_needed=200,
+                                        unit='ml')
+        WasteLog.objects.create(product_firebase_id='fb-milk', product_name='Milk', quantity=1, reason='Expired',
+                                waste_date=manila(2026, 10, 17, 20))
+
+    def setUp(self):
+        self.source = ORMDataSource()
+
+    def test_products_are_ordered_by_name(self):
+        self.assertEqual([product['name'] for product in self.source.get_products()], ['Cookie', 'Latte', 'Mocha'])
+        self.assertEqual(self.source.get_product_records()[1].firebase_id, 'fb-latte')
+
+    def test_product_by_firebase_id_or_local_id(self):
+        self.assertEqual(self.source.get_product_record('fb-latte').name, 'Latte')
+        self.assertEqual(self.source.get_product_record(self.latte.id).firebase_id, 'fb-latte')
+        self.assertEqual(self.source.get_product_record(str(self.cookie.id)).key, str(self.cookie.id))
+        self.assertIsNone(self.source.get_product_record('fb-missing'))
+
+    def test_several_products_in_one_query(self):
+        with self.assertNumQueries(1):
+            records = self.source.get_product_records_by_key([str(self.latte.id), 'fb-latte', self.cookie.id, 'fb-missing'])
+
+        self.assertEqual(set(records), {str(self.latte.id), 'fb-latte', str(self.cookie.id), 'fb-missing'})
+        self.assertEqual(records[str(self.latte.id)].firebase_id, records['fb-latte'].firebase_id)
+        self.assertEqual(records[str(self.cookie.id)].name, 'Cookie')
+        self.assertIsNone(records['fb-missing'])
+
+    def test_sales_are_newest_first_within_inclusive_bounds(self):
+        sales = self.source.get_sales(date_from='2026-10-17', date_to='2026-10-18')
+
+        # A bare date is midnight local time, as in the Node.js routes
+        self.assertEqual([timezone.localtime(sale['order_date']).day for sale in sales], [18, 17])
+        self.assertEqual(len(self.source.get_sales(limit=2)), 2)
+        self.assertEqual(len(self.source.get_sale_records(limit=0)), 4)
+
+    def test_sales_after_an_id_are_oldest_first(self):
+        first, *rest = Sale.objects.order_by('id').values_list('id', flat=True)
+
+        self.assertEqual([sale['id'] for sale in self.source.get_sales_after(first)], rest)
+        self.assertEqual([sale['id'] for sale in self.source.get_sales_after(first, limit=1)], rest[:1])
+        self.assertEqual(self.source.get_sales_after(first, date_from='2026-10-18T06:00:00'), [
+            sale for sale in self.source.get_sales_after(first) if sale['id'] == rest[-1]
+        ])
+
+    def test_recipes_embed_their_ingredients_in_the_api_shape(self):
+        recipes = self.source.get_recipes()
+
+        self.assertEqual([recipe['id'] for recipe in recipes], ['rc-latte', 'rc-mocha'])
+        self.assertEqual(recipes[0]['productFirebaseId'], 'fb-latte')
+        self.assertEqual(recipes[0]['ingredients'], [{
+            'id': 'ri-milk', 'ingredientFirebaseId': 'fb-milk', 'ingredientName': 'Milk',
+            'quantity': 200, 'quantityNeeded': 200, 'unit': 'ml',
+        }])
+        self.assertEqual(recipes[1]['ingredients'], [])
+        self.assertEqual(self.source.get_recipe_ingredients('rc-latte'), recipes[0]['ingredients'])
+
+    def test_waste_logs_use_the_same_date_filters(self):
+        self.assertEqual(len(self.source.get_waste_logs(date_from='2026-10-17')), 1)
+        self.assertEqual(self.source.get_waste_logs(date_from='2026-10-18'), [])
+
+    def test_validators_change_with_the_tables(self):
+        etag, changed_at = self.source.validators('products')
+        self.assertTrue(etag.startswith('"orm-'))
+        self.assertIsNotNone(changed_at)
+        self.assertEqual(self.source.validators('products'), (etag, changed_at))
+
+        Product.objects.filter(pk=self.latte.pk).update(quantity=9)
+        self.assertNotEqual(self.source.validators('products')[0], etag)
+
+        recipes_etag, _ = self.source.validators('recipes')
+        RecipeIngredient.objects.filter(firebase_id='ri-milk').update(quantity_needed=180)
+        self.assertNotEqual(self.source.validators('recipes')[0], recipes_etag)
+
+        self.assertEqual(self.source.validators('sales'), (None, None))
+
+    def test_async_counterparts_read_the_same_rows(self):
+        records = async_to_sync(self.source.aget_product_records)()
+        ingredients = async_to_sync(self.source.aget_recipe_ingredients)('rc-latte')
+
+        self.assertEqual([record.name for record in records], ['Cookie', 'Latte', 'Mocha'])
+        self.assertEqual([ingredient['id'] for ingredient in ingredients], ['ri-milk'])
+
+
+class APIDataSourceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.source = APIDataSource()
+        patcher = mock.patch.object(APIDataSource, 'api', APIService())
+        self.api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, method, *args, payload):
+        with mock.patch('dashboard.api_service.requests.get', return_value=api_response(200, payload)) as get:
+            result = getattr(self.source, method)(*args)
+        (url,), kwargs = get.call_args
+        return result, url.removeprefix(self.api.base_url), kwargs.get('params')
+
+    def test_reads_go_to_the_node_routes(self):
+        sales, url, params = self.read('get_sales_after', 41, 100, '2026-10-18',
+                                       payload={'success': True, 'data': [{'id': 42}]})
+        self.assertEqual((sales, url), ([{'id': 42}], '/api/sales'))
+        self.assertEqual(params, {'after_id': 41, 'limit': 100, 'date_from': '2026-10-18'})
+
+        waste, url, params = self.read('get_waste_logs', '2026-10-01', None, payload={'success': True, 'data': []})
+        self.assertEqual((waste, url, params), ([], '/api/waste-logs', {'date_from': '2026-10-01'}))
+
+        ingredients, url, _ = self.read('get_recipe_ingredients', 'rc-latte',
+                                        payload={'success': True, 'data': [{'id': 'ri-milk'}]})
+        self.assertEqual((ingredients, url), ([{'id': 'ri-milk'}], '/api/recipes/rc-latte/ingredients'))
+
+    def test_failed_incremental_read_returns_none(self):
+        sales, _, _ = self.read('get_sales_after', 41, payload={'success': False, 'message': 'Database error'})
+
+        self.assertIsNone(sales)
+
+    def test_records_come_from_the_service(self):
+        records, url, _ = self.read('get_product_records', payload=PRODUCTS_BODY)
+
+        self.assertEqual(url, '/api/products')
+        self.assertEqual([record.key for record in records], ['fb-latte'])
+
+
+class DataSourceRoutingTests(SimpleTestCase):
+
+    def route(self, **families):
+        return mock.patch.multiple(data_sources, DATA_SOURCES=families, _data_sources={})
+
+    def test_families_use_their_configured_backend(self):
+        with self.route(products='orm', sales='api'):
+            products, sales, waste = (get_data_source(family) for family in ('products', 'sales', 'waste'))
+
+            self.assertIsInstance(products, ORMDataSource)
+            self.assertIsInstance(sales, APIDataSource)
+            # Unconfigured families read through the Node.js API
+            self.assertIs(waste, sales)
+            self.assertIs(get_data_source('products'), products)
+            self.assertEqual(data_source_names(), {'products': 'orm', 'sales': 'api', 'recipes': 'api', 'waste': 'api'})
+
+    def test_unknown_backend_or_family_is_an_error(self):
+        with self.route(recipes='replica'):
+            with self.assertRaisesMessage(ImproperlyConfigured, "DATA_SOURCES['recipes'] is 'replica'"):
+                get_data_source('recipes')
+            with self.assertRaisesMessage(ValueError, 'Unknown data family: users'):
+                get_data_source('users')
+
+
+# ========================================
+# API STAND-IN
+# ========================================
+
+class StandInServerTests(MobileTablesMixin, TransactionTestCase):
+    """The stand-in on a real socket, read and written through APIService like the views do"""
+
+    def setUp(self):
+        # Committed rows, so the server threads' connections see them
+        Product.objects.create(firebase_id='fb-latte', name='Latte', category='Coffee',
+                               inventory_a=10, inventory_b=2, quantity=2)
+        Product.objects.create(firebase_id='fb-mocha', name='Mocha', category='Coffee',
+                               inventory_a=3, inventory_b=0, quantity=0)
+        self.sales = [
+            Sale.objects.create(product_firebase_id='fb-latte', product_name='Latte', category='Coffee',
+                                quantity=1, price=120, total=120, order_date=manila(2026, 10, 18, hour)).id
+            for hour in (8, 9, 10)
+        ]
+        # TransactionTestCase only flushes the managed tables
+        self.addCleanup(Sale.objects.all().delete)
+        self.addCleanup(Product.objects.all().delete)
+
+    def serve(self, **options):
+        server = make_standin_server(port=0, **options)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        api = APIService()
+        api.base_url = f'http://127.0.0.1:{server.server_port}'
+        api.cache_seconds = 0
+        return api
+
+    def inventory(self, firebase_id):
+        return Product.objects.values_list('inventory_a', 'inventory_b').get(firebase_id=firebase_id)
+
+    def test_product_list_is_revalidated_with_its_etag(self):
+        api = self.serve()
+
+        first = api.get_product_records()
+        unchanged = api.get_product_records()
+        Product.objects.filter(firebase_id='fb-latte').update(inventory_a=7)
+        changed = api.get_product_records()
+
+        self.assertEqual([(record.name, record.inventory_a) for record in first], [('Latte', 10), ('Mocha', 3)])
+        # A 304 keeps the cached records
+        self.assertIs(unchanged, first)
+        self.assertEqual(changed[0].inventory_a, 7)
+
+    def test_conditional_get_on_the_wire(self):
+        url = f'{self.serve().base_url}/api/products'
+
+        response = requests.get(url)
+        not_modified = requests.get(url, headers={'If-None-Match': response.headers['ETag']})
+
+        self.assertTrue(response.headers['ETag'].startswith('W/"'))
+        self.assertEqual((not_modified.status_code, not_modified.content), (304, b''))
+        self.assertEqual(not_modified.headers['ETag'], response.headers['ETag'])
+
+    def test_products_are_looked_up_by_firebase_id(self):
+        api = self.serve()
+
+        self.assertEqual(api.get_product_record('fb-mocha').inventory_a, 3)
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            self.assertIsNone(api.get_product('fb-missing'))
+
+    def test_sales_after_an_id_are_oldest_first(self):
+        api = self.serve()
+
+        self.assertEqual([sale['id'] for sale in api.get_sales_after(self.sales[0])], self.sales[1:])
+        self.assertEqual([sale['id'] for sale in api.get_sales_after(self.sales[0], limit=1)], self.sales[1:2])
+
+    def test_transfer_moves_stock_from_a_to_b(self):
+        api = self.serve()
+
+        result = api.transfer_inventory('fb-latte', 4)
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            refused = api.transfer_inventory('fb-mocha', 5)
+
+        self.assertEqual((result['newInventoryA'], result['newInventoryB']), (6, 6))
+        self.assertEqual(self.inventory('fb-latte'), (6, 6))
+        self.assertFalse(refused['success'])
+        self.assertIn('Insufficient stock in Inventory A', refused['message'])
+        self.assertEqual(self.inventory('fb-mocha'), (3, 0))
+
+    def test_bulk_transfer_is_all_or_nothing(self):
+        api = self.serve()
+
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            refused = api.transfer_inventory_bulk([('fb-latte', 4), ('fb-mocha', 2), ('fb-mocha', 2)])
+        self.assertFalse(refused['success'])
+        # Lines for the same product draw on the same stock
+        self.assertEqual([line['success'] for line in refused['results']], [True, True, False])
+        self.assertEqual((self.inventory('fb-latte'), self.inventory('fb-mocha')), ((10, 2), (3, 0)))
+
+        result = api.transfer_inventory_bulk([('fb-latte', 4), ('fb-mocha', 2), ('fb-latte', 5)])
+        self.assertTrue(result['success'])
+        self.assertEqual([line['newInventoryA'] for line in result['results']], [1, 1, 1])
+        self.assertEqual((self.inventory('fb-latte'), self.inventory('fb-mocha')), ((1, 11), (1, 2)))
+
+    def test_injected_failures_look_like_node_errors(self):
+        api = self.serve(failure_rate=1)
+
+        response = requests.get(f'{api.base_url}/api/products', headers={REQUEST_ID_HEADER: 'req-42'})
+        with self.assertLogs('dashboard.api_service', 'WARNING'):
+            products = api.get_products()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['error'], 'Injected failure')
+        self.assertEqual(response.headers[REQUEST_ID_HEADER], 'req-42')
+        self.assertEqual(products, [])
+
+    def test_plain_json_without_negotiation(self):
+        columns, plain = self.serve(), self.serve(negotiate=False)
+        accept = {'Accept': f'{COLUMNS_MEDIA_TYPE}, application/json;q=0.9'}
+
+        negotiated = requests.get(f'{columns.base_url}/api/products', headers=accept)
+        old_api = requests.get(f'{plain.base_url}/api/products', headers=accept)
+
+        self.assertIn(COLUMNS_MEDIA_TYPE, negotiated.headers['Content-Type'])
+        self.assertEqual(old_api.headers['Content-Type'], 'application/json; charset=utf-8')
+        self.assertEqual([record.raw for record in columns.get_product_records()],
+                         [record.raw for record in plain.get_product_records()])
+
+
+# ========================================
+# BULK INVENTORY TRANSFER
+# ========================================
+
+class BulkTransferTests(TestCase):
+
+    URL = '/dashboard/api/inventory/transfer/bulk/'
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('manager'))
+        catalogue = [
+            ProductRecord({'id': 7, 'firebase_id': 'fb-latte', 'name': 'Latte'}),
+            ProductRecord({'id': 8, 'firebase_id': 'fb-mocha', 'name': 'Mocha'}),
+            ProductRecord({'id': 9, 'firebase_id': '', 'name': 'Cookie'}),
+        ]
+        index = {str(record.id): record for record in catalogue}
+        index.update((record.firebase_id, record) for record in catalogue if record.firebase_id)
+        self.source = mock.Mock()
+        self.source.get_product_records_by_key.side_effect = lambda ids: {i: index.get(i) for i in ids}
+        self.api = mock.Mock()
+        for name, value in (('get_data_source', lambda family: self.source),
+                            ('get_api_service', lambda: self.api), ('log_audit', mock.Mock())):
+            patcher = mock.patch(f'dashboard.views.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, items):
+        return self.client.post(self.URL, json.dumps({'items': items}), content_type='application/json').json()
+
+    def test_lines_are_resolved_in_one_read_and_sent_in_one_call(self):
+        self.api.transfer_inventory_bulk.return_value = {'success': True, 'results': [
+            {'index': 0, 'firebaseId': 'fb-latte', 'quantity': 2, 'success': True, 'productName': 'Latte'},
+            {'index': 1, 'firebaseId': 'fb-mocha', 'quantity': 1, 'success': True, 'productName': 'Mocha'},
+            {'index': 2, 'firebaseId': 'fb-latte', 'quantity': 3, 'success': True, 'productName': 'Latte'},
+        ]}
+
+        response = self.post([{'productId': '7', 'quantity': 2}, {'productId': 'fb-mocha', 'quantity': 1},
+                              {'productId': 'fb-latte', 'quantity': 3}])
+
+        self.assertTrue(response['success'])
+        self.source.get_product_records_by_key.assert_called_once()
+        self.api.transfer_inventory_bulk.assert_called_once_with([('fb-latte', 2), ('fb-mocha', 1), ('fb-latte', 3)])
+        self.assertEqual([line['productId'] for line in response['results']], ['7', 'fb-mocha', 'fb-latte'])
+
+    def test_unresolved_lines_fail_the_whole_batch(self):
+        response = self.post([{'productId': 'fb-latte', 'quantity': 1}, {'productId': 'missing', 'quantity': 1},
+                              {'productId': '9', 'quantity': 1}])
+
+        self.assertFalse(response['success'])
+        self.assertEqual([(line['index'], line['success']) for line in response['results']], [(1, False), (2, False)])
+        self.assertEqual(response['results'][0]['message'], 'Product not found')
+        self.assertIn('not synced', response['results'][1]['message'])
+        self.api.transfer_inventory_bulk.assert_not_called()
+
+    def test_rejected_batch_returns_the_per_line_results(self):
+        self.api.transfer_inventory_bulk.return_value = {'success': False, 'message': 'No stock was transferred', 'results': [
+            {'index': 0, 'firebaseId': 'fb-latte', 'quantity': 1, 'success': True},
+            {'index': 1, 'firebaseId': 'fb-mocha', 'quantity': 99, 'success': False, 'message': 'Insufficient stock'},
+        ]}
+
+        with self.assertLogs('dashboard.views', 'ERROR'):
+            response = self.post([{'productId': 'fb-latte', 'quantity': 1}, {'productId': 'fb-mocha', 'quantity': 99}])
+
+        self.assertFalse(response['success'])
+        self.assertEqual([(line['productId'], line['success']) for line in response['results']],
+                         [('fb-latte', True), ('fb-mocha', False)])
+        self.assertEqual(response['results'][1]['message'], 'Insufficient stock')
+
+    def test_too_many_lines_are_rejected_before_any_lookup(self):
+        response = self.post([{'productId': 'fb-latte', 'quantity': 1}] * 501)
+
+        self.assertFalse(response['success'])
+        self.assertIn('Too many lines', response['message'])
+        self.source.get_product_records_by_key.assert_not_called()
+        self.api.transfer_inventory_bulk.assert_not_called()
+
+
+# ========================================
+# AUDIT STORAGE
+# ========================================
+
+class RecordingCursor:
+    """Records statements; answers to_regclass() from a set of existing tables"""
+
+    def __init__(self, tables):
+        self.tables = set(tables)
+        self.statements = []
+        self._last = None
+
+    def execute(self, sql, params=None):
+        self.statements.append(' '.join(sql.split()[:4]))
+        self._last = (sql, params)
+
+    def fetchone(self):
+        return (self._last[1][0].strip('"') in self.tables,)
+
+    def fetchall(self):
+        return [('id',), ('action',), ('timestamp',)]
+
+
+class MonthPartitionTests(SimpleTestCase):
+
+    month = datetime(2026, 3, 1, tzinfo=ZoneInfo('Asia/Manila'))
+
+    def statements(self, tables):
+        cursor = RecordingCursor(tables)
+        audit_storage.create_month_partition(cursor, self.month)
+        return [sql for sql in cursor.statements if not sql.startswith('SELECT')]
+
+    def test_rows_in_the_default_partition_are_moved_to_the_new_month(self):
+        self.assertEqual(self.statements([audit_storage.DEFAULT_PARTITION]), [
+            'ALTER TABLE "audit_trail" DETACH',
+            'CREATE TABLE "audit_trail_p2026_03" PARTITION',
+            'WITH moved AS (DELETE',
+            'ALTER TABLE "audit_trail" ATTACH',
+        ])
+
+    def test_without_a_default_partition_only_the_month_is_created(self):
+        self.assertEqual(self.statements([]), ['CREATE TABLE "audit_trail_p2026_03" PARTITION'])
+
+    def test_existing_partition_is_left_alone(self):
+        self.assertEqual(self.statements([audit_storage.DEFAULT_PARTITION, 'audit_trail_p2026_03']), [])
+
+
+class ArchiveRowsTests(TestCase):
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+        manila = ZoneInfo('Asia/Manila')
+        # Local month boundaries: 2026-01-01 00:30 Manila is still December in UTC
+        for details, moment in (('nov', datetime(2025, 11, 15, tzinfo=manila)),
+                                ('dec', datetime(2025, 12, 31, 23, 0, tzinfo=manila)),
+                                ('jan', datetime(2026, 1, 1, 0, 30, tzinfo=manila)),
+                                ('feb', datetime(2026, 2, 10, tzinfo=manila))):
+            AuditTrail.objects.create(action='Sale', user_name='cashier', details=details, timestamp=moment)
+        self.cutoff = audit_storage.month_start(datetime(2026, 1, 1, tzinfo=manila))
+
+    def archived(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return [row['details'] for row in csv.DictReader(archive)]
+
+    def test_old_months_are_archived_and_deleted(self):
+        results = audit_storage.archive_rows_before(self.cutoff, self.archive_dir)
+
+        self.assertEqual([(label, count) for label, count, _ in results],
+                         [('audit_trail_p2025_11', 1), ('audit_trail_p2025_12', 1)])
+        self.assertEqual([self.archived(path) for _, _, path in results], [['nov'], ['dec']])
+        self.assertEqual(sorted(AuditTrail.objects.values_list('details', flat=True)), ['feb', 'jan'])
+
+    def test_dry_run_only_counts(self):
+        results = audit_storage.archive_rows_before(self.cutoff, self.archive_dir, dry_run=True)
+
+        self.assertEqual([(label, count, path) for label, count, path in results],
+                         [('audit_trail_p2025_11', 1, None), ('audit_trail_p2025_12', 1, None)])
+        self.assertEqual(AuditTrail.objects.count(), 4)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+# ========================================
+# INDEX ADVISOR
+# ========================================
+
+class AdviseIndexesTests(TestCase):
+
+    def test_missing_mobile_tables_are_not_reported_as_indexed(self):
+        # A database the mobile app has not created its tables in yet
+        out = io.StringIO()
+        with mock.patch('dashboard.index_advisor.table_exists', return_value=False):
+            call_command('advise_indexes', stdout=out)
+
+        self.assertIn('No mobile tables found', out.getvalue())
+        self.assertNotIn('All recommended indexes exist', out.getvalue())
+
+
+# ========================================
+# AUDIT SEARCH
+# ========================================
+
+class AuditSearchTests(TestCase):
+
+    def setUp(self):
+        AuditTrail.objects.bulk_create([
+            AuditTrail(action='Inventory Transfer', user_id='1', user_name='admin', details=f'Transfer {i}')
+            for i in range(5)
+        ])
+
+    def test_total_is_exact_below_the_count_limit(self):
+        search = audit_search.search_audit_trail('transfer', page_size=2)
+
+        self.assertEqual((search['total'], search['total_exact'], len(search['results'])), (5, True, 2))
+
+    def test_total_is_capped_past_the_count_limit(self):
+        with mock.patch.object(audit_search, 'SEARCH_COUNT_LIMIT', 3):
+            first = audit_search.search_audit_trail('transfer', page_size=2)
+            # Counting reaches at least the end of the requested page
+            second = audit_search.search_audit_trail('transfer', page=2, page_size=2)
+            last = audit_search.search_audit_trail('transfer', page=3, page_size=2)
+
+        self.assertEqual((first['total'], first['total_exact'], len(first['results'])), (3, False, 2))
+        self.assertEqual((second['total'], second['total_exact'], len(second['results'])), (4, False, 2))
+        self.assertEqual((last['total'], last['total_exact'], len(last['results'])), (5, True, 1))
+
+    def test_date_filter_uses_local_days(self):
+        manila = ZoneInfo('Asia/Manila')
+        # 2026-01-01 16:30 UTC: stored as that naive UTC text on SQLite
+        late = AuditTrail.objects.create(action='Inventory Transfer', user_name='admin', details='Transfer late')
+        AuditTrail.objects.filter(pk=late.pk).update(timestamp=datetime(2026, 1, 2, 0, 30, tzinfo=manila))
+        date_from, date_to = datetime(2026, 1, 2, tzinfo=manila), datetime(2026, 1, 4, tzinfo=manila)
+
+        search = audit_search.search_audit_trail('late', date_from=date_from, date_to=date_to)
+        before = audit_search.search_audit_trail('late', date_to=date_from)
+
+        self.assertEqual([log.pk for log, _ in search['results']], [late.pk])
+        self.assertEqual(search['total'], AuditTrail.objects.filter(
+            details__contains='late', timestamp__gte=date_from, timestamp__lt=date_to).count())
+        self.assertEqual(before['total'], 0)
+
+
+# ========================================
+# TIMESTAMP COLUMNS
+# ========================================
+
+class TimestampColumnTests(SimpleTestCase):
+
+    def assert_matches_per_value_parser(self, values):
+        expected = [(moment.toordinal(), moment.hour) for moment in map(parse_api_datetime, values)]
+        days, hours = decode_timestamp_column(values)
+        self.assertEqual(list(zip(days, hours)), expected)
+
+    def hourly(self, start, count):
+        return [(start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z') for i in range(count)]
+
+    def test_offset_changes_between_first_and_last_value(self):
+        # Both ends are in standard time, the middle of the column is not
+        values = self.hourly(datetime(2026, 1, 15), 24) + self.hourly(datetime(2026, 6, 1), 24) \
+            + self.hourly(datetime(2026, 12, 1), 24)
+        with timezone.override(ZoneInfo('America/New_York')):
+            self.assert_matches_per_value_parser(values)
+
+    def test_values_around_a_transition(self):
+        with timezone.override(ZoneInfo('America/New_York')):
+            self.assert_matches_per_value_parser(self.hourly(datetime(2026, 3, 8), 24))
+        # Half-hour shift in the middle of a UTC hour
+        with timezone.override(ZoneInfo('Australia/Lord_Howe')):
+            self.assert_matches_per_value_parser(self.hourly(datetime(2026, 10, 3, 12), 8))
+
+    def test_constant_offset(self):
+        with timezone.override(ZoneInfo('Asia/Manila')):
+            self.assert_matches_per_value_parser(self.hourly(datetime(2026, 1, 1), 100))
+
+
+# ========================================
+# LOGGING
+# ========================================
+
+class QueueConsoleHandlerTests(SimpleTestCase):
+
+    def test_arguments_are_merged_when_the_record_is_queued(self):
+        stream = io.StringIO()
+        handler = QueueConsoleHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        stock = ['espresso', 3]
+        record = logging.LogRecord('dashboard', logging.INFO, __file__, 1, 'Stock: %s', (stock,), None)
+
+        handler.handle(record)
+        stock[1] = 0  # changed before the listener writes the line
+        handler.close()
+
+        self.assertEqual(stream.getvalue(), "Stock: ['espresso', 3]\n")
+        self.assertEqual(record.args, (stock,))
@@ -17,6 +17,7 @@ urlpatterns = [
     path('accounts/', views.accounts_view, name='accounts'),
     path('audit-trail/', views.audit_trail_view, name='audit_trail'),
     path('audit-trail/api/', views.get_audit_logs_api, name='audit_logs_api'),
+    path('audit-trail/search/', views.search_audit_trail_api, name='search_audit_trail_api'),
     path('audit-trail/export/', views.export_audit_trail_csv, name='export_audit_trail_csv'),
 
     # ========================================
@@ -25,6 +26,9 @@ urlpatterns = [
     path('api/products/', views.api_products, name='api_products'),
     path('api/sales/', views.api_sales, name='api_sales'),
     path('api/health/', views.firebase_health_check, name='firebase_health_check'),
+    path('api/health/db/', views.database_connection_stats, name='database_connection_stats'),
+    path('api/metrics/', views.metrics_view, name='metrics'),
+    path('api/kpi-stream/', views.dashboard_kpi_stream, name='dashboard_kpi_stream'),
     path('api/debug/firebase/', views.debug_firebase_status, name='debug_firebase_status'),
     path('api/update-password/', views.update_password_api, name='update_password_api'),
     path('api/train-forecasting/', views.train_forecasting_model, name='train_forecasting_model'),
@@ -41,6 +45,7 @@ urlpatterns = [
 
     # Inventory & Waste (legacy)
     path('api/inventory/transfer/', views.transfer_inventory_api, name='transfer_inventory_api'),
+    path('api/inventory/transfer/bulk/', views.bulk_transfer_inventory_api, name='bulk_transfer_inventory_api'),
     path('api/waste/add/', views.add_waste_api, name='add_waste_api'),
 
     # ========================================
@@ -4,25 +4,41 @@ Business data is fetched from the Node.js API which connects to PostgreSQL.
 Django only manages authentication and sessions locally.
 """
 
+import asyncio
 import csv
+import logging
 import os
 import json
-from django.http import JsonResponse, HttpResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import update_session_auth_hash
 from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from datetime import datetime, timedelta
 from collections import defaultdict
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.utils import timezone
 
 # Import API service
-from .api_service import get_api_service
+from .api_service import IngredientRecord, day_label, get_api_service, parse_api_datetime, to_float
+from .async_api_service import closes_api_client
+from . import audit, audit_search
+from .conditional import conditional_catalogue
+from .data_sources import data_source_names, get_data_source
+from .db_connections import get_connection_stats
+from .db_router import use_replica
+from .live_kpis import LIVE_KPI_ENABLED, count_low_stock, format_recent_sale, get_kpi_hub, percent_change
+from .metrics import render_prometheus
 
 # Import models
-from .models import Product, Recipe, RecipeIngredient, Sale, WasteLog, AuditTrail
+from .models import Product, Recipe, RecipeIngredient, Sale, AuditTrail, MLModel, MLPrediction
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================
@@ -32,10 +48,9 @@ from .models import Product, Recipe, RecipeIngredient, Sale, WasteLog, AuditTrai
 def calculate_max_servings(product_firebase_id, recipe_id):
     """Calculate maximum servings based on available ingredients (Legacy ORM version - kept for backward compatibility)"""
     try:
-        print(f"\n━━━━━━━━━━━━━━━━━━━━━━━━")
-        print(f"🧮 Calculating max servings (ORM mode)")
-        print(f"   Product ID: {product_firebase_id}")
-        print(f"   Recipe ID: {recipe_id}")
+        logger.debug("🧮 Calculating max servings (ORM mode)")
+        logger.debug("Product ID: %s", product_firebase_id)
+        logger.debug("Recipe ID: %s", recipe_id)
 
         # Get all ingredients for this recipe using Django ORM
         try:
@@ -44,7 +59,7 @@ def calculate_max_servings(product_firebase_id, recipe_id):
             try:
                 recipe = Recipe.objects.get(firebase_id=str(recipe_id))
             except Recipe.DoesNotExist:
-                print(f"   ❌ Recipe not found")
+                logger.warning("❌ Recipe not found")
                 return None
 
         ingredients = RecipeIngredient.objects.filter(
@@ -60,12 +75,12 @@ def calculate_max_servings(product_firebase_id, recipe_id):
             quantity_needed = ingredient.quantity_needed or 0
             ingredient_name = ingredient.ingredient_name or 'Unknown'
 
-            print(f"\n   📦 Ingredient #{ingredient_count}: {ingredient_name}")
-            print(f"      Ingredient ID: '{ingredient_product_id}'")
-            print(f"      Quantity needed: {quantity_needed}")
+            logger.debug("📦 Ingredient #%s: %s", ingredient_count, ingredient_name)
+            logger.debug("Ingredient ID: '%s'", ingredient_product_id)
+            logger.debug("Quantity needed: %s", quantity_needed)
 
             if not ingredient_product_id or quantity_needed == 0:
-                print(f"      ⚠️ Missing ID or quantity, skipping")
+                logger.debug("⚠️ Missing ID or quantity, skipping")
                 continue
 
             # Get the ingredient product's current stock
@@ -73,7 +88,7 @@ def calculate_max_servings(product_firebase_id, recipe_id):
                 product = Product.objects.get(firebase_id=ingredient_product_id)
                 available_quantity = product.quantity or 0
             except Product.DoesNotExist:
-                print(f"      ❌ Ingredient product not found in database!")
+                logger.debug("❌ Ingredient product not found in database!")
                 max_servings_list.append(0)
                 continue
 
@@ -83,50 +98,44 @@ def calculate_max_servings(product_firebase_id, recipe_id):
             else:
                 max_for_this_ingredient = 0
 
-            print(f"      ✅ Available: {available_quantity}g")
-            print(f"      🎯 Max servings from this ingredient: {max_for_this_ingredient}")
+            logger.debug("✅ Available: %sg", available_quantity)
+            logger.debug("🎯 Max servings from this ingredient: %s", max_for_this_ingredient)
 
             max_servings_list.append(max_for_this_ingredient)
 
         # Return the minimum (bottleneck ingredient)
         result = min(max_servings_list) if max_servings_list else 0
 
-        print(f"\n   🏆 FINAL MAX SERVINGS: {result}")
-        print(f"   Total ingredients checked: {ingredient_count}")
-        print(f"━━━━━━━━━━━━━━━━━━━━━━━━\n")
+        logger.debug("🏆 FINAL MAX SERVINGS: %s", result)
+        logger.debug("Total ingredients checked: %s", ingredient_count)
 
         return result
 
     except Exception as e:
-        print(f"❌ Error calculating max servings: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error calculating max servings: %s", e)
         return None
 
 
-def calculate_max_servings_api(recipe_data, products_dict):
+def calculate_max_servings_api(recipe, products_dict):
     """Calculate maximum servings based on available ingredients using API data
 
     Args:
-        recipe_data: Recipe object from API with 'ingredients' list
-        products_dict: Dictionary of products keyed by firebase_id
+        recipe: RecipeRecord from the API service
+        products_dict: Dictionary of ProductRecords keyed by firebase_id
 
     Returns:
         Integer: Maximum number of servings, or None if calculation fails
     """
     try:
-        ingredients = recipe_data.get('ingredients', [])
-
-        if not ingredients:
-            print(f"   ⚠️ No ingredients in recipe")
+        if not recipe.ingredients:
+            logger.warning("⚠️ No ingredients in recipe")
             return 0
 
         max_servings_list = []
 
-        for ingredient in ingredients:
-            ingredient_id = ingredient.get('ingredientFirebaseId') or ingredient.get('ingredient_firebase_id')
-            quantity_needed = float(ingredient.get('quantityNeeded') or ingredient.get('quantity_needed') or 0)
-            ingredient_name = ingredient.get('ingredientName') or ingredient.get('ingredient_name') or 'Unknown'
+        for ingredient in recipe.ingredients:
+            ingredient_id = ingredient.ingredient_firebase_id
+            quantity_needed = ingredient.quantity_needed
 
             if not ingredient_id or quantity_needed <= 0:
                 continue
@@ -135,70 +144,60 @@ def calculate_max_servings_api(recipe_data, products_dict):
             ingredient_product = products_dict.get(ingredient_id)
 
             if not ingredient_product:
-                print(f"   ⚠️ Ingredient product not found: {ingredient_name} ({ingredient_id})")
+                logger.warning("⚠️ Ingredient product not found: %s (%s)", ingredient.ingredient_name, ingredient_id)
                 max_servings_list.append(0)
                 continue
 
             # Use inventory_b (operational stock) for calculation
-            available_quantity = float(ingredient_product.get('inventory_b') or ingredient_product.get('quantity', 0) or 0)
+            available_quantity = ingredient_product.inventory_b or ingredient_product.quantity
 
             # Calculate max servings from this ingredient
-            if quantity_needed > 0:
-                max_for_this = int(available_quantity / quantity_needed)
-            else:
-                max_for_this = 0
-
-            max_servings_list.append(max_for_this)
+            max_servings_list.append(int(available_quantity / quantity_needed))
 
         # Return the minimum (bottleneck ingredient)
         result = min(max_servings_list) if max_servings_list else 0
         return result
 
     except Exception as e:
-        print(f"❌ Error calculating max servings (API): {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error calculating max servings (API): %s", e)
         return None
 
 
-def calculate_statistics(audit_logs):
-    """Calculate audit trail statistics"""
-    stats = {
-        'total_logs': len(audit_logs),
-        'actions_today': 0,
-        'unique_users': len(set(log['user'] for log in audit_logs)),
-    }
+def calculate_statistics(audit_queryset):
+    """Calculate audit trail statistics with a single aggregate query"""
+    today_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    today = datetime.now().date()
-    for log in audit_logs:
-        try:
-            log_date = datetime.strptime(log['timestamp'].split()[0], '%Y-%m-%d').date()
-            if log_date == today:
-                stats['actions_today'] += 1
-        except:
-            pass
+    return audit_queryset.order_by().aggregate(
+        total_logs=Count('id'),
+        actions_today=Count('id', filter=Q(timestamp__gte=today_start)),
+        unique_users=Count('user_name', distinct=True),
+    )
 
-    return stats
+
+def local_day_range(date_from, date_to):
+    """
+    'YYYY-MM-DD' filter values -> aware ISO timestamps for the data sources:
+    the start of date_from and the end of date_to (both days inclusive),
+    None where a value is empty. Raises ValueError for malformed dates.
+    """
+    start = end = None
+    if date_from:
+        start = timezone.make_aware(datetime.strptime(date_from, '%Y-%m-%d')).isoformat()
+    if date_to:
+        end = timezone.make_aware(
+            datetime.strptime(date_to, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999999)
+        ).isoformat()
+    return start, end
 
 
 def get_unique_users():
-    """Get unique users from audit trail"""
-    users = AuditTrail.objects.values_list('user_name', flat=True).distinct()
-    return [u for u in users if u]
+    """Get unique users from the audit user lookup table"""
+    return audit.get_audit_user_names()
 
 
 def log_audit(action, user, details=''):
-    """Helper function to log audit trail entries"""
-    try:
-        AuditTrail.objects.create(
-            action=action,
-            user_id=str(user.id) if hasattr(user, 'id') else '',
-            user_name=user.username if hasattr(user, 'username') else str(user),
-            details=details,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        print(f"Warning: Could not log audit trail: {e}")
+    """Helper function to log audit trail entries (queued, written in batches)"""
+    audit.log_audit(action, user, details)
 
 
 # ========================================
@@ -206,39 +205,39 @@ def log_audit(action, user, details=''):
 # ========================================
 
 @login_required
-def dashboard_view(request):
+@closes_api_client
+async def dashboard_view(request):
     """Display dashboard with data from Node.js API"""
     try:
-        print("\n🔥 DASHBOARD VIEW CALLED (API Mode)")
-
-        # Get API service
-        api = get_api_service()
+        logger.debug("🔥 DASHBOARD VIEW CALLED (API Mode)")
 
         # Get filter parameter (default: week)
         filter_type = request.GET.get('filter', 'week')
 
-        today = datetime.now()
-        today_start = today.replace(hour=0, minute=0, second=0, microsecond=0)
-        yesterday_start = today_start - timedelta(days=1)
+        # Sales are bucketed by local day number (date.toordinal(), see SaleRecord)
+        today = timezone.localtime()
+        today_day = today.toordinal()
+        yesterday_day = today_day - 1
 
         # Determine date range based on filter
         if filter_type == 'today':
-            start_date = today_start
-            date_range_days = 1
+            start_day = today_day
         elif filter_type == 'month':
-            start_date = today_start - timedelta(days=30)
-            date_range_days = 30
+            start_day = today_day - 30
         else:  # week (default)
-            start_date = today_start - timedelta(days=7)
-            date_range_days = 7
+            start_day = today_day - 7
 
         # ========================================
-        # 1. GET SALES DATA FROM API
+        # 1. GET SALES AND PRODUCT DATA FROM API
         # ========================================
-        print("🔍 Fetching sales data from API...")
+        logger.info("🔍 Fetching sales and product data from API...")
 
-        all_sales = api.get_sales(limit=5000)
-        print(f"✅ Fetched {len(all_sales)} sales records")
+        # Both calls are in flight at once
+        all_sales, products = await asyncio.gather(
+            get_data_source('sales').aget_sale_records(limit=5000),
+            get_data_source('products').aget_product_records(),
+        )
+        logger.info("✅ Fetched %s sales records", len(all_sales))
 
         today_sales = 0
         yesterday_sales = 0
@@ -246,68 +245,38 @@ def dashboard_view(request):
         yesterday_orders = 0
         recent_sales = []
 
-        # For charts
+        # For charts (keyed by day number / hour, see SaleRecord)
         daily_sales = defaultdict(float)
+        hourly_sales = defaultdict(float)
         product_sales = defaultdict(int)
 
         for sale in all_sales:
-            try:
-                # Parse order_date from API response (could be string or datetime)
-                order_date_raw = sale.get('order_date') or sale.get('orderDate')
-                if isinstance(order_date_raw, str):
-                    try:
-                        order_date = datetime.strptime(order_date_raw[:19], '%Y-%m-%dT%H:%M:%S')
-                    except:
-                        try:
-                            order_date = datetime.strptime(order_date_raw[:19], '%Y-%m-%d %H:%M:%S')
-                        except:
-                            order_date = None
-                else:
-                    order_date = order_date_raw
-
-                if order_date:
-                    price = float(sale.get('price', 0) or 0)
-                    quantity = int(sale.get('quantity', 0) or 0)
-                    sale_total = float(sale.get('total_amount') or sale.get('total') or 0) or (price * quantity)
-                    product_name = sale.get('product_name') or sale.get('productName') or 'Unknown'
-
-                    # Check if within date range for charts
-                    if order_date >= start_date:
-                        date_key = order_date.strftime('%Y-%m-%d')
-                        daily_sales[date_key] += sale_total
-                        product_sales[product_name] += quantity
-
-                    # Today's data
-                    if order_date.date() == today.date():
-                        today_sales += sale_total
-                        today_orders += 1
-
-                        if len(recent_sales) < 5:
-                            recent_sales.append({
-                                'product': product_name,
-                                'quantity': quantity,
-                                'price': price,
-                                'total': sale_total,
-                                'datetime': order_date.strftime('%Y-%m-%d %H:%M:%S')
-                            })
-
-                    # Yesterday's data
-                    elif order_date.date() == yesterday_start.date():
-                        yesterday_sales += sale_total
-                        yesterday_orders += 1
-
-            except Exception as item_error:
-                print(f"⚠️ Error processing sale item: {item_error}")
+            day = sale.day
+            if day is None:
                 continue
 
-        # Calculate percentage changes
-        sales_change = 0
-        if yesterday_sales > 0:
-            sales_change = round(((today_sales - yesterday_sales) / yesterday_sales) * 100, 1)
+            # Check if within date range for charts
+            if day >= start_day:
+                daily_sales[day] += sale.total
+                product_sales[sale.product_name] += sale.quantity
+
+            # Today's data
+            if day == today_day:
+                today_sales += sale.total
+                today_orders += 1
+                hourly_sales[sale.hour] += sale.total
+
+                if len(recent_sales) < 5:
+                    recent_sales.append(sale)
 
-        orders_change = 0
-        if yesterday_orders > 0:
-            orders_change = round(((today_orders - yesterday_orders) / yesterday_orders) * 100, 1)
+            # Yesterday's data
+            elif day == yesterday_day:
+                yesterday_sales += sale.total
+                yesterday_orders += 1
+
+        # Calculate percentage changes
+        sales_change = percent_change(today_sales, yesterday_sales)
+        orders_change = percent_change(today_orders, yesterday_orders)
 
         # ========================================
         # 2. PREPARE CHART DATA BASED ON FILTER
@@ -318,34 +287,15 @@ def dashboard_view(request):
         if filter_type == 'today':
             # Show hourly data for today
             for hour in range(0, 24):
-                hour_str = f"{hour:02d}:00"
-                chart_dates.append(hour_str)
-                chart_sales_data.append(0)
-
-            # Put all today's sales in current hour
-            current_hour = today.hour
-            date_key = today_start.strftime('%Y-%m-%d')
-            chart_sales_data[current_hour] = float(daily_sales.get(date_key, 0))
-
-        elif filter_type == 'month':
-            # Show daily data for last 30 days
-            for i in range(29, -1, -1):
-                date = today_start - timedelta(days=i)
-                date_key = date.strftime('%Y-%m-%d')
-                date_label = date.strftime('%b %d')
-
-                chart_dates.append(date_label)
-                chart_sales_data.append(float(daily_sales.get(date_key, 0)))
+                chart_dates.append(f"{hour:02d}:00")
+                chart_sales_data.append(float(hourly_sales.get(hour, 0)))
 
-        else:  # week
-            # Show daily data for last 7 days
-            for i in range(6, -1, -1):
-                date = today_start - timedelta(days=i)
-                date_key = date.strftime('%Y-%m-%d')
-                date_label = date.strftime('%b %d')
-
-                chart_dates.append(date_label)
-                chart_sales_data.append(float(daily_sales.get(date_key, 0)))
+        else:
+            # Show daily data for the last 30 (month) or 7 (week) days
+            days_shown = 30 if filter_type == 'month' else 7
+            for day in range(today_day - days_shown + 1, today_day + 1):
+                chart_dates.append(day_label(day, '%b %d'))
+                chart_sales_data.append(float(daily_sales.get(day, 0)))
 
         # ========================================
         # 3. PREPARE TOP 5 PRODUCTS DATA
@@ -360,53 +310,29 @@ def dashboard_view(request):
             chart_quantities.append(quantity)
 
         # ========================================
-        # 4. GET PRODUCT STATISTICS FROM API
+        # 4. PRODUCT STATISTICS
         # ========================================
-        print("🔍 Fetching product data from API...")
-
-        products = api.get_products()
         total_products = len(products)
-        low_stock_items = 0
-
-        for product in products:
-            category = (product.get('category', '') or '').lower().strip()
-
-            # Skip beverages - they don't have physical stock
-            if category in ['beverage', 'beverages', 'drink', 'drinks']:
-                continue
-
-            # For non-beverage items: check quantity stock
-            stock = float(product.get('quantity', 0) or 0)
-            reorder_level = 20  # Default reorder level
-
-            # Check if low stock
-            if stock < reorder_level:
-                low_stock_items += 1
+        # Non-beverage items below the reorder level (beverages have no physical stock)
+        low_stock_items = count_low_stock(products)
 
         # ========================================
         # 5. GET ACTIVE USERS COUNT
         # ========================================
         from django.contrib.auth.models import User
-        active_users = User.objects.filter(is_active=True).count()
+        active_users = await User.objects.filter(is_active=True).acount()
 
         # ========================================
         # 6. SORT RECENT SALES BY TIME
         # ========================================
-        recent_sales.sort(key=lambda x: x['datetime'], reverse=True)
+        recent_sales.sort(key=lambda sale: sale.order_date, reverse=True)
+        recent_sales = [format_recent_sale(sale) for sale in recent_sales]
 
-        for sale in recent_sales:
-            try:
-                dt = datetime.strptime(sale['datetime'], '%Y-%m-%d %H:%M:%S')
-                sale['display_date'] = dt.strftime('%b %d, %Y - %I:%M %p')
-            except:
-                sale['display_date'] = sale['datetime']
-
-        print(f"💰 Today's Sales: ₱{today_sales:.2f} ({sales_change:+.1f}%)")
-        print(f"📦 Today's Orders: {today_orders} ({orders_change:+.1f}%)")
-        print(f"📊 Total Products: {total_products}")
-        print(f"⚠️  Low Stock Items: {low_stock_items}")
-        print(f"📊 Chart Filter: {filter_type.upper()} - {len(chart_dates)} data points")
-        print("=" * 50 + "\n")
+        logger.debug("💰 Today's Sales: ₱%.2f (%+.1f%%)", today_sales, sales_change)
+        logger.debug("📦 Today's Orders: %s (%+.1f%%)", today_orders, orders_change)
+        logger.debug("📊 Total Products: %s", total_products)
+        logger.debug("⚠️  Low Stock Items: %s", low_stock_items)
+        logger.debug("📊 Chart Filter: %s - %s data points", filter_type.upper(), len(chart_dates))
 
         # ========================================
         # PREPARE CONTEXT
@@ -426,14 +352,13 @@ def dashboard_view(request):
             'chart_products': chart_products,
             'chart_quantities': chart_quantities,
             'current_filter': filter_type,
+            'live_kpis': LIVE_KPI_ENABLED,
         }
 
-        return render(request, 'dashboard/dashboard.html', context)
+        return await sync_to_async(render)(request, 'dashboard/dashboard.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading dashboard: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading dashboard: %s", e)
 
         context = {
             'today_sales': 0,
@@ -451,165 +376,116 @@ def dashboard_view(request):
             'current_filter': 'week',
             'error_message': f'Unable to load dashboard data: {str(e)}',
         }
-        return render(request, 'dashboard/dashboard.html', context)
+        return await sync_to_async(render)(request, 'dashboard/dashboard.html', context)
 
 
 @login_required
-def inventory_view(request):
-    """Display inventory page with data from API"""
-    try:
-        print("\n🔥 INVENTORY VIEW CALLED (API Mode)")
+def dashboard_kpi_stream(request):
+    """Server-Sent Events with live dashboard KPIs (see dashboard/live_kpis.py)"""
+    if not LIVE_KPI_ENABLED:
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
 
-        # Get API service
-        api = get_api_service()
+    hub = get_kpi_hub()
+    # Under ASGI the stream waits without holding a thread
+    stream = hub.astream() if isinstance(request, ASGIRequest) else hub.stream()
 
-        # Get all products from API
-        products = api.get_products()
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    return response
 
-        # Get all recipes from API
-        recipes = api.get_recipes()
+
+@login_required
+@closes_api_client
+async def inventory_view(request):
+    """Display inventory page with data from API"""
+    try:
+        logger.debug("🔥 INVENTORY VIEW CALLED (API Mode)")
+
+        # Get all products and recipes (normalized records), concurrently
+        products, recipes = await asyncio.gather(
+            get_data_source('products').aget_product_records(),
+            get_data_source('recipes').aget_recipe_records(),
+        )
 
         recipes_by_id = {}
         recipes_by_name = {}
 
         for recipe in recipes:
-            product_id = recipe.get('product_firebase_id') or recipe.get('productFirebaseId')
-            product_name = (recipe.get('product_name') or recipe.get('productName') or '').lower().strip()
-
-            recipe_info = {
-                'recipeId': recipe.get('id'),
-                'firebaseId': recipe.get('firebase_id') or recipe.get('firebaseId'),
-                'productName': recipe.get('product_name') or recipe.get('productName'),
-                'ingredients': recipe.get('ingredients', []),
-                'full_recipe': recipe  # Store full recipe data for servings calculation
-            }
+            if recipe.product_firebase_id:
+                recipes_by_id[recipe.product_firebase_id] = recipe
+                logger.debug("📋 Recipe found by ID: %s -> %s", recipe.product_firebase_id, recipe.product_name)
 
-            if product_id:
-                recipes_by_id[product_id] = recipe_info
-                print(f"📋 Recipe found by ID: {product_id} -> {recipe_info['productName']}")
+            if recipe.name_key:
+                recipes_by_name[recipe.name_key] = recipe
+                logger.debug("📋 Recipe found by Name: %s", recipe.name_key)
 
-            if product_name:
-                recipes_by_name[product_name] = recipe_info
-                print(f"📋 Recipe found by Name: {product_name}")
-
-        print(f"✅ Found {len(recipes_by_id)} recipes by ID, {len(recipes_by_name)} by name")
+        logger.info("✅ Found %s recipes by ID, %s by name", len(recipes_by_id), len(recipes_by_name))
 
         # Create products dictionary for faster lookup
-        products_dict = {}
-        for product in products:
-            firebase_id = product.get('firebase_id') or product.get('firebaseId') or ''
-            if firebase_id:
-                products_dict[firebase_id] = product
+        products_dict = {product.firebase_id: product for product in products if product.firebase_id}
 
         # Process products data
         products_data = []
-        doc_count = 0
+        placeholder_images = {'beverage': '☕', 'pastries': '🥐', 'ingredients': '🧂'}
 
         for product in products:
-            doc_count += 1
-
-            # Normalize category
-            raw_category = product.get('category', 'Unknown') or 'Unknown'
-            category_lower = str(raw_category).lower().strip()
-
-            if category_lower in ['beverage', 'beverages', 'drink', 'drinks', 'hot drinks', 'cold drinks']:
-                category = 'beverage'
-            elif category_lower in ['pastries', 'pastry', 'snacks', 'snack']:
-                category = 'pastries'
-            elif category_lower in ['ingredients', 'ingredient']:
-                category = 'ingredients'
-            else:
-                category = category_lower
+            category = product.category or 'unknown'
 
             # Handle image
-            image_raw = product.get('image_uri') or product.get('imageUri')
-            image = None
-
-            if image_raw and str(image_raw) not in ['nan', 'None', '']:
-                image = str(image_raw)
-
-            has_image = False
-            if image and (image.startswith('http://') or image.startswith('https://')):
-                has_image = True
-
+            image = product.image_uri
+            has_image = bool(image and image.startswith(('http://', 'https://')))
             if not has_image:
-                if category == 'beverage':
-                    image = '☕'
-                elif category == 'pastries':
-                    image = '🥐'
-                elif category == 'ingredients':
-                    image = '🧂'
-                else:
-                    image = '📦'
+                image = placeholder_images.get(category, '📦')
 
             # Calculate max servings for beverages and pastries with recipes
             max_servings = None
-            recipe_found = False
-            recipe_info = None
-            firebase_id = product.get('firebase_id') or product.get('firebaseId') or ''
-            product_name = product.get('name', 'Unknown')
-
-            if category in ['beverage', 'pastries']:
-                # Try matching by Firebase ID first
-                if firebase_id in recipes_by_id:
-                    recipe_found = True
-                    recipe_info = recipes_by_id[firebase_id]
-                    print(f"✅ Recipe matched by ID for: {product_name}")
-
-                # If not found, try matching by product name
-                elif product_name.lower().strip() in recipes_by_name:
-                    recipe_found = True
-                    recipe_info = recipes_by_name[product_name.lower().strip()]
-                    print(f"✅ Recipe matched by NAME for: {product_name}")
+            recipe = None
+
+            if category in ('beverage', 'pastries'):
+                # Try matching by Firebase ID first, then by product name
+                recipe = recipes_by_id.get(product.firebase_id) or recipes_by_name.get(product.name.lower().strip())
 
                 # Calculate max servings if recipe found
-                if recipe_found and recipe_info:
-                    max_servings = calculate_max_servings_api(recipe_info['full_recipe'], products_dict)
+                if recipe:
+                    max_servings = calculate_max_servings_api(recipe, products_dict)
                     if max_servings is not None:
-                        print(f"   🎯 Calculated {max_servings} servings for {product_name}")
-
-            # Get inventory data
-            inventory_a = float(product.get('inventory_a') or product.get('inventoryA') or product.get('quantity', 0) or 0)
-            inventory_b = float(product.get('inventory_b') or product.get('inventoryB') or 0)
-            cost_per_unit = float(product.get('cost_per_unit') or product.get('costPerUnit') or 0)
+                        logger.debug("🎯 Calculated %s servings for %s", max_servings, product.name)
 
             products_data.append({
-                'id': firebase_id or str(product.get('id', '')),
-                'name': product_name,
-                'price': float(product.get('price', 0) or 0),
+                'id': product.key,
+                'name': product.name,
+                'price': product.price,
                 'category': category,
-                'stock': float(product.get('quantity', 0) or 0),
-                'inventory_a': inventory_a,
-                'inventory_b': inventory_b,
-                'cost_per_unit': cost_per_unit,
+                'stock': product.quantity,
+                'inventory_a': product.inventory_a or product.quantity,
+                'inventory_b': product.inventory_b,
+                'cost_per_unit': product.cost_per_unit,
                 'image': image,
                 'has_image': has_image,
                 'max_servings': max_servings,
-                'has_recipe': recipe_found
+                'has_recipe': recipe is not None
             })
 
         # Sort by name
         products_data.sort(key=lambda x: x['name'])
 
-        print(f"\n{'=' * 60}")
-        print(f"✅ LOADED {len(products_data)} PRODUCTS FROM POSTGRESQL")
-        print(f"{'=' * 60}")
+        logger.info("✅ LOADED %s PRODUCTS FROM POSTGRESQL", len(products_data))
 
         context = {
             'products': products_data,
         }
 
-        return render(request, 'dashboard/inventory.html', context)
+        return await sync_to_async(render)(request, 'dashboard/inventory.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading inventory: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading inventory: %s", e)
 
         context = {
             'products': [],
         }
-        return render(request, 'dashboard/inventory.html', context)
+        return await sync_to_async(render)(request, 'dashboard/inventory.html', context)
 
 
 @login_required
@@ -619,47 +495,34 @@ def settings_view(request):
 
 
 @login_required
-def sales_view(request):
+@closes_api_client
+async def sales_view(request):
     """Display sales page with data from API"""
     try:
-        print("\n🔥 SALES VIEW CALLED (API Mode)")
+        logger.debug("🔥 SALES VIEW CALLED (API Mode)")
 
-        # Get API service
-        api = get_api_service()
-
-        # Get sales from API
-        sales = api.get_sales(limit=1000)
+        # Get sales from the configured source
+        sales = await get_data_source('sales').aget_sale_records(limit=1000)
 
         # Process sales data
         sales_data = []
         total_sales = 0
 
         for sale in sales:
-            price = float(sale.get('price', 0) or 0)
-            quantity = int(sale.get('quantity', 0) or 0)
-            sale_total = float(sale.get('total_amount') or sale.get('total') or 0) or (price * quantity)
-
-            # Parse order_date
-            order_date_raw = sale.get('order_date') or sale.get('orderDate')
-            if isinstance(order_date_raw, str):
-                date_only = order_date_raw[:10] if order_date_raw else 'N/A'
-            else:
-                date_only = order_date_raw.strftime('%Y-%m-%d') if order_date_raw else 'N/A'
-
             sales_data.append({
-                'id': sale.get('id'),
-                'date': date_only,
-                'product': sale.get('product_name') or sale.get('productName') or 'Unknown',
-                'quantity': quantity,
-                'unit_price': price,
-                'total': sale_total,
-                'category': sale.get('category') or 'Uncategorized'
+                'id': sale.id,
+                'date': day_label(sale.day) if sale.day is not None else 'N/A',
+                'product': sale.product_name,
+                'quantity': sale.quantity,
+                'unit_price': sale.price,
+                'total': sale.total,
+                'category': sale.category
             })
 
-            total_sales += sale_total
+            total_sales += sale.total
 
-        print(f"✅ Loaded {len(sales_data)} sales from API")
-        print(f"✅ Total sales: ₱{total_sales:.2f}")
+        logger.info("✅ Loaded %s sales from API", len(sales_data))
+        logger.info("✅ Total sales: ₱%.2f", total_sales)
 
         context = {
             'sales': sales_data,
@@ -667,65 +530,48 @@ def sales_view(request):
             'total_transactions': len(sales_data),
         }
 
-        return render(request, 'dashboard/sales.html', context)
+        return await sync_to_async(render)(request, 'dashboard/sales.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading sales: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading sales: %s", e)
 
         context = {
             'sales': [],
             'total_sales': 0,
             'total_transactions': 0,
         }
-        return render(request, 'dashboard/sales.html', context)
+        return await sync_to_async(render)(request, 'dashboard/sales.html', context)
 
 
 @login_required
 def export_sales_csv(request):
     """Export sales to CSV file"""
     try:
-        print("\n🔥 SALES CSV EXPORT CALLED")
+        logger.debug("🔥 SALES CSV EXPORT CALLED")
 
         # Get filter parameters
         filter_date_from = request.GET.get('date_from', '')
         filter_date_to = request.GET.get('date_to', '')
 
-        # Query PostgreSQL
-        sales = Sale.objects.all().order_by('-order_date')
+        date_from, date_to = local_day_range(filter_date_from, filter_date_to)
 
-        # Apply date filters
-        if filter_date_from:
-            from_date = datetime.strptime(filter_date_from, '%Y-%m-%d')
-            sales = sales.filter(order_date__gte=from_date)
-        if filter_date_to:
-            to_date = datetime.strptime(filter_date_to, '%Y-%m-%d') + timedelta(days=1)
-            sales = sales.filter(order_date__lt=to_date)
-
-        sales = sales[:5000]
+        # Query the configured sales source (Node.js API or PostgreSQL)
+        sales = get_data_source('sales').get_sale_records(limit=5000, date_from=date_from, date_to=date_to)
 
         # Process sales data
         sales_data = []
 
         for sale in sales:
-            price = float(sale.price or 0)
-            quantity = int(sale.quantity or 0)
-            sale_total = float(sale.total) if sale.total else price * quantity
-
-            order_date = sale.order_date
-            date_only = order_date.strftime('%Y-%m-%d') if order_date else 'N/A'
-
             sales_data.append({
-                'date': date_only,
-                'product': sale.product_name or 'Unknown',
-                'category': sale.category or 'Uncategorized',
-                'quantity': quantity,
-                'unit_price': price,
-                'total': sale_total
+                'date': day_label(sale.day) if sale.day is not None else 'N/A',
+                'product': sale.product_name,
+                'category': sale.category,
+                'quantity': sale.quantity,
+                'unit_price': sale.price,
+                'total': sale.total
             })
 
-        print(f"✅ Exporting {len(sales_data)} sales to CSV")
+        logger.info("✅ Exporting %s sales to CSV", len(sales_data))
 
         # Create CSV response
         response = HttpResponse(content_type='text/csv')
@@ -745,13 +591,11 @@ def export_sales_csv(request):
                 f"₱{sale['total']:.2f}"
             ])
 
-        print(f"✅ CSV export completed - {len(sales_data)} records\n")
+        logger.info("✅ CSV export completed - %s records", len(sales_data))
         return response
 
     except Exception as e:
-        print(f"❌ Error exporting sales CSV: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error exporting sales CSV: %s", e)
         return HttpResponse(f"Error: {str(e)}", status=500)
 
 
@@ -787,12 +631,11 @@ def accounts_view(request):
 # ========================================
 
 @login_required
+@use_replica
 def audit_trail_view(request):
     """Display audit trail from PostgreSQL with filters"""
     try:
-        print("\n" + "=" * 80)
-        print("🔥 AUDIT TRAIL VIEW CALLED (PostgreSQL)")
-        print("=" * 80)
+        logger.debug("🔥 AUDIT TRAIL VIEW CALLED (PostgreSQL)")
 
         # Get filter parameters
         filter_user = request.GET.get('user', '')
@@ -800,7 +643,7 @@ def audit_trail_view(request):
         filter_date_from = request.GET.get('date_from', '')
         filter_date_to = request.GET.get('date_to', '')
 
-        print(f"📊 Filters: user={filter_user}, action={filter_action}, from={filter_date_from}, to={filter_date_to}")
+        logger.debug("📊 Filters: user=%s, action=%s, from=%s, to=%s", filter_user, filter_action, filter_date_from, filter_date_to)
 
         # Build query
         audit_queryset = AuditTrail.objects.all()
@@ -816,6 +659,9 @@ def audit_trail_view(request):
             to_date = datetime.strptime(filter_date_to, '%Y-%m-%d') + timedelta(days=1)
             audit_queryset = audit_queryset.filter(timestamp__lt=to_date)
 
+        # Get statistics (computed in SQL over the filtered rows)
+        stats = calculate_statistics(audit_queryset)
+
         audit_queryset = audit_queryset.order_by('-timestamp')[:10000]
 
         # Process audit logs
@@ -831,12 +677,7 @@ def audit_trail_view(request):
                 'status': 'Success'
             })
 
-        print(f"\n{'=' * 80}")
-        print(f"✅ RESULTS: {len(audit_logs)} audit logs")
-        print(f"{'=' * 80}\n")
-
-        # Get statistics
-        stats = calculate_statistics(audit_logs)
+        logger.info("✅ RESULTS: %s audit logs", len(audit_logs))
 
         # Get unique users for filter dropdown
         users = get_unique_users()
@@ -854,9 +695,7 @@ def audit_trail_view(request):
         return render(request, 'dashboard/audit_trail.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading audit trail: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading audit trail: %s", e)
 
         context = {
             'audit_logs': [],
@@ -888,6 +727,61 @@ def get_audit_logs_api(request):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+@login_required
+@use_replica
+def search_audit_trail_api(request):
+    """Ranked, paginated full-text search over audit trail actions and details"""
+    try:
+        query = request.GET.get('q', '').strip()
+        filter_date_from = request.GET.get('date_from', '')
+        filter_date_to = request.GET.get('date_to', '')
+
+        filters = {
+            'user_name': request.GET.get('user', ''),
+            'action': request.GET.get('action', ''),
+        }
+        if filter_date_from:
+            filters['date_from'] = timezone.make_aware(datetime.strptime(filter_date_from, '%Y-%m-%d'))
+        if filter_date_to:
+            filters['date_to'] = timezone.make_aware(datetime.strptime(filter_date_to, '%Y-%m-%d') + timedelta(days=1))
+
+        search = audit_search.search_audit_trail(
+            query,
+            page=request.GET.get('page', 1),
+            page_size=request.GET.get('page_size', audit_search.DEFAULT_PAGE_SIZE),
+            **filters
+        )
+
+        logs_list = []
+        for log, rank in search['results']:
+            logs_list.append({
+                'id': log.id,
+                'user': log.user_name or 'Unknown',
+                'action': log.action or 'N/A',
+                'details': log.details or '',
+                'timestamp': log.timestamp.strftime('%Y-%m-%d %H:%M:%S') if log.timestamp else '',
+                'rank': round(float(rank), 4),
+            })
+
+        return JsonResponse({
+            'success': True,
+            'query': query,
+            'total': search['total'],
+            'total_exact': search['total_exact'],
+            # e.g. "1000+" when there are more matches than were counted
+            'total_display': f"{search['total']}" + ('' if search['total_exact'] else '+'),
+            'page': search['page'],
+            'page_size': search['page_size'],
+            'logs': logs_list,
+        })
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        logger.error("❌ Error searching audit trail: %s", e)
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
 @login_required
 def export_audit_trail_csv(request):
     """Export audit trail to CSV"""
@@ -911,7 +805,7 @@ def export_audit_trail_csv(request):
         return response
 
     except Exception as e:
-        print(f"❌ Error exporting audit trail CSV: {e}")
+        logger.error("❌ Error exporting audit trail CSV: %s", e)
         return HttpResponse(f"Error: {str(e)}", status=500)
 
 
@@ -920,22 +814,23 @@ def export_audit_trail_csv(request):
 # ========================================
 
 @login_required
+@conditional_catalogue('products')
 def api_products(request):
     """API endpoint to get all products"""
     try:
-        products = Product.objects.all()
+        products = get_data_source('products').get_product_records()
         products_list = []
 
         for product in products:
             products_list.append({
-                'id': product.firebase_id or str(product.id),
+                'id': product.key,
                 'name': product.name,
-                'category': product.category,
-                'price': float(product.price or 0),
-                'quantity': float(product.quantity or 0),
-                'inventoryA': float(product.inventory_a or 0),
-                'inventoryB': float(product.inventory_b or 0),
-                'costPerUnit': float(product.cost_per_unit or 0),
+                'category': product.raw_category,
+                'price': product.price,
+                'quantity': product.quantity,
+                'inventoryA': product.inventory_a,
+                'inventoryB': product.inventory_b,
+                'costPerUnit': product.cost_per_unit,
                 'unit': product.unit,
             })
 
@@ -949,7 +844,7 @@ def api_products(request):
 def api_sales(request):
     """API endpoint to get all sales"""
     try:
-        sales = Sale.objects.all().order_by('-order_date')[:1000]
+        sales = get_data_source('sales').get_sale_records(limit=1000)
         sales_list = []
 
         for sale in sales:
@@ -958,9 +853,9 @@ def api_sales(request):
                 'productName': sale.product_name,
                 'productFirebaseId': sale.product_firebase_id,
                 'category': sale.category,
-                'quantity': float(sale.quantity or 0),
-                'price': float(sale.price or 0),
-                'total': float(sale.total or 0),
+                'quantity': float(sale.quantity),
+                'price': sale.price,
+                'total': sale.total,
                 'orderDate': sale.order_date.strftime('%Y-%m-%d %H:%M:%S') if sale.order_date else '',
             })
 
@@ -992,7 +887,9 @@ def database_health_check(request):
                     'products': len(products),
                     'sales': 'Available',
                     'recipes': len(recipes),
-                }
+                },
+                'circuit_breakers': api.breaker_states(),
+                'data_sources': data_source_names(),
             })
         else:
             return JsonResponse({
@@ -1000,6 +897,8 @@ def database_health_check(request):
                 'connection': 'Node.js API',
                 'api_url': health['api_url'],
                 'message': health['message'],
+                'circuit_breakers': api.breaker_states(),
+                'data_sources': data_source_names(),
             }, status=500)
 
     except Exception as e:
@@ -1014,6 +913,29 @@ def database_health_check(request):
 firebase_health_check = database_health_check
 
 
+@csrf_exempt
+def metrics_view(request):
+    """Prometheus metrics for this worker (bearer token if METRICS_TOKEN is set, else login)"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        # Constant-time (hmac.compare_digest), so timing does not leak the token
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+            return HttpResponse('Unauthorized', status=401)
+    elif not request.user.is_authenticated:
+        return HttpResponse('Unauthorized', status=401)
+
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+def database_connection_stats(request):
+    """Database connection reuse / pool statistics for this worker process"""
+    try:
+        return JsonResponse({'success': True, 'stats': get_connection_stats()})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
 @login_required
 def debug_database_status(request):
     """Debug endpoint to check database status"""
@@ -1072,9 +994,7 @@ def debug_database_status(request):
         return HttpResponse(status_html, content_type='text/html')
 
     except Exception as e:
-        print(f"❌ Error in debug endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in debug endpoint: %s", e)
         return HttpResponse(f"<h1>Error: {str(e)}</h1>", content_type='text/html', status=500)
 
 
@@ -1128,61 +1048,56 @@ def update_password_api(request):
 # ========================================
 
 @login_required
-def recipes_view(request):
+@closes_api_client
+async def recipes_view(request):
     """Display recipe management page using data from the Node.js API"""
     try:
-        print("\n🔥 RECIPES VIEW CALLED (API Mode)")
+        logger.debug("🔥 RECIPES VIEW CALLED (API Mode)")
 
-        api = get_api_service()
+        recipe_source = get_data_source('recipes')
 
         # ========================================
-        # 1. LOAD RECIPES (WITH INGREDIENTS) FROM API
+        # 1. LOAD RECIPES (WITH INGREDIENTS) AND PRODUCTS
         # ========================================
-        api_recipes = api.get_recipes() or []
+        api_recipes, products = await asyncio.gather(
+            recipe_source.aget_recipe_records(),
+            get_data_source('products').aget_product_records(),
+        )
+
+        # Ingredients may be embedded or need separate call – handle both.
+        # Fallback: fetch the missing ones from the dedicated endpoint, concurrently
+        missing = [recipe for recipe in api_recipes if not recipe.ingredients and recipe.id]
+        fetched = await asyncio.gather(
+            *(recipe_source.aget_recipe_ingredients(recipe.id) for recipe in missing),
+            return_exceptions=True,
+        )
+        fetched_ingredients = {}
+        for recipe, result in zip(missing, fetched):
+            if isinstance(result, Exception):
+                logger.warning("⚠️ Could not load ingredients for recipe %s: %s", recipe.id, result)
+                result = []
+            fetched_ingredients[recipe.id] = [IngredientRecord(ing) for ing in result]
+
         recipes_list = []
 
         for recipe in api_recipes:
-            # Normalise keys from API response
-            recipe_id = recipe.get('firebase_id') or recipe.get('firebaseId') or recipe.get('id')
-            product_name = recipe.get('product_name') or recipe.get('productName') or 'Unknown'
-            product_firebase_id = recipe.get('product_firebase_id') or recipe.get('productFirebaseId') or ''
-
-            # Ingredients may be embedded or need separate call – handle both
-            ingredients_from_api = recipe.get('ingredients')
-            ingredients_data = []
-
-            if not ingredients_from_api and recipe_id:
-                # Fallback: fetch ingredients from dedicated endpoint
-                try:
-                    ingredients_from_api = api.get_recipe_ingredients(recipe_id)
-                except Exception as ing_err:
-                    print(f"⚠️ Could not load ingredients for recipe {recipe_id}: {ing_err}")
-                    ingredients_from_api = []
-
-            for ing in ingredients_from_api or []:
-                ingredient_id = ing.get('ingredient_firebase_id') or ing.get('ingredientFirebaseId') or ''
-                ingredient_name = ing.get('ingredient_name') or ing.get('ingredientName') or 'Unknown'
-                quantity_needed = ing.get('quantity_needed') or ing.get('quantityNeeded') or 0
-                unit = ing.get('unit') or 'g'
-
-                # Cost / stock info is optional in API; default gracefully
-                ingredient_cost = float(ing.get('cost_per_unit') or ing.get('costPerUnit') or 0)
-                stock = float(ing.get('stock') or 0)
-
-                ingredients_data.append({
-                    'id': ing.get('id', ''),
-                    'name': ingredient_name,
-                    'quantity': quantity_needed,
-                    'unit': unit,
-                    'ingredientFirebaseId': ingredient_id,
-                    'cost_per_unit': ingredient_cost,
-                    'stock': stock,
-                })
+            ingredients = recipe.ingredients or fetched_ingredients.get(recipe.id, [])
+
+            # Cost / stock info is optional in API; records default them to 0
+            ingredients_data = [{
+                'id': ing.id,
+                'name': ing.ingredient_name,
+                'quantity': ing.quantity_needed,
+                'unit': ing.unit,
+                'ingredientFirebaseId': ing.ingredient_firebase_id,
+                'cost_per_unit': ing.cost_per_unit,
+                'stock': ing.stock,
+            } for ing in ingredients]
 
             recipes_list.append({
-                'id': recipe_id,
-                'productName': product_name,
-                'productFirebaseId': product_firebase_id,
+                'id': recipe.id,
+                'productName': recipe.product_name,
+                'productFirebaseId': recipe.product_firebase_id,
                 'ingredients': ingredients_data,
                 'ingredientCount': len(ingredients_data),
             })
@@ -1190,47 +1105,34 @@ def recipes_view(request):
         # ========================================
         # 2. LOAD PRODUCTS FROM API FOR DROPDOWNS
         # ========================================
-        api_products = api.get_products() or []
         beverages = []
         available_ingredients = []
 
-        for product in api_products:
-            name = product.get('name') or 'Unknown'
-            firebase_id = product.get('firebase_id') or product.get('firebaseId') or str(product.get('id', ''))
-            raw_category = (product.get('category') or '').strip()
-            category_lower = raw_category.lower()
-
+        for product in products:
             # Beverages / pastries for recipe selection
-            if category_lower in ['beverage', 'beverages', 'pastries', 'pastry', 'drink', 'drinks',
-                                  'hot drinks', 'cold drinks', 'snacks', 'snack']:
+            if product.category in ('beverage', 'pastries'):
                 beverages.append({
-                    'id': firebase_id,
-                    'name': name,
-                    'category': category_lower,
+                    'id': product.key,
+                    'name': product.name,
+                    'category': product.raw_category.lower().strip(),
                 })
 
             # Ingredients for dropdown (match mobile category name)
-            if category_lower in ['ingredient', 'ingredients']:
-                inventory_a = float(
-                    product.get('inventory_a') or product.get('inventoryA') or product.get('quantity') or 0
-                )
-                inventory_b = float(product.get('inventory_b') or product.get('inventoryB') or 0)
-                total_stock = inventory_a + inventory_b
-                cost_per_unit = float(product.get('cost_per_unit') or product.get('costPerUnit') or 0)
-
+            elif product.category == 'ingredients':
+                inventory_a = product.inventory_a or product.quantity
                 available_ingredients.append({
-                    'id': firebase_id,
-                    'name': name,
-                    'stock': total_stock,
+                    'id': product.key,
+                    'name': product.name,
+                    'stock': inventory_a + product.inventory_b,
                     'inventory_a': inventory_a,
-                    'inventory_b': inventory_b,
-                    'cost_per_unit': cost_per_unit,
+                    'inventory_b': product.inventory_b,
+                    'cost_per_unit': product.cost_per_unit,
                     'unit': 'g',
                 })
 
-        print(f"✅ Loaded {len(recipes_list)} recipes from API")
-        print(f"✅ Found {len(beverages)} beverages for dropdown")
-        print(f"✅ Found {len(available_ingredients)} ingredients for dropdown")
+        logger.info("✅ Loaded %s recipes from API", len(recipes_list))
+        logger.info("✅ Found %s beverages for dropdown", len(beverages))
+        logger.info("✅ Found %s ingredients for dropdown", len(available_ingredients))
 
         context = {
             'recipes': recipes_list,
@@ -1238,12 +1140,10 @@ def recipes_view(request):
             'ingredients': available_ingredients,
             'ingredients_json': available_ingredients,  # For json_script filter
         }
-        return render(request, 'dashboard/recipes.html', context)
+        return await sync_to_async(render)(request, 'dashboard/recipes.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading recipes (API Mode): {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading recipes (API Mode): %s", e)
 
         context = {
             'recipes': [],
@@ -1251,7 +1151,7 @@ def recipes_view(request):
             'ingredients': [],
             'ingredients_json': [],  # For json_script filter
         }
-        return render(request, 'dashboard/recipes.html', context)
+        return await sync_to_async(render)(request, 'dashboard/recipes.html', context)
 
 
 # ============================================
@@ -1264,8 +1164,8 @@ def add_recipe_api(request):
     """Add a new recipe with ingredients via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 ADD RECIPE API CALLED (via Node API)")
-        print(f"Data received: {data}")
+        logger.debug("🔥 ADD RECIPE API CALLED (via Node API)")
+        logger.debug("Data received: %s", data)
 
         product_firebase_id = data.get('productFirebaseId')
         product_name = data.get('productName')
@@ -1288,13 +1188,13 @@ def add_recipe_api(request):
             'ingredients': ingredients
         }
 
-        print(f"📤 Sending recipe data to Node API: {recipe_data}")
+        logger.debug("📤 Sending recipe data to Node API: %s", recipe_data)
 
         # Call Node API to add recipe
         result = api.add_recipe(recipe_data)
 
         if result.get('success'):
-            print(f"✅ Recipe created successfully via Node API")
+            logger.info("✅ Recipe created successfully via Node API")
             log_audit('Recipe Created', request.user, f'Created recipe for {product_name}')
 
             return JsonResponse({
@@ -1303,16 +1203,14 @@ def add_recipe_api(request):
             })
         else:
             error_message = result.get('message', 'Failed to create recipe')
-            print(f"❌ Node API returned error: {error_message}")
+            logger.error("❌ Node API returned error: %s", error_message)
             return JsonResponse({
                 'success': False,
                 'message': error_message
             })
 
     except Exception as e:
-        print(f"❌ Error adding recipe: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error adding recipe: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -1322,8 +1220,8 @@ def update_recipe_api(request):
     """Update an existing recipe via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 UPDATE RECIPE API CALLED (via Node API)")
-        print(f"Data received: {data}")
+        logger.debug("🔥 UPDATE RECIPE API CALLED (via Node API)")
+        logger.debug("Data received: %s", data)
 
         recipe_id = data.get('recipeId')
         product_firebase_id = data.get('productFirebaseId')
@@ -1344,13 +1242,13 @@ def update_recipe_api(request):
             'ingredients': ingredients
         }
 
-        print(f"📤 Updating recipe {recipe_id} via Node API")
+        logger.debug("📤 Updating recipe %s via Node API", recipe_id)
 
         # Call Node API to update recipe
         result = api.update_recipe(recipe_id, recipe_data)
 
         if result.get('success'):
-            print(f"✅ Recipe {recipe_id} updated successfully via Node API")
+            logger.info("✅ Recipe %s updated successfully via Node API", recipe_id)
             log_audit('Recipe Updated', request.user, f'Updated recipe for {product_name}')
 
             return JsonResponse({
@@ -1359,16 +1257,14 @@ def update_recipe_api(request):
             })
         else:
             error_message = result.get('message', 'Failed to update recipe')
-            print(f"❌ Node API returned error: {error_message}")
+            logger.error("❌ Node API returned error: %s", error_message)
             return JsonResponse({
                 'success': False,
                 'message': error_message
             })
 
     except Exception as e:
-        print(f"❌ Error updating recipe: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error updating recipe: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -1378,8 +1274,8 @@ def delete_recipe_api(request):
     """Delete a recipe and its ingredients via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 DELETE RECIPE API CALLED (via Node API)")
-        print(f"Data received: {data}")
+        logger.debug("🔥 DELETE RECIPE API CALLED (via Node API)")
+        logger.debug("Data received: %s", data)
 
         recipe_id = data.get('recipeId')
 
@@ -1393,13 +1289,13 @@ def delete_recipe_api(request):
         recipe = api.get_recipe(recipe_id)
         product_name = recipe.get('productName', 'Unknown') if recipe else 'Unknown'
 
-        print(f"📤 Deleting recipe {recipe_id} via Node API")
+        logger.debug("📤 Deleting recipe %s via Node API", recipe_id)
 
         # Call Node API to delete recipe
         result = api.delete_recipe(recipe_id)
 
         if result.get('success'):
-            print(f"✅ Recipe {recipe_id} deleted successfully via Node API")
+            logger.info("✅ Recipe %s deleted successfully via Node API", recipe_id)
             log_audit('Recipe Deleted', request.user, f'Deleted recipe for {product_name}')
 
             return JsonResponse({
@@ -1408,16 +1304,14 @@ def delete_recipe_api(request):
             })
         else:
             error_message = result.get('message', 'Failed to delete recipe')
-            print(f"❌ Node API returned error: {error_message}")
+            logger.error("❌ Node API returned error: %s", error_message)
             return JsonResponse({
                 'success': False,
                 'message': error_message
             })
 
     except Exception as e:
-        print(f"❌ Error deleting recipe: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error deleting recipe: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -1425,14 +1319,19 @@ def delete_recipe_api(request):
 # INVENTORY TRANSFER API (A → B)
 # ============================================
 
+def unsynced_product_message(product):
+    """Error for a product the Node API cannot address (it has no Firebase ID yet)"""
+    return f'{product.name} is not synced with the mobile app yet (no Firebase ID); sync it first'
+
+
 @login_required
 @require_http_methods(["POST"])
 def transfer_inventory_api(request):
     """Transfer stock from Inventory A to Inventory B via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔄 INVENTORY TRANSFER API CALLED (via Node API)")
-        print(f"Data received: {data}")
+        logger.debug("🔄 INVENTORY TRANSFER API CALLED (via Node API)")
+        logger.debug("Data received: %s", data)
 
         product_id = data.get('productId')
         transfer_qty = float(data.get('quantity', 0))
@@ -1443,20 +1342,17 @@ def transfer_inventory_api(request):
         # Get API service
         api = get_api_service()
 
-        # Get product details to validate and get product name
-        products = api.get_products()
-        product = None
-        for p in products:
-            if p.get('id') == product_id or p.get('firebaseId') == product_id:
-                product = p
-                break
+        # Get product details to validate and get product name (point lookup)
+        product = get_data_source('products').get_product_record(product_id)
 
         if not product:
             return JsonResponse({'success': False, 'message': 'Product not found'})
+        if not product.firebase_id:
+            return JsonResponse({'success': False, 'message': unsynced_product_message(product)})
 
-        product_name = product.get('name', 'Unknown Product')
-        inventory_a = float(product.get('inventory_a', 0))
-        inventory_b = float(product.get('inventory_b', 0))
+        product_name = product.name
+        inventory_a = product.inventory_a
+        inventory_b = product.inventory_b
 
         # Check if sufficient stock
         if inventory_a < transfer_qty:
@@ -1465,18 +1361,18 @@ def transfer_inventory_api(request):
                 'message': f'Insufficient stock in Inventory A. Available: {inventory_a:.2f}'
             })
 
-        print(f"📤 Transferring {transfer_qty} units of {product_name} from A to B")
+        logger.debug("📤 Transferring %s units of %s from A to B", transfer_qty, product_name)
 
-        # Call Node API to transfer inventory
-        result = api.transfer_inventory(product_id, transfer_qty)
+        # Call Node API to transfer inventory (it looks products up by Firebase ID)
+        result = api.transfer_inventory(product.firebase_id, transfer_qty)
 
         if result.get('success'):
             new_inventory_a = inventory_a - transfer_qty
             new_inventory_b = inventory_b + transfer_qty
 
-            print(f"✅ Transferred {transfer_qty} units of {product_name}")
-            print(f"   Inventory A: {inventory_a} → {new_inventory_a}")
-            print(f"   Inventory B: {inventory_b} → {new_inventory_b}")
+            logger.info("✅ Transferred %s units of %s", transfer_qty, product_name)
+            logger.debug("Inventory A: %s → %s", inventory_a, new_inventory_a)
+            logger.debug("Inventory B: %s → %s", inventory_b, new_inventory_b)
 
             log_audit('Inventory Transfer', request.user, f'Transferred {transfer_qty} units of {product_name} from A to B')
 
@@ -1488,19 +1384,117 @@ def transfer_inventory_api(request):
             })
         else:
             error_message = result.get('message', 'Failed to transfer inventory')
-            print(f"❌ Node API returned error: {error_message}")
+            logger.error("❌ Node API returned error: %s", error_message)
             return JsonResponse({
                 'success': False,
                 'message': error_message
             })
 
     except Exception as e:
-        print(f"❌ Error in transfer: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in transfer: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
+# Same limit as the Node API's POST /api/products/transfer/bulk
+MAX_BULK_TRANSFER_LINES = 500
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_transfer_inventory_api(request):
+    """
+    Transfer several products from Inventory A to B in one call
+
+    Body: {"items": [{"productId": ..., "quantity": ...}, ...]}. The Node API
+    checks every line against one stock snapshot and applies them in a
+    single transaction: all lines are transferred or none is. The response
+    has one result per line, in order.
+    """
+    try:
+        data = json.loads(request.body)
+        items = data.get('items')
+        logger.debug("🔄 BULK INVENTORY TRANSFER API CALLED: %s lines", len(items) if isinstance(items, list) else 0)
+
+        if not isinstance(items, list) or not items:
+            return JsonResponse({'success': False, 'message': 'No transfer lines given', 'results': []})
+
+        if len(items) > MAX_BULK_TRANSFER_LINES:
+            return JsonResponse({
+                'success': False,
+                'message': f'Too many lines: {len(items)} (maximum {MAX_BULK_TRANSFER_LINES})',
+                'results': [],
+            })
+
+        lines = []
+        for item in items:
+            item = item if isinstance(item, dict) else {}
+            lines.append((str(item.get('productId') or ''), to_float(item.get('quantity'))))
+
+        invalid = [
+            {'index': index, 'productId': product_id, 'quantity': quantity, 'success': False,
+             'message': 'Invalid product or quantity'}
+            for index, (product_id, quantity) in enumerate(lines)
+            if not product_id or quantity <= 0
+        ]
+        if invalid:
+            return JsonResponse({
+                'success': False,
+                'message': f'No stock was transferred: {len(invalid)} of {len(lines)} lines are invalid',
+                'results': invalid,
+            })
+
+        # Node addresses products by Firebase ID: resolve every posted id in one read
+        products = get_data_source('products').get_product_records_by_key(product_id for product_id, _ in lines)
+
+        unresolved = []
+        for index, (product_id, quantity) in enumerate(lines):
+            product = products[product_id]
+            if product and product.firebase_id:
+                continue
+            unresolved.append({
+                'index': index, 'productId': product_id, 'quantity': quantity, 'success': False,
+                'message': unsynced_product_message(product) if product else 'Product not found',
+            })
+        if unresolved:
+            return JsonResponse({
+                'success': False,
+                'message': f'No stock was transferred: {len(unresolved)} of {len(lines)} lines cannot be transferred',
+                'results': unresolved,
+            })
+
+        api = get_api_service()
+        result = api.transfer_inventory_bulk(
+            [(products[product_id].firebase_id, quantity) for product_id, quantity in lines]
+        )
+        # Results come back in line order
+        results = [
+            {'productId': product_id, **line}
+            for (product_id, _), line in zip(lines, result.get('results') or ())
+        ]
+
+        if not result.get('success'):
+            error_message = result.get('message', 'Failed to transfer inventory')
+            logger.error("❌ Node API returned error: %s", error_message)
+            return JsonResponse({'success': False, 'message': error_message, 'results': results})
+
+        logger.info("✅ Bulk transfer of %s lines", len(results))
+
+        # One audit record for the whole batch
+        log_audit('Inventory Transfer', request.user, 'Transferred from A to B: ' + ', '.join(
+            f"{line['quantity']:g} units of {line.get('productName', line['productId'])}" for line in results
+        ))
+
+        return JsonResponse({
+            'success': True,
+            'message': result.get('message', f'Successfully transferred {len(results)} lines to Inventory B'),
+            'results': results,
+        })
+
+    except Exception as e:
+        logger.exception("❌ Error in bulk transfer: %s", e)
+        return JsonResponse({'success': False, 'message': str(e), 'results': []})
+
+
 # ============================================
 # WASTE MANAGEMENT API (B → Waste)
 # ============================================
@@ -1511,8 +1505,8 @@ def add_waste_api(request):
     """Transfer items from Inventory B to Waste logs via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🗑️ WASTE MANAGEMENT API CALLED (via Node API)")
-        print(f"Data received: {data}")
+        logger.debug("🗑️ WASTE MANAGEMENT API CALLED (via Node API)")
+        logger.debug("Data received: %s", data)
 
         product_id = data.get('productId')
         waste_qty = float(data.get('quantity', 0))
@@ -1524,20 +1518,17 @@ def add_waste_api(request):
         # Get API service
         api = get_api_service()
 
-        # Get product details to validate and get product name/category
-        products = api.get_products()
-        product = None
-        for p in products:
-            if p.get('id') == product_id or p.get('firebase_id') == product_id:
-                product = p
-                break
+        # Get product details to validate and get product name/category (point lookup)
+        product = get_data_source('products').get_product_record(product_id)
 
         if not product:
             return JsonResponse({'success': False, 'message': 'Product not found'})
+        if not product.firebase_id:
+            return JsonResponse({'success': False, 'message': unsynced_product_message(product)})
 
-        product_name = product.get('name', 'Unknown Product')
-        category = product.get('category', 'Unknown')
-        inventory_b = float(product.get('inventory_b', 0))
+        product_name = product.name
+        category = product.raw_category or 'Unknown'
+        inventory_b = product.inventory_b
 
         # Check if sufficient stock
         if inventory_b < waste_qty:
@@ -1546,11 +1537,11 @@ def add_waste_api(request):
                 'message': f'Insufficient stock in Inventory B. Available: {inventory_b:.2f}'
             })
 
-        print(f"📤 Recording waste: {waste_qty} units of {product_name}")
+        logger.debug("📤 Recording waste: %s units of %s", waste_qty, product_name)
 
         # Prepare waste data for Node API (matching Node API expectations)
         waste_data = {
-            'productFirebaseId': product.get('firebase_id', product_id),
+            'productFirebaseId': product.firebase_id,
             'productName': product_name,
             'category': category,
             'quantity': waste_qty,
@@ -1564,9 +1555,9 @@ def add_waste_api(request):
         if result.get('success'):
             new_inventory_b = inventory_b - waste_qty
 
-            print(f"✅ Recorded waste: {waste_qty} units of {product_name}")
-            print(f"   Inventory B: {inventory_b} → {new_inventory_b}")
-            print(f"   Reason: {reason}")
+            logger.info("✅ Recorded waste: %s units of %s", waste_qty, product_name)
+            logger.debug("Inventory B: %s → %s", inventory_b, new_inventory_b)
+            logger.debug("Reason: %s", reason)
 
             log_audit('Waste Recorded', request.user, f'Recorded {waste_qty} units of {product_name} as waste ({reason})')
 
@@ -1577,16 +1568,14 @@ def add_waste_api(request):
             })
         else:
             error_message = result.get('message', 'Failed to record waste')
-            print(f"❌ Node API returned error: {error_message}")
+            logger.error("❌ Node API returned error: %s", error_message)
             return JsonResponse({
                 'success': False,
                 'message': error_message
             })
 
     except Exception as e:
-        print(f"❌ Error in waste management: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in waste management: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -1594,48 +1583,43 @@ def add_waste_api(request):
 def waste_tracking_view(request):
     """Display waste tracking page with date filters and cost analysis"""
     try:
-        print("\n🗑️ WASTE TRACKING VIEW CALLED (PostgreSQL)")
+        logger.debug("🗑️ WASTE TRACKING VIEW CALLED")
 
         # Get date filter parameters
         from_date = request.GET.get('from_date', '')
         to_date = request.GET.get('to_date', '')
 
-        # Build query
-        waste_queryset = WasteLog.objects.all()
-
-        if from_date:
-            from_datetime = datetime.strptime(from_date, '%Y-%m-%d')
-            waste_queryset = waste_queryset.filter(waste_date__gte=from_datetime)
-        if to_date:
-            to_datetime = datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)
-            waste_queryset = waste_queryset.filter(waste_date__lt=to_datetime)
+        date_from, date_to = local_day_range(from_date, to_date)
+        waste_logs = get_data_source('waste').get_waste_logs(date_from=date_from, date_to=date_to)
 
-        waste_queryset = waste_queryset.order_by('-waste_date')
+        # Products by firebase_id and by local id, for the cost of each entry
+        products_by_id = {}
+        if waste_logs:
+            for product in get_data_source('products').get_product_records():
+                products_by_id[str(product.id)] = product
+                if product.firebase_id:
+                    products_by_id[product.firebase_id] = product
 
         waste_entries = []
         total_waste_cost = 0
         daily_costs = {}
 
-        for waste in waste_queryset:
-            product_id = waste.product_firebase_id
-            quantity = waste.quantity or 0
+        for waste in waste_logs:
+            product_id = waste.get('product_firebase_id')
+            quantity = to_float(waste.get('quantity'))
 
             # Get product details for cost
             waste_cost = 0
-            product_name = waste.product_name or 'Unknown'
-            category = waste.category or 'Unknown'
-
-            if product_id:
-                try:
-                    product = Product.objects.get(Q(firebase_id=product_id) | Q(id=product_id))
-                    cost_per_unit = product.cost_per_unit or 0
-                    waste_cost = quantity * cost_per_unit
-                    product_name = product.name or product_name
-                    category = product.category or category
-                except Product.DoesNotExist:
-                    pass
-
-            waste_date = waste.waste_date
+            product_name = waste.get('product_name') or 'Unknown'
+            category = waste.get('category') or 'Unknown'
+
+            product = products_by_id.get(str(product_id)) if product_id else None
+            if product is not None:
+                waste_cost = quantity * product.cost_per_unit
+                product_name = product.raw.get('name') or product_name
+                category = product.raw_category or category
+
+            waste_date = parse_api_datetime(waste.get('waste_date'))
             date_str = waste_date.strftime('%Y-%m-%d') if waste_date else 'Unknown'
             date_display = waste_date.strftime('%b %d, %Y %I:%M %p') if waste_date else 'Unknown'
 
@@ -1648,14 +1632,14 @@ def waste_tracking_view(request):
             total_waste_cost += waste_cost
 
             waste_entries.append({
-                'id': waste.id,
+                'id': waste.get('id'),
                 'productName': product_name,
                 'productId': product_id,
                 'quantity': quantity,
-                'reason': waste.reason or 'Unknown',
+                'reason': waste.get('reason') or 'Unknown',
                 'wasteDate': date_display,
                 'dateStr': date_str,
-                'recordedBy': waste.recorded_by or 'Unknown',
+                'recordedBy': waste.get('recorded_by') or 'Unknown',
                 'category': category,
                 'wasteCost': waste_cost
             })
@@ -1666,8 +1650,8 @@ def waste_tracking_view(request):
             for date, cost in sorted(daily_costs.items(), reverse=True)
         ]
 
-        print(f"✅ Loaded {len(waste_entries)} waste entries")
-        print(f"💰 Total waste cost: ₱{total_waste_cost:.2f}")
+        logger.info("✅ Loaded %s waste entries", len(waste_entries))
+        logger.info("💰 Total waste cost: ₱%.2f", total_waste_cost)
 
         context = {
             'waste_entries': waste_entries,
@@ -1681,9 +1665,7 @@ def waste_tracking_view(request):
         return render(request, 'dashboard/waste_tracking.html', context)
 
     except Exception as e:
-        print(f"❌ Error loading waste tracking: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error loading waste tracking: %s", e)
 
         context = {
             'waste_entries': [],
@@ -1701,20 +1683,21 @@ def waste_tracking_view(request):
 # ========================================
 
 @login_required
+@use_replica
 def inventory_forecasting_view(request):
     """ML-based inventory forecasting using PostgreSQL"""
     try:
-        print("\n🤖 ML INVENTORY FORECASTING VIEW (PostgreSQL)")
+        logger.debug("🤖 ML INVENTORY FORECASTING VIEW (PostgreSQL)")
 
         # Data validation
         sales_count = Sale.objects.count()
         products_count = Product.objects.count()
         predictions_count = MLPrediction.objects.count()
 
-        print(f"📊 Data Status:")
-        print(f"   Sales: {sales_count}")
-        print(f"   Products: {products_count}")
-        print(f"   Predictions: {predictions_count}")
+        logger.debug("📊 Data Status:")
+        logger.debug("Sales: %s", sales_count)
+        logger.debug("Products: %s", products_count)
+        logger.debug("Predictions: %s", predictions_count)
 
         data_issues = []
         if sales_count == 0:
@@ -1795,7 +1778,7 @@ def inventory_forecasting_view(request):
             name__icontains='Ice'
         )
 
-        print(f"📦 Processing {products.count()} products...")
+        logger.info("📦 Processing %s products...", products.count())
 
         for product in products:
             # Get ML prediction if available
@@ -1871,13 +1854,11 @@ def inventory_forecasting_view(request):
         # Sort by days_left
         forecast_data.sort(key=lambda x: x['days_left'] if isinstance(x['days_left'], int) else 999)
 
-        print(f"\n{'=' * 60}")
-        print(f"✅ FORECAST SUMMARY:")
-        print(f"   Total products: {len(forecast_data)}")
-        print(f"   Critical: {summary['critical']}")
-        print(f"   Low Stock: {summary['low']}")
-        print(f"   Healthy: {summary['healthy']}")
-        print(f"{'=' * 60}\n")
+        logger.debug("✅ FORECAST SUMMARY:")
+        logger.debug("Total products: %s", len(forecast_data))
+        logger.debug("Critical: %s", summary['critical'])
+        logger.debug("Low Stock: %s", summary['low'])
+        logger.debug("Healthy: %s", summary['healthy'])
 
         context = {
             'forecast_data': forecast_data,
@@ -1895,9 +1876,7 @@ def inventory_forecasting_view(request):
         return render(request, 'dashboard/inventory_forecasting.html', context)
 
     except Exception as e:
-        print(f"❌ Error in forecasting view: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in forecasting view: %s", e)
 
         context = {
             'forecast_data': [],
@@ -1919,7 +1898,7 @@ def inventory_forecasting_view(request):
 def train_forecasting_model(request):
     """Train the ML forecasting model using PostgreSQL data"""
     try:
-        print("\n🤖 TRAINING FORECASTING MODEL (PostgreSQL)")
+        logger.debug("🤖 TRAINING FORECASTING MODEL (PostgreSQL)")
 
         # Get sales data
         sales = Sale.objects.all()
@@ -1953,7 +1932,7 @@ def train_forecasting_model(request):
 
             # Simple moving average calculation
             total_quantity = sum(s['quantity'] for s in sales_data if s['quantity'])
-            days = (datetime.now() - min(s['order_date'] for s in sales_data if s['order_date'])).days or 1
+            days = (timezone.now() - min(s['order_date'] for s in sales_data if s['order_date'])).days or 1
 
             avg_daily_usage = total_quantity / max(days, 1)
             predicted_daily_usage = avg_daily_usage * 1.1  # Add 10% buffer
@@ -1977,7 +1956,7 @@ def train_forecasting_model(request):
             name='inventory_forecasting',
             defaults={
                 'is_trained': True,
-                'last_trained': datetime.now(),
+                'last_trained': timezone.now(),
                 'total_records': sales_count,
                 'products_analyzed': products.count(),
                 'predictions_generated': predictions_created,
@@ -2000,9 +1979,7 @@ def train_forecasting_model(request):
         })
 
     except Exception as e:
-        print(f"❌ Error training model: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error training model: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -2016,7 +1993,7 @@ def add_product_view(request):
     """Add a new product via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 ADD PRODUCT API CALLED (via Node API)")
+        logger.debug("🔥 ADD PRODUCT API CALLED (via Node API)")
 
         # Get API service
         api = get_api_service()
@@ -2054,7 +2031,7 @@ def add_product_view(request):
             })
 
     except Exception as e:
-        print(f"❌ Error adding product: {e}")
+        logger.error("❌ Error adding product: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -2064,7 +2041,7 @@ def update_product_view(request):
     """Update an existing product via Node.js API"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 UPDATE PRODUCT API CALLED (via Node API)")
+        logger.debug("🔥 UPDATE PRODUCT API CALLED (via Node API)")
 
         product_id = data.get('productId')
 
@@ -2103,7 +2080,7 @@ def update_product_view(request):
             })
 
     except Exception as e:
-        print(f"❌ Error updating product: {e}")
+        logger.error("❌ Error updating product: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
 
 
@@ -2113,7 +2090,7 @@ def delete_product_view(request):
     """Delete a product"""
     try:
         data = json.loads(request.body)
-        print("\n🔥 DELETE PRODUCT API CALLED (PostgreSQL)")
+        logger.debug("🔥 DELETE PRODUCT API CALLED (PostgreSQL)")
 
         product_id = data.get('productId')
 
@@ -2133,5 +2110,5 @@ def delete_product_view(request):
         })
 
     except Exception as e:
-        print(f"❌ Error deleting product: {e}")
+        logger.error("❌ Error deleting product: %s", e)
         return JsonResponse({'success': False, 'message': str(e)})
@@ -8,7 +8,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
-from datetime import datetime
+from django.utils.decorators import method_decorator
 
 from .models import (
     Product, Recipe, RecipeIngredient, Sale, WasteLog,
@@ -22,20 +22,14 @@ from .serializers import (
     WasteCreateSerializer, ProductCreateSerializer, ProductUpdateSerializer
 )
 from .api_service import get_api_service
+from .conditional import conditional_catalogue
+from .data_sources import get_data_source
+from .audit import log_audit
 
 
 def log_audit_action(action, user, details=''):
-    """Helper to log audit trail"""
-    try:
-        AuditTrail.objects.create(
-            action=action,
-            user_id=str(user.id) if hasattr(user, 'id') else '',
-            user_name=user.username if hasattr(user, 'username') else str(user),
-            details=details,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        print(f"Warning: Could not log audit trail: {e}")
+    """Helper to log audit trail (queued, written in batches)"""
+    log_audit(action, user, details)
 
 
 class ProductViewSet(viewsets.ModelViewSet):
@@ -48,11 +42,11 @@ class ProductViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     lookup_field = 'firebase_id'
 
+    @method_decorator(conditional_catalogue('products'))
     def list(self, request):
         """GET /api/v1/products/ - List all products"""
         try:
-            api = get_api_service()
-            products = api.get_products()
+            products = get_data_source('products').get_products()
 
             return Response({
                 'success': True,
@@ -230,11 +224,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     lookup_field = 'firebase_id'
 
+    @method_decorator(conditional_catalogue('recipes'))
     def list(self, request):
         """GET /api/v1/recipes/ - List all recipes with ingredients"""
         try:
-            api = get_api_service()
-            recipes = api.get_recipes()
+            recipes = get_data_source('recipes').get_recipes()
 
             return Response({
                 'success': True,
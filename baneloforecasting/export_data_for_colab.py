@@ -27,6 +27,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
 django.setup()
 
 from dashboard.models import Product, Sale, Recipe, RecipeIngredient
+from dashboard.db_router import use_replica
 
 # Create output directory
 OUTPUT_DIR = 'exported_data'
@@ -318,8 +319,9 @@ def generate_metadata():
     print(f"   ✓ Metadata saved to {filepath}")
 
 
+@use_replica
 def main():
-    """Main export function"""
+    """Main export function (reads from the replica when one is configured)"""
     print("=" * 60)
     print("DATA EXPORT FOR GOOGLE COLAB ML TRAINING")
     print("=" * 60)
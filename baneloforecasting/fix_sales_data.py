@@ -7,6 +7,7 @@ django.setup()
 
 from dashboard.firebase_service import FirebaseService
 from datetime import datetime
+from firebase_admin import firestore
 
 # Initialize Firebase
 db = FirebaseService().db
@@ -84,7 +85,9 @@ def fix_sales_data():
                 
                 # Update with Firebase ID
                 db.collection('sales').document(sale_id).update({
-                    'productFirebaseId': firebase_id
+                    'productFirebaseId': firebase_id,
+                    # Picked up by the incremental sync
+                    'updatedAt': firestore.SERVER_TIMESTAMP
                 })
                 
                 updated_count += 1
@@ -76,9 +76,25 @@ def inspect_schema():
                 count = cursor.fetchone()[0]
                 print(f"\n   📊 Row count: {count}")
 
+                # Get indexes
+                cursor.execute("""
+                    SELECT indexname, indexdef
+                    FROM pg_indexes
+                    WHERE schemaname = 'public' AND tablename = %s
+                    ORDER BY indexname;
+                """, [table_name])
+                indexes = cursor.fetchall()
+
+                print(f"   🗂️  Indexes: {len(indexes)}")
+                for index_name, index_def in indexes:
+                    print(f"      - {index_name}: {index_def.split(' USING ', 1)[-1]}")
+
             print("\n" + "=" * 70)
             print("Schema inspection complete!")
             print("=" * 70)
+            print("\n💡 Missing indexes for the website's queries:")
+            print("   python manage.py advise_indexes --explain   (report + query plans)")
+            print("   python manage.py advise_indexes --apply     (CREATE INDEX CONCURRENTLY)")
 
             # Generate Django model suggestions
             print("\n\n📝 DJANGO MODEL SUGGESTIONS:")
@@ -26,6 +26,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
 django.setup()
 
 from dashboard.models import Product, Sale, MLModel, MLPrediction, Recipe, RecipeIngredient
+from dashboard.db_router import use_replica
 from django.db.models import Sum, Avg, Count, Max, Min, StdDev
 from django.db.models.functions import TruncDate
 
@@ -84,8 +85,9 @@ def load_model():
         sys.exit(1)
 
 
+@use_replica
 def get_sales_data():
-    """Fetch sales data for prediction"""
+    """Fetch sales data for prediction (from the replica when one is configured)"""
     print("\n📊 Fetching sales data...")
 
     end_date = datetime.now()
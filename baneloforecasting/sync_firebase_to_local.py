@@ -8,12 +8,38 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
 django.setup()
 
 from dashboard.firebase_service import FirebaseService
+from dashboard.firestore_sync import incremental_sync, print_sync_metrics, reset_checkpoint
 from dashboard.models import Product, Sale
 from datetime import datetime
+import argparse
 
 # Initialize Firebase
 db = FirebaseService().db
 
+# Set timezone
+local_tz = pytz.timezone('Asia/Manila')  # Use your timezone
+
+
+def apply_product_doc(doc):
+    """Create or update one local product from a Firestore document"""
+    data = doc.to_dict()
+    firebase_id = doc.id
+
+    # Create or update product
+    product, created = Product.objects.update_or_create(
+        firebase_id=firebase_id,
+        defaults={
+            'name': data.get('name', 'Unknown'),
+            'category': data.get('category', 'Unknown'),
+            'stock': float(data.get('stock', 0)),
+            'unit': data.get('unit', 'pcs'),
+            'price': float(data.get('price', 0)),
+        }
+    )
+
+    return 'created' if created else 'updated'
+
+
 def sync_products():
     """Sync products from Firebase to local database"""
     print("\n📦 SYNCING PRODUCTS FROM FIREBASE TO LOCAL DB")
@@ -27,27 +53,12 @@ def sync_products():
     
     for doc in products_docs:
         try:
-            data = doc.to_dict()
-            firebase_id = doc.id
-            
-            # Create or update product
-            product, created = Product.objects.update_or_create(
-                firebase_id=firebase_id,
-                defaults={
-                    'name': data.get('name', 'Unknown'),
-                    'category': data.get('category', 'Unknown'),
-                    'stock': float(data.get('stock', 0)),
-                    'unit': data.get('unit', 'pcs'),
-                    'price': float(data.get('price', 0)),
-                }
-            )
-            
-            if created:
+            if apply_product_doc(doc) == 'created':
                 synced += 1
-                print(f"✅ Created: {product.name}")
+                print(f"✅ Created: {doc.to_dict().get('name', 'Unknown')}")
             else:
                 updated += 1
-                print(f"🔄 Updated: {product.name}")
+                print(f"🔄 Updated: {doc.to_dict().get('name', 'Unknown')}")
                 
         except Exception as e:
             print(f"❌ Error: {str(e)}")
@@ -55,6 +66,61 @@ def sync_products():
     print(f"\n📊 Products: {synced} created, {updated} updated")
 
 
+def apply_sale_doc(doc):
+    """Insert one local sale from a Firestore document (skips duplicates)"""
+    data = doc.to_dict()
+
+    # Parse order date
+    order_date_str = data.get('orderDate', '')
+    if not order_date_str:
+        return 'skipped'
+
+    try:
+        # Try to parse date
+        date_part = order_date_str.split()[0] if ' ' in order_date_str else order_date_str
+        order_date = datetime.strptime(date_part, '%Y-%m-%d')
+
+        # Make timezone aware
+        order_date = local_tz.localize(order_date)
+
+    except Exception as e:
+        print(f"⚠️ Date parse error: {order_date_str} - {str(e)}")
+        return 'skipped'
+
+    # Get price (handle missing price)
+    price = data.get('price')
+    if price is not None:
+        try:
+            price = float(price)
+        except:
+            price = 0.0
+    else:
+        price = 0.0
+
+    # Check if sale already exists (avoid duplicates)
+    product_name = data.get('productName', 'Unknown')
+    quantity = float(data.get('quantity', 0))
+
+    if Sale.objects.filter(
+        product_name=product_name,
+        order_date=order_date,
+        quantity=quantity
+    ).exists():
+        return 'skipped'
+
+    Sale.objects.create(
+        product_firebase_id=data.get('productFirebaseId'),
+        product_name=product_name,
+        category=data.get('category', 'Unknown'),
+        quantity=quantity,
+        price=price,
+        total=float(data.get('total', 0)) if data.get('total') else None,
+        order_date=order_date
+    )
+
+    return 'created'
+
+
 def sync_sales():
     """Sync sales from Firebase to local database"""
     print("\n💰 SYNCING SALES FROM FIREBASE TO LOCAL DB")
@@ -66,73 +132,9 @@ def sync_sales():
     synced = 0
     skipped = 0
     
-    # Set timezone
-    local_tz = pytz.timezone('Asia/Manila')  # Use your timezone
-    
     for doc in sales_docs:
         try:
-            data = doc.to_dict()
-            
-            # Parse order date
-            order_date_str = data.get('orderDate', '')
-            if not order_date_str:
-                skipped += 1
-                continue
-            
-            try:
-                # Try to parse date
-                date_part = order_date_str.split()[0] if ' ' in order_date_str else order_date_str
-                order_date = datetime.strptime(date_part, '%Y-%m-%d')
-                
-                # Make timezone aware
-                order_date = local_tz.localize(order_date)
-                
-            except Exception as e:
-                print(f"⚠️ Date parse error: {order_date_str} - {str(e)}")
-                skipped += 1
-                continue
-            
-            # Get product
-            product_firebase_id = data.get('productFirebaseId')
-            product = None
-            
-            if product_firebase_id:
-                try:
-                    product = Product.objects.get(firebase_id=product_firebase_id)
-                except Product.DoesNotExist:
-                    pass
-            
-            # Get price (handle missing price)
-            price = data.get('price')
-            if price is not None:
-                try:
-                    price = float(price)
-                except:
-                    price = 0.0
-            else:
-                price = 0.0
-            
-            # Check if sale already exists (avoid duplicates)
-            product_name = data.get('productName', 'Unknown')
-            quantity = float(data.get('quantity', 0))
-            
-            if not Sale.objects.filter(
-                product_name=product_name,
-                order_date=order_date,
-                quantity=quantity
-            ).exists():
-                
-                Sale.objects.create(
-                    product=product,
-                    product_firebase_id=product_firebase_id,
-                    product_name=product_name,
-                    category=data.get('category', 'Unknown'),
-                    quantity=quantity,
-                    price=price,
-                    total=float(data.get('total', 0)) if data.get('total') else None,
-                    order_date=order_date
-                )
-                
+            if apply_sale_doc(doc) == 'created':
                 synced += 1
                 if synced % 50 == 0:
                     print(f"📊 Synced {synced} sales...")
@@ -146,10 +148,33 @@ def sync_sales():
     print(f"\n📊 Sales: {synced} created, {skipped} skipped (duplicates or errors)")
 
 
+def sync_incremental(page_size=500, reset=False):
+    """Sync only products and sales changed since the last checkpoint"""
+    print("\n⚡ INCREMENTAL SYNC FROM FIREBASE TO LOCAL DB")
+    print("=" * 60)
+
+    for collection_name, apply_doc in [('products', apply_product_doc), ('sales', apply_sale_doc)]:
+        if reset:
+            reset_checkpoint(collection_name)
+
+        print(f"\n📦 {collection_name}")
+        stats = incremental_sync(db, collection_name, apply_doc, page_size=page_size)
+        print_sync_metrics(stats)
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sync products and sales from Firebase to the local database')
+    parser.add_argument('--full', action='store_true', help='Stream entire collections (legacy mode)')
+    parser.add_argument('--reset', action='store_true', help='Discard checkpoints and re-read everything incrementally')
+    parser.add_argument('--page-size', type=int, default=500, help='Documents per page/transaction')
+    args = parser.parse_args()
+
     try:
-        sync_products()
-        sync_sales()
+        if args.full:
+            sync_products()
+            sync_sales()
+        else:
+            sync_incremental(page_size=args.page_size, reset=args.reset)
         print("\n✅ SYNC COMPLETE!\n")
     except Exception as e:
         print(f"\n❌ SYNC FAILED: {str(e)}")
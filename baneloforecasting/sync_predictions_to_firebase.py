@@ -5,18 +5,26 @@ Sync ML Predictions to Firebase
 This script syncs ML predictions from the local Django database to Firebase Firestore.
 This allows real-time access to predictions across all platforms.
 
+By default only predictions that changed since the last publish are sent: either
+the prediction itself was retrained (lastUpdated) or its product's stock changed
+(products.updated_at). Use --full to recompute and reconcile every prediction:
+documents whose product or prediction no longer exists locally are deleted.
+
 Prerequisites:
 - Firebase credentials configured (firebase-credentials.json)
 - ML predictions generated in Django database
 
 Usage:
     python sync_predictions_to_firebase.py
+    python sync_predictions_to_firebase.py --full    # recompute every prediction, delete orphaned documents
+    python sync_predictions_to_firebase.py --force   # re-upload unchanged documents
 """
 
 import os
 import sys
+import argparse
 import django
-from datetime import datetime
+from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -27,6 +35,12 @@ django.setup()
 
 from dashboard.models import Product, MLPrediction, MLModel
 from dashboard.firebase_utils import validate_firebase_credentials
+from dashboard.firestore_sync import (
+    batched_upload, count_documents, delete_orphaned_documents, get_publish_watermark,
+    set_publish_watermark
+)
+from django.db.models import Q
+from django.utils import timezone
 
 try:
     import firebase_admin
@@ -42,6 +56,11 @@ except ImportError:
 FIREBASE_CREDENTIALS_PATH = 'baneloforecasting/firebase-credentials.json'
 COLLECTION_NAME = 'ml_predictions'
 MODEL_COLLECTION = 'ml_models'
+UPLOAD_WORKERS = 4  # Batches committed concurrently
+
+# Re-check a small window before the watermark to absorb clock skew
+# between this machine and the writers of products.updated_at
+WATERMARK_OVERLAP = timedelta(minutes=1)
 
 
 def initialize_firebase():
@@ -81,17 +100,46 @@ def initialize_firebase():
         sys.exit(1)
 
 
-def get_ml_predictions():
-    """Fetch ML predictions from Django database"""
+def get_changed_prediction_ids(since):
+    """Product firebase IDs whose prediction or stock changed after `since`"""
+    changed_products = Product.objects.filter(
+        updated_at__gt=since
+    ).exclude(firebase_id__isnull=True).values_list('firebase_id', flat=True)
+
+    return set(
+        MLPrediction.objects.filter(
+            Q(last_updated__gt=since) | Q(product_firebase_id__in=changed_products)
+        ).values_list('product_firebase_id', flat=True)
+    )
+
+
+def get_ml_predictions(product_firebase_ids=None):
+    """Fetch ML predictions from Django database
+
+    Args:
+        product_firebase_ids: Only build these predictions (None = all)
+    """
     print("\n📊 Fetching ML predictions from database...")
 
-    predictions = MLPrediction.objects.select_related('product').all()
+    predictions = MLPrediction.objects.all()
+    if product_firebase_ids is not None:
+        predictions = predictions.filter(product_firebase_id__in=product_firebase_ids)
+    predictions = list(predictions)
+
+    # MLPrediction references products by firebase_id - resolve them in one query
+    products = Product.objects.in_bulk(
+        [pred.product_firebase_id for pred in predictions], field_name='firebase_id'
+    )
 
     prediction_data = []
     for pred in predictions:
+        product = products.get(pred.product_firebase_id)
+        if product is None:
+            continue
+
         # Calculate additional metrics
-        if pred.product.stock > 0 and pred.predicted_daily_usage > 0:
-            days_until_stockout = pred.product.stock / pred.predicted_daily_usage
+        if product.stock > 0 and pred.predicted_daily_usage > 0:
+            days_until_stockout = product.stock / pred.predicted_daily_usage
         else:
             days_until_stockout = 999  # Essentially infinite
 
@@ -104,15 +152,15 @@ def get_ml_predictions():
             stock_status = 'healthy'
 
         # Calculate reorder recommendation (30-day supply)
-        recommended_reorder = max(0, (pred.predicted_daily_usage * 30) - pred.product.stock)
+        recommended_reorder = max(0, (pred.predicted_daily_usage * 30) - product.stock)
 
         prediction_data.append({
-            'product_id': pred.product.id,
-            'product_firebase_id': pred.product.firebase_id or '',
-            'product_name': pred.product.name,
-            'category': pred.product.category,
-            'current_stock': float(pred.product.stock),
-            'unit': pred.product.unit,
+            'product_id': product.id,
+            'product_firebase_id': product.firebase_id or '',
+            'product_name': product.name,
+            'category': product.category,
+            'current_stock': float(product.stock),
+            'unit': product.unit,
             'predicted_daily_usage': float(pred.predicted_daily_usage),
             'avg_daily_usage': float(pred.avg_daily_usage),
             'trend': float(pred.trend),
@@ -130,6 +178,13 @@ def get_ml_predictions():
     return prediction_data
 
 
+def count_publishable_predictions():
+    """Number of predictions that should exist in Firestore"""
+    return MLPrediction.objects.filter(
+        product_firebase_id__in=Product.objects.values('firebase_id')
+    ).count()
+
+
 def get_ml_model_metadata():
     """Fetch ML model metadata"""
     print("\n📋 Fetching ML model metadata...")
@@ -160,64 +215,60 @@ def get_ml_model_metadata():
         return []
 
 
-def sync_predictions_to_firestore(db, predictions):
-    """Upload predictions to Firestore"""
+def sync_predictions_to_firestore(db, predictions, force=False):
+    """Upload predictions to Firestore in batched commits"""
     print(f"\n☁️  Syncing predictions to Firebase...")
 
-    collection_ref = db.collection(COLLECTION_NAME)
+    # Use product_id as document ID
+    docs = [(str(pred['product_id']), pred) for pred in predictions]
 
-    success_count = 0
-    error_count = 0
-
-    for pred in predictions:
-        try:
-            # Use product_id as document ID
-            doc_id = str(pred['product_id'])
+    stats = batched_upload(db, COLLECTION_NAME, docs,
+                           max_workers=UPLOAD_WORKERS, skip_unchanged=not force)
 
-            # Upload to Firestore
-            collection_ref.document(doc_id).set(pred)
+    success_count = stats['uploaded'] + stats['unchanged']
+    error_count = stats['errors']
 
-            success_count += 1
-
-        except Exception as e:
-            print(f"   ⚠ Error syncing {pred['product_name']}: {e}")
-            error_count += 1
-
-    print(f"   ✓ Successfully synced {success_count} predictions")
+    print(f"   ✓ Successfully synced {success_count} predictions "
+          f"({stats['uploaded']} uploaded in {stats['batches']} batches, "
+          f"{stats['unchanged']} unchanged, {stats['elapsed_seconds']:.2f}s)")
     if error_count > 0:
         print(f"   ⚠ Failed to sync {error_count} predictions")
 
     return success_count, error_count
 
 
-def sync_model_metadata_to_firestore(db, models):
-    """Upload model metadata to Firestore"""
+def delete_orphaned_predictions(db, predictions):
+    """Delete prediction documents whose product or prediction no longer exists locally"""
+    print(f"\n🧹 Deleting orphaned predictions from Firebase...")
+
+    stats = delete_orphaned_documents(db, COLLECTION_NAME, (str(pred['product_id']) for pred in predictions))
+
+    print(f"   ✓ Deleted {stats['deleted']} orphaned predictions")
+    if stats['errors'] > 0:
+        print(f"   ⚠ Failed to delete {stats['errors']} orphaned predictions")
+
+    return stats['deleted'], stats['errors']
+
+
+def sync_model_metadata_to_firestore(db, models, force=False):
+    """Upload model metadata to Firestore in batched commits"""
     print(f"\n☁️  Syncing model metadata to Firebase...")
 
     if len(models) == 0:
         print("   ⚠ No model metadata to sync")
         return 0, 0
 
-    collection_ref = db.collection(MODEL_COLLECTION)
-
-    success_count = 0
-    error_count = 0
-
-    for model in models:
-        try:
-            # Use model name as document ID
-            doc_id = model['name'].replace(' ', '_').lower()
-
-            # Upload to Firestore
-            collection_ref.document(doc_id).set(model)
+    # Use model name as document ID
+    docs = [(model['name'].replace(' ', '_').lower(), model) for model in models]
 
-            success_count += 1
+    stats = batched_upload(db, MODEL_COLLECTION, docs,
+                           max_workers=UPLOAD_WORKERS, skip_unchanged=not force)
 
-        except Exception as e:
-            print(f"   ⚠ Error syncing model {model['name']}: {e}")
-            error_count += 1
+    success_count = stats['uploaded'] + stats['unchanged']
+    error_count = stats['errors']
 
-    print(f"   ✓ Successfully synced {success_count} model records")
+    print(f"   ✓ Successfully synced {success_count} model records "
+          f"({stats['uploaded']} uploaded, {stats['unchanged']} unchanged)")
     if error_count > 0:
         print(f"   ⚠ Failed to sync {error_count} model records")
 
@@ -229,10 +280,8 @@ def verify_sync(db, expected_count):
     print(f"\n✅ Verifying sync...")
 
     try:
-        collection_ref = db.collection(COLLECTION_NAME)
-        docs = collection_ref.stream()
-
-        synced_count = sum(1 for _ in docs)
+        # Server-side count aggregation instead of streaming every document
+        synced_count = count_documents(db, COLLECTION_NAME)
 
         print(f"   ✓ Found {synced_count} predictions in Firestore")
 
@@ -297,6 +346,13 @@ def display_summary(predictions, models, pred_success, pred_errors, model_succes
 
 def main():
     """Main sync function"""
+    parser = argparse.ArgumentParser(description='Sync ML predictions to Firebase')
+    parser.add_argument('--full', action='store_true',
+                        help='Recompute and publish every prediction (full reconcile)')
+    parser.add_argument('--force', action='store_true',
+                        help='Upload every document, even if unchanged since the last sync')
+    args = parser.parse_args()
+
     print("=" * 70)
     print("SYNC ML PREDICTIONS TO FIREBASE")
     print("=" * 70)
@@ -305,25 +361,43 @@ def main():
         # Initialize Firebase
         db = initialize_firebase()
 
-        # Get predictions from Django
-        predictions = get_ml_predictions()
+        # Capture the new watermark before reading, so changes made
+        # while this run is in progress are picked up next time
+        run_started = timezone.now()
+        watermark = None if args.full else get_publish_watermark(COLLECTION_NAME)
 
-        if len(predictions) == 0:
-            print("\n⚠ Warning: No predictions found in database!")
-            print("   Please run: python integrate_ml_model.py")
-            sys.exit(1)
+        if watermark is None:
+            print("\n🔁 Full reconcile: publishing every prediction")
+            predictions = get_ml_predictions()
+
+            if len(predictions) == 0:
+                print("\n⚠ Warning: No predictions found in database!")
+                print("   Please run: python integrate_ml_model.py")
+                sys.exit(1)
+        else:
+            print(f"\n⚡ Publishing changes since {watermark}")
+            changed_ids = get_changed_prediction_ids(watermark - WATERMARK_OVERLAP)
+            predictions = get_ml_predictions(changed_ids)
 
         # Get model metadata
         models = get_ml_model_metadata()
 
         # Sync predictions to Firestore
-        pred_success, pred_errors = sync_predictions_to_firestore(db, predictions)
+        pred_success, pred_errors = sync_predictions_to_firestore(db, predictions, force=args.force)
+
+        # A full reconcile also removes what the local data no longer produces
+        if watermark is None:
+            delete_orphaned_predictions(db, predictions)
 
         # Sync model metadata to Firestore
-        model_success, model_errors = sync_model_metadata_to_firestore(db, models)
+        model_success, model_errors = sync_model_metadata_to_firestore(db, models, force=args.force)
+
+        # Only move the watermark forward when everything was published
+        if pred_errors == 0:
+            set_publish_watermark(COLLECTION_NAME, run_started, docs_published=pred_success)
 
         # Verify sync
-        verify_sync(db, len(predictions))
+        verify_sync(db, count_publishable_predictions())
 
         # Display summary
         display_summary(predictions, models, pred_success, pred_errors, model_success, model_errors)
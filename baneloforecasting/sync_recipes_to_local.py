@@ -5,11 +5,77 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baneloforecasting.settings')
 django.setup()
 
 from dashboard.firebase_service import FirebaseService
+from dashboard.firestore_sync import incremental_sync, print_sync_metrics, reset_checkpoint
 from dashboard.models import Product, Recipe, RecipeIngredient
+import argparse
 
 # Initialize Firebase
 db = FirebaseService().db
 
+
+def apply_recipe_doc(doc):
+    """Create or update one local recipe from a Firestore document"""
+    recipe_data = doc.to_dict()
+    recipe_firebase_id = doc.id
+
+    # Recipes reference their product by Firebase ID
+    product_firebase_id = recipe_data.get('productFirebaseId', '')
+
+    if product_firebase_id and not Product.objects.filter(firebase_id=product_firebase_id).exists():
+        print(f"   ⚠️  Product not found in local DB: {recipe_data.get('productName')}")
+
+    # Create or update recipe
+    recipe, created = Recipe.objects.update_or_create(
+        firebase_id=recipe_firebase_id,
+        defaults={
+            'product_firebase_id': product_firebase_id,
+            'product_number': recipe_data.get('productId', 0),
+            'product_name': recipe_data.get('productName', 'Unknown'),
+        }
+    )
+
+    return 'created' if created else 'updated'
+
+
+def apply_ingredient_doc(doc):
+    """Create or update one local recipe ingredient from a Firestore document"""
+    ingredient_data = doc.to_dict()
+
+    # Get recipe
+    recipe_firebase_id = ingredient_data.get('recipeFirebaseId', '')
+
+    if not recipe_firebase_id:
+        print(f"   ⚠️  No recipeFirebaseId in ingredient")
+        return 'skipped'
+
+    try:
+        recipe = Recipe.objects.get(firebase_id=recipe_firebase_id)
+    except Recipe.DoesNotExist:
+        print(f"   ⚠️  Recipe not found: {recipe_firebase_id}")
+        return 'skipped'
+
+    # Ingredients reference their product by Firebase ID
+    ingredient_firebase_id = ingredient_data.get('ingredientFirebaseId', '')
+
+    if ingredient_firebase_id and not Product.objects.filter(firebase_id=ingredient_firebase_id).exists():
+        print(f"   ⚠️  Ingredient not found: {ingredient_data.get('ingredientName')}")
+
+    # Create or update recipe ingredient
+    recipe_ingredient, created = RecipeIngredient.objects.update_or_create(
+        recipe_firebase_id=recipe_firebase_id,
+        ingredient_firebase_id=ingredient_firebase_id,
+        defaults={
+            'firebase_id': doc.id,
+            'recipe_id': recipe.id,
+            'ingredient_name': ingredient_data.get('ingredientName', 'Unknown'),
+            'quantity_needed': float(ingredient_data.get('quantityNeeded', 0)),
+            'unit': ingredient_data.get('unit', 'g'),
+        }
+    )
+
+    return 'created' if created else 'updated'
+
+
 def sync_recipes():
     """Sync recipes and recipe ingredients from Firebase to local DB"""
     
@@ -28,33 +94,10 @@ def sync_recipes():
     for doc in recipes_docs:
         try:
             recipe_data = doc.to_dict()
-            recipe_firebase_id = doc.id
             
             print(f"\n📝 Processing: {recipe_data.get('productName', 'Unknown')}")
             
-            # Get or create local product reference
-            product_firebase_id = recipe_data.get('productFirebaseId', '')
-            product = None
-            
-            if product_firebase_id:
-                try:
-                    product = Product.objects.get(firebase_id=product_firebase_id)
-                    print(f"   ✅ Found product: {product.name}")
-                except Product.DoesNotExist:
-                    print(f"   ⚠️  Product not found in local DB: {recipe_data.get('productName')}")
-            
-            # Create or update recipe
-            recipe, created = Recipe.objects.update_or_create(
-                firebase_id=recipe_firebase_id,
-                defaults={
-                    'product': product,
-                    'product_firebase_id': product_firebase_id,
-                    'product_number': recipe_data.get('productId', 0),
-                    'product_name': recipe_data.get('productName', 'Unknown'),
-                }
-            )
-            
-            if created:
+            if apply_recipe_doc(doc) == 'created':
                 recipes_synced += 1
                 print(f"   ✅ Created recipe")
             else:
@@ -85,52 +128,16 @@ def sync_recipes():
     for doc in ingredients_docs:
         try:
             ingredient_data = doc.to_dict()
-            ingredient_doc_id = doc.id
+            result = apply_ingredient_doc(doc)
             
-            # Get recipe
-            recipe_firebase_id = ingredient_data.get('recipeFirebaseId', '')
-            
-            if not recipe_firebase_id:
-                print(f"   ⚠️  No recipeFirebaseId in ingredient")
-                ingredients_skipped += 1
-                continue
-            
-            try:
-                recipe = Recipe.objects.get(firebase_id=recipe_firebase_id)
-            except Recipe.DoesNotExist:
-                print(f"   ⚠️  Recipe not found: {recipe_firebase_id}")
-                ingredients_skipped += 1
-                continue
-            
-            # Get ingredient product
-            ingredient_firebase_id = ingredient_data.get('ingredientFirebaseId', '')
-            ingredient_product = None
-            
-            if ingredient_firebase_id:
-                try:
-                    ingredient_product = Product.objects.get(firebase_id=ingredient_firebase_id)
-                except Product.DoesNotExist:
-                    print(f"   ⚠️  Ingredient not found: {ingredient_data.get('ingredientName')}")
-            
-            # Create or update recipe ingredient
-            recipe_ingredient, created = RecipeIngredient.objects.update_or_create(
-                recipe=recipe,
-                ingredient_firebase_id=ingredient_firebase_id,
-                defaults={
-                    'ingredient': ingredient_product,
-                    'ingredient_name': ingredient_data.get('ingredientName', 'Unknown'),
-                    'quantity_needed': float(ingredient_data.get('quantityNeeded', 0)),
-                    'unit': ingredient_data.get('unit', 'g'),
-                    'recipe_firebase_id': recipe_firebase_id,
-                }
-            )
-            
-            if created:
+            if result == 'created':
                 ingredients_synced += 1
                 print(f"   ✅ {ingredient_data.get('ingredientName')} - {ingredient_data.get('quantityNeeded')}{ingredient_data.get('unit')}")
-            else:
+            elif result == 'updated':
                 ingredients_updated += 1
                 print(f"   🔄 {ingredient_data.get('ingredientName')} - {ingredient_data.get('quantityNeeded')}{ingredient_data.get('unit')}")
+            else:
+                ingredients_skipped += 1
             
         except Exception as e:
             print(f"   ❌ Error processing ingredient: {str(e)}")
@@ -146,9 +153,36 @@ def sync_recipes():
     print("\n✅ RECIPE SYNC COMPLETE!\n")
 
 
+def sync_recipes_incremental(page_size=500, reset=False):
+    """Sync only recipes and ingredients changed since the last checkpoint"""
+    print("\n⚡ INCREMENTAL RECIPE SYNC FROM FIREBASE TO LOCAL DB")
+    print("=" * 60)
+
+    # Recipes first, so new ingredients can resolve their recipe
+    for collection_name, apply_doc in [('recipes', apply_recipe_doc),
+                                       ('recipe_ingredients', apply_ingredient_doc)]:
+        if reset:
+            reset_checkpoint(collection_name)
+
+        print(f"\n📦 {collection_name}")
+        stats = incremental_sync(db, collection_name, apply_doc, page_size=page_size)
+        print_sync_metrics(stats)
+
+    print("\n✅ RECIPE SYNC COMPLETE!\n")
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sync recipes and recipe ingredients from Firebase to the local database')
+    parser.add_argument('--full', action='store_true', help='Stream entire collections (legacy mode)')
+    parser.add_argument('--reset', action='store_true', help='Discard checkpoints and re-read everything incrementally')
+    parser.add_argument('--page-size', type=int, default=500, help='Documents per page/transaction')
+    args = parser.parse_args()
+
     try:
-        sync_recipes()
+        if args.full:
+            sync_recipes()
+        else:
+            sync_recipes_incremental(page_size=args.page_size, reset=args.reset)
     except Exception as e:
         print(f"\n❌ SYNC FAILED: {str(e)}")
         import traceback
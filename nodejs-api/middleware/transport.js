@@ -0,0 +1,68 @@
+/**
+ * Response Transport Negotiation
+ *
+ * List responses ({ success, data: [rows], count }) are large: every row
+ * repeats every column name. Clients can ask for a smaller body:
+ *
+ * - Accept: application/vnd.banelo.columns+json
+ *   `data` is sent column-oriented, { columns: [...], rows: [[...], ...] },
+ *   so each column name is sent once. Other clients get plain JSON.
+ * - Accept-Encoding: br / gzip / deflate
+ *   Bodies over 1 KB are compressed (the `compression` middleware).
+ */
+
+const compression = require('compression');
+
+const COLUMNS_TYPE = 'application/vnd.banelo.columns+json';
+
+// Row objects -> { columns, rows }; keys missing from a row become null
+function toColumns(rows) {
+  const columns = [];
+  const seen = new Set();
+  for (const row of rows) {
+    for (const key of Object.keys(row)) {
+      if (!seen.has(key)) {
+        seen.add(key);
+        columns.push(key);
+      }
+    }
+  }
+  return {
+    columns,
+    rows: rows.map((row) => columns.map((column) => (column in row ? row[column] : null)))
+  };
+}
+
+function isRowList(data) {
+  return Array.isArray(data) && data.length > 0 &&
+    data[0] !== null && typeof data[0] === 'object' && !Array.isArray(data[0]);
+}
+
+// Wraps res.json for GET requests whose client prefers the columns format
+function columnsFormat(req, res, next) {
+  if (req.method !== 'GET') {
+    return next();
+  }
+  res.vary('Accept');
+  // Ties go to plain JSON, so browsers and curl (*/*) are unaffected
+  if (req.accepts(['application/json', COLUMNS_TYPE]) !== COLUMNS_TYPE) {
+    return next();
+  }
+
+  const json = res.json.bind(res);
+  res.json = (body) => {
+    if (body && isRowList(body.data)) {
+      res.type(COLUMNS_TYPE);
+      return json({ ...body, data: toColumns(body.data) });
+    }
+    return json(body);
+  };
+  next();
+}
+
+module.exports = {
+  COLUMNS_TYPE,
+  compression: compression({ threshold: 1024 }),
+  columnsFormat,
+  toColumns
+};
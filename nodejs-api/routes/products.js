@@ -4,7 +4,7 @@
 
 const express = require('express');
 const router = express.Router();
-const { query } = require('../config/database');
+const { query, pool } = require('../config/database');
 
 // ============================================
 // GET /api/products - Get all products
@@ -308,6 +308,144 @@ router.post('/transfer', async (req, res) => {
   }
 });
 
+// ============================================
+// POST /api/products/transfer/bulk - Transfer many products A to B at once
+// ============================================
+// Every line is checked against one locked snapshot of the products and the
+// whole batch is applied by a single set-based UPDATE in one transaction:
+// either all lines are transferred or none is. Lines for the same product
+// draw on the same stock, in order.
+const MAX_BULK_TRANSFER_ITEMS = 500;
+
+const checkTransferLines = (items, products) => {
+  const available = new Map();  // firebase_id -> Inventory A left for later lines
+  const totals = new Map();     // firebase_id -> quantity to transfer
+
+  const results = items.map((item, index) => {
+    const firebaseId = item && item.firebaseId ? String(item.firebaseId) : '';
+    const quantity = Number(item && item.quantity);
+    const line = { index, firebaseId, quantity };
+
+    if (!firebaseId || !(quantity > 0)) {
+      return { ...line, success: false, message: 'Missing firebaseId or quantity not greater than 0' };
+    }
+
+    const product = products.get(firebaseId);
+    if (!product) {
+      return { ...line, success: false, message: 'Product not found' };
+    }
+
+    const stock = available.has(firebaseId) ? available.get(firebaseId) : parseFloat(product.inventory_a || 0);
+    if (stock < quantity) {
+      return {
+        ...line,
+        productName: product.name,
+        success: false,
+        message: `Insufficient stock in Inventory A. Available: ${stock}, Requested: ${quantity}`
+      };
+    }
+
+    available.set(firebaseId, stock - quantity);
+    totals.set(firebaseId, (totals.get(firebaseId) || 0) + quantity);
+    return { ...line, productName: product.name, success: true };
+  });
+
+  return { results, totals };
+};
+
+router.post('/transfer/bulk', async (req, res) => {
+  const { items } = req.body;
+
+  if (!Array.isArray(items) || items.length === 0) {
+    return res.status(400).json({
+      success: false,
+      message: 'Missing required field: items (list of { firebaseId, quantity })'
+    });
+  }
+
+  if (items.length > MAX_BULK_TRANSFER_ITEMS) {
+    return res.status(400).json({
+      success: false,
+      message: `Too many items: ${items.length} (maximum ${MAX_BULK_TRANSFER_ITEMS})`
+    });
+  }
+
+  const client = await pool.connect();
+
+  try {
+    await client.query('BEGIN');
+
+    // One snapshot for all lines, locked until COMMIT
+    const firebaseIds = [...new Set(items.map(item => String((item && item.firebaseId) || '')))];
+    const snapshot = await client.query(
+      `SELECT firebase_id, name, inventory_a, inventory_b
+       FROM products WHERE firebase_id = ANY($1::text[])
+       FOR UPDATE`,
+      [firebaseIds]
+    );
+    const products = new Map(snapshot.rows.map(row => [row.firebase_id, row]));
+
+    const { results, totals } = checkTransferLines(items, products);
+    const failed = results.filter(result => !result.success).length;
+
+    if (failed > 0) {
+      await client.query('ROLLBACK');
+      return res.status(400).json({
+        success: false,
+        message: `No stock was transferred: ${failed} of ${items.length} lines failed`,
+        results
+      });
+    }
+
+    const updated = await client.query(
+      `UPDATE products AS p
+       SET inventory_a = COALESCE(p.inventory_a, 0) - t.quantity,
+           inventory_b = COALESCE(p.inventory_b, 0) + t.quantity,
+           quantity = COALESCE(p.inventory_b, 0) + t.quantity,
+           updated_at = NOW()
+       FROM unnest($1::text[], $2::float8[]) AS t(firebase_id, quantity)
+       WHERE p.firebase_id = t.firebase_id AND COALESCE(p.inventory_a, 0) >= t.quantity
+       RETURNING p.firebase_id, p.inventory_a, p.inventory_b`,
+      [[...totals.keys()], [...totals.values()]]
+    );
+
+    if (updated.rowCount !== totals.size) {
+      await client.query('ROLLBACK');
+      return res.status(409).json({
+        success: false,
+        message: 'Stock changed during the transfer, nothing was transferred',
+        results
+      });
+    }
+
+    await client.query('COMMIT');
+
+    const newInventory = new Map(updated.rows.map(row => [row.firebase_id, row]));
+    const transferred = [...totals.values()].reduce((sum, quantity) => sum + quantity, 0);
+
+    res.json({
+      success: true,
+      message: `Successfully transferred ${transferred} units of ${totals.size} products to Inventory B`,
+      count: items.length,
+      results: results.map(result => ({
+        ...result,
+        newInventoryA: parseFloat(newInventory.get(result.firebaseId).inventory_a),
+        newInventoryB: parseFloat(newInventory.get(result.firebaseId).inventory_b)
+      }))
+    });
+  } catch (error) {
+    await client.query('ROLLBACK');
+    console.error('Error in bulk inventory transfer:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Failed to transfer inventory',
+      error: error.message
+    });
+  } finally {
+    client.release();
+  }
+});
+
 // ============================================
 // PUT /api/products/:id/inventory - Update inventory
 // ============================================
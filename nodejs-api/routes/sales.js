@@ -8,10 +8,12 @@ const { query } = require('../config/database');
 
 // ============================================
 // GET /api/sales - Get all sales
+// ?after_id=N returns only rows with id > N, oldest first (high-water mark
+// polling by the live dashboard)
 // ============================================
 router.get('/', async (req, res) => {
   try {
-    const { limit, date_from, date_to } = req.query;
+    const { limit, date_from, date_to, after_id } = req.query;
 
     let queryText = 'SELECT * FROM sales WHERE 1=1';
     const values = [];
@@ -27,7 +29,12 @@ router.get('/', async (req, res) => {
       values.push(date_to);
     }
 
-    queryText += ' ORDER BY order_date DESC';
+    if (after_id) {
+      queryText += ` AND id > $${paramCount++}`;
+      values.push(parseInt(after_id));
+    }
+
+    queryText += after_id ? ' ORDER BY id ASC' : ' ORDER BY order_date DESC';
 
     if (limit) {
       queryText += ` LIMIT $${paramCount++}`;
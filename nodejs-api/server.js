@@ -16,6 +16,7 @@ const recipesRoutes = require('./routes/recipes');
 const salesRoutes = require('./routes/sales');
 const wasteRoutes = require('./routes/waste');
 const auditRoutes = require('./routes/audit');
+const transport = require('./middleware/transport');
 
 // Initialize Express app
 const app = express();
@@ -48,10 +49,20 @@ app.use(cors({
 app.use(bodyParser.json());
 app.use(bodyParser.urlencoded({ extended: true }));
 
+// Compressed and column-oriented responses for clients that ask for them
+// (see middleware/transport.js)
+app.use(transport.compression);
+app.use(transport.columnsFormat);
+
 // Request logging middleware
+// X-Request-ID is sent by the Django site so both logs can be correlated
 app.use((req, res, next) => {
   const timestamp = new Date().toISOString();
-  console.log(`[${timestamp}] ${req.method} ${req.path}`);
+  const requestId = req.get('X-Request-ID');
+  if (requestId) {
+    res.set('X-Request-ID', requestId);
+  }
+  console.log(`[${timestamp}] ${req.method} ${req.path}${requestId ? ` [${requestId}]` : ''}`);
   next();
 });
 
@@ -92,6 +103,7 @@ app.get('/', (req, res) => {
         update: 'PUT /api/products/:id',
         delete: 'DELETE /api/products/:id',
         transfer: 'POST /api/products/transfer',
+        bulkTransfer: 'POST /api/products/transfer/bulk',
         updateInventory: 'PUT /api/products/:id/inventory'
       },
       recipes: {